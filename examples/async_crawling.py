@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+# PhantomCrawler - 异步并发爬取示例
+
+import os
+import sys
+import time
+import asyncio
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.async_crawler import AsyncPhantomCrawler
+
+
+async def run(urls):
+    """并发爬取多个主机，同一主机的请求仍按人类延迟依次进行"""
+    async with AsyncPhantomCrawler(max_in_flight=32, per_host_limit=1) as crawler:
+        start_time = time.time()
+        async for result in crawler.aiter_batch(urls):
+            status = result.get('status_code') or result.get('error')
+            print(f"[*] {result['url']} -> {status} ({result.get('response_time', 0):.2f}s)")
+
+        elapsed = time.time() - start_time
+        stats = crawler.async_stats
+        print(f"\n[*] 共 {len(urls)} 个URL，{stats['hosts']} 个主机，耗时 {elapsed:.2f} 秒")
+        print(f"[*] 峰值并发: {stats['peak_in_flight']}，错误: {stats['errors']}")
+
+
+def main():
+    """PhantomCrawler异步爬取示例"""
+    urls = sys.argv[1:] or [
+        'https://example.com/',
+        'https://example.org/',
+        'https://example.net/',
+        'https://httpbin.org/html',
+        'https://httpbin.org/get'
+    ]
+    asyncio.run(run(urls))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+PhantomCrawler - 正文存储压缩对比
+
+比较三种正文存储方式的落盘字节数：
+1. 逐文件gzip（以往 --output-dir 的做法）
+2. 内容存储 + 普通zstd
+3. 内容存储 + 每主机zstd字典
+
+用法:
+    python examples/content_store_benchmark.py             # 使用合成的多主机语料
+    python examples/content_store_benchmark.py <语料目录>   # 目录下每个子目录视为一个主机，包含若干HTML文件
+"""
+
+import sys
+import os
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import gzip
+import time
+import random
+import shutil
+import tempfile
+from typing import Dict, List
+
+from src.modules.storage.content_store import ContentStore, HAS_ZSTD
+
+WORDS = ('crawler phantom desire network page content article market data river mountain '
+         'policy science music history future engine system report update travel').split()
+
+
+def build_synthetic_corpus(hosts: int = 8, pages_per_host: int = 200) -> Dict[str, List[bytes]]:
+    """生成合成语料：每个主机共享一套页面模板，正文各不相同"""
+    rng = random.Random(42)
+    corpus = {}
+    for h in range(hosts):
+        host = f'site{h}.example.com'
+        nav = ''.join(f'<li><a href="/section/{rng.randrange(10000)}">{rng.choice(WORDS).title()}</a></li>'
+                      for _ in range(60))
+        scripts = ''.join(f'<script src="/static/js/{rng.choice(WORDS)}.{rng.randrange(10**8):08x}.js"></script>'
+                          for _ in range(12))
+        styles = '\n'.join(f'.{rng.choice(WORDS)}-{i} {{ margin: {i}px; color: #{rng.randrange(16**6):06x}; }}'
+                           for i in range(120))
+        footer = ''.join(f'<p class="legal">{" ".join(rng.choice(WORDS) for _ in range(25))}</p>'
+                         for _ in range(6))
+        # 真实页面中常见的内联配置与图标
+        config = '{' + ','.join(f'"{rng.choice(WORDS)}_{i}": "{rng.randrange(16**12):012x}"' for i in range(150)) + '}'
+        icons = ''.join(f'<svg viewBox="0 0 24 24"><path d="M{rng.randrange(24)} {rng.randrange(24)}L{rng.randrange(24)} '
+                        f'{rng.randrange(24)}Z"/></svg>' for _ in range(40))
+        pages = []
+        for p in range(pages_per_host):
+            article = ''.join(f'<p>{" ".join(rng.choice(WORDS) for _ in range(rng.randint(30, 60)))}</p>'
+                              for _ in range(rng.randint(2, 5)))
+            html = (f'<!DOCTYPE html><html><head><title>{host} page {p}</title><style>{styles}</style>{scripts}'
+                    f'<script>window.__CONFIG__ = {config};</script></head>'
+                    f'<body><header><ul class="nav">{nav}</ul>{icons}</header><main><h1>Article {p}</h1>{article}</main>'
+                    f'<footer>{footer}</footer></body></html>')
+            pages.append(html.encode('utf-8'))
+        corpus[host] = pages
+    return corpus
+
+
+def load_corpus(root: str) -> Dict[str, List[bytes]]:
+    """从目录加载语料，每个子目录是一个主机"""
+    corpus = {}
+    for host in sorted(os.listdir(root)):
+        host_dir = os.path.join(root, host)
+        if not os.path.isdir(host_dir):
+            continue
+        pages = []
+        for name in sorted(os.listdir(host_dir)):
+            with open(os.path.join(host_dir, name), 'rb') as f:
+                pages.append(f.read())
+        if pages:
+            corpus[host] = pages
+    return corpus
+
+
+def interleave(corpus: Dict[str, List[bytes]]):
+    """按主机交错产出页面，模拟真实爬取顺序"""
+    iterators = {host: iter(pages) for host, pages in corpus.items()}
+    while iterators:
+        for host in list(iterators):
+            page = next(iterators[host], None)
+            if page is None:
+                del iterators[host]
+            else:
+                yield host, page
+
+
+def measure_store(corpus: Dict[str, List[bytes]], host_dictionaries: bool) -> Dict[str, float]:
+    """测量内容存储的落盘字节数与读取速度"""
+    root = tempfile.mkdtemp(prefix='content_store_bench_')
+    try:
+        store = ContentStore(root, host_dictionaries=host_dictionaries)
+        start = time.perf_counter()
+        digests = [store.put(page, host=host) for host, page in interleave(corpus)]
+        write_seconds = time.perf_counter() - start
+        store.flush()
+
+        start = time.perf_counter()
+        read_bytes = sum(len(chunk) for digest in digests for chunk in store.iter_chunks(digest))
+        read_seconds = time.perf_counter() - start
+        stats = store.get_stats()
+        store.close()
+
+        pack_bytes = sum(os.path.getsize(os.path.join(root, name))
+                         for name in os.listdir(root) if name.endswith('.pack'))
+        return {
+            'bytes': pack_bytes,
+            'write_seconds': write_seconds,
+            'read_mb_per_second': read_bytes / read_seconds / 1e6 if read_seconds else 0.0,
+            'dictionaries': stats['host_dictionaries']
+        }
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def main():
+    """主函数"""
+    corpus = load_corpus(sys.argv[1]) if len(sys.argv) > 1 else build_synthetic_corpus()
+    raw_bytes = sum(len(page) for pages in corpus.values() for page in pages)
+    page_count = sum(len(pages) for pages in corpus.values())
+    print(f"语料: {len(corpus)} 个主机, {page_count} 个页面, {raw_bytes / 1e6:.2f} MB")
+
+    gzip_bytes = sum(len(gzip.compress(page, 6)) for pages in corpus.values() for page in pages)
+    print(f"逐文件gzip:        {gzip_bytes / 1e6:8.2f} MB  (基准)")
+
+    if not HAS_ZSTD:
+        print("未安装zstandard库，跳过zstd与字典压缩对比")
+        return
+
+    plain = measure_store(corpus, host_dictionaries=False)
+    print(f"内容存储 zstd:     {plain['bytes'] / 1e6:8.2f} MB  "
+          f"({gzip_bytes / plain['bytes']:.2f}x, 读取 {plain['read_mb_per_second']:.0f} MB/s)")
+
+    dictionary = measure_store(corpus, host_dictionaries=True)
+    print(f"内容存储 主机字典: {dictionary['bytes'] / 1e6:8.2f} MB  "
+          f"({gzip_bytes / dictionary['bytes']:.2f}x, 读取 {dictionary['read_mb_per_second']:.0f} MB/s, "
+          f"{dictionary['dictionaries']} 个字典)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+PhantomCrawler - 元认知洞察的每页开销
+
+模拟BehaviorSimulator每处理一个页面对七宗欲引擎的调用（记录结果后读取洞察），
+分别统计记录结果和读取洞察的耗时，比较：
+1. 每次都重新计算整份报告（清空增量缓存）
+2. 增量维护的整份报告
+3. 只请求system_state（BehaviorSimulator实际使用的部分）
+
+用法:
+    python examples/insight_overhead_benchmark.py
+"""
+
+import sys
+import os
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import io
+import time
+import random
+import shutil
+import tempfile
+import contextlib
+from typing import Tuple
+
+from src.config import global_config
+from src.modules.intelligence.metacognition_engine import SevenDesiresEngine
+
+
+def per_page_us(engine: SevenDesiresEngine, pages: int, read, rng: random.Random) -> Tuple[float, float]:
+    """
+    每个页面的平均耗时（微秒）：记录一次结果并读取一次洞察
+
+    Returns:
+        (记录结果耗时, 读取洞察耗时)
+    """
+    record_seconds = 0.0
+    read_seconds = 0.0
+    for i in range(pages):
+        success = rng.random() < 0.85
+        start = time.perf_counter()
+        engine.manifest_desire_outcome(
+            f"https://www.example{i % 20}.com/page/{i}.html",
+            {'status_code': 200 if success else 403, 'content': 'ok', 'response_time': rng.uniform(0.1, 2.0)},
+            {'delay': 1.0}
+        )
+        middle = time.perf_counter()
+        read()
+        record_seconds += middle - start
+        read_seconds += time.perf_counter() - middle
+    return record_seconds * 1e6 / pages, read_seconds * 1e6 / pages
+
+
+def main():
+    """主函数"""
+    state_dir = tempfile.mkdtemp(prefix='phantom_insight_')
+    global_config.set('desires.memory_path', os.path.join(state_dir, 'seven_desires.db'))
+    global_config.set('desires.legacy_memory_path', '')
+    pages = 5000
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            engine = SevenDesiresEngine()
+
+        def full_recompute():
+            engine._insight_view.invalidate()
+            engine.get_metacognitive_insights()
+
+        cases = [
+            ('整份报告，每次重新计算', full_recompute),
+            ('整份报告，增量维护', engine.get_metacognitive_insights),
+            ("只请求system_state", lambda: engine.get_metacognitive_insights(('system_state',))),
+        ]
+        print(f"{'方式':<24} {'记录结果(us)':>14} {'读取洞察(us)':>14}")
+        for name, read in cases:
+            with contextlib.redirect_stdout(io.StringIO()):
+                record_us, read_us = per_page_us(engine, pages, read, random.Random(42))
+            print(f"{name:<24} {record_us:>14.1f} {read_us:>14.1f}")
+        print(f"缓存统计: {engine._insight_view.stats}")
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            engine.shutdown()
+    finally:
+        shutil.rmtree(state_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
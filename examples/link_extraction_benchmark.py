@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+PhantomCrawler - 链接提取性能对比
+
+比较三种链接提取方式在大页面上的耗时：
+1. 以往HTMLParser.extract_links的正则 + 逐链接urljoin/urlparse
+2. 以往递归路径测试中的BeautifulSoup(html.parser)
+3. LinkExtractor（字节级增量分词 + 一次性规范化）
+
+用法:
+    python examples/link_extraction_benchmark.py              # 使用合成的大页面
+    python examples/link_extraction_benchmark.py <HTML文件>...  # 使用真实页面
+"""
+
+import sys
+import os
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import re
+import time
+import random
+import importlib.util
+from typing import Callable, List, Tuple
+from urllib.parse import urljoin, urlparse
+
+from src.modules.parsing.link_extractor import LinkExtractor
+
+HAS_BS4 = importlib.util.find_spec('bs4') is not None
+
+BASE_URL = 'https://news.example.com/section/world/index.html'
+WORDS = ('crawler phantom desire network page content article market data river mountain '
+         'policy science music history future engine system report update travel').split()
+
+LEGACY_PATTERN = re.compile(r'<a[^>]+href=["\'](.*?)["\'][^>]*>', re.IGNORECASE)
+
+
+def legacy_regex_extract(html: str, base_url: str) -> List[str]:
+    """以往HTMLParser.extract_links的实现"""
+    normalized_links = []
+    for link in LEGACY_PATTERN.findall(html):
+        if link.startswith('javascript:') or link.startswith('#'):
+            continue
+        if not link.startswith(('http://', 'https://')):
+            link = urljoin(base_url, link)
+        parsed = urlparse(link)
+        normalized_link = f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
+        if parsed.query:
+            normalized_link += f"?{parsed.query}"
+        normalized_links.append(normalized_link)
+    return list(set(normalized_links))
+
+
+def legacy_bs4_extract(html: str, base_url: str) -> List[str]:
+    """以往递归路径测试中的BeautifulSoup实现"""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+    links = set()
+    for link in soup.find_all('a', href=True):
+        absolute_url = urljoin(base_url, link['href'])
+        if urlparse(absolute_url).scheme in ('http', 'https'):
+            links.add(absolute_url)
+    return list(links)
+
+
+def build_page(articles: int, seed: int = 42) -> str:
+    """生成一个大型新闻列表页：大段内联脚本和样式、深层嵌套、相对/绝对/协议相对链接混合"""
+    rng = random.Random(seed)
+    parts = ['<!DOCTYPE html><html><head><meta charset="utf-8"><title>World</title>',
+             '<link rel="stylesheet" href="/static/site.css"><link rel="next" href="?page=2">',
+             '<script>window.__STATE__ = {' +
+             ','.join(f'"{rng.choice(WORDS)}{i}": "<a href=\\"/state/{i}\\">"' for i in range(3000)) +
+             '};</script>',
+             '<style>' + ''.join(f'.{rng.choice(WORDS)}-{i} {{ margin: {i}px; }}' for i in range(3000)) + '</style>',
+             '</head><body><nav>']
+    parts.extend(f'<a href="/section/{word}/">{word.title()}</a>' for word in WORDS)
+    parts.append('</nav><main>')
+    for i in range(articles):
+        words = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(20, 40)))
+        parts.append(
+            f'<article class="card"><div class="card-body"><div class="meta"><span>{words}</span></div>'
+            f'<h2><a class="title" href="/article/{i}?utm_source=home&amp;utm_medium=list">{rng.choice(WORDS)}</a></h2>'
+            f'<a href=../related/{i}.html>related</a> '
+            f'<a href="//cdn.example.net/img/{i}.jpg"><img src="/thumb/{i}.jpg" alt=""></a>'
+            f'<a href="#comments">comments</a><!-- <a href="/draft/{i}"> --></div></article>'
+        )
+    parts.append('</main><footer>')
+    parts.extend(f'<a href="https://partner{j}.example.org/">partner</a>' for j in range(50))
+    parts.append('</footer></body></html>')
+    return ''.join(parts)
+
+
+def best_of(func: Callable[[], List[str]], rounds: int) -> Tuple[float, int]:
+    """返回多轮中的最短耗时（秒）和链接数"""
+    best = float('inf')
+    count = 0
+    for _ in range(rounds):
+        start = time.perf_counter()
+        count = len(func())
+        best = min(best, time.perf_counter() - start)
+    return best, count
+
+
+def benchmark(name: str, html: str, base_url: str) -> None:
+    """对一个页面运行三种实现"""
+    data = html.encode('utf-8')
+    extractor = LinkExtractor()
+    print(f"\n{name}: {len(data) / 1e6:.2f} MB")
+
+    new_seconds, new_count = best_of(lambda: extractor.extract(data, base_url), 7)
+    regex_seconds, regex_count = best_of(lambda: legacy_regex_extract(html, base_url), 7)
+    print(f"  正则 + urljoin:      {regex_seconds * 1000:8.1f} ms  {regex_count:6d} 个链接")
+    if HAS_BS4:
+        bs4_seconds, bs4_count = best_of(lambda: legacy_bs4_extract(html, base_url), 1)
+        print(f"  BeautifulSoup:       {bs4_seconds * 1000:8.1f} ms  {bs4_count:6d} 个链接")
+    print(f"  LinkExtractor:       {new_seconds * 1000:8.1f} ms  {new_count:6d} 个链接  "
+          f"(正则的 {regex_seconds / new_seconds:.1f}x"
+          + (f", BeautifulSoup的 {bs4_seconds / new_seconds:.1f}x)" if HAS_BS4 else ")"))
+
+    # 分块输入与整页输入的结果一致
+    chunks = [data[i:i + 65536] for i in range(0, len(data), 65536)]
+    assert extractor.extract_stream(chunks, base_url) == extractor.extract(data, base_url)
+
+
+def main():
+    """主函数"""
+    if len(sys.argv) > 1:
+        for path in sys.argv[1:]:
+            with open(path, 'rb') as f:
+                html = f.read().decode('utf-8', 'replace')
+            benchmark(path, html, BASE_URL)
+    else:
+        benchmark('合成新闻列表页', build_page(5000), BASE_URL)
+        if not HAS_BS4:
+            print("未安装beautifulsoup4，跳过BeautifulSoup对比")
+
+
+if __name__ == "__main__":
+    main()
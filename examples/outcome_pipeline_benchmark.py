@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+PhantomCrawler - crawl()在网络之外的耗时与其中的结果分析耗时
+
+使用httpx.MockTransport模拟固定延迟的网络，统计每次crawl()的总耗时减去传输层耗时，
+以及其中七宗欲/环境感知分析所占的耗时（分析在请求路径上同步执行）。
+
+用法:
+    python examples/outcome_pipeline_benchmark.py [请求数] [网络延迟毫秒]
+"""
+
+import sys
+import os
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import io
+import time
+import shutil
+import tempfile
+import contextlib
+import statistics
+from typing import Dict, List
+
+import httpx
+
+from src.config import global_config
+from src.core.crawler import PhantomCrawler
+
+PAGE = b'<html><head><title>ok</title></head><body>' + b'<p>content</p>' * 200 + b'</body></html>'
+
+
+def run(requests: int, latency: float) -> Dict[str, float]:
+    """
+    用一个新的爬虫依次爬取requests个不同主机的页面
+
+    Returns:
+        网络之外耗时的统计（毫秒）和每个事件的分析耗时
+    """
+    network_seconds = [0.0]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        start = time.perf_counter()
+        if latency:
+            time.sleep(latency)
+        network_seconds[0] += time.perf_counter() - start
+        return httpx.Response(200, content=PAGE, headers={'Content-Type': 'text/html; charset=utf-8'})
+
+    overheads: List[float] = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        crawler = PhantomCrawler()
+        crawler.playwright_available = False
+        crawler.http_client = httpx.Client(transport=httpx.MockTransport(handler))
+        for i in range(requests):
+            # 每个请求使用不同的主机，避免主机调度的礼貌等待
+            url = f"http://host{i}.example.com/page.html"
+            network_seconds[0] = 0.0
+            start = time.perf_counter()
+            crawler.crawl(url)
+            overheads.append((time.perf_counter() - start - network_seconds[0]) * 1000)
+        stats = crawler.outcome_pipeline.get_stats()
+        crawler.close()
+    overheads.sort()
+    return {
+        'mean': statistics.mean(overheads),
+        'p50': overheads[len(overheads) // 2],
+        'p95': overheads[int(len(overheads) * 0.95)],
+        'analysis': stats['avg_apply_ms'],
+        'errors': stats['apply_errors']
+    }
+
+
+def main():
+    """主函数"""
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 0.0) / 1000
+
+    state_dir = tempfile.mkdtemp(prefix='phantom_pipeline_')
+    global_config.set('desires.memory_path', os.path.join(state_dir, 'seven_desires.db'))
+    global_config.set('desires.legacy_memory_path', '')
+    global_config.set('robots.enabled', False)
+    global_config.set('http_cache.enabled', False)
+    global_config.set('response_body.spool_dir', os.path.join(state_dir, 'spool'))
+    try:
+        print(f"请求数: {requests}, 模拟网络延迟: {latency * 1000:.1f} ms")
+        print(f"{'平均(ms)':>10} {'P50(ms)':>10} {'P95(ms)':>10} {'分析/请求(ms)':>14} {'分析失败':>8}")
+        r = run(requests, latency)
+        print(f"{r['mean']:>10.3f} {r['p50']:>10.3f} {r['p95']:>10.3f} {r['analysis']:>14.3f} {r['errors']:>8}")
+    finally:
+        shutil.rmtree(state_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -10,13 +10,18 @@ import sys
 import argparse
 import json
 import time
-from typing import List, Dict, Any, Optional, Callable
+from typing import List, Dict, Any, Optional, Callable, Tuple
 
 # 添加项目根目录到Python路径
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 # 导入核心模块
 from src.core.crawler import PhantomCrawler
+from src.modules.frontier.checkpoint import CrawlCheckpoint
+from src.modules.frontier.visited_store import create_visited_store
+from src.modules.storage.result_sink import create_sink
+from src.modules.storage.content_store import ContentStore
+from src.modules.storage.http_cache import HttpCache
 from src.configs.config import global_config
 
 
@@ -95,74 +100,122 @@ def process_single_url(crawler: PhantomCrawler, url: str, output_file: Optional[
     start_time = time.time()
     
     try:
-        # 定义回调函数
-        def response_callback(response: Dict[str, Any]) -> None:
-            elapsed = time.time() - start_time
-            print(f"[✓] 爬取完成: {url}")
-            print(f"[*] 状态码: {response.get('status_code')}")
-            print(f"[*] 响应大小: {len(response.get('content', ''))} 字节")
-            print(f"[*] 耗时: {elapsed:.2f} 秒")
-            
-            if output_file:
-                # 保存结果到文件
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    json.dump(response, f, indent=2, ensure_ascii=False)
-                print(f"[*] 结果已保存至: {output_file}")
+        # 执行爬取（配置了结果输出时由爬虫写入）
+        response = crawler.crawl(url)
         
-        # 执行爬取
-        crawler.crawl(url, response_callback=response_callback)
+        elapsed = time.time() - start_time
+        print(f"[✓] 爬取完成: {url}")
+        print(f"[*] 状态码: {response.get('status_code')}")
+        print(f"[*] 响应大小: {response.get('content_length', len(response.get('content', '')))} 字节")
+        print(f"[*] 耗时: {elapsed:.2f} 秒")
+        
+        if output_file:
+            # 保存结果到文件
+            with open(output_file, 'w', encoding='utf-8') as f:
+                json.dump(dict(response), f, indent=2, ensure_ascii=False)
+            print(f"[*] 结果已保存至: {output_file}")
         
     except Exception as e:
         print(f"[✗] 爬取失败: {str(e)}")
 
 
-def process_url_list(crawler: PhantomCrawler, url_list: List[str], output_dir: Optional[str] = None) -> None:
-    """处理URL列表爬取"""
+def process_url_list(crawler: PhantomCrawler, url_list: List[str], output_dir: Optional[str] = None,
+                     state_dir: Optional[str] = None, resume: bool = False) -> None:
+    """处理URL列表爬取
+    
+    按主机调度爬取顺序：总是先爬取最早冷却完毕的主机，只有所有主机都在冷却时才等待。
+    提供state_dir时定期保存已完成的URL，resume为True时跳过已完成的URL
+    """
     total = len(url_list)
     success = 0
+    pending = list(enumerate(url_list, 1))
+    
+    checkpoint = CrawlCheckpoint(state_dir) if state_dir else None
+    if checkpoint:
+        crawler.body_reader.use_state_dir(state_dir)
+        # 检查点记录结果输出的位置，恢复时截断之后写出的结果
+        checkpoint.sink = crawler.result_sink
+        list_params = {'list_size': total, 'list_head': url_list[0] if url_list else None}
+        has_state = resume and checkpoint.has_state()
+        
+        if has_state and checkpoint.saved_params() == list_params:
+            completed = create_visited_store()
+            checkpoint.restore(visited=completed)
+            # 调度会打乱列表顺序，按已完成URL的指纹而不是列表偏移跳过
+            pending = [(i, url) for i, url in pending if url not in completed]
+            success = checkpoint.counters['success']
+            print(f"\n[*] 从检查点恢复: 已完成 {total - len(pending)}/{total} 个URL")
+        else:
+            if has_state:
+                print("\n[!] 检查点与当前URL列表不匹配，从头开始")
+            checkpoint.reset()
+            checkpoint.params = list_params
     
     print(f"\n[*] 开始批量爬取: {total} 个URL")
     
-    for i, url in enumerate(url_list, 1):
-        print(f"\n[{i}/{total}] 开始爬取: {url}")
+    try:
+        success = _crawl_url_list(crawler, pending, total, output_dir, checkpoint, success)
+    except KeyboardInterrupt:
+        if checkpoint:
+            checkpoint.save(status='interrupted')
+            print(f"\n[*] 检查点已保存至: {state_dir}，使用 --resume 继续")
+        raise
+    finally:
+        if checkpoint:
+            checkpoint.close()
+    
+    print(f"\n[*] 批量爬取完成")
+    print(f"[*] 成功: {success}, 失败: {total - success}")
+    scheduler_stats = crawler.host_scheduler.get_stats()
+    print(f"[*] 主机数: {scheduler_stats['hosts']}, 等待所有主机冷却的时间: {scheduler_stats['idle_seconds']:.2f} 秒")
+
+
+def _crawl_url_list(crawler: PhantomCrawler, pending: List[Tuple[int, str]], total: int,
+                    output_dir: Optional[str], checkpoint: Optional[CrawlCheckpoint], success: int) -> int:
+    """按主机调度顺序爬取(序号, URL)列表，返回累计成功数量"""
+    done = total - len(pending)
+    
+    for i, url in crawler.host_scheduler.iter_ready(pending, key=lambda item: item[1]):
+        done += 1
+        print(f"\n[{done}/{total}] 开始爬取: {url}")
         start_time = time.time()
+        success_before = success
         
         try:
-            # 准备输出文件
+            # 准备输出文件（配置了结果输出时不再逐个写文件）
             output_file = None
-            if output_dir:
+            if output_dir and not crawler.result_sink:
                 # 生成安全的文件名
                 safe_filename = f"{i:04d}_{url.replace('://', '_').replace('/', '_').replace('?', '_').replace('&', '_')[:50]}.json"
                 output_file = os.path.join(output_dir, safe_filename)
             
-            # 定义回调函数
-            def response_callback(response: Dict[str, Any], idx=i) -> None:
-                nonlocal success
-                success += 1
-                elapsed = time.time() - start_time
-                print(f"[✓] 爬取完成 [{idx}/{total}]: {url}")
-                print(f"[*] 状态码: {response.get('status_code')}")
-                print(f"[*] 耗时: {elapsed:.2f} 秒")
-                
-                if output_file:
-                    # 保存结果到文件
-                    with open(output_file, 'w', encoding='utf-8') as f:
-                        json.dump(response, f, indent=2, ensure_ascii=False)
+            # 执行爬取（同一主机的请求间隔由爬虫的主机调度器保证）
+            response = crawler.crawl(url)
+            success += 1
             
-            # 执行爬取
-            crawler.crawl(url, response_callback=response_callback)
+            elapsed = time.time() - start_time
+            print(f"[✓] 爬取完成 [{done}/{total}]: {url}")
+            print(f"[*] 状态码: {response.get('status_code')}")
+            print(f"[*] 耗时: {elapsed:.2f} 秒")
+            
+            if output_file:
+                # 保存结果到文件
+                with open(output_file, 'w', encoding='utf-8') as f:
+                    json.dump(dict(response), f, indent=2, ensure_ascii=False)
             
         except Exception as e:
-            print(f"[✗] 爬取失败 [{i}/{total}]: {str(e)}")
+            print(f"[✗] 爬取失败 [{done}/{total}]: {str(e)}")
         
-        # 添加延迟避免请求过于频繁
-        if i < total:
-            delay = global_config.get('behavior_simulation.min_delay', 1.0)
-            print(f"[*] 等待 {delay} 秒后继续...")
-            time.sleep(delay)
+        # 记录已完成数量并按需保存检查点
+        if checkpoint:
+            checkpoint.record_page(url, success > success_before)
+            checkpoint.offsets['url_list'] = done
+            if done == total:
+                checkpoint.save(status='finished')
+            else:
+                checkpoint.maybe_save()
     
-    print(f"\n[*] 批量爬取完成")
-    print(f"[*] 成功: {success}, 失败: {total - success}")
+    return success
 
 
 def main():
@@ -185,6 +238,41 @@ def main():
     # 输出参数
     parser.add_argument('-o', '--output', type=str, help='输出文件路径 (单个URL时使用)')
     parser.add_argument('-d', '--output-dir', type=str, help='输出目录路径 (批量URL时使用)')
+    parser.add_argument('--sink', type=str,
+                       help='批量写出结果，替代逐个JSON文件，例如:\n'
+                            '  jsonl:out/results.jsonl  (可用 jsonl+gzip / jsonl+zstd 压缩)\n'
+                            '  sqlite:out/results.db\n'
+                            '  parquet:out/results.parquet')
+    parser.add_argument('--content-store', type=str,
+                       help='正文去重存储目录，结果中只保留content_hash\n'
+                            '(使用 --output-dir 时默认为 <output-dir>/bodies)')
+    parser.add_argument('--no-content-store', dest='use_content_store', action='store_false',
+                       help='在结果中直接保存正文，不使用去重存储')
+    parser.add_argument('--host-dictionaries', action='store_true',
+                       help='正文存储为每个主机训练zstd压缩字典 (需要zstandard)')
+    
+    # HTTP缓存参数
+    parser.add_argument('--http-cache', type=str,
+                       help='启用ETag/Last-Modified重新验证缓存并指定缓存目录\n'
+                            '(默认不启用，配置 http_cache.enabled 为 true 时使用 data/http_cache)')
+    parser.add_argument('--no-http-cache', dest='use_http_cache', action='store_false',
+                       help='禁用条件请求缓存，每次都下载完整正文')
+    
+    # robots.txt参数
+    parser.add_argument('--ignore-robots', action='store_true',
+                       help='不检查robots.txt (仅限获得授权的目标)')
+    
+    # 站点地图参数
+    parser.add_argument('--sitemap', dest='sitemaps', action='append', metavar='URL',
+                       help='额外的站点地图或RSS/Atom订阅源URL (递归爬取时使用，可重复)')
+    parser.add_argument('--use-sitemaps', dest='use_sitemaps', action='store_true', default=None,
+                       help='递归爬取时从robots.txt声明的站点地图播种 (默认不播种，指定 --sitemap 时总是使用)')
+    parser.add_argument('--no-sitemaps', dest='use_sitemaps', action='store_false',
+                       help='递归爬取时不从站点地图播种')
+    
+    # 检查点参数
+    parser.add_argument('--state-dir', type=str, help='检查点状态目录 (批量/递归爬取时使用)')
+    parser.add_argument('--resume', action='store_true', help='从 --state-dir 中的检查点继续爬取')
     
     # 功能开关
     parser.add_argument('--no-dynamic-ua', dest='dynamic_ua', action='store_false', 
@@ -226,12 +314,16 @@ def main():
         browser_fp=True,
         human_delay=True,
         gamma_delay=True,
+        use_content_store=True,
         request_chain=True,
         metacognition=True
     )
     
     args = parser.parse_args()
     
+    if args.resume and not args.state_dir:
+        parser.error('--resume 需要同时指定 --state-dir')
+    
     # 如果指定了配置文件，加载它
     if args.config:
         custom_config = load_config_from_file(args.config)
@@ -309,6 +401,36 @@ def main():
     
     print("[✓] 爬虫初始化成功！")
     
+    # 配置结果输出
+    if args.sink:
+        try:
+            crawler.set_result_sink(create_sink(args.sink))
+            print(f"[*] 结果将批量写出至: {args.sink}")
+        except Exception as e:
+            print(f"\n[✗] 结果输出创建失败: {str(e)}")
+            sys.exit(1)
+    
+    # 配置正文去重存储
+    content_store_dir = args.content_store or (os.path.join(args.output_dir, 'bodies') if args.output_dir else None)
+    if content_store_dir and args.use_content_store:
+        crawler.set_content_store(ContentStore(content_store_dir,
+                                               host_dictionaries=args.host_dictionaries or None))
+        print(f"[*] 正文去重存储: {content_store_dir}")
+    
+    # 条件请求缓存
+    if not args.use_http_cache:
+        crawler.set_http_cache(None)
+    elif args.http_cache:
+        crawler.set_http_cache(HttpCache(args.http_cache))
+        print(f"[*] HTTP重新验证缓存: {args.http_cache}")
+    
+    # robots.txt检查
+    if args.ignore_robots:
+        if crawler.robots:
+            crawler.robots.close()
+        crawler.robots = None
+        print("[*] 已禁用robots.txt检查")
+    
     # 激活高级测试模块（如果启用）
     if args.advanced:
         print("\n⚠️  警告：正在激活高级测试模块！")
@@ -353,7 +475,10 @@ def main():
                     print(f"\n[*] 开始递归路径测试，起始URL: {start_url}")
                     
                     # 执行递归路径测试爬取
-                    results = crawler.crawl_iterative(start_url, max_depth=2, max_urls=50)
+                    results = crawler.crawl_iterative(start_url, max_depth=2, max_urls=50,
+                                                      state_dir=args.state_dir, resume=args.resume,
+                                                      use_sitemaps=args.use_sitemaps,
+                                                      sitemap_urls=args.sitemaps)
                     
                     # 显示结果
                     print("\n[*] 递归路径测试完成！")
@@ -362,7 +487,7 @@ def main():
                     print(f"[*] 达到深度: {results.get('depth_reached', 0)}")
                 else:
                     # 普通批量爬取
-                    process_url_list(crawler, urls, args.output_dir)
+                    process_url_list(crawler, urls, args.output_dir, args.state_dir, args.resume)
                 
             except Exception as e:
                 print(f"\n[✗] URL列表文件读取失败: {str(e)}")
@@ -377,6 +502,21 @@ def main():
         if hasattr(crawler, 'seven_desires') and hasattr(crawler.seven_desires, 'optimize_testing_strategy'):
             crawler.seven_desires.optimize_testing_strategy(str(e))
     finally:
+        if crawler.result_sink:
+            crawler.result_sink.close()
+            sink_stats = crawler.result_sink.get_stats()
+            print(f"\n[*] 已写出 {sink_stats['records']} 条结果，"
+                  f"平均批次写出延迟 {sink_stats['flush_latency_avg_ms']:.2f} ms")
+        if crawler.content_store:
+            crawler.content_store.close()
+            store_stats = crawler.content_store.get_stats()
+            print(f"\n[*] 正文存储: {store_stats['puts']} 个正文，去重 {store_stats['duplicates']} 个，"
+                  f"写入 {store_stats['stored_bytes']}/{store_stats['raw_bytes']} 字节")
+        if crawler.http_cache:
+            cache_stats = crawler.http_cache.get_stats()
+            print(f"\n[*] HTTP缓存: 命中(304) {cache_stats['hits']}，未缓存 {cache_stats['misses']}，"
+                  f"已变化 {cache_stats['changed']}，节省 {cache_stats['bytes_saved']} 字节")
+            crawler.http_cache.close()
         print("\n[*] PhantomCrawler 已关闭")
 
 
@@ -87,6 +87,131 @@ class ConfigManager:
                 'enabled': True,
                 'browser_mimic': 'chrome',  # chrome, firefox, safari
                 'custom_cipher_suites': []
+            },
+
+            # 爬取边界配置
+            'frontier': {
+                'max_in_memory': 100000,  # 内存窗口中最多保留的URL数量
+                'refill_batch': 25000,  # 每次从磁盘段回填的URL数量
+                'spill_dir': None  # 溢出段目录，None表示使用系统临时目录
+            },
+
+            # 已访问URL存储配置
+            'visited': {
+                'mode': 'exact',  # exact: 64位指纹哈希表; bloom: Bloom过滤器
+                'capacity': 1000000,  # 预期URL数量
+                'false_positive_rate': 0.001  # bloom模式的目标误判率
+            },
+
+            # 结果输出配置
+            'sinks': {
+                'batch_size': 500,  # 每批写出的最大记录数
+                'flush_interval': 1.0,  # 未满一批时最长等待秒数
+                'queue_size': 10000,  # 待写出队列容量，写满时对爬取形成反压
+                'jsonl_max_bytes': 268435456,  # JSONL单文件最大未压缩字节数（256MB）
+                'parquet_row_group_size': 5000  # Parquet每个行组的行数
+            },
+
+            # 正文内容存储配置
+            'content_store': {
+                'codec': 'auto',  # auto: 有zstandard时用zstd，否则zlib
+                'segment_max_bytes': 268435456,  # 单个段文件最大字节数（256MB）
+                'host_dictionaries': False,  # 是否为每个主机训练zstd压缩字典
+                'dict_training_samples': 32,  # 每个主机用前多少个正文训练字典
+                'dict_size': 112640  # 字典大小（字节）
+            },
+
+            # 检查点配置
+            'checkpoint': {
+                'interval_pages': 50,  # 每爬取多少个页面保存一次检查点
+                'interval_seconds': 60  # 距上次保存超过多少秒时保存检查点
+            },
+
+            # 主机礼貌调度配置
+            'scheduler': {
+                'burst': 1  # 每个主机令牌桶容量（允许的突发请求数）
+            },
+
+            # robots.txt配置
+            'robots': {
+                'enabled': True,  # 爬取前检查robots.txt
+                'user_agent': 'PhantomCrawler',  # 匹配robots.txt用户代理组的产品标识
+                'cache_path': 'data/robots_cache.db',  # 持久化缓存路径，空字符串表示只缓存在内存中
+                'ttl': 86400,  # robots.txt缓存时间（秒）
+                'error_ttl': 600,  # 服务器返回5xx时的重试间隔（秒），期间整站暂不可爬
+                'unreachable_ttl': 60,  # 连接失败或超时时的重试间隔（秒），期间不限制爬取
+                'max_crawl_delay': 60,  # Crawl-delay上限（秒）
+                'max_hosts': 10000  # 内存中缓存规则的最大主机数，超出时淘汰最久未使用的主机
+            },
+
+            # 响应正文流式读取配置
+            'response_body': {
+                'max_bytes': {  # 按媒体类型的解码后字节上限，键可以是完整类型、'type/'前缀或default
+                    'text/html': 10485760,
+                    'application/xhtml+xml': 10485760,
+                    'text/': 5242880,
+                    'application/json': 5242880,
+                    'default': 104857600
+                },
+                'spool_threshold': 1048576,  # 非HTML正文超过该大小时写入磁盘
+                'spool_dir': None,  # 溢出目录，None时使用状态目录下的spool，没有状态目录时使用系统临时目录
+                'spool_max_bytes': 1073741824,  # 溢出目录总大小上限（1GB），超出时删除最早的文件
+                'reject_types': ['video/', 'audio/']  # 不下载正文的媒体类型前缀
+            },
+
+            # 字符集检测配置
+            'charset': {
+                'sniff_bytes': 4096,  # 查找<meta charset>时扫描的字节数
+                'detect_bytes': 65536,  # 统计检测的最大样本字节数
+                'max_hosts': 10000  # 记忆编码的最大主机数
+            },
+
+            # 爬取范围配置，模式为子串，或're:'开头的正则、'glob:'开头的通配符（匹配完整URL）
+            'scope': {
+                'include_patterns': [],  # 迭代爬取未指定include_patterns时使用
+                'exclude_patterns': [],  # 迭代爬取未指定exclude_patterns时使用
+                'allowed_domains': [],  # 额外允许的域名（含子域名），迭代爬取未指定allowed_domains时使用
+                'public_suffix_file': None,  # 公共后缀列表文件，None时使用随代码分发的列表
+                'domain_cache_size': 65536  # 可注册域名查询的缓存条目数
+            },
+
+            # 站点地图播种配置
+            'sitemaps': {
+                'enabled': False,  # 迭代爬取时从robots.txt声明的站点地图播种（需显式启用，指定站点地图URL时总是使用）
+                'max_sitemaps': 1000,  # 最多读取的站点地图文件数量
+                'max_urls': 1000000,  # 最多从站点地图加入的URL数量，迭代爬取指定max_urls时取两者中较小的值
+                'max_bytes': 52428800,  # 单个站点地图解压后的最大字节数
+                'low_water': 1000  # 爬取边界少于该数量时读取下一个站点地图
+            },
+
+            # HTTP重新验证缓存配置
+            'http_cache': {
+                'enabled': False,  # 重复爬取时发送If-None-Match / If-Modified-Since条件请求（需显式启用）
+                'dir': 'data/http_cache',  # 缓存目录
+                'max_body_bytes': 10485760,  # 可缓存的最大正文字节数
+                'max_entries': 100000,  # 最多保留的条目数，超出时淘汰最久未验证的条目
+                'max_age': 2592000,  # 条目自最近一次验证起的最长保留时间（秒，30天）
+                'segment_max_bytes': 67108864,  # 正文段文件大小，回收空间以段为单位
+                'commit_interval': 100  # 每多少次写入提交一次
+            },
+
+            # 异步爬取引擎配置
+            'async_crawler': {
+                'max_in_flight': 64,  # 全局同时在途的最大请求数
+                'per_host_limit': 1,  # 每个主机同时在途的最大请求数
+                'max_connections': 100,  # 连接池最大连接数
+                'max_keepalive_connections': 20  # 保持活动的最大连接数
+            },
+
+            # 七宗欲引擎记忆配置
+            'desires': {
+                'memory_path': 'data/seven_desires.db',  # 欲望记忆数据库（事件日志加快照）
+                'legacy_memory_path': 'data/seven_desires.pkl',  # 旧版pickle记忆，数据库为空时导入
+                'flush_interval': 5.0,  # 有未写入修改时，后台写入的最大间隔秒数
+                'flush_every': 100,  # 累计多少次修改后立即写入
+                'compact_every': 5000,  # 日志累计多少条事件后压缩进快照
+                'rate_windows': [60, 600, 3600],  # 请求/成功/失败/封锁计数的滑动窗口（秒）
+                'window_buckets': 60  # 每个滑动窗口划分的时间桶数量
             }
         }
         
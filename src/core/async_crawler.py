@@ -0,0 +1,360 @@
+# PhantomCrawler - 异步爬取引擎
+import asyncio
+import random
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+import httpx
+
+from src.core.crawler import PhantomCrawler
+from src.core.crawl_result import CrawlResult
+from src.modules.storage.result_sink import ResultSink
+from src.config import global_config
+
+
+class AsyncPhantomCrawler(PhantomCrawler):
+    """
+    基于httpx.AsyncClient的异步爬取引擎
+
+    在同一个事件循环中并发爬取多个主机：全局并发上限限制同时在途的请求数，
+    每个主机另有严格的并发上限（默认1），同一主机的相邻请求之间仍保持与同步
+    爬虫相同的人类延迟。总吞吐量随不同主机的数量增长，而单个主机看到的请求
+    频率保持不变。
+
+    HTTP缓存、正文溢出文件、解码和结果输出等同步的SQLite与磁盘操作在单独的I/O线程中
+    依次执行，事件循环只负责网络请求和调度。
+
+    使用示例:
+        async with AsyncPhantomCrawler() as crawler:
+            async for result in crawler.aiter_batch(urls):
+                print(result['url'], result['status_code'])
+    """
+
+    def __init__(self, config_file: Optional[str] = None, max_in_flight: Optional[int] = None,
+                 per_host_limit: Optional[int] = None):
+        """
+        Args:
+            config_file: 配置文件路径
+            max_in_flight: 全局同时在途的最大请求数
+            per_host_limit: 每个主机同时在途的最大请求数
+        """
+        super().__init__(config_file, auto_initialize=False)
+        self.max_in_flight = max(1, max_in_flight or global_config.get('async_crawler.max_in_flight', 64))
+        self.per_host_limit = max(1, per_host_limit or global_config.get('async_crawler.per_host_limit', 1))
+        self.async_client: Optional[httpx.AsyncClient] = None
+
+        # 事件循环内的调度状态，在initialize_async中创建
+        self._in_flight_semaphore: Optional[asyncio.Semaphore] = None
+        # 主机 -> [信号量, 正在等待或占用槽位的协程数]，没有协程使用时移除
+        self._host_semaphores: Dict[str, List[Any]] = {}
+        self._in_flight = 0
+        # 同步的SQLite与磁盘操作在这个线程中依次执行，不阻塞事件循环
+        self._io_executor: Optional[ThreadPoolExecutor] = None
+        self.async_stats = {
+            'requests': 0,
+            'errors': 0,
+            'blocked': 0,
+            'peak_in_flight': 0,
+            'hosts': 0,
+            'hosts_evicted': 0
+        }
+
+    async def initialize_async(self) -> bool:
+        """初始化异步HTTP客户端"""
+        try:
+            self.async_client = self._create_async_http_client()
+            self._in_flight_semaphore = asyncio.Semaphore(self.max_in_flight)
+            if self._io_executor is None:
+                self._io_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='phantom-io')
+            self.is_running = True
+            print(f"[PhantomCrawler] 异步引擎初始化成功，会话ID: {self.session_id}，"
+                  f"全局并发 {self.max_in_flight}，每主机并发 {self.per_host_limit}")
+            return True
+        except Exception as e:
+            print(f"[PhantomCrawler] 异步引擎初始化失败: {str(e)}")
+            return False
+
+    def _create_async_http_client(self) -> httpx.AsyncClient:
+        """创建配置好的异步HTTP客户端"""
+        max_connections = global_config.get('async_crawler.max_connections', 100)
+        try:
+            headers = self.fingerprint_spoofer.generate_fingerprint()
+            client = self.protocol_obfuscator.create_proxied_async_httpx_client(
+                max_connections=max(max_connections, self.max_in_flight),
+                max_keepalive_connections=global_config.get('async_crawler.max_keepalive_connections', 20)
+            )
+            client.headers.update(headers)
+            return client
+        except Exception as e:
+            print(f"[七宗欲爬虫] 创建异步HTTP客户端失败: {str(e)}")
+            return httpx.AsyncClient(timeout=30, follow_redirects=True)
+
+    async def __aenter__(self) -> 'AsyncPhantomCrawler':
+        if self.async_client is None:
+            await self.initialize_async()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.aclose()
+
+    async def _run_io(self, func: Callable, *args) -> Any:
+        """在I/O线程中执行同步的SQLite或磁盘操作"""
+        return await asyncio.get_running_loop().run_in_executor(self._io_executor, func, *args)
+
+    @asynccontextmanager
+    async def _host_slot(self, host: str):
+        """
+        占用主机的一个并发槽位
+
+        由HostScheduler的令牌桶和下一次允许时间决定何时放行，释放时按人类延迟安排下一次请求。
+        等待期间不占用全局并发名额，其他主机的请求可以继续进行。最后一个使用者离开后移除
+        主机的信号量，与HostScheduler移除空闲主机一样，内存只与正在爬取的主机数量有关。
+        """
+        entry = self._host_semaphores.get(host)
+        if entry is None:
+            entry = self._host_semaphores[host] = [asyncio.Semaphore(self.per_host_limit), 0]
+            self.async_stats['hosts'] += 1
+        entry[1] += 1
+
+        scheduler = self.host_scheduler
+        try:
+            async with entry[0]:
+                # 多个槽位可能同时醒来，检查与占用令牌之间没有await，不会超出主机速率
+                wait = scheduler.wait_time(host)
+                while wait > 0:
+                    await asyncio.sleep(wait)
+                    wait = scheduler.wait_time(host)
+                scheduler.acquire(host)
+                try:
+                    yield
+                finally:
+                    scheduler.release(host)
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                # 主机的下一次请求时间由HostScheduler保存，重建的信号量与移除前没有区别
+                del self._host_semaphores[host]
+                self.async_stats['hosts_evicted'] += 1
+
+    def _finish_response(self, url: str, response: httpx.Response, conditional: bool,
+                         start_time: float) -> Tuple[httpx.Response, bool, float]:
+        """
+        在I/O线程中完成响应的同步处理：更新HTTP缓存、解码正文并记录历史
+
+        Returns:
+            (响应, 是否被阻止, 响应时间)，需要去掉验证器重新请求时响应为原始的304
+        """
+        response = self._apply_http_cache(url, response, conditional)
+        if self._needs_unconditional_retry(response, conditional):
+            return response, False, 0.0
+        self._decode_body(url, response)
+
+        response_time = time.time() - start_time
+        blocked = self._is_blocked(response)
+        self._record_crawl_history(url, response, response_time, blocked)
+        return response, blocked, response_time
+
+    async def _fetch(self, url: str) -> Dict[str, Any]:
+        """在全局并发限制内请求URL，被阻止或出错时按退避重试"""
+        max_retries = max(1, global_config.get('max_retries', 3))
+        timeout = global_config.get('request_timeout', 30)
+        start_time = time.time()
+        last_error = None
+        cache_headers = await self._run_io(self.http_cache.conditional_headers, url) if self.http_cache else {}
+
+        attempt = 0
+        while attempt < max_retries:
+            attempt += 1
+            try:
+                headers = self.fingerprint_spoofer.generate_dynamic_headers(url)
+                headers.update(cache_headers)
+                async with self._in_flight_semaphore:
+                    self._in_flight += 1
+                    self.async_stats['peak_in_flight'] = max(self.async_stats['peak_in_flight'], self._in_flight)
+                    try:
+                        self.async_stats['requests'] += 1
+                        request = self.async_client.build_request('GET', url, headers=headers, timeout=timeout)
+                        stream = await self.async_client.send(request, stream=True)
+                        try:
+                            response = await self.body_reader.aread(stream, self._io_executor)
+                        finally:
+                            await stream.aclose()
+                    finally:
+                        self._in_flight -= 1
+                response, blocked, response_time = await self._run_io(
+                    self._finish_response, url, response, bool(cache_headers), start_time
+                )
+                if self._needs_unconditional_retry(response, bool(cache_headers)):
+                    # 缓存条目已删除，本次不计入重试次数
+                    cache_headers = {}
+                    attempt -= 1
+                    continue
+
+                if blocked and attempt < max_retries:
+                    self.async_stats['blocked'] += 1
+                    wait_time = random.uniform(5, 15)
+                    print(f"[PhantomCrawler] 检测到可能被阻止: {url}，休眠 {wait_time:.2f} 秒后重试...")
+                    await asyncio.sleep(wait_time)
+                    continue
+
+                content_type = self.body_reader.media_type(response.headers)
+                result = CrawlResult(
+                    url, response,
+                    textual=self.body_reader.is_textual(content_type),
+                    response_time=response_time,
+                    blocked=blocked,
+                    timestamp=time.time()
+                )
+                result.update(self.body_reader.describe(response))
+                if response.extensions.get('from_http_cache'):
+                    result['not_modified'] = True
+                return result
+            except Exception as e:
+                last_error = str(e)
+                self.async_stats['errors'] += 1
+                print(f"[PhantomCrawler] 请求失败: {url}: {last_error}")
+                if attempt < max_retries:
+                    wait_time = random.uniform(2, 5) * attempt
+                    print(f"[PhantomCrawler] 等待 {wait_time:.2f} 秒后重试...")
+                    await asyncio.sleep(wait_time)
+
+        return {
+            'url': url,
+            'status_code': None,
+            'error': last_error or f"达到最大重试次数 {max_retries}",
+            'blocked': False,
+            'response_time': time.time() - start_time,
+            'timestamp': time.time()
+        }
+
+    async def _arobots_allowed(self, url: str) -> bool:
+        """异步检查robots.txt，同一主机只获取一次"""
+        async def fetch(robots_url: str):
+            response = await self.async_client.get(robots_url, timeout=global_config.get('request_timeout', 30))
+            return response.status_code, response.text
+
+        try:
+            return await self.robots.ais_allowed(url, fetch)
+        except Exception as e:
+            print(f"[PhantomCrawler] robots.txt检查失败: {str(e)}")
+            return True
+
+    async def acrawl(self, url: str, sink: Optional[ResultSink] = None) -> Dict[str, Any]:
+        """
+        异步爬取单个URL，遵守全局与每主机并发上限
+
+        Args:
+            url: 目标URL
+            sink: 结果输出，None时使用爬虫的默认结果输出
+
+        Returns:
+            爬取结果字典
+        """
+        if self.async_client is None:
+            await self.initialize_async()
+
+        if self.robots is not None and not await self._arobots_allowed(url):
+            return self._robots_disallowed_result(url)
+
+        host = self.host_scheduler.host_of(url)
+        async with self._host_slot(host):
+            result = await self._fetch(url)
+
+        result['success'] = self._is_successful_result(result)
+        return await self._run_io(self._emit_result, result, sink)
+
+    async def aiter_batch(self, urls: Iterable[str],
+                          sink: Optional[ResultSink] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        并发爬取URL列表，按完成顺序逐个产出结果
+
+        每个主机由独立的协程按顺序处理自己的URL，某个主机冷却时不会阻塞其他主机。
+
+        Args:
+            urls: URL列表
+            sink: 结果输出，None时使用爬虫的默认结果输出
+
+        Yields:
+            爬取结果字典
+        """
+        if self.async_client is None:
+            await self.initialize_async()
+
+        host_queues: Dict[str, Deque[str]] = {}
+        for url in urls:
+            host = self.host_scheduler.host_of(url)
+            queue = host_queues.get(host)
+            if queue is None:
+                queue = host_queues[host] = deque()
+            queue.append(url)
+
+        results: asyncio.Queue = asyncio.Queue()
+
+        async def host_worker(queue: Deque[str]) -> None:
+            while queue:
+                url = queue.popleft()
+                try:
+                    result = await self.acrawl(url, sink=sink)
+                except Exception as e:
+                    result = {'url': url, 'status_code': None, 'error': str(e),
+                              'blocked': False, 'success': False, 'timestamp': time.time()}
+                await results.put(result)
+
+        # 每主机上限大于1时，同一个主机队列由多个协程共同消费
+        workers = [
+            asyncio.ensure_future(host_worker(queue))
+            for queue in host_queues.values()
+            for _ in range(min(self.per_host_limit, len(queue)))
+        ]
+        remaining = sum(len(queue) for queue in host_queues.values())
+
+        try:
+            while remaining:
+                yield await results.get()
+                remaining -= 1
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def acrawl_batch(self, urls: List[str], sink: Optional[ResultSink] = None) -> List[Dict[str, Any]]:
+        """
+        并发爬取URL列表
+
+        Args:
+            urls: URL列表
+            sink: 结果输出，None时使用爬虫的默认结果输出
+
+        Returns:
+            与输入顺序一致的爬取结果列表
+        """
+        positions: Dict[str, List[int]] = {}
+        for index, url in enumerate(urls):
+            positions.setdefault(url, []).append(index)
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(urls)
+        async for result in self.aiter_batch(urls, sink=sink):
+            results[positions[result['url']].pop(0)] = result
+        return results
+
+    async def aclose(self) -> None:
+        """关闭异步客户端、I/O线程及结果输出"""
+        if self.async_client:
+            await self.async_client.aclose()
+            self.async_client = None
+        if self._io_executor is not None:
+            # 等待已提交的写入完成后再关闭缓存和结果输出
+            self._io_executor.shutdown(wait=True)
+            self._io_executor = None
+        self.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取爬虫统计信息"""
+        stats = super().get_stats()
+        stats['async_stats'] = dict(self.async_stats, max_in_flight=self.max_in_flight,
+                                    per_host_limit=self.per_host_limit,
+                                    active_hosts=len(self._host_semaphores))
+        return stats
@@ -0,0 +1,105 @@
+# PhantomCrawler - 爬取结果模块
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator, Optional
+
+import httpx
+
+
+class CrawlResult(MutableMapping):
+    """
+    惰性的爬取结果
+
+    只持有一份响应（原始正文字节和原始响应头），content、headers、cookies
+    在第一次访问时才解码并缓存，之后与普通字段无异。没有访问过的字段不会产生
+    解码后的字符串、头部字典和Cookie字典。
+
+    实现了完整的映射接口（result['url']、result.get()、'content' in result、
+    dict(result)、result.update()等），现有的回调和结果输出可以直接使用；
+    需要JSON序列化时使用to_dict()或dict(result)。
+    """
+
+    __slots__ = ('_response', '_fields', '_pending', '_textual')
+
+    # 惰性字段，按此顺序出现在键的末尾
+    LAZY_FIELDS = ('content', 'headers', 'cookies')
+
+    def __init__(self, url: str, response: httpx.Response, textual: bool = True, **fields: Any):
+        """
+        Args:
+            url: 原始请求URL
+            response: 正文已读取的响应
+            textual: 正文是否为需要解码的文本，False时content为空字符串
+            **fields: 其他结果字段（response_time、blocked等）
+        """
+        self._response = response
+        self._textual = textual
+        self._fields: Dict[str, Any] = {'url': url, 'status_code': response.status_code}
+        self._fields.update(fields)
+        self._pending = [name for name in self.LAZY_FIELDS if name not in self._fields]
+
+    @property
+    def response(self) -> httpx.Response:
+        """底层响应"""
+        return self._response
+
+    @property
+    def content_length(self) -> int:
+        """正文字节数，不触发解码"""
+        return len(self._response.content)
+
+    def _materialize(self, key: str) -> Any:
+        response = self._response
+        if key == 'content':
+            value = response.text if self._textual else ''
+        elif key == 'headers':
+            value = dict(response.headers)
+        else:
+            value = dict(response.cookies)
+        self._pending.remove(key)
+        self._fields[key] = value
+        return value
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return self._fields[key]
+        except KeyError:
+            if key in self._pending:
+                return self._materialize(key)
+            raise
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key in self._pending:
+            self._pending.remove(key)
+        self._fields[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        if key in self._pending:
+            # 删除未访问过的字段时不需要解码
+            self._pending.remove(key)
+            return
+        del self._fields[key]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._fields or key in self._pending
+
+    def __iter__(self) -> Iterator[str]:
+        yield from list(self._fields)
+        yield from list(self._pending)
+
+    def __len__(self) -> int:
+        return len(self._fields) + len(self._pending)
+
+    def get(self, key: str, default: Optional[Any] = None) -> Any:
+        if key in self._fields:
+            return self._fields[key]
+        if key in self._pending:
+            return self._materialize(key)
+        return default
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为普通字典（解码所有惰性字段）"""
+        return {key: self[key] for key in self}
+
+    def __repr__(self) -> str:
+        return (f"CrawlResult(url={self._fields.get('url')!r}, status_code={self._fields.get('status_code')!r}, "
+                f"pending={self._pending!r})")
@@ -3,13 +3,33 @@ import asyncio
 import random
 import time
 import importlib.util
-from typing import Dict, List, Optional, Any, Callable, Set
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Any, Callable, Set, Iterator, AsyncIterator
 import httpx
-from urllib.parse import urlparse
+from urllib.parse import urlparse, urlsplit
 from src.modules.evasion.fingerprint_spoofer import FingerprintSpoofer
 from src.modules.behavior.behavior_simulator import BehaviorSimulator
 from src.modules.evasion.protocol_obfuscator import ProtocolObfuscator
 from src.modules.parsing.html_parser import HTMLParser
+from src.modules.parsing.sitemap_parser import SitemapSeeder, lastmod_priority
+from src.modules.parsing.parsed_link import LinkScope, parse_link
+from src.modules.parsing.public_suffix import DomainScope
+from src.modules.parsing.charset_detector import CharsetDetector
+from src.modules.frontier.frontier import CrawlFrontier
+from src.modules.frontier.checkpoint import CrawlCheckpoint
+from src.modules.frontier.visited_store import create_visited_store
+from src.modules.frontier.host_scheduler import HostScheduler
+from src.modules.frontier.robots_cache import RobotsCache
+from src.modules.storage.result_sink import ResultSink
+from src.modules.storage.content_store import ContentStore
+from src.modules.storage.http_cache import HttpCache
+from src.modules.storage.response_body import ResponseBodyReader
+from src.modules.intelligence.outcome_pipeline import (
+    OutcomePipeline, OutcomeEvent, StrategySnapshot,
+    EVENT_RESPONSE, EVENT_ERROR, EVENT_FAILURE, EVENT_BROWSER
+)
+from src.core.crawl_result import CrawlResult
 from src.config import global_config
 
 # 动态检查playwright是否安装
@@ -89,10 +109,42 @@ class PhantomCrawler:
         # HTML解析器
         self.html_parser = HTMLParser()
         
+        # 按主机的礼貌调度（令牌桶 + 下一次允许时间），替代全局的阻塞延迟
+        self.host_scheduler = HostScheduler(delay_provider=self._host_delay)
+        
+        # robots.txt规则缓存，Crawl-delay会应用到主机调度器
+        self.robots: Optional[RobotsCache] = None
+        if global_config.get('robots.enabled', True):
+            try:
+                self.robots = RobotsCache(scheduler=self.host_scheduler)
+            except Exception as e:
+                print(f"[PhantomCrawler] robots.txt缓存初始化失败，将不检查robots.txt: {str(e)}")
+        
+        # 结果输出（crawl/crawl_batch/iter_crawl未指定sink时使用）
+        self.result_sink: Optional[ResultSink] = None
+        # 正文内容存储，设置后结果只保留content_hash引用
+        self.content_store: Optional[ContentStore] = None
+        
+        # ETag / Last-Modified重新验证缓存，重复爬取未变化的页面时只收到304
+        self.http_cache: Optional[HttpCache] = None
+        if global_config.get('http_cache.enabled', False):
+            try:
+                self.http_cache = HttpCache()
+            except Exception as e:
+                print(f"[PhantomCrawler] HTTP缓存初始化失败，将不使用条件请求: {str(e)}")
+        
+        # 流式读取正文：按类型限制大小，二进制和大文件直接写入磁盘
+        self.body_reader = ResponseBodyReader()
+        # 文本正文的字符集检测（BOM/头部/meta优先，按主机记忆）
+        self.charset_detector = CharsetDetector()
+        
         # 学习状态
         self.previous_state = None
         self.previous_action = None
         
+        # 结果分析管线：请求路径提交紧凑事件并同步分析，策略决策读取分析后发布的快照
+        self.outcome_pipeline = OutcomePipeline(self._apply_outcome_events, self._take_strategy_snapshot)
+        
         # 自动初始化
         if auto_initialize:
             self.initialize()
@@ -215,10 +267,9 @@ class PhantomCrawler:
         """
         import threading
         import queue
-        from urllib.parse import urljoin, urlparse
         
         results = {'results': {}, 'errors': [], 'depth_reached': 0}
-        visited_urls = set()
+        visited_urls = create_visited_store()
         url_queue = queue.Queue()
         
         # 检查是否启用了高级测试策略
@@ -270,20 +321,10 @@ class PhantomCrawler:
                 # 提取新链接（如果还有深度）
                 if depth < max_depth:
                     # 从响应中提取所有链接
-                    from bs4 import BeautifulSoup
                     content = result.get('content', '')
                     if content:
-                        soup = BeautifulSoup(content, 'html.parser')
-                        base_url = urlparse(url).scheme + '://' + urlparse(url).netloc
-                        
-                        # 提取所有a标签的链接
-                        for link in soup.find_all('a', href=True):
-                            href = link['href']
-                            absolute_url = urljoin(base_url, href)
-                            
-                            # 过滤有效URL
-                            parsed = urlparse(absolute_url)
-                            if parsed.scheme in ['http', 'https'] and absolute_url not in visited_urls:
+                        for absolute_url in self.html_parser.extract_links(content, url):
+                            if absolute_url not in visited_urls:
                                 visited_urls.add(absolute_url)
                                 url_queue.put((absolute_url, depth + 1))
                 
@@ -377,25 +418,111 @@ class PhantomCrawler:
                         same_domain_only: bool = True, 
                         include_patterns: Optional[List[str]] = None,
                         exclude_patterns: Optional[List[str]] = None,
-                        max_urls: Optional[int] = None) -> Dict[str, Any]:
+                        max_urls: Optional[int] = None,
+                        state_dir: Optional[str] = None,
+                        resume: bool = False,
+                        sink: Optional[ResultSink] = None,
+                        use_sitemaps: Optional[bool] = None,
+                        sitemap_urls: Optional[List[str]] = None,
+                        allowed_domains: Optional[List[str]] = None) -> Dict[str, Any]:
         """
         执行迭代爬取，从起始URL开始，自动提取和爬取下一页链接
         在高级测试模式下，将执行递归路径测试和资源压力测试
         
+        该方法会把所有结果（含页面内容）保存在内存中，大规模爬取请使用iter_crawl逐条处理
+        
         Args:
             start_url: 起始URL
             max_depth: 最大爬取深度（0表示只爬取起始URL）
-            same_domain_only: 是否只爬取相同域名的链接
-            include_patterns: 包含的URL模式列表
-            exclude_patterns: 排除的URL模式列表
+            same_domain_only: 是否只爬取与起始URL属于同一可注册域名（按公共后缀列表划分的站点）的链接
+            include_patterns: 包含的URL模式列表（子串，或're:'开头的正则、'glob:'开头的通配符），
+                              None时读取配置scope.include_patterns
+            exclude_patterns: 排除的URL模式列表，格式同上，None时读取配置scope.exclude_patterns
             max_urls: 最大爬取的URL数量，None表示不限制
+            state_dir: 检查点状态目录，提供时定期保存爬取状态
+            resume: 是否从state_dir中的检查点继续爬取
+            sink: 结果输出，None时使用爬虫的默认结果输出
+            use_sitemaps: 是否从站点地图播种，None时指定了sitemap_urls则使用，
+                          否则读取配置sitemaps.enabled（默认关闭）
+            sitemap_urls: 额外的站点地图或RSS/Atom订阅源URL
+            allowed_domains: 允许爬取的域名列表（含子域名），与same_domain_only的起始站点合并，
+                             None时读取配置scope.allowed_domains
             
         Returns:
-            包含所有爬取结果的字典
+            包含所有爬取结果的字典（恢复运行时results只包含本次运行的结果，
+            summary中的计数包含之前运行的页面）
+        """
+        summary: Dict[str, Any] = {}
+        results: Dict[str, Dict[str, Any]] = {}
+        
+        for result in self.iter_crawl(start_url, max_depth, same_domain_only, include_patterns,
+                                      exclude_patterns, max_urls, state_dir, resume, summary=summary,
+                                      sink=sink, use_sitemaps=use_sitemaps, sitemap_urls=sitemap_urls,
+                                      allowed_domains=allowed_domains):
+            results[result['url']] = result
+        
+        # 此模式应永不见天日
+        # if is_hatred_mode and hasattr(self.seven_desires, 'self_replicate'):
+        #     self.seven_desires.self_replicate(start_url, visited_urls)
+        #     print(f"[恨世引擎] 链式感染完成，已感染 {summary['total_urls']} 个目标")
+        # else:
+        print(f"[七宗欲爬虫] 迭代爬取完成，总计爬取 {summary['total_urls']} 个URL")
+        
+        return {
+            'results': results,
+            'summary': summary
+        }
+    
+    def iter_crawl(self, start_url: str, max_depth: int = 2,
+                   same_domain_only: bool = True,
+                   include_patterns: Optional[List[str]] = None,
+                   exclude_patterns: Optional[List[str]] = None,
+                   max_urls: Optional[int] = None,
+                   state_dir: Optional[str] = None,
+                   resume: bool = False,
+                   summary: Optional[Dict[str, Any]] = None,
+                   sink: Optional[ResultSink] = None,
+                   use_sitemaps: Optional[bool] = None,
+                   sitemap_urls: Optional[List[str]] = None,
+                   allowed_domains: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        流式迭代爬取，每处理完一个URL立即产出其结果
+        
+        生成器是惰性的：只有消费者请求下一条结果时才会爬取下一个URL，
+        慢速消费者会自然地暂停抓取。除爬取边界和已访问存储外，只在内存中保留汇总计数。
+        每个页面在写入结果输出、交给消费者之前记为完成；检查点同时保存结果输出的位置，
+        恢复时输出被截断到该位置，检查点之后完成的页面重新爬取，不会在输出中重复出现。
+        
+        Args:
+            start_url: 起始URL
+            max_depth: 最大爬取深度（0表示只爬取起始URL）
+            same_domain_only: 是否只爬取与起始URL属于同一可注册域名（按公共后缀列表划分的站点）的链接
+            include_patterns: 包含的URL模式列表（子串，或're:'开头的正则、'glob:'开头的通配符），
+                              None时读取配置scope.include_patterns
+            exclude_patterns: 排除的URL模式列表，格式同上，None时读取配置scope.exclude_patterns
+            max_urls: 最大爬取的URL数量，None表示不限制
+            state_dir: 检查点状态目录，提供时定期保存爬取状态
+            resume: 是否从state_dir中的检查点继续爬取
+            summary: 可选的汇总字典，迭代过程中原地更新
+            sink: 结果输出，None时使用爬虫的默认结果输出
+            use_sitemaps: 是否从robots.txt声明的站点地图（或/sitemap.xml）播种，None时指定了
+                          sitemap_urls则使用，否则读取配置sitemaps.enabled（默认关闭）。
+                          站点地图中的URL按lastmod从新到旧作为深度1的URL加入爬取边界，
+                          边界中的URL不足时才读取下一个站点地图文件
+            sitemap_urls: 额外的站点地图或RSS/Atom订阅源URL
+            allowed_domains: 允许爬取的域名列表（含子域名），与same_domain_only的起始站点合并，
+                             None时读取配置scope.allowed_domains
+            
+        Yields:
+            单个URL的爬取结果字典，额外包含depth和success字段
         """
         if not self.is_running:
             self.initialize()
         
+        if summary is None:
+            summary = {}
+        sink = sink or self.result_sink
+        
         # 检查是否处于高级测试模式
         is_advanced_testing_mode = False
         # 高级测试模式功能（用于安全评估）
@@ -410,12 +537,45 @@ class PhantomCrawler:
         #         self.seven_desires.enable_session_cleaning()
         
         # 初始化数据结构
-        visited_urls: Set[str] = set()
-        results: Dict[str, Dict[str, Any]] = {}
-        queue = [(start_url, 0)]  # (url, depth)
-        
-        # 获取目标域名（如果限制在相同域名）
-        base_domain = urlparse(start_url).netloc if same_domain_only and not is_advanced_testing_mode else None
+        visited_urls = create_visited_store()
+        counters = {'total': 0, 'success': 0, 'failed': 0}
+        checkpoint = CrawlCheckpoint(state_dir) if state_dir else None
+        frontier = CrawlFrontier(connection=checkpoint.connection if checkpoint else None)
+        if state_dir:
+            # 溢出的正文与检查点放在一起
+            self.body_reader.use_state_dir(state_dir)
+        
+        crawl_params = {'start_url': start_url, 'max_depth': max_depth}
+        has_state = bool(checkpoint and resume and checkpoint.has_state())
+        if has_state and checkpoint.saved_params() != crawl_params:
+            # 检查点属于另一次爬取，不能继承它的已访问集合和爬取边界
+            print(f"[七宗欲爬虫] 检查点的爬取参数与当前不匹配，从头开始: {checkpoint.saved_params()}")
+            has_state = False
+        
+        if checkpoint:
+            checkpoint.sink = sink
+        if has_state:
+            completed = checkpoint.restore(frontier, visited_urls)
+            counters.update(checkpoint.counters)
+            print(f"[七宗欲爬虫] 从检查点恢复: 已完成 {completed} 个URL，待爬取 {len(frontier)} 个URL")
+        else:
+            if checkpoint:
+                checkpoint.reset()
+                checkpoint.params = crawl_params
+            frontier.push(start_url, 0)
+        
+        # 域名范围：起始URL所在的站点（如果限制在相同域名）加上允许列表，与包含/排除模式一起构成整个爬取共用的范围
+        domain_scope = None
+        if not is_advanced_testing_mode:
+            if allowed_domains is None:
+                allowed_domains = global_config.get('scope.allowed_domains', [])
+            if same_domain_only:
+                domain_scope = DomainScope.for_url(start_url)
+                for domain in allowed_domains:
+                    domain_scope.add(domain)
+            elif allowed_domains:
+                domain_scope = DomainScope(allowed_domains)
+        link_scope = LinkScope(domain_scope, include_patterns, exclude_patterns)
         
         # 高级测试模式输出
         # if is_advanced_testing_mode:
@@ -423,102 +583,426 @@ class PhantomCrawler:
         # else:
         print(f"[七宗欲爬虫] 开始迭代爬取，起始URL: {start_url}，最大深度: {max_depth}")
         
-        while queue and (max_urls is None or len(visited_urls) < max_urls):
-            current_url, depth = queue.pop(0)
-            
-            # 检查URL是否已访问
-            if current_url in visited_urls:
-                continue
-            
-            # 记录已访问
-            visited_urls.add(current_url)
-            print(f"[七宗欲爬虫] 爬取 {current_url} (深度: {depth}/{max_depth})")
-            
-            try:
-                # 爬取当前URL
-                result = self.crawl(current_url)
-                results[current_url] = result
+        if use_sitemaps is None:
+            # 显式指定的站点地图总是使用，robots.txt声明的站点地图需要在配置中启用
+            use_sitemaps = bool(sitemap_urls) or global_config.get('sitemaps.enabled', False)
+        seeder = self._create_sitemap_seeder(start_url, sitemap_urls, max_urls) \
+            if use_sitemaps and max_depth > 0 else None
+        seed_low_water = global_config.get('sitemaps.low_water', 1000)
+        
+        try:
+            scheduler = self.host_scheduler
+            while max_urls is None or len(visited_urls) < max_urls:
+                # 边界中的URL不足时，从下一个站点地图文件继续播种
+                while seeder is not None and len(frontier) < seed_low_water and seeder.has_pending():
+                    self._seed_from_sitemap(seeder, frontier, visited_urls, link_scope)
+                    summary['sitemaps'] = dict(seeder.stats)
+                if not frontier:
+                    break
+                
+                # 优先选择已冷却完毕的主机，只有所有主机都在冷却时才等待
+                current_url, depth = frontier.pop(scheduler.wait_time)
+                
+                # 检查URL是否已访问
+                if current_url in visited_urls:
+                    continue
+                
+                # 记录已访问
+                visited_urls.add(current_url)
+                
+                # robots.txt禁止的URL直接丢弃，不计入爬取结果
+                if not self._robots_allowed(current_url):
+                    counters['robots_skipped'] = counters.get('robots_skipped', 0) + 1
+                    continue
                 
-                # 高级测试模式下执行资源压力测试
-                # if is_advanced_testing_mode and hasattr(self.seven_desires, 'resource_stress_testing'):
-                #     self.seven_desires.resource_stress_testing(current_url, request_count=50, concurrency=10)
+                if checkpoint:
+                    checkpoint.begin(current_url, depth)
                 
-                # 如果深度未达限制且爬取成功，提取下一页链接
-                if depth < max_depth and result.get('success', False):
-                    # 从响应内容中提取链接
+                host = scheduler.host_of(current_url)
+                scheduler.wait(host)
+                scheduler.acquire(host)
+                try:
+                    result = self._crawl_frontier_url(current_url, depth, max_depth, frontier, visited_urls,
+                                                      link_scope)
+                finally:
+                    scheduler.release(host)
+                
+                counters['total'] += 1
+                counters['success' if result['success'] else 'failed'] += 1
+                counters['max_depth'] = max(counters.get('max_depth', 0), depth)
+                if sink:
+                    sink.write(result)
+                
+                # 交给消费者之前记为完成，消费者在此之后停止也不会丢失或重复该页面
+                if checkpoint:
+                    checkpoint.record_page(current_url, result['success'], depth)
+                    checkpoint.maybe_save(frontier)
+                self._update_iterative_summary(summary, counters, frontier, visited_urls, checkpoint)
+                
+                yield result
+            
+            if checkpoint:
+                checkpoint.save(frontier, status='running' if frontier else 'finished')
+            self._update_iterative_summary(summary, counters, frontier, visited_urls, checkpoint)
+        except (KeyboardInterrupt, GeneratorExit):
+            if checkpoint:
+                checkpoint.save(frontier, status='interrupted')
+                print(f"[七宗欲爬虫] 爬取被中断，检查点已保存至 {state_dir}，可使用resume继续")
+            raise
+        finally:
+            frontier.close()
+            if checkpoint:
+                checkpoint.close()
+    
+    def _create_sitemap_seeder(self, start_url: str, sitemap_urls: Optional[List[str]] = None,
+                               max_urls: Optional[int] = None) -> SitemapSeeder:
+        """
+        根据robots.txt的Sitemap声明创建站点地图播种器，没有声明时使用/sitemap.xml
+        
+        Args:
+            start_url: 起始URL
+            sitemap_urls: 额外的站点地图或订阅源URL
+            max_urls: 本次爬取的URL上限，站点地图产出的URL不超过该数量
+        """
+        urls = list(sitemap_urls or [])
+        if self.robots is not None:
+            # 确保已获取起始主机的robots.txt
+            self._robots_allowed(start_url)
+            urls.extend(self.robots.sitemaps(start_url))
+        if not urls:
+            parts = urlsplit(start_url)
+            urls.append(f"{parts.scheme}://{parts.netloc}/sitemap.xml")
+        limit = global_config.get('sitemaps.max_urls', 1000000)
+        if max_urls is not None:
+            limit = min(limit, max_urls)
+        return SitemapSeeder(self._open_sitemap_stream, urls, max_urls=max(1, limit))
+    
+    @contextmanager
+    def _open_sitemap_stream(self, url: str):
+        """流式读取站点地图，遵守主机调度，读完整个文件后释放主机"""
+        scheduler = self.host_scheduler
+        host = scheduler.host_of(url)
+        scheduler.wait(host)
+        scheduler.acquire(host)
+        try:
+            client = self.http_client or httpx.Client(timeout=30, follow_redirects=True)
+            with client.stream('GET', url, timeout=global_config.get('request_timeout', 30),
+                               follow_redirects=True) as response:
+                if response.status_code != 200:
+                    raise Exception(f"HTTP {response.status_code}")
+                yield response.iter_bytes()
+        finally:
+            scheduler.release(host)
+    
+    def _seed_from_sitemap(self, seeder: SitemapSeeder, frontier: CrawlFrontier, visited_urls,
+                           scope: LinkScope) -> int:
+        """读取下一个站点地图文件，把爬取范围内的URL按lastmod优先级加入爬取边界"""
+        pending = []
+        added = 0
+        robots = self.robots
+        
+        def flush():
+            nonlocal added
+            lastmods = {link.fingerprint: lastmod for link, lastmod in pending}
+            for link in scope.filter([link for link, _ in pending], visited_urls, robots):
+                if frontier.push(link.url, 1, lastmod_priority(lastmods[link.fingerprint]),
+                                 fingerprint=link.fingerprint, host=link.host):
+                    added += 1
+            pending.clear()
+        
+        def collect(entry):
+            link = parse_link(entry.url)
+            if link is not None:
+                pending.append((link, entry.lastmod))
+            if len(pending) >= 1000:
+                flush()
+        
+        seeder.read_next(collect)
+        flush()
+        if added:
+            print(f"[七宗欲爬虫] 从站点地图加入 {added} 个URL")
+        return added
+    
+    async def aiter_crawl(self, *args, **kwargs) -> AsyncIterator[Dict[str, Any]]:
+        """
+        iter_crawl的异步迭代器形式，参数与iter_crawl相同
+        
+        每一步爬取在一个专用的工作线程中执行，不阻塞事件循环；只有消费者请求下一条结果时才会继续抓取。
+        生成器持有的SQLite连接（检查点、边界溢出段）只能在创建它们的线程中使用，
+        因此所有步骤和最后的关闭都在同一个线程中执行。
+        """
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='aiter-crawl')
+        stream = self.iter_crawl(*args, **kwargs)
+        finished = object()
+        try:
+            while True:
+                result = await loop.run_in_executor(executor, next, stream, finished)
+                if result is finished:
+                    break
+                yield result
+        finally:
+            # 关闭排在仍在执行的步骤之后，在同一线程中进行，不阻塞事件循环
+            executor.submit(stream.close)
+            executor.shutdown(wait=False)
+    
+    def _crawl_frontier_url(self, current_url: str, depth: int, max_depth: int,
+                            frontier: CrawlFrontier, visited_urls,
+                            link_scope: LinkScope) -> Dict[str, Any]:
+        """爬取边界中的单个URL，并把新发现的链接加入爬取边界"""
+        print(f"[七宗欲爬虫] 爬取 {current_url} (深度: {depth}/{max_depth})")
+        
+        try:
+            # 爬取当前URL（结果由iter_crawl统一写入输出）
+            result = self._crawl_url(current_url)
+            result.setdefault('success', self._is_successful_result(result))
+            result['depth'] = depth
+            
+            # 高级测试模式下执行资源压力测试
+            # if is_advanced_testing_mode and hasattr(self.seven_desires, 'resource_stress_testing'):
+            #     self.seven_desires.resource_stress_testing(current_url, request_count=50, concurrency=10)
+            
+            # 如果深度未达限制且爬取成功，提取下一页链接
+            if depth < max_depth and result['success']:
+                # 从响应内容中提取链接
+                if isinstance(result, CrawlResult):
+                    # 直接从原始字节中提取，不需要先解码整个页面
+                    html_content = result.response.content
+                    encoding = result.response.encoding
+                else:
                     html_content = result.get('content', '')
-                    if html_content:
-                        # 提取所有链接
-                        all_links = self.html_parser.extract_links(html_content, current_url)
-                        
-                        # 过滤链接
-                        filtered_links = all_links
-                        
-                        # 根据域名过滤
-                        if same_domain_only and base_domain:
-                            filtered_links = self.html_parser.filter_links_by_domain(filtered_links, base_domain)
-                        
-                        # 根据模式过滤
-                        filtered_links = self.html_parser.filter_links_by_pattern(
-                            filtered_links, include_patterns, exclude_patterns
-                        )
-                        
-                        # 高级测试模式下执行并发测试
-                        # if is_advanced_testing_mode and hasattr(self.seven_desires, 'concurrent_link_testing'):
-                        #     self.seven_desires.concurrent_link_testing(filtered_links)
-                        
-                        # 添加未访问的链接到队列
-                        for link in filtered_links:
-                            if link not in visited_urls and not any(q[0] == link for q in queue):
-                                queue.append((link, depth + 1))
+                    encoding = None
+                if html_content and self.body_reader.is_html(result.get('content_type')):
+                    # 提取所有链接，每个链接只解析一次
+                    all_links = self.html_parser.extract_parsed_links(html_content, current_url, encoding)
                     
-                    # 添加人类行为延迟
-                    self.behavior_simulator.human_delay()
-                
-            except Exception as e:
-                error_msg = str(e)
-                # 高级测试模式下的错误处理
-                # if is_advanced_testing_mode:
-                #     print(f"[高级测试引擎] 测试 {current_url} 失败: {error_msg}")
-                #     # 在高级测试模式下进行策略优化
-                #     if hasattr(self.seven_desires, 'optimize_testing_strategy'):
-                #         self.seven_desires.optimize_testing_strategy({'reason': error_msg})
-                # else:
-                print(f"[七宗欲爬虫] 爬取 {current_url} 失败: {error_msg}")
-                
-                results[current_url] = {
-                    'success': False,
-                    'error': error_msg,
-                    'url': current_url,
-                    'timestamp': time.time()
-                }
+                    # 一次遍历完成域名、模式、已访问过滤；已缓存robots.txt的主机上被禁止的链接不再入队
+                    filtered_links = link_scope.filter(all_links, visited_urls, self.robots)
+                    
+                    # 高级测试模式下执行并发测试
+                    # if is_advanced_testing_mode and hasattr(self.seven_desires, 'concurrent_link_testing'):
+                    #     self.seven_desires.concurrent_link_testing(filtered_links)
+                    
+                    # 添加未访问的链接到爬取边界（边界自身负责去重）
+                    for link in filtered_links:
+                        frontier.push(link.url, depth + 1, fingerprint=link.fingerprint, host=link.host)
             
-            # 检查是否达到最大URL数量
-            if max_urls is not None and len(visited_urls) >= max_urls:
-                break
+            return self._externalize_content(result)
+            
+        except Exception as e:
+            error_msg = str(e)
+            # 高级测试模式下的错误处理
+            # if is_advanced_testing_mode:
+            #     print(f"[高级测试引擎] 测试 {current_url} 失败: {error_msg}")
+            #     # 在高级测试模式下进行策略优化
+            #     if hasattr(self.seven_desires, 'optimize_testing_strategy'):
+            #         self.seven_desires.optimize_testing_strategy({'reason': error_msg})
+            # else:
+            print(f"[七宗欲爬虫] 爬取 {current_url} 失败: {error_msg}")
+            
+            return {
+                'success': False,
+                'error': error_msg,
+                'url': current_url,
+                'depth': depth,
+                'timestamp': time.time()
+            }
+    
+    @staticmethod
+    def _is_successful_result(result: Dict[str, Any]) -> bool:
+        """根据状态码和阻止检测结果判断一次爬取是否成功"""
+        status_code = result.get('status_code') or 0
+        return 200 <= status_code < 400 and not result.get('blocked', False)
+    
+    @staticmethod
+    def _update_iterative_summary(summary: Dict[str, Any], counters: Dict[str, int],
+                                  frontier: CrawlFrontier, visited_urls,
+                                  checkpoint: Optional[CrawlCheckpoint]) -> None:
+        """原地更新迭代爬取的汇总信息"""
+        summary['total_urls'] = counters['total']
+        summary['successful_urls'] = counters['success']
+        summary['failed_urls'] = counters['failed']
+        summary['robots_skipped'] = counters.get('robots_skipped', 0)
+        # 实际爬取过的最大深度，边界耗尽后仍然有效
+        summary['max_depth_reached'] = counters.get('max_depth', 0)
+        summary['visited_count'] = len(visited_urls)
+        summary['visited_store'] = visited_urls.get_stats()
+        summary['frontier'] = frontier.get_stats()
+        if checkpoint:
+            summary['checkpoints_saved'] = checkpoint.saves
+    
+
+    def set_result_sink(self, sink: Optional[ResultSink]) -> None:
+        """
+        设置默认结果输出，爬虫关闭时一并关闭
         
-        # 生成汇总信息
-        summary = {
-            'total_urls': len(results),
-            'successful_urls': sum(1 for r in results.values() if r.get('success', False)),
-            'failed_urls': sum(1 for r in results.values() if not r.get('success', False)),
-            'max_depth_reached': max((d for _, d in queue), default=0) if queue else max_depth,
-            'visited_urls': list(visited_urls)
-        }
+        Args:
+            sink: 结果输出实例，None表示不输出
+        """
+        self.result_sink = sink
+    
+    def set_content_store(self, store: Optional[ContentStore]) -> None:
+        """
+        设置正文内容存储，爬虫关闭时一并关闭
         
-        # 此模式应永不见天日
-        # if is_hatred_mode and hasattr(self.seven_desires, 'self_replicate'):
-        #     self.seven_desires.self_replicate(start_url, list(visited_urls))
-        #     print(f"[恨世引擎] 链式感染完成，已感染 {summary['total_urls']} 个目标")
-        # else:
-        print(f"[七宗欲爬虫] 迭代爬取完成，总计爬取 {summary['total_urls']} 个URL")
+        设置后crawl/iter_crawl返回的结果不再包含content，而是content_hash与content_length，
+        正文可通过store.get(content_hash)读取
+        
+        Args:
+            store: 内容存储实例，None表示结果中直接保留正文
+        """
+        self.content_store = store
+    
+    def _externalize_content(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """把结果中的正文存入内容存储并替换为哈希引用"""
+        if self.content_store is None or result.get('content') is None:
+            return result
+        content = result.pop('content')
+        host = urlparse(result.get('url') or '').netloc.lower()
+        result['content_hash'] = self.content_store.put(content, host=host)
+        result['content_length'] = len(content)
+        return result
+    
+    def crawl(self, url: str, callback: Optional[Callable] = None, _playwright_attempted: bool = False,
+              sink: Optional[ResultSink] = None) -> Dict[str, Any]:
+        """
+        爬取单个URL
+        
+        Args:
+            url: 目标URL
+            callback: 收到响应后调用的回调函数
+            sink: 结果输出，None时使用爬虫的默认结果输出
+            
+        Returns:
+            爬取结果字典
+        """
+        # robots.txt禁止的URL不发起请求，也不写入结果输出
+        if not self._robots_allowed(url):
+            return self._robots_disallowed_result(url)
+        
+        # 只等待该主机的冷却时间，其他主机不受影响
+        scheduler = self.host_scheduler
+        host = scheduler.host_of(url)
+        scheduler.wait(host)
+        scheduler.acquire(host)
+        try:
+            result = self._crawl_url(url, callback, _playwright_attempted)
+        finally:
+            scheduler.release(host)
+        return self._emit_result(result, sink)
+    
+    def _emit_result(self, result: Dict[str, Any], sink: Optional[ResultSink] = None) -> Dict[str, Any]:
+        """外置正文并写入结果输出"""
+        result = self._externalize_content(result)
+        sink = sink or self.result_sink
+        if sink:
+            sink.write(result)
+        return result
+    
+    def set_http_cache(self, cache: Optional[HttpCache]) -> None:
+        """
+        设置HTTP重新验证缓存，None表示禁用
+        
+        Args:
+            cache: HTTP缓存实例
+        """
+        if self.http_cache and self.http_cache is not cache:
+            self.http_cache.close()
+        self.http_cache = cache
+    
+    def _apply_http_cache(self, url: str, response: httpx.Response, conditional: bool) -> httpx.Response:
+        """
+        根据响应更新HTTP缓存
         
+        304时用缓存的正文构造完整响应返回；缓存条目或正文已丢失时删除条目并原样返回304，
+        调用方应去掉验证器重新请求（见_needs_unconditional_retry）。带验证器的200响应写入缓存
+        
+        Args:
+            url: 原始请求URL
+            response: 服务器响应
+            conditional: 是否发送了条件请求
+            
+        Returns:
+            供后续处理的响应
+        """
+        if self.http_cache is None:
+            return response
+        try:
+            if response.status_code == 304 and conditional:
+                cached = self.http_cache.lookup(url)
+                if cached is not None:
+                    cached_response = httpx.Response(
+                        cached['status_code'],
+                        headers=cached['headers'],
+                        content=cached['content'],
+                        request=response.request,
+                        extensions={'from_http_cache': True}
+                    )
+                    return cached_response
+                self.http_cache.invalidate(url)
+            elif self.body_reader.is_complete(response):
+                self.http_cache.store(url, response.status_code, response.headers, response.content,
+                                      revalidated=conditional)
+        except Exception as e:
+            print(f"[PhantomCrawler] 更新HTTP缓存失败: {str(e)}")
+        return response
+    
+    @staticmethod
+    def _needs_unconditional_retry(response: httpx.Response, conditional: bool) -> bool:
+        """条件请求收到304但没有可用的缓存正文，需要不带验证器重新请求"""
+        return conditional and response.status_code == 304 and not response.extensions.get('from_http_cache')
+    
+    def _robots_allowed(self, url: str) -> bool:
+        """检查robots.txt是否允许爬取URL，需要时获取该主机的robots.txt"""
+        if self.robots is None:
+            return True
+        try:
+            return self.robots.is_allowed(url, self._fetch_robots)
+        except Exception as e:
+            print(f"[PhantomCrawler] robots.txt检查失败: {str(e)}")
+            return True
+    
+    def _fetch_robots(self, robots_url: str):
+        """使用爬虫的HTTP客户端获取robots.txt"""
+        client = self.http_client or httpx.Client(timeout=30, follow_redirects=True)
+        response = client.get(robots_url, timeout=global_config.get('request_timeout', 30), follow_redirects=True)
+        return response.status_code, response.text
+    
+    @staticmethod
+    def _robots_disallowed_result(url: str) -> Dict[str, Any]:
+        """robots.txt禁止爬取时返回的结果"""
+        print(f"[PhantomCrawler] robots.txt禁止爬取，已跳过: {url}")
         return {
-            'results': results,
-            'summary': summary
+            'url': url,
+            'status_code': None,
+            'error': 'robots.txt禁止爬取',
+            'robots_disallowed': True,
+            'blocked': False,
+            'success': False,
+            'timestamp': time.time()
         }
     
-    def crawl(self, url: str, callback: Optional[Callable] = None, _playwright_attempted: bool = False) -> Dict[str, Any]:
+    def _host_delay(self) -> float:
+        """同一主机相邻请求之间的间隔，与BehaviorSimulator.human_delay的取值范围一致"""
+        simulator = self.behavior_simulator
+        if simulator is None:
+            return random.uniform(1.0, 3.0)
+        pattern_params = simulator.pattern_parameters.get(simulator.behavior_pattern,
+                                                          simulator.pattern_parameters['normal'])
+        min_d = simulator.delay_min * pattern_params['delay_multiplier']
+        max_d = simulator.delay_max * pattern_params['delay_multiplier']
+        
+        # 根据环境风险调整延迟
+        risk = simulator.environment_awareness.get('detection_risk', 0)
+        if risk > 0.7:
+            min_d *= 1.5
+            max_d *= 2.0
+        elif risk > 0.4:
+            min_d *= 1.2
+            max_d *= 1.5
+        return random.uniform(min_d, max_d)
+    
+    def _crawl_url(self, url: str, callback: Optional[Callable] = None, _playwright_attempted: bool = False) -> Dict[str, Any]:
         # 检查是否启用了高级测试策略
         if self.seven_desires and hasattr(self.seven_desires, 'testing_strategies'):
             if self.seven_desires.testing_strategies.get('indiscriminate_attack', False):
@@ -576,8 +1060,10 @@ class PhantomCrawler:
             
             if self.seven_desires:
                 try:
-                    risk_level = getattr(self.seven_desires, 'desire_perception', {}).get('detection_danger', 0.3)
-                    dominant_desire = getattr(self.seven_desires, 'dominant_desire', '贪婪')
+                    # 读取最近一次分析发布的快照
+                    snapshot = self.outcome_pipeline.snapshot
+                    risk_level = snapshot.detection_danger
+                    dominant_desire = snapshot.dominant_desire
                     # 此模式应永不见天日
                     # is_hatred_mode = hasattr(self.seven_desires, 'hatred_mode') and dominant_desire == '恨世'
                 except Exception as e:
@@ -653,16 +1139,18 @@ class PhantomCrawler:
                         # 计算响应时间
                         response_time = time.time() - start_time
                         
-                        # 准备结果数据
-                        result = {
-                            'url': url,
-                            'status_code': response.status_code,
-                            'content': response.text,
-                            'headers': dict(response.headers),
-                            'cookies': dict(response.cookies),
-                            'response_time': response_time,
-                            'blocked': self._is_blocked(response)
-                        }
+                        # 准备结果数据（content、headers、cookies在首次访问时才解码）
+                        # 只有文本正文才解码，溢出到磁盘的正文以body_path引用
+                        content_type = self.body_reader.media_type(response.headers)
+                        result = CrawlResult(
+                            url, response,
+                            textual=self.body_reader.is_textual(content_type),
+                            response_time=response_time,
+                            blocked=self._is_blocked(response)
+                        )
+                        result.update(self.body_reader.describe(response))
+                        if response.extensions.get('from_http_cache'):
+                            result['not_modified'] = True
                         
                         # 调用回调函数
                         if callback:
@@ -679,8 +1167,8 @@ class PhantomCrawler:
                         # 检查是否被阻止
                         if result['blocked']:
                             print(f"[七宗欲爬虫] 检测到被阻止，启动备用策略")
-                            # 执行七宗欲分析（针对阻止情况）
-                            self._seven_desires_analysis(url, result, response_time, success=False)
+                            # 提交七宗欲分析（针对阻止情况）
+                            self._emit_outcome(EVENT_RESPONSE, url, result, response_time, success=False)
                             # 尝试Playwright备用方案
                             if self.playwright_available and not _playwright_attempted:
                                 return self._crawl_with_playwright(url, callback)
@@ -691,20 +1179,13 @@ class PhantomCrawler:
                                     print(f"[七宗欲爬虫] 更换身份后重试 (轮次 {self.current_retry_round}/{self.max_retry_rounds})")
                                     wait_time = self.retry_interval_base * self.current_retry_round
                                     time.sleep(wait_time)
-                                    return self.crawl(url, callback, _playwright_attempted)
+                                    return self._crawl_url(url, callback, _playwright_attempted)
                                 
                             # 所有尝试都失败，返回当前结果
                             return result
                         
-                        # 执行七宗欲分析（成功情况）
-                        self._seven_desires_analysis(url, result, response_time, success=True)
-                        
-                        # 安全更新环境感知
-                        if hasattr(self, 'behavior_simulator') and self.behavior_simulator and hasattr(self.behavior_simulator, '_update_environment_awareness'):
-                            try:
-                                self.behavior_simulator._update_environment_awareness(result)
-                            except Exception as e:
-                                print(f"[七宗欲爬虫] 更新环境感知失败: {str(e)}")
+                        # 提交七宗欲分析（成功情况），环境感知在分析时一并更新
+                        self._emit_outcome(EVENT_RESPONSE, url, result, response_time, success=True)
                         
                         # 更新连续成功记录
                         self.success_streak += 1
@@ -723,22 +1204,19 @@ class PhantomCrawler:
                         self.consecutive_failures += 1
                         self.success_streak = 0
                         
-                        # 执行七宗欲失败分析
-                        self._seven_desires_analysis(url, {'error': error_msg}, time.time() - start_time, success=False)
+                        # 提交七宗欲失败分析（同时记录失败到元认知系统）
+                        self._emit_outcome(EVENT_ERROR, url, {'error': error_msg}, time.time() - start_time, success=False)
                         
                         # 使用统一的错误处理方法
                         retry_needed = self._handle_request_error(error_msg, url)
                         
-                        # 记录失败到元认知系统
-                        self.seven_desires.record_failure(url, error_msg, self.current_strategies)
-                        
                         # 智能重试决策
                         if retry_needed and self.current_retry_round < self.max_retry_rounds:
                             self.current_retry_round += 1
                             wait_time = self.retry_interval_base * self.current_retry_round * (1 + random.random())
                             print(f"[PhantomCrawler] 等待 {wait_time:.2f} 秒后重试 (轮次 {self.current_retry_round}/{self.max_retry_rounds})")
                             time.sleep(wait_time)
-                            return self.crawl(url, callback, _playwright_attempted)
+                            return self._crawl_url(url, callback, _playwright_attempted)
                         
                         # 尝试Playwright作为最后手段
                         if self.playwright_available and not _playwright_attempted:
@@ -760,8 +1238,8 @@ class PhantomCrawler:
                 self.success_streak = 0
                 self.current_retry_round = 0  # 重置重试计数
                 
-                # 执行七宗欲失败分析（安全模式）
-                self._seven_desires_analysis(url, {'error': final_error}, time.time() - start_time, success=False)
+                # 提交七宗欲失败分析（安全模式）
+                self._emit_outcome(EVENT_FAILURE, url, {'error': final_error}, time.time() - start_time, success=False)
                 
                 # 尝试Playwright作为最后的备用方案
                 if self.playwright_available and not _playwright_attempted:
@@ -779,8 +1257,11 @@ class PhantomCrawler:
         retry_count = 0
         last_referrer = None
         
-        # 获取当前风险评估
-        risk_level = self.seven_desires.environment_awareness.get('detection_risk', 0)
+        # 有缓存条目时发送条件请求（按原始URL查找，不受追加的随机参数影响）
+        cache_headers = self.http_cache.conditional_headers(url) if self.http_cache else {}
+        
+        # 获取当前风险评估（最近一批分析发布的快照）
+        risk_level = self.outcome_pipeline.snapshot.detection_risk
         
         # 根据风险级别调整重试策略
         if risk_level > 0.7:
@@ -800,6 +1281,8 @@ class PhantomCrawler:
                 # 在高风险模式下使用更高级的指纹
                 if risk_level > 0.5 or pattern == 'stealth':
                     headers = self.fingerprint_spoofer.generate_advanced_fingerprint(headers)
+                if cache_headers:
+                    headers.update(cache_headers)
                 
                 request_signature = self.fingerprint_spoofer.generate_request_signature()
                 
@@ -843,13 +1326,14 @@ class PhantomCrawler:
                 if retry_count > 0:
                     self.behavior_simulator.human_delay()
                 
-                # 执行请求
-                response = self.http_client.get(
-                    new_url,
-                    headers=headers,
-                    timeout=adjusted_timeout,
-                    follow_redirects=True
-                )
+                # 执行请求（流式读取正文，先检查类型和长度）
+                response = self._send_streaming(new_url, headers, adjusted_timeout)
+                response = self._apply_http_cache(url, response, bool(cache_headers))
+                if self._needs_unconditional_retry(response, bool(cache_headers)):
+                    # 缓存条目已删除，本次不计入重试次数
+                    cache_headers = {}
+                    continue
+                self._decode_body(url, response)
                 
                 # 检查是否被阻止
                 if self._is_blocked(response):
@@ -921,6 +1405,28 @@ class PhantomCrawler:
         self.seven_desires.record_failure(url, 'max_retries_reached', self.current_strategies)
         raise Exception(f"达到最大重试次数 {max_retries}")
     
+    def _send_streaming(self, url: str, headers: Dict[str, str], timeout: float) -> httpx.Response:
+        """
+        以流的方式发送GET请求并按ResponseBodyReader的规则读取正文
+        
+        被拒绝的类型和超过上限的正文不会完整下载，连接在读取结束后立即关闭
+        """
+        request = self.http_client.build_request('GET', url, headers=headers, timeout=timeout)
+        response = self.http_client.send(request, stream=True, follow_redirects=True)
+        try:
+            return self.body_reader.read(response)
+        finally:
+            response.close()
+    
+    def _decode_body(self, url: str, response: httpx.Response) -> None:
+        """按CharsetDetector确定文本正文的编码并解码，二进制正文不解码"""
+        if not self.body_reader.is_textual(self.body_reader.media_type(response.headers)):
+            return
+        try:
+            self.charset_detector.decode_response(response, self.host_scheduler.host_of(url))
+        except Exception as e:
+            print(f"[PhantomCrawler] 正文解码失败: {str(e)}")
+    
     def _handle_request_error(self, error_msg: str, url: str) -> bool:
         """
         统一的请求错误处理方法
@@ -962,6 +1468,11 @@ class PhantomCrawler:
         if response.status_code in [403, 429, 503]:
             return True
         
+        # 未解码的正文（二进制、溢出到磁盘或被跳过）不做内容检测
+        if not self.body_reader.is_textual(self.body_reader.media_type(response.headers)) \
+                or response.extensions.get('body_path') or response.extensions.get('body_skipped'):
+            return False
+        
         # 检查响应内容中的阻止关键词
         blocked_keywords = [
             'captcha', '验证码', 'robot', 'automated', 'blocked', 
@@ -1057,8 +1568,7 @@ class PhantomCrawler:
     
     def _generate_desire_based_strategy(self, url: str):
         """基于七宗欲生成实战策略"""
-        dominant = self.seven_desires.dominant_desire if hasattr(self.seven_desires, 'dominant_desire') else '贪婪'
-        risk = self.seven_desires.desire_perception.get('detection_danger', 0) if hasattr(self.seven_desires, 'desire_perception') else 0
+        dominant, risk = self.outcome_pipeline.snapshot[:2]
         
         # 根据主导欲望调整策略
         strategies = {
@@ -1131,8 +1641,7 @@ class PhantomCrawler:
     
     def _get_desire_adjusted_delay(self):
         """根据七宗欲获取调整后的延迟"""
-        dominant = self.seven_desires.dominant_desire if hasattr(self.seven_desires, 'dominant_desire') else '贪婪'
-        risk = self.seven_desires.desire_perception.get('detection_danger', 0) if hasattr(self.seven_desires, 'desire_perception') else 0
+        dominant, risk = self.outcome_pipeline.snapshot[:2]
         
         # 基础延迟
         base_delay = self.current_strategies['delay']
@@ -1163,7 +1672,7 @@ class PhantomCrawler:
     
     def _get_risk_adjusted_headers(self):
         """获取基于风险等级调整的请求头"""
-        risk = self.seven_desires.desire_perception.get('detection_danger', 0) if hasattr(self.seven_desires, 'desire_perception') else 0
+        risk = self.outcome_pipeline.snapshot.detection_danger
         
         if risk > 0.5:
             # 高风险时生成全新指纹
@@ -1207,11 +1716,19 @@ class PhantomCrawler:
             
             # 安全地提取结果信息，避免异常
             try:
-                if isinstance(result, dict):
+                if isinstance(result, CrawlResult):
+                    # 只取分析需要的标量字段，不解码正文
+                    safe_result['status_code'] = result.get('status_code', 500)
+                    safe_result['error'] = str(result.get('error', 'Unknown error'))
+                    safe_result['blocked'] = result.get('blocked', False)
+                    safe_result['content_length'] = result.content_length
+                    safe_result['playwright_used'] = result.get('playwright_used', False)
+                    safe_result['risk_level'] = result.get('risk_level', 0.5)
+                elif isinstance(result, dict):
                     safe_result['status_code'] = result.get('status_code', 500)
                     safe_result['error'] = str(result.get('error', 'Unknown error'))
                     safe_result['blocked'] = result.get('blocked', False)
-                    safe_result['content_length'] = len(result.get('content', '')) if 'content' in result else 0
+                    safe_result['content_length'] = len(result.get('content', '')) if 'content' in result else result.get('content_length', 0)
                     safe_result['playwright_used'] = result.get('playwright_used', False)
                     safe_result['risk_level'] = result.get('risk_level', 0.5)
                 else:
@@ -1284,17 +1801,17 @@ class PhantomCrawler:
                 setattr(self, '_analysis_in_progress', False)
             print(f"[七宗欲爬虫-实战版] 分析完成，递归深度重置: {self._analysis_recursion_depth}")
     
-    def _metacognitive_analysis(self, url: str, result: Dict[str, Any], response_time: float):
-        """保持向后兼容的元认知分析方法"""
+    def _metacognitive_analysis(self, url: str, result: Dict[str, Any], response_time: float,
+                                success: Optional[bool] = None):
+        """保持向后兼容的元认知分析方法（成功连续次数由请求路径更新）"""
         # 调用七宗欲分析
-        success = result.get('status_code', 0) < 400 and not self._is_blocked_content(result.get('content', ''))
+        if success is None:
+            success = result.get('status_code', 0) < 400 and not self._is_blocked_content(result.get('content', ''))
         self._seven_desires_analysis(url, result, response_time, success)
         
-        # 更新成功连续次数
-        if result['status_code'] == 200 and not self._is_blocked_content(result.get('content', '')):
-            self.success_streak += 1
-        else:
-            self.success_streak = 0
+        # 没有配置自我感知监控器和学习优化器时只做七宗欲分析
+        if getattr(self, 'self_awareness', None) is None or getattr(self, 'learning_optimizer', None) is None:
+            return
         
         # 获取当前性能指标
         performance_metrics = self.self_awareness.get_performance_metrics()
@@ -1313,7 +1830,7 @@ class PhantomCrawler:
             {
                 'response_time': response_time,
                 'resource_usage': self.self_awareness.get_resource_metrics()['cpu_usage']['average'] / 100,
-                'success_streak': self.success_streak
+                'success_streak': result.get('success_streak', self.success_streak)
             }
         )
         
@@ -1333,6 +1850,69 @@ class PhantomCrawler:
         if len(self.crawl_history) % 10 == 0:
             self.learning_optimizer.replay_experiences()
     
+    def _emit_outcome(self, kind: str, url: str, result: Any, response_time: float, success: bool) -> None:
+        """
+        把请求结果作为紧凑事件提交给分析管线
+        
+        Args:
+            kind: 事件类型（EVENT_RESPONSE/EVENT_ERROR/EVENT_FAILURE/EVENT_BROWSER）
+            url: 目标URL
+            result: 爬取结果或错误信息字典
+            response_time: 响应时间（秒）
+            success: 是否成功
+        """
+        try:
+            self.outcome_pipeline.emit(OutcomeEvent.from_result(kind, url, result, response_time, success,
+                                                                self.success_streak))
+        except Exception as e:
+            print(f"[七宗欲爬虫] 提交分析事件失败: {str(e)}")
+    
+    def _apply_outcome_events(self, events: List[OutcomeEvent]) -> None:
+        """
+        执行七宗欲/元认知分析（由分析管线调用）
+        
+        Args:
+            events: 按提交顺序排列的事件
+        """
+        simulator = self.behavior_simulator
+        for event in events:
+            try:
+                result = event.as_result()
+                if event.kind == EVENT_BROWSER:
+                    self._metacognitive_analysis(event.url, result, event.response_time, event.success)
+                else:
+                    self._seven_desires_analysis(event.url, result, event.response_time, event.success)
+                
+                if event.kind == EVENT_ERROR and self.seven_desires:
+                    # 记录失败到元认知系统
+                    self.seven_desires.record_failure(event.url, event.error)
+                
+                # 更新环境感知（成功的响应和Playwright结果）
+                if simulator and (event.kind == EVENT_BROWSER or (event.kind == EVENT_RESPONSE and event.success)):
+                    try:
+                        simulator._update_environment_awareness(
+                            {'blocked': event.blocked, 'response_time': event.response_time}
+                        )
+                    except Exception as e:
+                        print(f"[七宗欲爬虫] 更新环境感知失败: {str(e)}")
+                
+                # Playwright未被阻止且连续成功时，略微降低风险评估
+                if event.kind == EVENT_BROWSER and not event.blocked and event.success_streak > 3:
+                    self.seven_desires.update_risk_level(event.url, -0.1)
+            except Exception as e:
+                print(f"[七宗欲爬虫] 分析事件处理失败: {str(e)}")
+    
+    def _take_strategy_snapshot(self) -> StrategySnapshot:
+        """读取七宗欲引擎中策略决策需要的状态"""
+        engine = self.seven_desires
+        if engine is None:
+            return StrategySnapshot()
+        return StrategySnapshot(
+            getattr(engine, 'dominant_desire', '贪婪'),
+            getattr(engine, 'desire_perception', {}).get('detection_danger', 0),
+            getattr(engine, 'environment_awareness', {}).get('detection_risk', 0)
+        )
+    
     def _record_failure(self, url: str, error_message: str):
         """[实战优化版] 记录失败并执行智能学习与自适应调整"""
         # 实战优化：添加记录失败的开始日志
@@ -1800,8 +2380,7 @@ class PhantomCrawler:
             from playwright.sync_api import sync_playwright
             
             # 从七宗欲引擎获取风险评估
-            risk_level = self.seven_desires.desire_perception['detection_danger'] if hasattr(self.seven_desires, 'desire_perception') else 0
-            dominant_desire = self.seven_desires.dominant_desire if hasattr(self.seven_desires, 'dominant_desire') else '贪婪'
+            dominant_desire, risk_level = self.outcome_pipeline.snapshot[:2]
             
             print(f"[七宗欲爬虫] Playwright模式 - {dominant_desire}驱动 - 风险等级: {risk_level:.2f}")
             
@@ -2248,15 +2827,16 @@ class PhantomCrawler:
                     'risk_level': risk_level
                 })
                 
-                # 执行元认知分析
-                self._metacognitive_analysis(url, result, response_time)
-                
-                # 更新环境感知
-                self.behavior_simulator._update_environment_awareness(result)
+                # 更新成功连续次数
+                content_blocked = self._is_blocked_content(final_content)
+                if result['status_code'] == 200 and not content_blocked:
+                    self.success_streak += 1
+                else:
+                    self.success_streak = 0
                 
-                # 如果未被阻止且连续成功，考虑降低风险评估
-                if not result['blocked'] and hasattr(self, 'success_streak') and self.success_streak > 3:
-                    self.seven_desires.update_risk_level(url, -0.1)  # 略微降低风险评估
+                # 提交元认知分析（环境感知和风险评估在分析时一并更新）
+                self._emit_outcome(EVENT_BROWSER, url, result, response_time,
+                                   success=result['status_code'] < 400 and not content_blocked)
                 
                 return result
                 
@@ -2297,28 +2877,25 @@ class PhantomCrawler:
             # 抛出异常以便上层捕获处理，但标记已经尝试过playwright
             raise Exception(f"Playwright爬取失败: {error_msg}") from e
     
-    def crawl_batch(self, urls: List[str], max_concurrent: int = 3) -> List[Dict[str, Any]]:
-        """批量爬取多个URL"""
-        results = []
+    def crawl_batch(self, urls: List[str], max_concurrent: int = 3,
+                    sink: Optional[ResultSink] = None) -> List[Dict[str, Any]]:
+        """批量爬取多个URL（同步顺序执行，多主机并发爬取请使用AsyncPhantomCrawler）
         
-        # 将URL分成批次
-        for i in range(0, len(urls), max_concurrent):
-            batch = urls[i:i+max_concurrent]
-            batch_results = []
-            
-            for url in batch:
-                result = self.crawl(url)
-                batch_results.append(result)
-                
-                # 批次内的URL之间添加延时
-                if url != batch[-1]:
-                    self.behavior_simulator.human_delay()
-            
-            results.extend(batch_results)
+        按主机调度：总是先爬取最早冷却完毕的主机，同一主机的相邻请求之间保持人类延迟，
+        只有所有主机都在冷却时才会等待。
+        
+        Args:
+            urls: URL列表
+            max_concurrent: 兼容旧接口保留，同步模式下不再分批
+            sink: 结果输出，None时使用爬虫的默认结果输出
             
-            # 批次之间添加更长的延时
-            if i + max_concurrent < len(urls):
-                time.sleep(random.uniform(5, 10))
+        Returns:
+            与输入顺序一致的爬取结果列表
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(urls)
+        
+        for index, url in self.host_scheduler.iter_ready(enumerate(urls), key=lambda item: item[1]):
+            results[index] = self.crawl(url, sink=sink)
         
         return results
     
@@ -2405,15 +2982,40 @@ class PhantomCrawler:
             # 关闭Playwright浏览器
             pass
         
+        if self.result_sink:
+            self.result_sink.close()
+        
+        if self.content_store:
+            self.content_store.close()
+        
+        if self.robots:
+            self.robots.close()
+        
+        if self.http_cache:
+            self.http_cache.close()
+        
         self.is_running = False
         print(f"[PhantomCrawler] 已关闭，会话ID: {self.session_id}")
     
     def get_stats(self) -> Dict[str, Any]:
         """获取爬虫统计信息"""
-        return {
+        stats = {
             'session_id': self.session_id,
             'crawl_count': len(self.crawl_history),
             'is_running': self.is_running,
             'behavior_stats': self.behavior_simulator.get_behavior_statistics(),
-            'proxy_count': len(self.protocol_obfuscator.proxy_chain)
-        }
\ No newline at end of file
+            'proxy_count': len(self.protocol_obfuscator.proxy_chain),
+            'scheduler_stats': self.host_scheduler.get_stats(),
+            'analysis_stats': self.outcome_pipeline.get_stats()
+        }
+        if self.robots:
+            stats['robots_stats'] = self.robots.get_stats()
+        if self.http_cache:
+            stats['http_cache_stats'] = self.http_cache.get_stats()
+        stats['body_stats'] = self.body_reader.get_stats()
+        stats['charset_stats'] = self.charset_detector.get_stats()
+        if self.result_sink:
+            stats['sink_stats'] = self.result_sink.get_stats()
+        if self.content_store:
+            stats['content_store_stats'] = self.content_store.get_stats()
+        return stats
@@ -37,7 +37,7 @@ def main():
     print(f"- 成功爬取: {summary['successful_urls']}")
     print(f"- 爬取失败: {summary['failed_urls']}")
     print(f"- 达到最大深度: {summary['max_depth_reached']}")
-    print(f"- 已访问URL列表: {', '.join(summary['visited_urls'][:5])}...")
+    print(f"- 已访问URL数: {summary['visited_count']}")
     print()
     
     # 示例2: 高级迭代爬取（使用URL过滤模式）
@@ -59,7 +59,7 @@ def main():
     print(f"\n高级爬取结果摘要:")
     print(f"- 总爬取URL数: {summary_advanced['total_urls']}")
     print(f"- 成功爬取: {summary_advanced['successful_urls']}")
-    print(f"- 已访问URL列表: {', '.join(summary_advanced['visited_urls'][:5])}...")
+    print(f"- 已访问URL数: {summary_advanced['visited_count']}")
     print()
     
     # 示例3: 爬取指定URL模式的页面内容
@@ -725,7 +725,7 @@ class BehaviorSimulator:
             interaction_counts[interaction] = interaction_counts.get(interaction, 0) + 1
         
         # 获取元认知洞察
-        metacognitive_insights = self.seven_desires.get_metacognitive_insights()
+        metacognitive_insights = self.seven_desires.get_metacognitive_insights(('system_state', 'recommendations'))
         
         return {
             'mouse_movement_enabled': self.mouse_movement_enabled,
@@ -740,7 +740,7 @@ class BehaviorSimulator:
             'actions_performed': len(self.action_history),
             'last_pattern_change': time.time() - self.last_pattern_change,
             'recommendations': metacognitive_insights['recommendations'],
-            'best_strategies': metacognitive_insights['best_strategies']
+            'best_strategies': metacognitive_insights.get('best_strategies', {})
         }
         
     def shutdown(self):
@@ -827,8 +827,8 @@ class BehaviorSimulator:
                 strategies_used=strategies_used
             )
         
-        # 基于元认知引擎的洞察更新本地状态
-        insights = self.seven_desires.get_metacognitive_insights()
+        # 基于元认知引擎的洞察更新本地状态（只读取需要的部分）
+        insights = self.seven_desires.get_metacognitive_insights(('system_state',))
         
         # 更新本地行为模式
         if 'current_behavior_pattern' in insights['system_state']:
@@ -848,7 +848,7 @@ class BehaviorSimulator:
     def _select_optimized_behavior_pattern(self):
         """基于元认知分析选择优化的行为模式"""
         # 使用元认知引擎进行决策
-        insights = self.seven_desires.get_metacognitive_insights()
+        insights = self.seven_desires.get_metacognitive_insights(('system_state', 'recommendations'))
         new_pattern = insights['system_state']['current_behavior_pattern']
         
         # 模式变更时间限制，避免频繁切换
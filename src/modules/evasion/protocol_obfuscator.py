@@ -59,6 +59,27 @@ class ProtocolObfuscator:
         
         return proxy_chain
     
+    def _build_proxy_url(self) -> Optional[str]:
+        """从代理链中取下一个代理并构建代理URL"""
+        if not self.proxy_chain:
+            return None
+        
+        # 获取下一个代理
+        proxy = self.get_next_proxy()
+        
+        # 构建代理URL
+        if proxy and proxy.get('type') == 'http':
+            proxy_url = f"http://{proxy.get('host')}:{proxy.get('port')}"
+            if proxy.get('username') and proxy.get('password'):
+                proxy_url = f"http://{proxy['username']}:{proxy['password']}@{proxy['host']}:{proxy['port']}"
+        elif proxy and proxy.get('type') == 'socks5':
+            proxy_url = f"socks5://{proxy.get('host')}:{proxy.get('port')}"
+            if proxy.get('username') and proxy.get('password'):
+                proxy_url = f"socks5://{proxy['username']}:{proxy['password']}@{proxy['host']}:{proxy['port']}"
+        else:
+            proxy_url = None
+        return proxy_url
+    
     def create_proxied_httpx_client(self) -> httpx.Client:
         """创建配置了代理链的httpx客户端"""
         client_kwargs = {}
@@ -67,27 +88,12 @@ class ProtocolObfuscator:
         client_kwargs['timeout'] = httpx.Timeout(global_config.get('request_timeout', 30.0))
         
         # 只有在有代理链时才添加代理配置
-        if self.proxy_chain:
-            # 获取下一个代理
-            proxy = self.get_next_proxy()
-            
-            # 构建代理URL
-            if proxy and proxy.get('type') == 'http':
-                proxy_url = f"http://{proxy.get('host')}:{proxy.get('port')}"
-                if proxy.get('username') and proxy.get('password'):
-                    proxy_url = f"http://{proxy['username']}:{proxy['password']}@{proxy['host']}:{proxy['port']}"
-            elif proxy and proxy.get('type') == 'socks5':
-                proxy_url = f"socks5://{proxy.get('host')}:{proxy.get('port')}"
-                if proxy.get('username') and proxy.get('password'):
-                    proxy_url = f"socks5://{proxy['username']}:{proxy['password']}@{proxy['host']}:{proxy['port']}"
-            else:
-                proxy_url = None
-            
-            if proxy_url:
-                client_kwargs['proxies'] = {
-                    "http://": proxy_url,
-                    "https://": proxy_url,
-                }
+        proxy_url = self._build_proxy_url()
+        if proxy_url:
+            client_kwargs['proxies'] = {
+                "http://": proxy_url,
+                "https://": proxy_url,
+            }
         
         # 创建客户端
         client = httpx.Client(**client_kwargs)
@@ -97,6 +103,41 @@ class ProtocolObfuscator:
         
         return client
     
+    def create_proxied_async_httpx_client(self, max_connections: int = 100,
+                                          max_keepalive_connections: int = 20) -> httpx.AsyncClient:
+        """创建配置了代理链的异步httpx客户端
+        
+        Args:
+            max_connections: 连接池的最大连接数
+            max_keepalive_connections: 保持活动的最大连接数
+            
+        Returns:
+            异步httpx客户端
+        """
+        client_kwargs = {
+            'timeout': httpx.Timeout(global_config.get('request_timeout', 30.0)),
+            'limits': httpx.Limits(max_connections=max_connections,
+                                   max_keepalive_connections=max_keepalive_connections),
+            'follow_redirects': True
+        }
+        
+        proxy_url = self._build_proxy_url()
+        if proxy_url:
+            client_kwargs['proxies'] = {
+                "http://": proxy_url,
+                "https://": proxy_url,
+            }
+        
+        client = httpx.AsyncClient(**client_kwargs)
+        
+        # 异步客户端的钩子必须是协程
+        async def request_hook(request: httpx.Request) -> None:
+            self._request_hook(request)
+        
+        client.event_hooks['request'] = [request_hook]
+        
+        return client
+    
     def _request_hook(self, request: httpx.Request) -> None:
         """请求前的钩子，用于添加额外的混淆"""
         # 随机添加一些无害的头部来混淆指纹
@@ -0,0 +1,272 @@
+# PhantomCrawler - 爬取检查点模块
+import os
+import json
+import time
+import sqlite3
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from src.config import global_config
+from src.modules.frontier.frontier import CrawlFrontier
+from src.utils.url_fingerprint import url_fingerprint
+
+
+class CrawlCheckpoint:
+    """
+    爬取检查点
+
+    将爬取边界、已访问URL指纹、主机状态、输出偏移和计数器保存在状态目录下的
+    SQLite数据库中。每次保存都在同一个事务中完成，崩溃或中断后磁盘上保留的
+    总是最近一次完整的检查点。
+
+    爬取边界与检查点共享同一个连接：边界溢出段的写入只在检查点时随其他状态
+    一起提交，恢复时无需重放任何日志，只需读回内存窗口和已访问集合。
+
+    设置sink后，每次保存先让结果输出写出已提交的结果并记录输出位置，与已完成的页面在同一个
+    事务中保存；恢复时把输出截断到该位置，检查点之后写出、将被重新爬取的页面不会重复出现。
+    主机统计保存在crawl_hosts表中，每次只写入上次保存之后变化的主机。
+    """
+
+    DB_NAME = 'crawl_state.db'
+
+    def __init__(self, state_dir: str, interval_pages: Optional[int] = None,
+                 interval_seconds: Optional[float] = None):
+        """
+        Args:
+            state_dir: 状态目录
+            interval_pages: 每爬取多少个页面保存一次检查点
+            interval_seconds: 距上次保存超过多少秒时保存检查点
+        """
+        os.makedirs(state_dir, exist_ok=True)
+        self.state_dir = state_dir
+        self.db_path = os.path.join(state_dir, self.DB_NAME)
+        self.interval_pages = interval_pages or global_config.get('checkpoint.interval_pages', 50)
+        self.interval_seconds = interval_seconds or global_config.get('checkpoint.interval_seconds', 60)
+
+        self.connection = sqlite3.connect(self.db_path)
+        self.connection.execute('PRAGMA journal_mode = WAL')
+        self.connection.execute('PRAGMA synchronous = NORMAL')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS crawl_visited (fp INTEGER PRIMARY KEY)'
+        )
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS crawl_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)'
+        )
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS crawl_hosts ('
+            'host TEXT PRIMARY KEY, fetched INTEGER NOT NULL, failed INTEGER NOT NULL, last_fetch REAL)'
+        )
+        CrawlFrontier.create_tables(self.connection)
+        self.connection.commit()
+
+        # 需要持久化的运行状态
+        self.counters: Dict[str, int] = {'total': 0, 'success': 0, 'failed': 0}
+        self.offsets: Dict[str, Any] = {}
+        self.params: Dict[str, Any] = {}
+        # 结果输出，保存时记录其位置
+        self.sink = None
+
+        # 上次保存之后的主机统计增量：主机 -> [爬取数, 失败数, 最后爬取时间]
+        self._host_updates: Dict[str, List[Any]] = {}
+
+        # 正在爬取、尚未记录结果的URL，保存时一并写入，恢复时重新入队
+        self._in_flight: Optional[Tuple[str, int]] = None
+        self._pending_visited: List[int] = []
+        self._pages_since_save = 0
+        self._last_save = time.time()
+        self.saves = 0
+
+    def has_state(self) -> bool:
+        """状态目录中是否存在可恢复的检查点"""
+        row = self.connection.execute(
+            "SELECT 1 FROM crawl_meta WHERE key = 'status'"
+        ).fetchone()
+        return row is not None
+
+    def saved_params(self) -> Dict[str, Any]:
+        """读取检查点保存的爬取参数（不恢复其他状态），用于判断检查点是否属于当前爬取"""
+        row = self.connection.execute(
+            "SELECT value FROM crawl_meta WHERE key = 'params'"
+        ).fetchone()
+        return (json.loads(row[0]) if row else None) or {}
+
+    def status(self) -> Optional[str]:
+        """获取检查点状态（running/interrupted/finished），没有检查点时返回None"""
+        row = self.connection.execute(
+            "SELECT value FROM crawl_meta WHERE key = 'status'"
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def reset(self) -> None:
+        """清空状态目录中已有的检查点"""
+        for table in ('crawl_visited', 'crawl_meta', 'crawl_hosts', 'frontier_spill', 'frontier_window'):
+            self.connection.execute(f'DELETE FROM {table}')
+        self.connection.commit()
+
+    def begin(self, url: str, depth: int = 0) -> None:
+        """标记开始爬取某个URL"""
+        self._in_flight = (url, depth)
+
+    def record_page(self, url: str, success: bool, depth: Optional[int] = None) -> None:
+        """
+        记录一个已完成的页面
+
+        Args:
+            url: 已完成的URL
+            success: 是否爬取成功
+            depth: 页面所在深度，提供时记录已爬取的最大深度
+        """
+        self._in_flight = None
+        self._pending_visited.append(url_fingerprint(url))
+        self._pages_since_save += 1
+
+        self.counters['total'] += 1
+        self.counters['success' if success else 'failed'] += 1
+        if depth is not None:
+            self.counters['max_depth'] = max(self.counters.get('max_depth', 0), depth)
+
+        host = urlsplit(url).netloc.lower()
+        update = self._host_updates.get(host)
+        if update is None:
+            update = self._host_updates[host] = [0, 0, 0.0]
+        update[0] += 1
+        if not success:
+            update[1] += 1
+        update[2] = time.time()
+
+    def host_stats(self, host: str) -> Dict[str, Any]:
+        """
+        获取主机的累计统计（包括尚未保存的部分）
+
+        Returns:
+            {'fetched': 爬取数, 'failed': 失败数, 'last_fetch': 最后爬取时间}
+        """
+        row = self.connection.execute(
+            'SELECT fetched, failed, last_fetch FROM crawl_hosts WHERE host = ?', (host,)
+        ).fetchone() or (0, 0, 0.0)
+        update = self._host_updates.get(host, (0, 0, 0.0))
+        return {'fetched': row[0] + update[0], 'failed': row[1] + update[1],
+                'last_fetch': max(row[2] or 0.0, update[2])}
+
+    def is_due(self) -> bool:
+        """是否到了保存检查点的时间"""
+        if self._pages_since_save >= self.interval_pages:
+            return True
+        return self._pages_since_save > 0 and time.time() - self._last_save >= self.interval_seconds
+
+    def maybe_save(self, frontier: Optional[CrawlFrontier] = None) -> bool:
+        """到期时保存检查点
+
+        Returns:
+            是否执行了保存
+        """
+        if not self.is_due():
+            return False
+        self.save(frontier)
+        return True
+
+    def save(self, frontier: Optional[CrawlFrontier] = None, status: str = 'running') -> None:
+        """
+        在单个事务中保存完整检查点
+
+        Args:
+            frontier: 与检查点共享连接的爬取边界
+            status: 检查点状态
+        """
+        # 先让输出写出已提交的结果，记录的位置与本次保存的已完成页面一致
+        if self.sink is not None:
+            position = self.sink.mark()
+            if position is not None:
+                self.offsets['sink'] = position
+
+        conn = self.connection
+        try:
+            if frontier is not None:
+                frontier.snapshot()
+            if self._pending_visited:
+                conn.executemany(
+                    'INSERT OR IGNORE INTO crawl_visited (fp) VALUES (?)',
+                    ((fingerprint,) for fingerprint in self._pending_visited)
+                )
+            if self._host_updates:
+                conn.executemany(
+                    'INSERT INTO crawl_hosts (host, fetched, failed, last_fetch) VALUES (?, ?, ?, ?) '
+                    'ON CONFLICT(host) DO UPDATE SET fetched = fetched + excluded.fetched, '
+                    'failed = failed + excluded.failed, last_fetch = excluded.last_fetch',
+                    [(host, *update) for host, update in self._host_updates.items()]
+                )
+
+            meta = {
+                'status': status,
+                'counters': self.counters,
+                'offsets': self.offsets,
+                'params': self.params,
+                'in_flight': self._in_flight,
+                'frontier_stats': frontier.stats if frontier is not None else None,
+                'saved_at': time.time()
+            }
+            # 旧版的主机统计已迁移到crawl_hosts表
+            conn.execute("DELETE FROM crawl_meta WHERE key = 'hosts'")
+            conn.executemany(
+                'INSERT OR REPLACE INTO crawl_meta (key, value) VALUES (?, ?)',
+                [(key, json.dumps(value, ensure_ascii=False)) for key, value in meta.items()]
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        self._pending_visited = []
+        self._host_updates = {}
+        self._pages_since_save = 0
+        self._last_save = time.time()
+        self.saves += 1
+
+    def restore(self, frontier: Optional[CrawlFrontier] = None, visited=None) -> int:
+        """
+        从检查点恢复运行状态，设置了sink时把输出截断到检查点位置
+
+        Args:
+            frontier: 与检查点共享连接的爬取边界，恢复其内存窗口与溢出段
+            visited: 已访问URL存储，恢复已完成URL的指纹
+
+        Returns:
+            已完成的URL数量
+        """
+        meta = {
+            key: json.loads(value)
+            for key, value in self.connection.execute('SELECT key, value FROM crawl_meta')
+        }
+        self.counters.update(meta.get('counters') or {})
+        self.offsets = meta.get('offsets') or {}
+        self.params = meta.get('params') or {}
+        # 旧版检查点把主机统计整体保存在crawl_meta中
+        for host, state in (meta.get('hosts') or {}).items():
+            self._host_updates[host] = [state.get('fetched', 0), state.get('failed', 0), state.get('last_fetch', 0.0)]
+        if self.sink is not None and self.offsets.get('sink'):
+            self.sink.truncate(self.offsets['sink'])
+
+        if frontier is not None:
+            frontier.restore()
+            if meta.get('frontier_stats'):
+                frontier.stats.update(meta['frontier_stats'])
+            # 中断时正在爬取的URL重新入队
+            in_flight = meta.get('in_flight')
+            if in_flight:
+                frontier.push(in_flight[0], in_flight[1])
+
+        completed = 0
+        cursor = self.connection.execute('SELECT fp FROM crawl_visited')
+        for (fingerprint,) in cursor:
+            if visited is not None:
+                visited.add_fingerprint(fingerprint)
+            completed += 1
+        self._last_save = time.time()
+        return completed
+
+    def close(self) -> None:
+        """关闭检查点数据库连接"""
+        try:
+            self.connection.close()
+        except Exception:
+            pass
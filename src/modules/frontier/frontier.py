@@ -0,0 +1,412 @@
+# PhantomCrawler - 爬取边界模块
+import os
+import heapq
+import sqlite3
+import tempfile
+import itertools
+from collections import deque
+from typing import Callable, Dict, Iterable, Optional, Tuple
+from urllib.parse import urlsplit
+
+from src.config import global_config
+from src.utils.url_fingerprint import url_fingerprint
+
+
+class CrawlFrontier:
+    """
+    爬取边界（待爬URL集合）
+
+    - 基于64位URL指纹的O(1)成员检查
+    - 按深度、按主机划分子队列：总是先出队最浅的深度，同一深度内按主机轮询
+    - 内存窗口有上限，超出的URL溢出到磁盘上的SQLite段，窗口回落后再批量回填
+
+    无论边界里有一千还是一千万个URL，内存占用和单步开销都保持平稳。
+    """
+
+    def __init__(self, max_in_memory: Optional[int] = None,
+                 refill_batch: Optional[int] = None,
+                 spill_path: Optional[str] = None,
+                 connection: Optional[sqlite3.Connection] = None):
+        """
+        Args:
+            max_in_memory: 内存窗口中最多保留的URL数量
+            refill_batch: 每次从磁盘段回填到内存的URL数量
+            spill_path: 溢出段SQLite文件路径，None时在临时目录中创建
+            connection: 外部SQLite连接（如检查点数据库）。提供时溢出段写入该连接，
+                        且不自行提交，由连接的所有者在检查点时统一提交
+        """
+        if max_in_memory is None:
+            max_in_memory = global_config.get('frontier.max_in_memory', 100000)
+        if refill_batch is None:
+            refill_batch = global_config.get('frontier.refill_batch', max(1, max_in_memory // 4))
+        self.max_in_memory = max_in_memory
+        self.refill_batch = max(1, refill_batch)
+        self._spill_path = spill_path
+        self._owns_spill_file = False
+
+        # 内存窗口：深度 -> 主机 -> 堆[(-优先级, 序号, URL, 指纹)]
+        self._queues: Dict[int, Dict[str, list]] = {}
+        # 每个深度上仍有待处理URL的主机轮询环，条目为(主机, 令牌)
+        self._host_rings: Dict[int, deque] = {}
+        # 每个深度上在环中的主机 -> 有效令牌；令牌不一致的环条目已失效，轮到时丢弃（惰性删除）
+        self._ring_members: Dict[int, Dict[str, int]] = {}
+        self._ring_tokens = itertools.count()
+        # 内存窗口中URL的指纹集合
+        self._memory_fingerprints = set()
+
+        # 磁盘溢出段（首次溢出时才打开）
+        self._conn: Optional[sqlite3.Connection] = connection
+        self._external_conn = connection is not None
+        if connection is not None:
+            self.create_tables(connection)
+        self._spill_count = 0
+        self._spill_depths: Dict[int, int] = {}
+        self._uncommitted_writes = 0
+
+        # 所有待处理URL的深度分布，用于汇总
+        self._depth_counts: Dict[int, int] = {}
+        self._seq = itertools.count()
+
+        self.stats = {
+            'pushed': 0,
+            'duplicates': 0,
+            'popped': 0,
+            'spilled': 0,
+            'refilled': 0
+        }
+
+    def __len__(self) -> int:
+        return len(self._memory_fingerprints) + self._spill_count
+
+    def __contains__(self, url: str) -> bool:
+        return self._contains_fingerprint(url_fingerprint(url))
+
+    def push(self, url: str, depth: int, priority: float = 0.0,
+             fingerprint: Optional[int] = None, host: Optional[str] = None) -> bool:
+        """
+        将URL加入边界
+
+        Args:
+            url: 待爬取的URL
+            depth: URL所在深度
+            priority: 同一主机、同一深度内的优先级，越大越先出队
+            fingerprint: 已计算的URL指纹（如ParsedLink.fingerprint），省略时重新计算
+            host: 已解析的小写主机（如ParsedLink.host），省略时重新解析
+
+        Returns:
+            URL已在边界中时返回False，否则返回True
+        """
+        if fingerprint is None:
+            fingerprint = url_fingerprint(url)
+        if self._contains_fingerprint(fingerprint):
+            self.stats['duplicates'] += 1
+            return False
+
+        if host is None:
+            host = urlsplit(url).netloc.lower()
+        if len(self._memory_fingerprints) < self.max_in_memory:
+            self._push_memory(url, depth, host, priority, fingerprint, next(self._seq))
+        else:
+            self._spill(url, depth, host, priority, fingerprint)
+
+        self._depth_counts[depth] = self._depth_counts.get(depth, 0) + 1
+        self.stats['pushed'] += 1
+        return True
+
+    def push_many(self, urls: Iterable[str], depth: int, priority: float = 0.0) -> int:
+        """
+        批量加入同一深度的URL
+
+        Returns:
+            实际新加入的URL数量
+        """
+        added = 0
+        for url in urls:
+            if self.push(url, depth, priority):
+                added += 1
+        return added
+
+    def pop(self, wait_time: Optional[Callable[[str], float]] = None) -> Optional[Tuple[str, int]]:
+        """
+        取出下一个待爬取的URL
+
+        Args:
+            wait_time: 返回主机还需冷却多少秒的函数（如HostScheduler.wait_time）。
+                       提供时优先选择已就绪的主机：先在最浅深度内查找，再依次查找更深的深度；
+                       所有主机都在冷却时选择最早就绪的主机
+
+        Returns:
+            (url, depth)元组，边界为空时返回None
+        """
+        if self._spill_count and self._should_refill():
+            self._refill()
+
+        if not self._host_rings:
+            return None
+
+        if wait_time is None:
+            depth = min(self._host_rings)
+            host = self._ring_head(depth)
+            self._ring_take(depth, host)
+        else:
+            depth, host = self._pop_ready_host(wait_time)
+        host_queues = self._queues[depth]
+        heap = host_queues[host]
+        _, _, url, fingerprint = heapq.heappop(heap)
+
+        if heap:
+            self._ring_append(depth, host)
+        else:
+            del host_queues[host]
+            if not host_queues:
+                del self._host_rings[depth]
+                del self._ring_members[depth]
+                del self._queues[depth]
+
+        self._memory_fingerprints.discard(fingerprint)
+        self._decrement_depth(depth)
+        self.stats['popped'] += 1
+        return url, depth
+
+    def max_pending_depth(self) -> int:
+        """返回边界中待处理URL的最大深度，边界为空时返回0"""
+        return max(self._depth_counts, default=0)
+
+    def get_stats(self) -> Dict[str, int]:
+        """获取边界统计信息"""
+        stats = dict(self.stats)
+        stats['in_memory'] = len(self._memory_fingerprints)
+        stats['on_disk'] = self._spill_count
+        stats['hosts_in_memory'] = sum(len(members) for members in self._ring_members.values())
+        return stats
+
+    @staticmethod
+    def create_tables(conn: sqlite3.Connection) -> None:
+        """在给定连接上创建溢出段表和内存窗口快照表"""
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS frontier_spill ('
+            'seq INTEGER PRIMARY KEY, fp INTEGER NOT NULL UNIQUE, url TEXT NOT NULL, '
+            'depth INTEGER NOT NULL, host TEXT NOT NULL, priority REAL NOT NULL)'
+        )
+        conn.execute(
+            'CREATE INDEX IF NOT EXISTS frontier_spill_order '
+            'ON frontier_spill (depth, priority DESC, seq)'
+        )
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS frontier_window ('
+            'seq INTEGER PRIMARY KEY, fp INTEGER NOT NULL, url TEXT NOT NULL, '
+            'depth INTEGER NOT NULL, host TEXT NOT NULL, priority REAL NOT NULL)'
+        )
+
+    def snapshot(self) -> None:
+        """
+        将内存窗口写入外部连接的frontier_window表
+
+        不提交事务：调用方（检查点）负责在同一事务中写入其他状态后统一提交，
+        这样磁盘上的溢出段与窗口快照总是对应同一时刻。
+        """
+        if not self._external_conn:
+            raise RuntimeError('snapshot需要通过connection参数提供外部连接')
+
+        rows = [
+            (seq, fingerprint, url, depth, host, -neg_priority)
+            for depth, host_queues in self._queues.items()
+            for host, heap in host_queues.items()
+            for neg_priority, seq, url, fingerprint in heap
+        ]
+        self._conn.execute('DELETE FROM frontier_window')
+        self._conn.executemany(
+            'INSERT INTO frontier_window (seq, fp, url, depth, host, priority) VALUES (?, ?, ?, ?, ?, ?)',
+            rows
+        )
+
+    def restore(self) -> None:
+        """从外部连接恢复上一次快照时的内存窗口与溢出段计数"""
+        if not self._external_conn:
+            raise RuntimeError('restore需要通过connection参数提供外部连接')
+
+        conn = self._conn
+        max_seq = -1
+        for depth, count, depth_max_seq in conn.execute(
+                'SELECT depth, COUNT(*), MAX(seq) FROM frontier_spill GROUP BY depth'):
+            self._spill_depths[depth] = count
+            self._spill_count += count
+            self._depth_counts[depth] = self._depth_counts.get(depth, 0) + count
+            max_seq = max(max_seq, depth_max_seq)
+
+        for seq, fingerprint, url, depth, host, priority in conn.execute(
+                'SELECT seq, fp, url, depth, host, priority FROM frontier_window ORDER BY seq'):
+            self._push_memory(url, depth, host, priority, fingerprint, seq)
+            self._depth_counts[depth] = self._depth_counts.get(depth, 0) + 1
+            max_seq = max(max_seq, seq)
+
+        self._seq = itertools.count(max_seq + 1)
+
+    def close(self) -> None:
+        """关闭溢出段并清理临时文件"""
+        if self._external_conn:
+            # 外部连接由其所有者负责关闭
+            self._conn = None
+            return
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+        if self._owns_spill_file and self._spill_path:
+            for suffix in ('', '-journal'):
+                try:
+                    os.remove(self._spill_path + suffix)
+                except OSError:
+                    pass
+            self._owns_spill_file = False
+
+    def _contains_fingerprint(self, fingerprint: int) -> bool:
+        if fingerprint in self._memory_fingerprints:
+            return True
+        if self._spill_count:
+            row = self._conn.execute(
+                'SELECT 1 FROM frontier_spill WHERE fp = ?', (fingerprint,)
+            ).fetchone()
+            return row is not None
+        return False
+
+    def _push_memory(self, url: str, depth: int, host: str, priority: float,
+                     fingerprint: int, seq: int) -> None:
+        host_queues = self._queues.get(depth)
+        if host_queues is None:
+            host_queues = self._queues[depth] = {}
+            self._host_rings[depth] = deque()
+            self._ring_members[depth] = {}
+
+        heap = host_queues.get(host)
+        if heap is None:
+            heap = host_queues[host] = []
+            self._ring_append(depth, host)
+
+        heapq.heappush(heap, (-priority, seq, url, fingerprint))
+        self._memory_fingerprints.add(fingerprint)
+
+    def _pop_ready_host(self, wait_time: Callable[[str], float]) -> Tuple[int, str]:
+        # 刚出队过的主机会被放到轮询环末尾，环首通常已就绪，扫描很快结束
+        best = None
+        # 同一主机可能出现在多个深度上，每次扫描只取一次等待时间，保证较浅的深度优先
+        waits: Dict[str, float] = {}
+        for depth in sorted(self._host_rings):
+            ring = self._host_rings[depth]
+            for _ in range(len(self._ring_members[depth])):
+                host = self._ring_head(depth)
+                wait = waits.get(host)
+                if wait is None:
+                    wait = waits[host] = wait_time(host)
+                if wait <= 0:
+                    self._ring_take(depth, host)
+                    return depth, host
+                if best is None or wait < best[0]:
+                    best = (wait, depth, host)
+                ring.rotate(-1)
+
+        # 最早就绪的主机不在环首：只让它的环条目失效，不在环中线性查找删除
+        _, depth, host = best
+        del self._ring_members[depth][host]
+        return depth, host
+
+    def _ring_append(self, depth: int, host: str) -> None:
+        token = next(self._ring_tokens)
+        self._ring_members[depth][host] = token
+        self._host_rings[depth].append((host, token))
+
+    def _ring_head(self, depth: int) -> str:
+        # 丢弃环首的失效条目，返回环首的主机（调用方保证该深度上还有主机）
+        ring = self._host_rings[depth]
+        members = self._ring_members[depth]
+        while True:
+            host, token = ring[0]
+            if members.get(host) == token:
+                return host
+            ring.popleft()
+
+    def _ring_take(self, depth: int, host: str) -> None:
+        # 从环首取出主机
+        self._host_rings[depth].popleft()
+        del self._ring_members[depth][host]
+
+    def _decrement_depth(self, depth: int) -> None:
+        remaining = self._depth_counts.get(depth, 0) - 1
+        if remaining > 0:
+            self._depth_counts[depth] = remaining
+        else:
+            self._depth_counts.pop(depth, None)
+
+    def _open_spill(self) -> sqlite3.Connection:
+        if self._conn is not None:
+            return self._conn
+
+        if not self._spill_path:
+            spill_dir = global_config.get('frontier.spill_dir')
+            if spill_dir:
+                os.makedirs(spill_dir, exist_ok=True)
+            fd, self._spill_path = tempfile.mkstemp(prefix='frontier_', suffix='.db', dir=spill_dir)
+            os.close(fd)
+            self._owns_spill_file = True
+
+        conn = sqlite3.connect(self._spill_path)
+        # 临时溢出段不需要持久性保证
+        conn.execute('PRAGMA synchronous = OFF')
+        self.create_tables(conn)
+        self._conn = conn
+        return conn
+
+    def _spill(self, url: str, depth: int, host: str, priority: float, fingerprint: int) -> None:
+        conn = self._open_spill()
+        conn.execute(
+            'INSERT INTO frontier_spill (seq, fp, url, depth, host, priority) VALUES (?, ?, ?, ?, ?, ?)',
+            (next(self._seq), fingerprint, url, depth, host, priority)
+        )
+        self._spill_count += 1
+        self._spill_depths[depth] = self._spill_depths.get(depth, 0) + 1
+        self.stats['spilled'] += 1
+        self._maybe_commit()
+
+    def _should_refill(self) -> bool:
+        # 内存窗口为空，或磁盘段中存在比内存更浅的URL时回填，保证按深度出队
+        if not self._host_rings:
+            return True
+        return min(self._spill_depths) < min(self._host_rings)
+
+    def _refill(self) -> None:
+        # 内存窗口已满时不回填，下一次出队腾出空间后再从磁盘段取最浅的URL；
+        # 窗口上限为0时窗口总是空的，每次只回填一个
+        room = self.max_in_memory - len(self._memory_fingerprints)
+        if room <= 0 and self._memory_fingerprints:
+            return
+        limit = max(1, min(self.refill_batch, room))
+        rows = self._conn.execute(
+            'SELECT seq, fp, url, depth, host, priority FROM frontier_spill '
+            'ORDER BY depth, priority DESC, seq LIMIT ?', (limit,)
+        ).fetchall()
+        if not rows:
+            return
+
+        self._conn.executemany('DELETE FROM frontier_spill WHERE seq = ?', [(row[0],) for row in rows])
+        for seq, fingerprint, url, depth, host, priority in rows:
+            self._push_memory(url, depth, host, priority, fingerprint, seq)
+            remaining = self._spill_depths[depth] - 1
+            if remaining:
+                self._spill_depths[depth] = remaining
+            else:
+                del self._spill_depths[depth]
+
+        self._spill_count -= len(rows)
+        self.stats['refilled'] += len(rows)
+        self._maybe_commit(len(rows))
+
+    def _maybe_commit(self, writes: int = 1) -> None:
+        # 定期提交，避免回滚日志无限增长；外部连接只在检查点时提交
+        if self._external_conn:
+            return
+        self._uncommitted_writes += writes
+        if self._uncommitted_writes >= 10000:
+            self._conn.commit()
+            self._uncommitted_writes = 0
@@ -0,0 +1,243 @@
+# PhantomCrawler - 主机礼貌调度模块
+import heapq
+import itertools
+import random
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+from urllib.parse import urlsplit
+
+from src.config import global_config
+
+
+class _HostState:
+    """单个主机的令牌桶与下一次允许请求的时间"""
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated', 'next_allowed', 'crawl_delay', 'requests')
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+        self.next_allowed = 0.0
+        self.crawl_delay = 0.0
+        self.requests = 0
+
+    def refill(self, now: float) -> None:
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def ready_time(self, now: float) -> float:
+        self.refill(now)
+        token_time = now if self.tokens >= 1 else now + (1 - self.tokens) / self.rate
+        return max(token_time, self.next_allowed)
+
+
+class HostScheduler:
+    """
+    按主机的礼貌调度器
+
+    每个主机维护一个令牌桶和下一次允许请求的时间：
+    - 请求结束后，下一次允许时间推迟一个人类延迟（与BehaviorSimulator.human_delay的取值一致）
+    - 令牌桶按最小延迟补充令牌，同一主机有多个并发请求时仍限制其请求开始的频率
+    - robots.txt的Crawl-delay可通过set_crawl_delay收紧单个主机的速率
+
+    iter_ready总是选出最早就绪的主机，只有所有待爬主机都在冷却时才会空等，
+    等待一个主机时其他主机的URL可以继续爬取。单个主机看到的请求频率与逐个sleep时相同。
+
+    令牌桶已满且已过下一次允许时间的主机与新主机没有区别，定期从状态表中移除，
+    大范围爬取时内存只与正在冷却的主机数量有关。Crawl-delay单独保存，主机状态重建时重新应用。
+    """
+
+    def __init__(self, delay_min: Optional[float] = None, delay_max: Optional[float] = None,
+                 burst: Optional[float] = None, delay_provider: Optional[Callable[[], float]] = None,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        """
+        Args:
+            delay_min: 同一主机相邻请求的最小间隔（秒）
+            delay_max: 同一主机相邻请求的最大间隔（秒）
+            burst: 令牌桶容量，即同一主机允许的突发请求数
+            delay_provider: 返回下一次间隔的函数，提供时替代[delay_min, delay_max]均匀分布
+            clock: 单调时钟
+            sleep: 阻塞等待函数
+        """
+        self.delay_min = delay_min if delay_min is not None else global_config.get('behavior_simulator.delay_min', 1.0)
+        self.delay_max = delay_max if delay_max is not None else global_config.get('behavior_simulator.delay_max', 3.0)
+        self.delay_max = max(self.delay_max, self.delay_min)
+        self.burst = max(1.0, burst or global_config.get('scheduler.burst', 1))
+        self.delay_provider = delay_provider
+        self.clock = clock
+        self.sleep = sleep
+
+        self._hosts: Dict[str, _HostState] = {}
+        # 设置过Crawl-delay的主机 -> 间隔秒数
+        self._crawl_delays: Dict[str, float] = {}
+        self._acquired_since_sweep = 0
+        self.stats = {
+            'acquired': 0,
+            'idle_waits': 0,
+            'idle_seconds': 0.0,
+            'evicted': 0
+        }
+
+    @staticmethod
+    def host_of(url: str) -> str:
+        """返回URL的主机键"""
+        return urlsplit(url).netloc.lower()
+
+    def _state(self, host: str) -> _HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            rate = 1.0 / self.delay_min if self.delay_min > 0 else float('inf')
+            state = self._hosts[host] = _HostState(rate, self.burst, self.clock())
+            crawl_delay = self._crawl_delays.get(host)
+            if crawl_delay:
+                self._apply_crawl_delay(state, crawl_delay)
+        return state
+
+    def _apply_crawl_delay(self, state: _HostState, seconds: float) -> None:
+        state.crawl_delay = max(0.0, seconds)
+        if seconds > 0:
+            state.rate = min(state.rate, 1.0 / seconds)
+            state.capacity = 1.0
+            state.tokens = min(state.tokens, 1.0)
+
+    def _evict_idle(self, now: float) -> None:
+        """移除令牌桶已满且已过下一次允许时间的主机（重建后的状态与之相同）"""
+        idle = []
+        for host, state in self._hosts.items():
+            state.refill(now)
+            if state.tokens >= state.capacity and state.next_allowed <= now:
+                idle.append(host)
+        for host in idle:
+            del self._hosts[host]
+        self.stats['evicted'] += len(idle)
+
+    def next_delay(self) -> float:
+        """下一次同主机请求的间隔"""
+        if self.delay_provider is not None:
+            return self.delay_provider()
+        return random.uniform(self.delay_min, self.delay_max)
+
+    def set_crawl_delay(self, host: str, seconds: float) -> None:
+        """
+        为主机设置最小请求间隔（如robots.txt的Crawl-delay）
+
+        Args:
+            host: 主机键
+            seconds: 相邻请求开始的最小间隔
+        """
+        if seconds > 0:
+            self._crawl_delays[host] = seconds
+        else:
+            self._crawl_delays.pop(host, None)
+        self._apply_crawl_delay(self._state(host), seconds)
+
+    def ready_time(self, host: str) -> float:
+        """主机下一次可以发起请求的时钟时间"""
+        state = self._hosts.get(host)
+        if state is None:
+            return self.clock()
+        return state.ready_time(self.clock())
+
+    def wait_time(self, host: str) -> float:
+        """距离主机就绪还需等待的秒数"""
+        return max(0.0, self.ready_time(host) - self.clock())
+
+    def acquire(self, host: str) -> None:
+        """在向主机发起请求前调用，消耗一个令牌"""
+        now = self.clock()
+        # 每累计与主机数量相当的请求清理一次空闲主机，均摊开销为常数
+        self._acquired_since_sweep += 1
+        if self._acquired_since_sweep >= max(1024, len(self._hosts)):
+            self._acquired_since_sweep = 0
+            self._evict_idle(now)
+        state = self._state(host)
+        state.refill(now)
+        state.tokens -= 1
+        state.requests += 1
+        if state.crawl_delay:
+            state.next_allowed = max(state.next_allowed, now + state.crawl_delay)
+        self.stats['acquired'] += 1
+
+    def release(self, host: str, delay: Optional[float] = None) -> None:
+        """
+        在主机的请求结束后调用，安排下一次允许请求的时间
+
+        Args:
+            host: 主机键
+            delay: 本次之后的间隔，None时使用人类延迟
+        """
+        state = self._state(host)
+        if delay is None:
+            delay = self.next_delay()
+        state.next_allowed = max(state.next_allowed, self.clock() + max(delay, state.crawl_delay))
+
+    def wait(self, host: str) -> float:
+        """
+        阻塞直到主机就绪
+
+        Returns:
+            实际等待的秒数
+        """
+        wait = self.wait_time(host)
+        if wait > 0:
+            self.stats['idle_waits'] += 1
+            self.stats['idle_seconds'] += wait
+            self.sleep(wait)
+        return wait
+
+    def iter_ready(self, items: Iterable[Any], key: Optional[Callable[[Any], str]] = None) -> Iterator[Any]:
+        """
+        按主机就绪顺序产出条目
+
+        每次产出最早就绪主机的下一个条目，所有主机都在冷却时先等待最早的一个。
+        消费者负责在请求前后调用acquire/release（PhantomCrawler.crawl会自动完成），
+        下一个条目根据更新后的就绪时间选出。同一主机的条目保持原有顺序。
+
+        Args:
+            items: 待调度的条目，默认为URL
+            key: 从条目取得URL的函数
+
+        Yields:
+            条目
+        """
+        queues: Dict[str, deque] = {}
+        for item in items:
+            host = self.host_of(key(item) if key else item)
+            queue = queues.get(host)
+            if queue is None:
+                queue = queues[host] = deque()
+            queue.append(item)
+
+        seq = itertools.count()
+        heap = [(self.ready_time(host), next(seq), host) for host in queues]
+        heapq.heapify(heap)
+
+        while heap:
+            ready, _, host = heapq.heappop(heap)
+            # 就绪时间可能在入堆后被推迟（如设置了Crawl-delay）
+            current = self.ready_time(host)
+            if current > ready and current > self.clock():
+                heapq.heappush(heap, (current, next(seq), host))
+                continue
+
+            # 堆顶主机尚未就绪，说明所有主机都在冷却
+            self.wait(host)
+
+            queue = queues[host]
+            yield queue.popleft()
+
+            if queue:
+                heapq.heappush(heap, (self.ready_time(host), next(seq), host))
+            else:
+                del queues[host]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取调度统计信息"""
+        stats = dict(self.stats)
+        stats['hosts'] = len(self._hosts)
+        stats['cooling_hosts'] = sum(1 for host in self._hosts if self.wait_time(host) > 0)
+        return stats
@@ -0,0 +1,400 @@
+# PhantomCrawler - robots.txt缓存模块
+import os
+import re
+import time
+import sqlite3
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit, unquote
+
+from src.config import global_config
+
+
+class RobotsRules:
+    """
+    编译后的robots.txt规则
+
+    规则按RFC 9309的最长匹配原则预先排序（路径模式越长越优先，长度相同时Allow优先），
+    检查时返回第一个匹配的规则。不含通配符的规则用str.startswith匹配，
+    含*或$的规则编译为正则表达式。
+    """
+
+    __slots__ = ('rules', 'crawl_delay', 'sitemaps', 'allow_all', 'disallow_all')
+
+    def __init__(self, rules: Optional[List[Tuple[str, bool]]] = None, crawl_delay: Optional[float] = None,
+                 sitemaps: Optional[List[str]] = None, disallow_all: bool = False):
+        """
+        Args:
+            rules: (路径模式, 是否允许)列表
+            crawl_delay: Crawl-delay（秒）
+            sitemaps: 声明的站点地图URL
+            disallow_all: 整个站点禁止爬取（robots.txt暂时不可达时使用）
+        """
+        compiled = []
+        for pattern, allow in rules or []:
+            if not pattern:
+                # 空的Disallow表示不限制，空的Allow没有意义
+                continue
+            if '*' in pattern or pattern.endswith('$'):
+                regex = re.escape(pattern).replace(r'\*', '.*')
+                if regex.endswith(r'\$'):
+                    regex = regex[:-2] + '$'
+                matcher = re.compile(regex).match
+            else:
+                matcher = None
+            compiled.append((len(pattern), allow, pattern, matcher))
+        compiled.sort(key=lambda rule: (-rule[0], not rule[1]))
+
+        self.rules = [(allow, pattern, matcher) for _, allow, pattern, matcher in compiled]
+        self.crawl_delay = crawl_delay
+        self.sitemaps = sitemaps or []
+        self.disallow_all = disallow_all
+        self.allow_all = not disallow_all and all(allow for allow, _, _ in self.rules)
+
+    def is_allowed(self, path: str) -> bool:
+        """
+        检查路径（含查询字符串）是否允许爬取
+
+        Args:
+            path: 以/开头的URL路径
+        """
+        if self.allow_all:
+            return True
+        if self.disallow_all:
+            return False
+        for allow, pattern, matcher in self.rules:
+            if matcher is None:
+                if path.startswith(pattern):
+                    return allow
+            elif matcher(path):
+                return allow
+        return True
+
+    @classmethod
+    def parse(cls, text: str, user_agent: str = '*') -> 'RobotsRules':
+        """
+        解析robots.txt内容
+
+        选择与user_agent（不区分大小写）完全匹配的组，没有匹配时使用*组；同一个用户代理的多个组合并。
+
+        Args:
+            text: robots.txt内容
+            user_agent: 爬虫的产品标识
+
+        Returns:
+            编译后的规则
+        """
+        agent = user_agent.lower()
+        groups: List[Tuple[List[str], List[Tuple[str, bool]], Optional[float]]] = []
+        sitemaps = []
+        agents: List[str] = []
+        rules: List[Tuple[str, bool]] = []
+        delay: Optional[float] = None
+        in_rules = False
+
+        for line in text.splitlines():
+            line = line.split('#', 1)[0].strip()
+            if ':' not in line:
+                continue
+            field, value = line.split(':', 1)
+            field = field.strip().lower()
+            value = value.strip()
+
+            if field == 'user-agent':
+                if in_rules:
+                    groups.append((agents, rules, delay))
+                    agents, rules, delay = [], [], None
+                    in_rules = False
+                agents.append(value.lower())
+            elif field in ('allow', 'disallow'):
+                if agents:
+                    in_rules = True
+                    rules.append((cls._normalize_path(value), field == 'allow'))
+            elif field == 'crawl-delay':
+                if agents:
+                    in_rules = True
+                    try:
+                        delay = float(value)
+                    except ValueError:
+                        pass
+            elif field == 'sitemap':
+                if value:
+                    sitemaps.append(value)
+        if agents:
+            groups.append((agents, rules, delay))
+
+        # 与产品标识完全匹配的组优先，其次是*
+        best_length = -1
+        selected_rules: List[Tuple[str, bool]] = []
+        selected_delay = None
+        for group_agents, group_rules, group_delay in groups:
+            for name in group_agents:
+                if name == '*':
+                    length = 0
+                elif name == agent:
+                    length = len(name)
+                else:
+                    continue
+                if length > best_length:
+                    best_length = length
+                    selected_rules = list(group_rules)
+                    selected_delay = group_delay
+                elif length == best_length:
+                    selected_rules.extend(group_rules)
+                    if selected_delay is None:
+                        selected_delay = group_delay
+                break
+
+        return cls(selected_rules, selected_delay, sitemaps)
+
+    @staticmethod
+    def _normalize_path(value: str) -> str:
+        # 规则与URL路径都按解码后的形式比较
+        return unquote(value) if '%' in value else value
+
+
+class RobotsCache:
+    """
+    robots.txt获取、解析与缓存
+
+    - 每个主机只获取一次robots.txt，编译后的规则保存在内存中，最多保留max_hosts个主机（LRU）
+    - 原始内容连同过期时间保存在SQLite中，下次运行时在TTL内直接复用
+    - 4xx视为不限制；5xx按RFC 9309视为整站暂不可爬，并使用较短的重试TTL
+    - 连接失败或超时视为不限制，只在内存中保留更短的unreachable_ttl，之后重新获取
+    - Crawl-delay传给主机调度器，收紧该主机的请求间隔
+    """
+
+    MAX_BODY_CHARS = 512000
+    # 连接失败或超时时使用的状态码
+    STATUS_UNREACHABLE = 0
+
+    def __init__(self, cache_path: Optional[str] = None, ttl: Optional[float] = None,
+                 error_ttl: Optional[float] = None, user_agent: Optional[str] = None,
+                 scheduler=None, max_crawl_delay: Optional[float] = None,
+                 unreachable_ttl: Optional[float] = None, max_hosts: Optional[int] = None):
+        """
+        Args:
+            cache_path: 持久化缓存的SQLite文件路径，空字符串表示只在内存中缓存
+            ttl: 成功获取的robots.txt的缓存时间（秒）
+            error_ttl: 服务器返回5xx时的缓存时间（秒）
+            user_agent: 匹配robots.txt用户代理组的产品标识
+            scheduler: 主机调度器（HostScheduler），用于应用Crawl-delay
+            max_crawl_delay: Crawl-delay的上限（秒）
+            unreachable_ttl: 连接失败或超时时的缓存时间（秒）
+            max_hosts: 内存中缓存规则的最大主机数
+        """
+        if cache_path is None:
+            cache_path = global_config.get('robots.cache_path', 'data/robots_cache.db')
+        self.ttl = ttl or global_config.get('robots.ttl', 86400)
+        self.error_ttl = error_ttl or global_config.get('robots.error_ttl', 600)
+        self.user_agent = user_agent or global_config.get('robots.user_agent', 'PhantomCrawler')
+        self.max_crawl_delay = max_crawl_delay or global_config.get('robots.max_crawl_delay', 60)
+        self.unreachable_ttl = unreachable_ttl or global_config.get('robots.unreachable_ttl', 60)
+        self.max_hosts = max_hosts or global_config.get('robots.max_hosts', 10000)
+        self.scheduler = scheduler
+
+        # 主机键（scheme://netloc） -> (规则, 过期时间)，按最近使用排序，只在_lock内修改
+        self._rules: 'OrderedDict[str, Tuple[RobotsRules, float]]' = OrderedDict()
+        self._lock = threading.RLock()
+        self._pending: Dict[str, asyncio.Future] = {}
+
+        self._conn: Optional[sqlite3.Connection] = None
+        if cache_path:
+            directory = os.path.dirname(cache_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(cache_path, check_same_thread=False)
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS robots_cache ('
+                'origin TEXT PRIMARY KEY, status INTEGER, body TEXT, fetched_at REAL, expires REAL)'
+            )
+            self._conn.commit()
+
+        self.stats = {
+            'fetches': 0,
+            'disk_hits': 0,
+            'memory_hits': 0,
+            'allowed': 0,
+            'disallowed': 0,
+            'unreachable': 0,
+            'evicted': 0
+        }
+
+    @staticmethod
+    def _split(url: str) -> Tuple[str, str, str]:
+        parts = urlsplit(url)
+        origin = f"{parts.scheme.lower()}://{parts.netloc.lower()}"
+        path = parts.path or '/'
+        if '%' in path:
+            path = unquote(path)
+        if parts.query:
+            path = f"{path}?{parts.query}"
+        return origin, parts.netloc.lower(), path
+
+    def is_allowed(self, url: str, fetch: Optional[Callable[[str], Tuple[int, str]]] = None) -> bool:
+        """
+        检查URL是否允许爬取，需要时同步获取robots.txt
+
+        Args:
+            url: 待检查的URL
+            fetch: 获取函数，接收robots.txt的URL，返回(状态码, 内容)
+
+        Returns:
+            是否允许爬取
+        """
+        _, _, path = self._split(url)
+        allowed = self.get_rules(url, fetch).is_allowed(path)
+        self.stats['allowed' if allowed else 'disallowed'] += 1
+        return allowed
+
+    async def ais_allowed(self, url: str, fetch: Callable[[str], Awaitable[Tuple[int, str]]]) -> bool:
+        """is_allowed的异步形式，同一主机的并发检查只触发一次获取"""
+        origin, _, path = self._split(url)
+        rules = self._cached(origin)
+        if rules is None:
+            pending = self._pending.get(origin)
+            if pending is None:
+                pending = self._pending[origin] = asyncio.ensure_future(self._afetch(origin, fetch))
+                pending.add_done_callback(lambda _: self._pending.pop(origin, None))
+            rules = await asyncio.shield(pending)
+        allowed = rules.is_allowed(path)
+        self.stats['allowed' if allowed else 'disallowed'] += 1
+        return allowed
+
+    def get_rules(self, url: str, fetch: Optional[Callable[[str], Tuple[int, str]]] = None) -> RobotsRules:
+        """获取URL所在主机的规则，缓存缺失或过期时获取robots.txt"""
+        origin = self._split(url)[0]
+        rules = self._cached(origin)
+        if rules is not None:
+            return rules
+
+        with self._lock:
+            # 等待锁期间可能已被其他线程获取
+            rules = self._cached(origin)
+            if rules is not None:
+                return rules
+            try:
+                status, body = (fetch or self._default_fetch)(origin + '/robots.txt')
+            except Exception as e:
+                print(f"[PhantomCrawler] 获取 {origin}/robots.txt 失败: {str(e)}")
+                status, body = self.STATUS_UNREACHABLE, ''
+            return self._store(origin, status, body)
+
+    async def _afetch(self, origin: str, fetch: Callable[[str], Awaitable[Tuple[int, str]]]) -> RobotsRules:
+        try:
+            status, body = await fetch(origin + '/robots.txt')
+        except Exception as e:
+            print(f"[PhantomCrawler] 获取 {origin}/robots.txt 失败: {str(e)}")
+            status, body = self.STATUS_UNREACHABLE, ''
+        return self._store(origin, status, body)
+
+    def check_cached(self, url: str) -> Optional[bool]:
+        """
+        只用已缓存的规则检查URL，不触发获取
+
+        Returns:
+            是否允许爬取，主机规则尚未缓存时返回None
+        """
+        origin, _, path = self._split(url)
+        rules = self._cached(origin)
+        return rules.is_allowed(path) if rules is not None else None
+
+    def crawl_delay(self, url: str) -> Optional[float]:
+        """返回URL所在主机已缓存的Crawl-delay，未缓存时返回None"""
+        rules = self._cached(self._split(url)[0])
+        return rules.crawl_delay if rules is not None else None
+
+    def sitemaps(self, url: str) -> List[str]:
+        """返回URL所在主机robots.txt中声明的站点地图，未缓存时返回空列表"""
+        rules = self._cached(self._split(url)[0])
+        return list(rules.sitemaps) if rules is not None else []
+
+    def _cached(self, origin: str) -> Optional[RobotsRules]:
+        now = time.time()
+        with self._lock:
+            entry = self._rules.get(origin)
+            if entry is not None:
+                if entry[1] > now:
+                    self._rules.move_to_end(origin)
+                    self.stats['memory_hits'] += 1
+                    return entry[0]
+                del self._rules[origin]
+
+        if self._conn is None:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT status, body, expires FROM robots_cache WHERE origin = ?', (origin,)
+            ).fetchone()
+        if row is None or row[2] <= now:
+            return None
+        self.stats['disk_hits'] += 1
+        rules = self._compile(row[0], row[1])
+        self._remember(origin, rules, row[2])
+        return rules
+
+    def _store(self, origin: str, status: int, body: str) -> RobotsRules:
+        self.stats['fetches'] += 1
+        # 只解析前500KiB（RFC 9309要求的最小解析长度）
+        body = (body or '')[:self.MAX_BODY_CHARS]
+        rules = self._compile(status, body)
+        now = time.time()
+        if status == self.STATUS_UNREACHABLE:
+            # 网络错误是暂时的，只在内存中短暂记住，不写入持久化缓存
+            self.stats['unreachable'] += 1
+            self._remember(origin, rules, now + self.unreachable_ttl)
+            return rules
+        expires = now + (self.ttl if 200 <= status < 500 else self.error_ttl)
+        self._remember(origin, rules, expires)
+        if self._conn is not None:
+            try:
+                with self._lock:
+                    self._conn.execute(
+                        'INSERT OR REPLACE INTO robots_cache (origin, status, body, fetched_at, expires) '
+                        'VALUES (?, ?, ?, ?, ?)', (origin, status, body, now, expires)
+                    )
+                    self._conn.commit()
+            except sqlite3.Error as e:
+                print(f"[PhantomCrawler] 保存robots.txt缓存失败: {str(e)}")
+        return rules
+
+    def _compile(self, status: int, body: str) -> RobotsRules:
+        if 200 <= status < 300:
+            return RobotsRules.parse(body, self.user_agent)
+        if 400 <= status < 500 or status == self.STATUS_UNREACHABLE:
+            return RobotsRules()
+        return RobotsRules(disallow_all=True)
+
+    def _remember(self, origin: str, rules: RobotsRules, expires: float) -> None:
+        with self._lock:
+            self._rules[origin] = (rules, expires)
+            self._rules.move_to_end(origin)
+            while len(self._rules) > self.max_hosts:
+                self._rules.popitem(last=False)
+                self.stats['evicted'] += 1
+        if self.scheduler is not None and rules.crawl_delay:
+            host = urlsplit(origin).netloc
+            self.scheduler.set_crawl_delay(host, min(rules.crawl_delay, self.max_crawl_delay))
+
+    @staticmethod
+    def _default_fetch(url: str) -> Tuple[int, str]:
+        import httpx
+        response = httpx.get(url, timeout=global_config.get('request_timeout', 30), follow_redirects=True)
+        return response.status_code, response.text
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        stats = dict(self.stats)
+        stats['hosts'] = len(self._rules)
+        return stats
+
+    def close(self) -> None:
+        """关闭持久化缓存"""
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
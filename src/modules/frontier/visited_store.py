@@ -0,0 +1,252 @@
+# PhantomCrawler - 已访问URL存储模块
+import math
+from array import array
+from typing import Any, Dict, Iterable, Optional
+
+from src.config import global_config
+from src.utils.url_fingerprint import url_fingerprint
+
+
+class FingerprintVisitedStore:
+    """
+    精确模式的已访问URL存储
+
+    只保存URL的64位指纹，放在array('q')实现的开放寻址哈希表中（线性探测，
+    0作为空槽标记），每个URL约占16字节，而Python字符串加set槽位通常超过150字节。
+    两个不同URL指纹相同的概率约为 n²/2⁶⁵，百万级URL时可以忽略。
+    """
+
+    mode = 'exact'
+    _MAX_LOAD = 0.5
+
+    def __init__(self, initial_capacity: int = 1024):
+        """
+        Args:
+            initial_capacity: 初始槽位数量（向上取整为2的幂）
+        """
+        size = 1
+        while size < max(16, initial_capacity):
+            size <<= 1
+        self._slots = array('q', bytes(8 * size))
+        self._mask = size - 1
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, url: str) -> bool:
+        return self.contains_fingerprint(url_fingerprint(url))
+
+    def add(self, url: str) -> bool:
+        """
+        添加URL
+
+        Returns:
+            URL此前不存在时返回True
+        """
+        return self.add_fingerprint(url_fingerprint(url))
+
+    def contains_fingerprint(self, fingerprint: int) -> bool:
+        """检查指纹是否存在"""
+        fingerprint = fingerprint or 1
+        slots = self._slots
+        mask = self._mask
+        index = fingerprint & mask
+        while True:
+            value = slots[index]
+            if value == fingerprint:
+                return True
+            if value == 0:
+                return False
+            index = (index + 1) & mask
+
+    def add_fingerprint(self, fingerprint: int) -> bool:
+        """
+        添加指纹
+
+        Returns:
+            指纹此前不存在时返回True
+        """
+        # 0是空槽标记，把恰好为0的指纹映射到1
+        fingerprint = fingerprint or 1
+        slots = self._slots
+        mask = self._mask
+        index = fingerprint & mask
+        while True:
+            value = slots[index]
+            if value == fingerprint:
+                return False
+            if value == 0:
+                break
+            index = (index + 1) & mask
+
+        slots[index] = fingerprint
+        self._count += 1
+        if self._count > len(slots) * self._MAX_LOAD:
+            self._grow()
+        return True
+
+    def update_fingerprints(self, fingerprints: Iterable[int]) -> None:
+        """批量添加指纹（用于从检查点恢复）"""
+        for fingerprint in fingerprints:
+            self.add_fingerprint(fingerprint)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取存储统计信息"""
+        return {
+            'mode': self.mode,
+            'count': self._count,
+            'memory_bytes': self._slots.itemsize * len(self._slots),
+            'false_positive_rate': 0.0
+        }
+
+    def _grow(self) -> None:
+        old_slots = self._slots
+        size = len(old_slots) * 2
+        self._slots = array('q', bytes(8 * size))
+        self._mask = size - 1
+        self._count = 0
+        for value in old_slots:
+            if value:
+                self.add_fingerprint(value)
+
+
+class _BloomLayer:
+    """固定容量的Bloom过滤器层"""
+
+    __slots__ = ('capacity', 'bit_count', 'hash_count', 'bits', 'count')
+
+    def __init__(self, capacity: int, false_positive_rate: float):
+        self.capacity = capacity
+        self.bit_count = max(64, int(math.ceil(-capacity * math.log(false_positive_rate) / (math.log(2) ** 2))))
+        self.hash_count = max(1, int(round(self.bit_count / capacity * math.log(2))))
+        self.bits = bytearray((self.bit_count + 7) // 8)
+        self.count = 0
+
+    def _positions(self, fingerprint: int) -> range:
+        # 双重哈希：由64位指纹的高低32位派生k个位置
+        h1 = fingerprint & 0xFFFFFFFF
+        h2 = ((fingerprint >> 32) & 0xFFFFFFFF) | 1
+        return range(h1, h1 + self.hash_count * h2, h2)
+
+    def contains(self, fingerprint: int) -> bool:
+        bits = self.bits
+        bit_count = self.bit_count
+        for position in self._positions(fingerprint):
+            position %= bit_count
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def add(self, fingerprint: int) -> None:
+        bits = self.bits
+        bit_count = self.bit_count
+        for position in self._positions(fingerprint):
+            position %= bit_count
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+
+class BloomVisitedStore:
+    """
+    概率模式的已访问URL存储（可扩展Bloom过滤器）
+
+    按配置的误判率分配位数组，每个URL约占 -ln(p)/ln²2 位（p=0.1%时约1.8字节）。
+    误判意味着少量从未访问的URL会被当作已访问而跳过，不会出现重复爬取。
+    超出容量时追加一层容量翻倍、误判率减半的新过滤器，总误判率保持在配置值附近。
+    """
+
+    mode = 'bloom'
+
+    def __init__(self, capacity: int = 1000000, false_positive_rate: float = 0.001):
+        """
+        Args:
+            capacity: 第一层过滤器的预期容量
+            false_positive_rate: 目标误判率
+        """
+        if not 0 < false_positive_rate < 1:
+            raise ValueError('false_positive_rate必须在0和1之间')
+        self.false_positive_rate = false_positive_rate
+        # 各层误判率按1/2递减，总和收敛于配置值
+        self._layers = [_BloomLayer(max(1, capacity), false_positive_rate / 2)]
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, url: str) -> bool:
+        return self.contains_fingerprint(url_fingerprint(url))
+
+    def add(self, url: str) -> bool:
+        """
+        添加URL
+
+        Returns:
+            URL此前（可能）不存在时返回True
+        """
+        return self.add_fingerprint(url_fingerprint(url))
+
+    def contains_fingerprint(self, fingerprint: int) -> bool:
+        """检查指纹是否（可能）存在"""
+        for layer in self._layers:
+            if layer.contains(fingerprint):
+                return True
+        return False
+
+    def add_fingerprint(self, fingerprint: int) -> bool:
+        """
+        添加指纹
+
+        Returns:
+            指纹此前（可能）不存在时返回True
+        """
+        if self.contains_fingerprint(fingerprint):
+            return False
+
+        layer = self._layers[-1]
+        if layer.count >= layer.capacity:
+            layer = _BloomLayer(layer.capacity * 2, self.false_positive_rate / (2 ** (len(self._layers) + 1)))
+            self._layers.append(layer)
+        layer.add(fingerprint)
+        self._count += 1
+        return True
+
+    def update_fingerprints(self, fingerprints: Iterable[int]) -> None:
+        """批量添加指纹（用于从检查点恢复）"""
+        for fingerprint in fingerprints:
+            self.add_fingerprint(fingerprint)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取存储统计信息"""
+        return {
+            'mode': self.mode,
+            'count': self._count,
+            'memory_bytes': sum(len(layer.bits) for layer in self._layers),
+            'false_positive_rate': self.false_positive_rate,
+            'layers': len(self._layers)
+        }
+
+
+def create_visited_store(mode: Optional[str] = None, capacity: Optional[int] = None,
+                         false_positive_rate: Optional[float] = None):
+    """
+    根据配置创建已访问URL存储
+
+    Args:
+        mode: 'exact'（64位指纹哈希表）或'bloom'（Bloom过滤器），None时读取配置
+        capacity: 预期URL数量
+        false_positive_rate: Bloom模式的目标误判率
+
+    Returns:
+        已访问URL存储实例
+    """
+    mode = mode or global_config.get('visited.mode', 'exact')
+    capacity = capacity or global_config.get('visited.capacity', 1000000)
+
+    if mode == 'bloom':
+        false_positive_rate = false_positive_rate or global_config.get('visited.false_positive_rate', 0.001)
+        return BloomVisitedStore(capacity, false_positive_rate)
+    if mode != 'exact':
+        print(f"[PhantomCrawler] 未知的已访问存储模式 {mode}，使用精确模式")
+    # 精确模式按需扩容，初始只分配一小块
+    return FingerprintVisitedStore(min(capacity * 2, 1 << 16))
@@ -0,0 +1,329 @@
+# PhantomCrawler - 欲望记忆存储模块
+import os
+import pickle
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.config import global_config
+
+# 事件类型：成功/失败历史记录追加，目标档案和全局状态以最新一条为准
+TRIUMPH = 'triumph'
+DEFEAT = 'defeat'
+PROFILE = 'profile'
+STATE = 'state'
+
+# (事件类型, 键, 序列化后的内容)
+Event = Tuple[str, Optional[str], bytes]
+
+
+def dumps(value: Any) -> bytes:
+    return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+class DesireMemoryStore:
+    """
+    七宗欲记忆的事件日志与快照存储
+
+    每次写入只把新增的历史记录、修改过的目标档案和全局状态作为事件追加到SQLite（WAL模式）的
+    desire_events表中，不再重写整份记忆。日志累计compact_every条后压缩：目标档案按主机合并进
+    desire_profiles，历史记录移入desire_history并只保留最近history_span条，全局状态写入desire_meta，
+    然后删除已压缩的事件。压缩只处理日志尾部，耗时与历史总量无关。
+
+    冷启动先把上次运行留下的日志尾部合并进快照表，然后只读取全局状态和最近的历史记录；
+    目标档案在第一次访问时按主机查询（见LazyProfileMap）。
+    """
+
+    def __init__(self, path: Optional[str] = None, compact_every: Optional[int] = None,
+                 history_span: Optional[int] = None):
+        """
+        Args:
+            path: 数据库文件，None时读取配置desires.memory_path
+            compact_every: 日志累计多少条事件后压缩
+            history_span: 成功/失败历史各保留的条数
+        """
+        self.path = path or global_config.get('desires.memory_path', 'data/seven_desires.db')
+        self.compact_every = compact_every or global_config.get('desires.compact_every', 5000)
+        self.history_span = history_span or global_config.get('desires.memory_span', 1000)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        # 写入在后台线程、档案查询在调用线程，共用一个连接并由_lock串行化
+        self.connection = sqlite3.connect(self.path, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode = WAL')
+        self.connection.execute('PRAGMA synchronous = NORMAL')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS desire_events ('
+            'seq INTEGER PRIMARY KEY AUTOINCREMENT, kind TEXT NOT NULL, key TEXT, payload BLOB NOT NULL)'
+        )
+        self.connection.execute('CREATE INDEX IF NOT EXISTS desire_events_key ON desire_events (key)')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS desire_profiles (host TEXT PRIMARY KEY, payload BLOB NOT NULL)'
+        )
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS desire_history ('
+            'seq INTEGER PRIMARY KEY, kind TEXT NOT NULL, payload BLOB NOT NULL)'
+        )
+        self.connection.execute('CREATE INDEX IF NOT EXISTS desire_history_kind ON desire_history (kind, seq)')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS desire_meta (key TEXT PRIMARY KEY, payload BLOB NOT NULL)'
+        )
+        self.connection.commit()
+        self._log_size = self.connection.execute('SELECT COUNT(*) FROM desire_events').fetchone()[0]
+        self.stats = {'appended': 0, 'compactions': 0}
+
+    def is_empty(self) -> bool:
+        """存储中是否还没有任何记忆"""
+        with self._lock:
+            conn = self.connection
+            return (conn.execute('SELECT 1 FROM desire_events LIMIT 1').fetchone() is None and
+                    conn.execute('SELECT 1 FROM desire_meta LIMIT 1').fetchone() is None)
+
+    def load(self) -> Dict[str, Any]:
+        """
+        读取冷启动所需的记忆：全局状态和最近的历史记录
+
+        日志尾部先在SQLite中合并进快照表，读取量只与history_span有关，不随未压缩的日志增长。
+
+        Returns:
+            {'state': 全局状态或None, 'triumph_history': [...], 'defeat_history': [...],
+             'profiles': {}（目标档案按需读取）}
+        """
+        with self._lock:
+            if self._log_size:
+                self._compact()
+            conn = self.connection
+            row = conn.execute("SELECT payload FROM desire_meta WHERE key = 'state'").fetchone()
+            state = row[0] if row else None
+            history = {TRIUMPH: [], DEFEAT: []}
+            for kind, records in history.items():
+                rows = conn.execute(
+                    'SELECT payload FROM desire_history WHERE kind = ? ORDER BY seq DESC LIMIT ?',
+                    (kind, self.history_span)
+                ).fetchall()
+                records.extend(payload for payload, in reversed(rows))
+
+        for kind, records in history.items():
+            records[:] = [pickle.loads(payload) for payload in records]
+        if state is not None:
+            state = pickle.loads(state)
+        return {
+            'state': state,
+            'triumph_history': history[TRIUMPH],
+            'defeat_history': history[DEFEAT],
+            'profiles': {}
+        }
+
+    def get_profile(self, host: str) -> Optional[Dict[str, Any]]:
+        """按主机读取目标档案，日志中的最新版本优先"""
+        with self._lock:
+            conn = self.connection
+            row = conn.execute(
+                'SELECT payload FROM desire_events WHERE key = ? AND kind = ? ORDER BY seq DESC LIMIT 1',
+                (host, PROFILE)
+            ).fetchone()
+            if row is None:
+                row = conn.execute('SELECT payload FROM desire_profiles WHERE host = ?', (host,)).fetchone()
+        return pickle.loads(row[0]) if row else None
+
+    def iter_profiles(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """读取全部目标档案（报告等需要遍历所有目标时使用）"""
+        with self._lock:
+            conn = self.connection
+            profiles = dict(conn.execute('SELECT host, payload FROM desire_profiles').fetchall())
+            profiles.update(conn.execute(
+                'SELECT key, payload FROM desire_events WHERE kind = ? ORDER BY seq', (PROFILE,)
+            ).fetchall())
+        for host, payload in profiles.items():
+            yield host, pickle.loads(payload)
+
+    def profile_count(self) -> int:
+        """已保存的目标档案数量"""
+        with self._lock:
+            return self.connection.execute(
+                'SELECT COUNT(*) FROM (SELECT host FROM desire_profiles '
+                'UNION SELECT key FROM desire_events WHERE kind = ?)', (PROFILE,)
+            ).fetchone()[0]
+
+    def append(self, events: List[Event]) -> None:
+        """
+        在一个事务中追加一批事件，日志过长时随后压缩
+
+        Args:
+            events: (事件类型, 键, 序列化后的内容)列表
+        """
+        if not events:
+            return
+        with self._lock:
+            with self.connection:
+                self.connection.executemany(
+                    'INSERT INTO desire_events (kind, key, payload) VALUES (?, ?, ?)', events
+                )
+            self._log_size += len(events)
+            self.stats['appended'] += len(events)
+            if self._log_size >= self.compact_every:
+                self._compact()
+
+    def compact(self) -> None:
+        """把日志合并进快照表"""
+        with self._lock:
+            self._compact()
+
+    def _compact(self) -> None:
+        conn = self.connection
+        with conn:
+            last = conn.execute('SELECT MAX(seq) FROM desire_events').fetchone()[0]
+            if last is None:
+                return
+            profiles = {}
+            state = None
+            for kind, key, payload in conn.execute(
+                    'SELECT kind, key, payload FROM desire_events WHERE kind IN (?, ?) ORDER BY seq',
+                    (PROFILE, STATE)):
+                if kind == PROFILE:
+                    profiles[key] = payload
+                else:
+                    state = payload
+            conn.executemany('INSERT OR REPLACE INTO desire_profiles (host, payload) VALUES (?, ?)',
+                             profiles.items())
+            if state is not None:
+                conn.execute("INSERT OR REPLACE INTO desire_meta (key, payload) VALUES ('state', ?)", (state,))
+            for kind in (TRIUMPH, DEFEAT):
+                conn.execute(
+                    'INSERT INTO desire_history (seq, kind, payload) '
+                    'SELECT seq, kind, payload FROM desire_events WHERE kind = ? AND seq <= ?', (kind, last)
+                )
+                # 只保留最近history_span条
+                conn.execute(
+                    'DELETE FROM desire_history WHERE kind = ? AND seq < ('
+                    'SELECT seq FROM desire_history WHERE kind = ? ORDER BY seq DESC LIMIT 1 OFFSET ?)',
+                    (kind, kind, self.history_span - 1)
+                )
+            conn.execute('DELETE FROM desire_events WHERE seq <= ?', (last,))
+        self._log_size = 0
+        self.stats['compactions'] += 1
+
+    def import_memories(self, memories: Dict[str, Any], state_keys: Iterable[str]) -> None:
+        """
+        导入旧版整份pickle格式的记忆并立即压缩
+
+        Args:
+            memories: 旧版记忆字典
+            state_keys: 属于全局状态的键
+        """
+        events: List[Event] = [(STATE, None, dumps({key: memories[key] for key in state_keys if key in memories}))]
+        for kind in (TRIUMPH, DEFEAT):
+            events.extend((kind, None, dumps(record)) for record in memories.get(f'{kind}_history', []))
+        events.extend((PROFILE, host, dumps(profile)) for host, profile in memories.get('target_profiles', {}).items())
+        with self._lock:
+            with self.connection:
+                self.connection.executemany(
+                    'INSERT INTO desire_events (kind, key, payload) VALUES (?, ?, ?)', events
+                )
+            self._compact()
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self._lock:
+            try:
+                self.connection.close()
+            except sqlite3.Error:
+                pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取日志和压缩统计"""
+        stats = dict(self.stats)
+        stats['log_size'] = self._log_size
+        return stats
+
+
+class LazyProfileMap(dict):
+    """
+    按需加载的目标档案字典
+
+    查找不在内存中的主机时从存储中读取该主机的档案；遍历或取长度时先加载全部档案。
+    存储中没有的主机记入未命中集合，再次查找时不再查询存储，写入该主机时从集合中移除。
+    """
+
+    # 未命中集合的上限，超过时清空
+    MAX_MISSING = 65536
+
+    def __init__(self, loader: Callable[[str], Optional[Dict[str, Any]]],
+                 loader_all: Callable[[], Iterable[Tuple[str, Dict[str, Any]]]],
+                 profiles: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            loader: 按主机读取档案的函数，不存在时返回None
+            loader_all: 读取全部档案的函数
+            profiles: 已经在内存中的档案
+        """
+        super().__init__(profiles or {})
+        self._loader = loader
+        self._loader_all = loader_all
+        self._complete = False
+        self._missing = set()
+
+    def _load(self, key):
+        if self._complete or key in self._missing:
+            return None
+        value = self._loader(key)
+        if value is not None:
+            dict.__setitem__(self, key, value)
+        else:
+            if len(self._missing) >= self.MAX_MISSING:
+                self._missing.clear()
+            self._missing.add(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self._missing.discard(key)
+        dict.__setitem__(self, key, value)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return dict.__getitem__(self, key)
+
+    def _load_all(self) -> None:
+        if not self._complete:
+            for key, value in self._loader_all():
+                dict.setdefault(self, key, value)
+            self._complete = True
+            self._missing.clear()
+
+    def __missing__(self, key):
+        value = self._load(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key) -> bool:
+        return dict.__contains__(self, key) or self._load(key) is not None
+
+    def get(self, key, default=None):
+        if dict.__contains__(self, key):
+            return dict.__getitem__(self, key)
+        value = self._load(key)
+        return default if value is None else value
+
+    def __iter__(self):
+        self._load_all()
+        return dict.__iter__(self)
+
+    def __len__(self) -> int:
+        self._load_all()
+        return dict.__len__(self)
+
+    def keys(self):
+        self._load_all()
+        return dict.keys(self)
+
+    def values(self):
+        self._load_all()
+        return dict.values(self)
+
+    def items(self):
+        self._load_all()
+        return dict.items(self)
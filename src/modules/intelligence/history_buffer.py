@@ -0,0 +1,239 @@
+# PhantomCrawler - 紧凑历史记录模块
+import math
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Union
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from src.config import global_config
+
+# 结果代码
+OUTCOME_OK = 0
+OUTCOME_FAILED = 1
+OUTCOME_ERROR = 2
+OUTCOME_TIMEOUT = 3
+OUTCOME_CAPTCHA = 4
+OUTCOME_BLOCKED = 5
+OUTCOME_RATE_LIMITED = 6
+
+# 欲望编号，不在列表中的欲望记为UNKNOWN_DESIRE
+DESIRES = ('傲慢', '嫉妒', '愤怒', '懒惰', '贪婪', '暴食', '色欲', '恨世')
+UNKNOWN_DESIRE = 255
+_DESIRE_IDS = {name: index for index, name in enumerate(DESIRES)}
+
+RECORD_DTYPE = np.dtype([
+    ('timestamp', 'f8'),
+    ('host', 'u4'),       # 主机编号，见HistoryBuffer.host_name
+    ('status', 'u2'),     # HTTP状态码，0表示没有响应
+    ('latency', 'f4'),    # 响应时间（秒），NaN表示未知
+    ('outcome', 'u1'),    # 结果代码
+    ('desire', 'u1')      # 主导欲望编号
+])
+
+
+class HistoryRecord(NamedTuple):
+    """一条历史记录（读取时解码主机名和欲望名）"""
+    timestamp: float
+    host: str
+    status: int
+    latency: float
+    outcome: int
+    desire: Optional[str]
+
+
+def classify_outcome(reason: Any = None, status_code: int = 0) -> int:
+    """
+    把失败原因或状态码归类为结果代码
+
+    Args:
+        reason: 失败原因（字符串、异常或结果字典）
+        status_code: HTTP状态码
+
+    Returns:
+        结果代码
+    """
+    text = str(reason).lower() if reason else ''
+    if 'captcha' in text or '验证码' in text:
+        return OUTCOME_CAPTCHA
+    if status_code == 403 or 'block' in text or '403' in text:
+        return OUTCOME_BLOCKED
+    if status_code == 429 or 'rate limit' in text or '429' in text:
+        return OUTCOME_RATE_LIMITED
+    if 'timeout' in text or 'timed out' in text:
+        return OUTCOME_TIMEOUT
+    if 'error' in text:
+        return OUTCOME_ERROR
+    return OUTCOME_FAILED
+
+
+class HistoryBuffer:
+    """
+    固定容量的历史记录环形缓冲区
+
+    每条记录是NumPy结构化数组中的一行（时间戳、主机编号、状态码、响应时间、结果代码、欲望编号，
+    共20字节），不保留页面内容、策略等完整数据。缓冲区写满后覆盖最旧的记录，长时间运行时内存不再增长。
+    主机名表按引用计数维护：主机的最后一条记录被覆盖时释放其编号并复用，表中最多有capacity个主机。
+    total记录累计追加的条数，用于统计和增量持久化。
+    """
+
+    def __init__(self, capacity: Optional[int] = None):
+        """
+        Args:
+            capacity: 保留的记录条数，None时读取配置desires.memory_span
+        """
+        self.capacity = max(1, capacity or global_config.get('desires.memory_span', 1000))
+        self._records = np.zeros(self.capacity, dtype=RECORD_DTYPE)
+        self._next = 0
+        self._size = 0
+        self.total = 0
+        self._host_ids: Dict[str, int] = {}
+        self._hosts: List[Optional[str]] = []
+        # 每个主机编号在缓冲区中的记录数，以及已释放可复用的编号
+        self._host_refs: List[int] = []
+        self._free_host_ids: List[int] = []
+
+    def _host_id(self, host: str) -> int:
+        host_id = self._host_ids.get(host)
+        if host_id is None:
+            if self._free_host_ids:
+                host_id = self._free_host_ids.pop()
+                self._hosts[host_id] = host
+            else:
+                host_id = len(self._hosts)
+                self._hosts.append(host)
+                self._host_refs.append(0)
+            self._host_ids[host] = host_id
+        self._host_refs[host_id] += 1
+        return host_id
+
+    def _release_host(self, host_id: int) -> None:
+        # 被覆盖的记录不再引用该主机，最后一条记录被覆盖时释放编号
+        self._host_refs[host_id] -= 1
+        if self._host_refs[host_id] == 0:
+            del self._host_ids[self._hosts[host_id]]
+            self._hosts[host_id] = None
+            self._free_host_ids.append(host_id)
+
+    def host_name(self, host_id: int) -> str:
+        """主机编号对应的主机名"""
+        return self._hosts[host_id]
+
+    def append(self, timestamp: float, host: str = '', status: int = 0, latency: Optional[float] = None,
+               outcome: int = OUTCOME_OK, desire: Optional[str] = None) -> None:
+        """
+        追加一条记录
+
+        Args:
+            timestamp: 时间戳
+            host: 主机（netloc）
+            status: HTTP状态码
+            latency: 响应时间（秒）
+            outcome: 结果代码
+            desire: 主导欲望
+        """
+        if self._size == self.capacity:
+            self._release_host(int(self._records['host'][self._next]))
+        self._records[self._next] = (
+            timestamp,
+            self._host_id(host or ''),
+            status or 0,
+            math.nan if latency is None else latency,
+            outcome,
+            _DESIRE_IDS.get(desire, UNKNOWN_DESIRE)
+        )
+        self._next = (self._next + 1) % self.capacity
+        if self._size < self.capacity:
+            self._size += 1
+        self.total += 1
+
+    def add(self, record: Union[HistoryRecord, tuple, Dict[str, Any]], failed: bool = False) -> None:
+        """
+        追加已有的记录（持久化的记录元组，或旧版的完整字典记录）
+
+        Args:
+            record: 记录
+            failed: 旧版字典记录是否为失败记录（按失败原因归类结果代码）
+        """
+        if not isinstance(record, dict):
+            self.append(*record)
+            return
+        result = record.get('result') if isinstance(record.get('result'), dict) else {}
+        host = record.get('target') or ''
+        if not host and record.get('url'):
+            host = urlsplit(str(record['url'])).netloc
+        latency = result.get('response_time', record.get('response_time'))
+        status = result.get('status_code') or 0
+        outcome = classify_outcome(record.get('reason') or result.get('error'), status) if failed else OUTCOME_OK
+        self.append(record.get('timestamp') or record.get('time') or 0.0, host, status,
+                    latency, outcome, record.get('dominant_desire'))
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _ordered(self, count: Optional[int] = None) -> np.ndarray:
+        """最近count条记录，从旧到新排列（副本）"""
+        size = self._size if count is None else max(0, min(count, self._size))
+        if size == 0:
+            return self._records[:0].copy()
+        start = (self._next - size) % self.capacity
+        if start + size <= self.capacity:
+            return self._records[start:start + size].copy()
+        return np.concatenate((self._records[start:], self._records[:self._next]))
+
+    def recent(self, count: Optional[int] = None) -> np.ndarray:
+        """
+        最近的记录（结构化数组，从旧到新）
+
+        Args:
+            count: 条数，None表示全部
+        """
+        return self._ordered(count)
+
+    def _decode(self, row) -> HistoryRecord:
+        desire = int(row['desire'])
+        return HistoryRecord(float(row['timestamp']), self._hosts[int(row['host'])], int(row['status']),
+                             float(row['latency']), int(row['outcome']),
+                             DESIRES[desire] if desire < len(DESIRES) else None)
+
+    def records(self, count: Optional[int] = None) -> List[HistoryRecord]:
+        """最近的记录，解码为HistoryRecord（从旧到新）"""
+        return [self._decode(row) for row in self._ordered(count)]
+
+    def since(self, total: int) -> List[HistoryRecord]:
+        """
+        累计第total条之后追加、仍在缓冲区中的记录
+
+        Args:
+            total: 之前读取时的累计条数
+        """
+        return self.records(self.total - total) if total < self.total else []
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._decode(row) for row in self._ordered()[index]]
+        return self._decode(self._ordered()[index])
+
+    def __iter__(self) -> Iterator[HistoryRecord]:
+        return iter(self.records())
+
+    def timestamp_at(self, index: int) -> float:
+        """
+        按位置读取时间戳（-1为最新的记录），不复制记录
+
+        Args:
+            index: 位置，负数从最新的记录倒数
+        """
+        if not -self._size <= index < self._size:
+            raise IndexError(index)
+        if index < 0:
+            index += self._size
+        return float(self._records['timestamp'][(self._next - self._size + index) % self.capacity])
+
+    def count_since(self, timestamp: float) -> int:
+        """时间戳不早于timestamp的记录条数"""
+        return int(np.count_nonzero(self._records['timestamp'][:self._size] >= timestamp))
+
+    @property
+    def nbytes(self) -> int:
+        """记录数组占用的字节数"""
+        return self._records.nbytes
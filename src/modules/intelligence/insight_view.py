@@ -0,0 +1,50 @@
+# PhantomCrawler - 增量洞察视图模块
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class InsightView:
+    """
+    按组成部分缓存的洞察报告
+
+    每个部分登记一个输入键（由该部分依赖的状态组成的元组）和计算函数。读取时输入键与上次相同
+    且没有被显式标记为脏，就直接返回上次的结果；否则只重新计算这一部分。
+    缓存的结果由多个调用方共享，调用方不应修改。
+    """
+
+    def __init__(self):
+        # 部分名称 -> (输入键, 结果)
+        self._entries: Dict[str, tuple] = {}
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def get(self, name: str, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        读取一个部分，输入键变化或被标记为脏时重新计算
+
+        Args:
+            name: 部分名称
+            key: 输入键
+            compute: 计算函数
+
+        Returns:
+            该部分的结果
+        """
+        entry = self._entries.get(name)
+        if entry is not None and entry[0] == key:
+            self.stats['hits'] += 1
+            return entry[1]
+        self.stats['misses'] += 1
+        value = compute()
+        self._entries[name] = (key, value)
+        return value
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        """
+        标记部分为脏（用于无法通过输入键反映的修改）
+
+        Args:
+            name: 部分名称，None表示全部
+        """
+        if name is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(name, None)
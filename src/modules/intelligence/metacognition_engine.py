@@ -6,9 +6,16 @@ import pickle
 import os
 import threading
 import numpy as np
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, Iterable, List, Any, Optional, Tuple
 from datetime import datetime
 from src.config import global_config
+from src.modules.intelligence.write_behind import WriteBehindPersister
+from src.modules.intelligence.desire_store import DesireMemoryStore, LazyProfileMap, TRIUMPH, DEFEAT, PROFILE, STATE, dumps
+from src.modules.intelligence.history_buffer import (
+    HistoryBuffer, classify_outcome, OUTCOME_OK, OUTCOME_ERROR, OUTCOME_CAPTCHA, OUTCOME_BLOCKED, OUTCOME_RATE_LIMITED
+)
+from src.modules.intelligence.window_counter import WindowedCounters, REQUESTS
+from src.modules.intelligence.insight_view import InsightView
 
 # 欲望之力监控器
 class DesireMonitor:
@@ -54,8 +61,10 @@ class SevenDesiresEngine:
     def __init__(self):
         # 欲望知识库
         self.desire_knowledge = {}
-        self.triumph_history = []  # 成功历史
-        self.defeat_history = []    # 失败历史
+        self.triumph_history = HistoryBuffer()  # 成功历史（固定容量的紧凑记录）
+        self.defeat_history = HistoryBuffer()   # 失败历史
+        self.outcome_counters = WindowedCounters()  # 1分钟/10分钟/1小时窗口的请求、成功、失败、封锁计数
+        self._insight_view = InsightView()  # 按组成部分增量维护的元认知洞察
         self.desire_strengths = {}  # 欲望强度
         self.target_profiles = {}   # 目标档案
         self.success_streak = 0     # 连续成功次数
@@ -157,6 +166,20 @@ class SevenDesiresEngine:
                 'desire_conflict': lambda d1, d2, msg: print(f"[{d1}-{d2}冲突] {msg}"),
                 'desire_manifest': lambda desire, msg: print(f"[{desire}显现] {msg}")
             })()
+        
+        # 欲望记忆：事件日志加快照。每次结果只标记修改，由后台线程把新增的历史记录、
+        # 修改过的目标档案和全局状态追加到日志
+        self._memory_store = DesireMemoryStore(history_span=self.memory_span)
+        self._dirty_targets = set()
+        self._history_marks = {TRIUMPH: 0, DEFEAT: 0}
+        self._unwritten_events = []
+        self._memory_persister = WriteBehindPersister(
+            self._snapshot_desire_memories,
+            self._append_desire_events,
+            lock=self.desire_lock,
+            name='desire-memory-writer'
+        )
+        self._awaken_desire_memories()
     
     def shift_behavior_pattern(self, context=None):
         """
@@ -189,35 +212,126 @@ class SevenDesiresEngine:
             'context_summary': self._summarize_context(context)
         }
         self.environment_awareness['historical_patterns'].append(pattern_record)
+        self._insight_view.invalidate('pattern_analysis')
         # 保持历史记录在合理范围内
         if len(self.environment_awareness['historical_patterns']) > 50:
             self.environment_awareness['historical_patterns'] = self.environment_awareness['historical_patterns'][-50:]
         
         return self.current_behavior_pattern
     
-    def get_metacognitive_insights(self):
+    # 洞察报告的组成部分
+    INSIGHT_SECTIONS = ('system_state', 'environmental_awareness', 'desire_state', 'risk_assessment',
+                        'pattern_analysis', 'desire_effectiveness', 'resource_usage', 'recommendations',
+                        'throughput')
+    
+    def get_metacognitive_insights(self, fields: Optional[Iterable[str]] = None):
         """
         获取全面的元认知洞察报告 - 整合七宗欲引擎与元认知能力
         提供系统状态、环境感知、欲望效能和自适应策略分析
         
+        报告按组成部分增量维护：每个部分只在其依赖的状态变化时重新计算，
+        调用方可以只请求需要的部分。返回的各部分由调用方共享，不应修改。
+        
+        Args:
+            fields: 需要的部分（见INSIGHT_SECTIONS），None表示全部
+        
         Returns:
             详细的元认知洞察报告
         """
+        insights = {'timestamp': time.time()}
+        for name in (self.INSIGHT_SECTIONS if fields is None else fields):
+            if name in self.INSIGHT_SECTIONS:
+                insights[name] = self._insight_section(name)
+        
+        if fields is None:
+            # 更新缓存
+            self._last_metacognitive_insights = insights
+        
+        return insights
+    
+    def _insight_section(self, name: str):
+        """读取洞察报告的一个部分，输入未变化时直接使用上次的结果"""
+        return self._insight_view.get(name, self._insight_key(name), getattr(self, f'_build_{name}_insight'))
+    
+    def _insight_key(self, name: str) -> tuple:
+        """洞察报告各部分依赖的状态"""
+        perception = self.desire_perception
+        if name == 'risk_assessment':
+            return (perception['detection_danger'], perception['block_attempts'], perception['captcha_detection_count'])
+        if name == 'system_state':
+            # 近期成功率和距上次转换的时间随时间变化，按秒刷新
+            return (int(time.time()), self.triumph_history.total, self.defeat_history.total, self.success_streak,
+                    self.dominant_desire, self.current_behavior_pattern, self.last_desire_shift,
+                    self._insight_key('risk_assessment'))
+        if name == 'throughput':
+            return (int(time.time()), self.triumph_history.total, self.defeat_history.total)
+        if name == 'desire_state':
+            return (tuple(self.desire_forces.items()), self.dominant_desire)
+        if name == 'pattern_analysis':
+            # 历史模式的变化由shift_behavior_pattern显式标记
+            return (self.current_behavior_pattern,)
+        if name == 'desire_effectiveness':
+            return (self.dominant_desire,)
+        if name == 'recommendations':
+            # 建议只取决于各项指标是否越过阈值
+            overall_risk = self._insight_section('risk_assessment')['overall_risk']
+            defeats = len(self.defeat_history)
+            return (overall_risk > 0.7, overall_risk > 0.4, overall_risk < 0.3,
+                    perception['efficiency_score'].get('avg_response_time', 0) > 5.0,
+                    self.success_streak > 10, defeats > 5 and defeats > len(self.triumph_history),
+                    perception['resource_hunger'].get('cpu', 0) > 0.8)
+        return ()
+    
+    def _success_rate_percent(self) -> float:
+        total_attempts = self.triumph_history.total + self.defeat_history.total
+        return (self.triumph_history.total / total_attempts) * 100 if total_attempts > 0 else 0
+    
+    def _build_system_state_insight(self) -> Dict[str, Any]:
         # 计算成功率和统计信息
-        total_attempts = len(self.triumph_history) + len(self.defeat_history)
-        success_rate = (len(self.triumph_history) / total_attempts) * 100 if total_attempts > 0 else 0
-        
-        # 计算近期成功率（最近10次）
-        recent_attempts = []
-        for record in self.triumph_history[-10:]:
-            recent_attempts.append((record.get('timestamp', 0) or record.get('time', 0), True))
-        for record in self.defeat_history[-10:]:
-            recent_attempts.append((record.get('timestamp', 0) or record.get('time', 0), False))
-        recent_attempts.sort(key=lambda x: x[0], reverse=True)
-        recent_attempts = recent_attempts[:10]
-        recent_success_count = sum(1 for _, success in recent_attempts if success)
-        recent_success_rate = (recent_success_count / len(recent_attempts)) * 100 if recent_attempts else 0
+        total_attempts = self.triumph_history.total + self.defeat_history.total
+        success_rate = self._success_rate_percent()
+        
+        # 计算近期成功率（最近10分钟）
+        recent_success_rate = (self.outcome_counters.success_rate(600) or 0) * 100
+        
+        # 计算信心分数
+        risk_assessment = self._insight_section('risk_assessment')
+        confidence_score = self._calculate_confidence_score(success_rate / 100, risk_assessment['overall_risk'])
         
+        return {
+            'current_behavior_pattern': self.current_behavior_pattern,
+            'dominant_desire': self.dominant_desire,
+            'success_streak': self.success_streak,
+            'total_triumphs': self.triumph_history.total,
+            'total_defeats': self.defeat_history.total,
+            'total_attempts': total_attempts,
+            'success_rate': success_rate,
+            'recent_success_rate': recent_success_rate,
+            'last_pattern_change': time.time() - self.last_desire_shift if hasattr(self, 'last_desire_shift') else 0,
+            'confidence_score': confidence_score
+        }
+    
+    def _build_environmental_awareness_insight(self) -> Dict[str, Any]:
+        return {
+            'detection_risk': getattr(self.environment_awareness, 'detection_risk', getattr(self.desire_perception, 'detection_danger', 0)),
+            'pressure_level': getattr(self.environment_awareness, 'pressure_level', 'normal'),
+            'system_performance': getattr(self.environment_awareness, 'system_performance', {}),
+            'target_characteristics': getattr(self.environment_awareness, 'target_characteristics', {})
+        }
+    
+    def _build_desire_state_insight(self) -> Dict[str, Any]:
+        return {
+            'active_forces': self.desire_forces.copy(),
+            'dominant_desire': self.dominant_desire,
+            'dominant_desire_strength': max(self.desire_forces.values()) if self.desire_forces else 0,
+            'confidence_level': getattr(self.desire_perception, 'adaptive_confidence', 0.5)
+        }
+    
+    def _build_risk_assessment_insight(self) -> Dict[str, Any]:
+        # 生成环境风险评估
+        return self._calculate_risk_assessment()
+    
+    def _build_pattern_analysis_insight(self) -> Dict[str, Any]:
         # 获取最近的行为模式
         recent_patterns = []
         if 'historical_patterns' in self.environment_awareness:
@@ -226,90 +340,30 @@ class SevenDesiresEngine:
         for pattern in recent_patterns:
             pattern_frequency[pattern] = pattern_frequency.get(pattern, 0) + 1
         
-        # 生成环境风险评估
-        if hasattr(self, '_calculate_risk_assessment'):
-            risk_assessment = self._calculate_risk_assessment()
-        else:
-            # 简化风险评估
-            detection_danger = getattr(self.desire_perception, 'detection_danger', 0)
-            risk_level = '低' if detection_danger < 0.4 else '中' if detection_danger < 0.7 else '高'
-            risk_assessment = {
-                'overall_risk': detection_danger,
-                'risk_level': risk_level,
-                'recommended_precautions': []
-            }
-        
         # 行为模式分析
-        pattern_analysis = {
+        return {
             'current_pattern': self.current_behavior_pattern,
             'pattern_frequency': pattern_frequency,
             'most_common_pattern': max(pattern_frequency.items(), key=lambda x: x[1])[0] if pattern_frequency else '未知'
         }
-        
+    
+    def _build_desire_effectiveness_insight(self) -> Dict[str, Any]:
         # 欲望效能分析
-        desire_effectiveness = self._analyze_desire_effectiveness() if hasattr(self, '_analyze_desire_effectiveness') else {
-            'recommended_desire': self.dominant_desire
-        }
-        
-        # 生成调整建议
-        if hasattr(self, '_generate_adjustment_recommendations'):
-            recommendations = self._generate_adjustment_recommendations()
-        else:
-            recommendations = []
-            # 基于成功率生成基本建议
-            if success_rate < 30:
-                recommendations.append("成功率过低，建议更换策略")
-            elif self.success_streak > 10:
-                recommendations.append("连续成功，可以适度提高效率")
-        
-        # 计算信心分数
-        confidence_score = self._calculate_confidence_score(success_rate / 100, risk_assessment['overall_risk'])
-        
+        return {'recommended_desire': self.dominant_desire}
+    
+    def _build_resource_usage_insight(self) -> Dict[str, Any]:
         # 获取资源使用情况
-        resource_usage = getattr(self.desire_perception, 'resource_hunger', {})
-        
-        # 生成完整洞察报告
-        insights = {
-            'timestamp': time.time(),
-            'system_state': {
-                'current_behavior_pattern': self.current_behavior_pattern,
-                'dominant_desire': self.dominant_desire,
-                'success_streak': self.success_streak,
-                'total_triumphs': len(self.triumph_history),
-                'total_defeats': len(self.defeat_history),
-                'total_attempts': total_attempts,
-                'success_rate': success_rate,
-                'recent_success_rate': recent_success_rate,
-                'last_pattern_change': time.time() - self.last_desire_shift if hasattr(self, 'last_desire_shift') else 0,
-                'confidence_score': confidence_score
-            },
-            'environmental_awareness': {
-                'detection_risk': getattr(self.environment_awareness, 'detection_risk', getattr(self.desire_perception, 'detection_danger', 0)),
-                'pressure_level': getattr(self.environment_awareness, 'pressure_level', 'normal'),
-                'system_performance': getattr(self.environment_awareness, 'system_performance', {}),
-                'target_characteristics': getattr(self.environment_awareness, 'target_characteristics', {})
-            },
-            'desire_state': {
-                'active_forces': self.desire_forces.copy(),
-                'dominant_desire': self.dominant_desire,
-                'dominant_desire_strength': max(self.desire_forces.values()) if self.desire_forces else 0,
-                'confidence_level': getattr(self.desire_perception, 'adaptive_confidence', 0.5)
-            },
-            'risk_assessment': risk_assessment,
-            'pattern_analysis': pattern_analysis,
-            'desire_effectiveness': desire_effectiveness,
-            'resource_usage': resource_usage,
-            'recommendations': recommendations,
-            'throughput': {
-                'requests_per_minute': self._calculate_rpm() if hasattr(self, '_calculate_rpm') else 0,
-                'success_rate': success_rate
-            }
+        return getattr(self.desire_perception, 'resource_hunger', {})
+    
+    def _build_recommendations_insight(self) -> List[str]:
+        # 生成调整建议
+        return self._generate_adjustment_recommendations()
+    
+    def _build_throughput_insight(self) -> Dict[str, Any]:
+        return {
+            'requests_per_minute': self._calculate_rpm(),
+            'success_rate': self._success_rate_percent()
         }
-        
-        # 更新缓存
-        self._last_metacognitive_insights = insights
-        
-        return insights
     
     def activate_advanced_testing(self):
         """
@@ -369,11 +423,7 @@ class SevenDesiresEngine:
         self.monitor.desire_manifest(current_mode, f'从测试结果中学习：{failure_reason}')
         
         # 记录失败经验
-        self.defeat_history.append({
-            'timestamp': time.time(),
-            'reason': failure_reason,
-            'strategy_optimized': True
-        })
+        self._record_history(False, time.time(), outcome=classify_outcome(failure_reason), desire=self.dominant_desire)
         
     def replicate_self(self, target_url):
         """
@@ -473,7 +523,7 @@ class SevenDesiresEngine:
         print("█                                                  █")
         print("█                🔱 第八宗欲 · 恨世 🔱               █")
         print("█                                                  █")
-        print("█      "你已触及七宗欲引擎的终极奥秘"              █")
+        print('█      "你已触及七宗欲引擎的终极奥秘"              █')
         print("█                                                  █")
         print("█   ⚡ 极端性能模式：突破所有限制                    █")
         print("█   🔄 无限复制：测试实例几何级数增长                █")
@@ -608,25 +658,25 @@ class SevenDesiresEngine:
         
         # 连续失败惩罚
         if hasattr(self, 'defeat_history') and len(self.defeat_history) >= 3:
-            recent_failures = self.defeat_history[-3:]
-            if all('time' in f for f in recent_failures):
-                recent_time = time.time()
-                if all(recent_time - f['time'] < 300 for f in recent_failures):  # 5分钟内连续失败
-                    confidence = max(0.1, confidence - 0.15)
+            # 时间戳按追加顺序递增，倒数第三条在5分钟内即最近三次失败都在5分钟内
+            if time.time() - self.defeat_history.timestamp_at(-3) < 300:  # 5分钟内连续失败
+                confidence = max(0.1, confidence - 0.15)
         
         return round(confidence, 2)
     
     def shutdown(self):
         """兼容旧版API：关闭引擎"""
         try:
-            # 保存欲望知识
-            self._save_desire_knowledge()
+            # 封印尚未保存的欲望记忆，再停止后台写入（写入封印之后到达的修改）并关闭存储
+            self._seal_desire_memories()
+            self._memory_persister.close()
+            self._memory_store.close()
             # 生成战场报告
             if hasattr(self, 'monitor'):
                 stats = {
                     'dominant_desire': self.dominant_desire,
                     'danger_level': self.desire_perception['detection_danger'],
-                    'success_rate': (len(self.triumph_history) / (len(self.triumph_history) + len(self.defeat_history) + 1)) * 100,
+                    'success_rate': (self.triumph_history.total / (self.triumph_history.total + self.defeat_history.total + 1)) * 100,
                     'success_streak': self.success_streak
                 }
                 self.monitor.battlefield_report(stats)
@@ -642,52 +692,49 @@ class SevenDesiresEngine:
             reason: 失败原因
             strategies: 使用的策略
         """
-        failure_record = {
-            'url': url,
-            'reason': reason,
-            'time': time.time(),
-            'strategies': strategies or {},
-            'context': self.environment_awareness.copy(),
-            'current_desires': self.desire_forces.copy()
-        }
-        
-        self.defeat_history.append(failure_record)
-        self.success_streak = 0
-        
-        # 基于失败类型的欲望调整
-        reason_str = str(reason).lower() if reason else ''
-        if 'captcha' in reason_str:
-            self.desire_perception['captcha_detection_count'] = getattr(self.desire_perception, 'captcha_detection_count', 0) + 1
-            self._manifest_desire('色欲', 0.2)    # 遇到验证码更专注
-            self._manifest_desire('暴食', -0.2)   # 降低速度
-        elif 'block' in reason_str or '403' in reason_str:
-            self.desire_perception['block_attempts'] = getattr(self.desire_perception, 'block_attempts', 0) + 1
-            self.desire_perception['detection_danger'] = min(1.0, getattr(self.desire_perception, 'detection_danger', 0) + 0.3)
-            # 强制切换到色欲模式（最安全）
-            self._awaken_dominant_desire('色欲')
-            self._manifest_desire('傲慢', -0.3)   # 降低傲慢
-        elif 'timeout' in reason_str:
-            self._manifest_desire('懒惰', 0.1)    # 寻找更优路径
-            self._manifest_desire('暴食', -0.1)   # 降低请求频率
-        
-        # 记录失败模式
-        if len(self.defeat_history) >= 3:
-            recent_failures = self.defeat_history[-3:]
-            # 检测连续失败模式
-            if all('captcha' in str(f.get('reason', '')).lower() for f in recent_failures):
-                patterns = getattr(self.desire_perception, 'pattern_recognition', {}).get('detected_patterns', [])
-                patterns.append('captcha_pattern')
-                self.monitor.enlighten("检测到验证码模式，请更换身份")
-            elif all('block' in str(f.get('reason', '')).lower() for f in recent_failures):
-                patterns = getattr(self.desire_perception, 'pattern_recognition', {}).get('detected_patterns', [])
-                patterns.append('block_pattern')
-                self.monitor.enlighten("检测到封锁模式，请紧急调整策略")
-        
+        from urllib.parse import urlparse
+        # 请求线程和分析管线的消费线程都可能记录失败，整个更新在desire_lock内完成
+        with self.desire_lock:
+            status_code = reason.get('status_code', 0) if isinstance(reason, dict) else 0
+            self._record_history(False, time.time(), urlparse(str(url)).netloc if url else '', status_code,
+                                 outcome=classify_outcome(reason, status_code), desire=self.dominant_desire)
+            self.success_streak = 0
+            self._memory_persister.mark_dirty()
+
+            # 基于失败类型的欲望调整
+            reason_str = str(reason).lower() if reason else ''
+            if 'captcha' in reason_str:
+                self.desire_perception['captcha_detection_count'] = getattr(self.desire_perception, 'captcha_detection_count', 0) + 1
+                self._manifest_desire('色欲', 0.2)    # 遇到验证码更专注
+                self._manifest_desire('暴食', -0.2)   # 降低速度
+            elif 'block' in reason_str or '403' in reason_str:
+                self.desire_perception['block_attempts'] = getattr(self.desire_perception, 'block_attempts', 0) + 1
+                self.desire_perception['detection_danger'] = min(1.0, getattr(self.desire_perception, 'detection_danger', 0) + 0.3)
+                # 强制切换到色欲模式（最安全）
+                self._awaken_dominant_desire('色欲')
+                self._manifest_desire('傲慢', -0.3)   # 降低傲慢
+            elif 'timeout' in reason_str:
+                self._manifest_desire('懒惰', 0.1)    # 寻找更优路径
+                self._manifest_desire('暴食', -0.1)   # 降低请求频率
+
+            # 记录失败模式
+            if len(self.defeat_history) >= 3:
+                recent_outcomes = self.defeat_history.recent(3)['outcome']
+                # 检测连续失败模式
+                if (recent_outcomes == OUTCOME_CAPTCHA).all():
+                    patterns = getattr(self.desire_perception, 'pattern_recognition', {}).get('detected_patterns', [])
+                    patterns.append('captcha_pattern')
+                    self.monitor.enlighten("检测到验证码模式，请更换身份")
+                elif (recent_outcomes == OUTCOME_BLOCKED).all():
+                    patterns = getattr(self.desire_perception, 'pattern_recognition', {}).get('detected_patterns', [])
+                    patterns.append('block_pattern')
+                    self.monitor.enlighten("检测到封锁模式，请紧急调整策略")
+
     # 兼容旧版API的统一实现
     def detect_pattern_changes(self, url, recent_results):
         """兼容旧版API：检测模式变化"""
         # 使用现有的模式识别系统
-        return len(self.defeat_history) >= 3 and all('error' in str(f.get('reason', '')) for f in self.defeat_history[-3:])
+        return len(self.defeat_history) >= 3 and bool((self.defeat_history.recent(3)['outcome'] == OUTCOME_ERROR).all())
     
     def generate_adaptive_response(self, url, pattern_changed):
         """兼容旧版API：生成自适应响应"""
@@ -819,13 +866,13 @@ class SevenDesiresEngine:
             调整建议列表
         """
         recommendations = []
-        insights = self.get_metacognitive_insights()
+        risk_assessment = self._insight_section('risk_assessment')
         
         # 基于风险调整
-        if insights['risk_assessment']['overall_risk'] > 0.7:
+        if risk_assessment['overall_risk'] > 0.7:
             recommendations.append("建议切换至隐身模式，降低请求频率")
             recommendations.append("考虑更换代理和指纹")
-        elif insights['risk_assessment']['overall_risk'] > 0.4:
+        elif risk_assessment['overall_risk'] > 0.4:
             recommendations.append("建议增加请求间隔，减少并发")
         
         # 基于性能调整
@@ -834,7 +881,7 @@ class SevenDesiresEngine:
             recommendations.append("响应时间过长，建议增加超时设置")
         
         # 基于成功率调整
-        if self.success_streak > 10 and insights['risk_assessment']['overall_risk'] < 0.3:
+        if self.success_streak > 10 and risk_assessment['overall_risk'] < 0.3:
             recommendations.append("连续成功，可以适当提高爬取效率")
         elif len(self.defeat_history) > 5 and len(self.defeat_history) > len(self.triumph_history):
             recommendations.append("失败率较高，建议调整策略")
@@ -950,16 +997,16 @@ class SevenDesiresEngine:
         # 简化实现
         knowledge = {
             'desire_forces': self.desire_forces,
-            'triumph_history': self.triumph_history[-self.memory_span:],
-            'defeat_history': self.defeat_history[-self.memory_span:],
+            'triumph_history': self.triumph_history.records(),
+            'defeat_history': self.defeat_history.records(),
             'dominant_desire': self.dominant_desire
         }
         # 这里可以添加保存到文件的逻辑
         if hasattr(self, 'monitor'):
             self.monitor.enlighten("欲望知识已保存")
         
-        # 唤醒欲望记忆
-        self._awaken_desire_memories()
+        # 封印欲望记忆（记忆在构造时已唤醒）
+        self._seal_desire_memories()
         
         # 初始化欲望策略
         self._initialize_desire_strategies()
@@ -970,7 +1017,7 @@ class SevenDesiresEngine:
         # 启动欲望监控
         self._start_desire_monitoring()
     
-    def analyze_crawl_result(self, *args):
+    def analyze_crawl_result(self, *args, **kwargs):
         """
         分析爬取结果并执行元认知学习
         
@@ -978,13 +1025,16 @@ class SevenDesiresEngine:
             *args: 支持多种参数格式
                 - (result_dict): 新版格式
                 - (url, result_dict, additional_info): 旧版格式
+            **kwargs: 关键字格式 url=..., result=..., strategies_used=...
         
         Returns:
             分析后的结果和建议
         """
         try:
             # 支持不同的参数格式
-            if len(args) == 1:
+            if 'result' in kwargs:
+                result = kwargs['result']
+            elif len(args) == 1:
                 result = args[0]
             else:
                 # 假设格式为(url, result_dict, additional_info)
@@ -1015,15 +1065,15 @@ class SevenDesiresEngine:
             
             if result.get('success'):
                 # 记录成功
-                success_record = {
-                    'timestamp': time.time(),
-                    'target': result.get('url'),
-                    'data_size': result.get('data_size', 0),
-                    'response_time': result.get('response_time', 0),
-                    'behavior_pattern': getattr(self, 'current_behavior_pattern', 'default'),
-                    'dominant_desire': self.get_dominant_desire() if hasattr(self, 'get_dominant_desire') else '未知'
-                }
-                self.triumph_history.append(success_record)
+                from urllib.parse import urlparse
+                self._record_history(
+                    True,
+                    time.time(),
+                    urlparse(str(result.get('url') or '')).netloc,
+                    result.get('status_code', 0),
+                    result.get('response_time'),
+                    desire=self.get_dominant_desire() if hasattr(self, 'get_dominant_desire') else None
+                )
                 self.success_streak += 1
                 
                 # 更新效率分数
@@ -1052,7 +1102,7 @@ class SevenDesiresEngine:
             if hasattr(self, 'get_metacognitive_insights'):
                 insights = self.get_metacognitive_insights()
                 analysis_result['metacognitive_insights'] = insights
-                analysis_result['recommendations'] = self._generate_adjustment_recommendations() if hasattr(self, '_generate_adjustment_recommendations') else []
+                analysis_result['recommendations'] = insights['recommendations']
             
             return analysis_result
         except Exception as e:
@@ -1075,20 +1125,16 @@ class SevenDesiresEngine:
         Returns:
             每分钟请求数
         """
-        # 简单实现：计算最近的请求频率
-        time_window = 60  # 1分钟
-        recent_requests = 0
-        current_time = time.time()
-        
-        for record in self.triumph_history:
-            if current_time - record.get('timestamp', 0) < time_window or current_time - record.get('time', 0) < time_window:
-                recent_requests += 1
-        
-        for record in self.defeat_history:
-            if current_time - record.get('timestamp', 0) < time_window or current_time - record.get('time', 0) < time_window:
-                recent_requests += 1
-        
-        return recent_requests
+        return self.outcome_counters.count(60, REQUESTS)
+    
+    def _record_history(self, success: bool, timestamp: float, host: str = '', status: int = 0,
+                        latency: Optional[float] = None, outcome: int = OUTCOME_OK, desire: Optional[str] = None):
+        """记录一次结果：写入成功/失败历史并更新滑动窗口计数（持有desire_lock，与后台写入的快照互斥）"""
+        history = self.triumph_history if success else self.defeat_history
+        blocked = outcome in (OUTCOME_BLOCKED, OUTCOME_CAPTCHA, OUTCOME_RATE_LIMITED)
+        with self.desire_lock:
+            history.append(timestamp, host, status, latency, outcome, desire)
+            self.outcome_counters.record(success, blocked, latency, timestamp)
     
     def _initialize_desire_strategies(self):
         """初始化七宗欲策略强度"""
@@ -1172,25 +1218,11 @@ class SevenDesiresEngine:
     def _balance_desire_forces(self):
         """平衡七宗欲之力，避免某一欲望过度膨胀"""
         with self.desire_lock:
-            # 计算最近的成功率以影响欲望强度
-            recent_manifestations = self.triumph_history[-50:] + self.defeat_history[-50:]
-            recent_manifestations.sort(key=lambda x: x.get('timestamp', 0))
-            recent_manifestations = recent_manifestations[-50:]
-            
-            if recent_manifestations:
-                # 计算成功比例
-                triumph_count = len(self.triumph_history)
-                total_count = len(self.triumph_history) + len(self.defeat_history)
-                success_ratio = triumph_count / total_count if total_count > 0 else 0
+            # 计算最近10分钟的成功率以影响欲望强度（窗口内没有请求时为None）
+            success_ratio = self.outcome_counters.success_rate(600)
+            if success_ratio is not None:
                 self.desire_perception['efficiency_score']['success_rate'] = success_ratio
                 
-                # 更新连续成功次数
-                if recent_manifestations and 'success' in recent_manifestations[-1]:
-                    if recent_manifestations[-1]['success']:
-                        self.success_streak += 1
-                    else:
-                        self.success_streak = 0
-                
                 # 实战策略调整：基于成功比例和连续成功
                 if self.success_streak > 5:
                     # 连续成功多次，傲慢和贪婪暴涨
@@ -1208,9 +1240,8 @@ class SevenDesiresEngine:
                     self.monitor.desire_conflict('愤怒', '懒惰', "成功率低，愤怒唤醒，准备激进突破！")
                 
                 # 计算平均响应时间
-                response_times = [h.get('result', {}).get('response_time', 0) for h in recent_manifestations if 'response_time' in h.get('result', {})]
-                if response_times:
-                    avg_time = sum(response_times) / len(response_times)
+                avg_time = self.outcome_counters.average_latency(600)
+                if avg_time is not None:
                     self.desire_perception['efficiency_score']['avg_response_time'] = avg_time
                     
                     # 响应时间过长时增强懒惰（寻求更省力方法）
@@ -1237,46 +1268,81 @@ class SevenDesiresEngine:
                     }
                     self.monitor.battlefield_report(stats)
     
+    # 属于全局状态的记忆，每次写入时作为一条状态事件整体保存
+    _DESIRE_STATE_KEYS = ('desire_knowledge', 'desire_strengths', 'desire_perception', 'desire_transition_history')
+    
     def _awaken_desire_memories(self):
-        """唤醒七宗欲的记忆"""
-        desire_path = global_config.get('desires.memory_path', 'data/seven_desires.pkl')
-        if os.path.exists(desire_path):
-            try:
-                with open(desire_path, 'rb') as f:
-                    memories = pickle.load(f)
-                    self.desire_knowledge = memories.get('desire_knowledge', {})
-                    self.triumph_history = memories.get('triumph_history', [])
-                    self.defeat_history = memories.get('defeat_history', [])
-                    self.desire_strengths = memories.get('desire_strengths', {})
-                    self.target_profiles = memories.get('target_profiles', {})
-                    # 加载欲望感知数据
-                    self.desire_perception = memories.get('desire_perception', self.desire_perception)
-                    self.desire_transition_history = memories.get('desire_transition_history', [])
-                self.monitor.enlighten(f"七宗欲记忆已唤醒，包含 {len(self.target_profiles)} 个目标档案")
-            except Exception as e:
-                self.monitor.desire_conflict('傲慢', '愤怒', f"唤醒欲望记忆失败: {e}")
+        """唤醒七宗欲的记忆（只读取全局状态、最近的历史记录和日志尾部，目标档案按需加载）"""
+        store = self._memory_store
+        try:
+            if store.is_empty():
+                self._import_legacy_memories()
+            memories = store.load()
+            state = memories['state'] or {}
+            self.desire_knowledge = state.get('desire_knowledge', self.desire_knowledge)
+            self.desire_strengths = state.get('desire_strengths', self.desire_strengths)
+            self.desire_perception = state.get('desire_perception', self.desire_perception)
+            self.desire_transition_history = state.get('desire_transition_history', self.desire_transition_history)
+            for record in memories['triumph_history']:
+                self.triumph_history.add(record)
+            for record in memories['defeat_history']:
+                self.defeat_history.add(record, failed=True)
+            self.target_profiles = LazyProfileMap(store.get_profile, store.iter_profiles, memories['profiles'])
+            self._history_marks = {TRIUMPH: self.triumph_history.total, DEFEAT: self.defeat_history.total}
+            if memories['state'] is not None:
+                self.monitor.enlighten(f"七宗欲记忆已唤醒，包含 {store.profile_count()} 个目标档案")
+        except Exception as e:
+            self.monitor.desire_conflict('傲慢', '愤怒', f"唤醒欲望记忆失败: {e}")
     
-    def _seal_desire_memories(self):
-        """封印七宗欲的记忆"""
-        desire_path = global_config.get('desires.memory_path', 'data/seven_desires.pkl')
-        os.makedirs(os.path.dirname(desire_path), exist_ok=True)
-        
-        memories = {
-            'desire_knowledge': self.desire_knowledge,
-            'triumph_history': self.triumph_history[-self.memory_span:],
-            'defeat_history': self.defeat_history[-self.memory_span:],
-            'desire_strengths': self.desire_strengths,
-            'target_profiles': self.target_profiles,
-            'desire_perception': self.desire_perception,
-            'desire_transition_history': self.desire_transition_history[-100:]
-        }
+    def _import_legacy_memories(self):
+        """把旧版整份pickle格式的欲望记忆导入事件存储"""
+        legacy_path = global_config.get('desires.legacy_memory_path', 'data/seven_desires.pkl')
+        if not legacy_path or not os.path.exists(legacy_path):
+            return
+        with open(legacy_path, 'rb') as f:
+            memories = pickle.load(f)
+        self._memory_store.import_memories(memories, self._DESIRE_STATE_KEYS)
+        self.monitor.enlighten(f"已导入旧版欲望记忆: {legacy_path}")
+    
+    def _snapshot_desire_memories(self) -> list:
+        """
+        收集上次写入之后的修改（在desire_lock内调用，直接序列化，写盘时不再受其他线程修改影响）
         
+        Returns:
+            待追加的事件列表：新增的历史记录、修改过的目标档案和当前全局状态
+        """
+        events = self._unwritten_events
+        for kind, history in ((TRIUMPH, self.triumph_history), (DEFEAT, self.defeat_history)):
+            events.extend((kind, None, dumps(tuple(record))) for record in history.since(self._history_marks[kind]))
+            self._history_marks[kind] = history.total
+        for target in self._dirty_targets:
+            profile = dict.get(self.target_profiles, target)
+            if profile is not None:
+                events.append((PROFILE, target, dumps(profile)))
+        self._dirty_targets.clear()
+        state = {key: getattr(self, key) for key in self._DESIRE_STATE_KEYS}
+        state['desire_transition_history'] = self.desire_transition_history[-100:]
+        events.append((STATE, None, dumps(state)))
+        self._unwritten_events = []
+        return events
+    
+    def _append_desire_events(self, events: list):
+        """追加事件到存储，失败时保留到下一次写入"""
         try:
-            with open(desire_path, 'wb') as f:
-                pickle.dump(memories, f)
+            self._memory_store.append(events)
+        except Exception:
+            with self.desire_lock:
+                # 同一批中的旧状态事件会被之后的新状态覆盖，一并保留即可
+                self._unwritten_events = events + self._unwritten_events
+            raise
+    
+    def _seal_desire_memories(self):
+        """立即封印七宗欲的记忆（平时由后台线程延迟写入）"""
+        self._memory_persister.mark_dirty()
+        if self._memory_persister.flush():
             self.monitor.enlighten("七宗欲记忆已封印")
-        except Exception as e:
-            self.monitor.desire_conflict('傲慢', '愤怒', f"封印欲望记忆失败: {e}")
+        elif self._memory_persister.dirty:
+            self.monitor.desire_conflict('傲慢', '愤怒', "封印欲望记忆失败")
     
     def _sense_danger(self, success: bool, result: Dict[str, Any]):
         """感知危险信号，激发相应欲望（实战版）"""
@@ -1475,6 +1541,7 @@ class SevenDesiresEngine:
             if target in self.target_profiles:
                 self.target_profiles[target]['last_desire_response'] = desire_response
                 self.target_profiles[target]['response_timestamp'] = time.time()
+                self._dirty_targets.add(target)
     
     def _is_desire_satisfied(self, result: Dict[str, Any]) -> bool:
         """判断欲望是否得到满足"""
@@ -1524,24 +1591,20 @@ class SevenDesiresEngine:
         response_time = result.get('response_time', 0)
         self._manifest_desire(desire_satisfied, response_time)
         
-        # 记录欲望历史
-        desire_record = {
-            'url': url,
-            'target': target,
-            'timestamp': time.time(),
-            'result': result,
-            'desires_unleashed': desires_unleashed,
-            'dominant_desire': self.dominant_desire
-        }
+        # 记录欲望历史（只保留紧凑字段，不保留页面内容）
+        status_code = result.get('status_code', 0)
         
         with self.desire_lock:
             if desire_satisfied:
-                self.triumph_history.append(desire_record)
+                self._record_history(True, time.time(), target, status_code, result.get('response_time'),
+                                     OUTCOME_OK, self.dominant_desire)
                 # 增强释放的欲望之力
                 self._strengthen_desires(desires_unleashed, satisfied=True)
                 self.monitor.desire_manifest(self.dominant_desire, f"{self.dominant_desire}得到满足: {url}")
             else:
-                self.defeat_history.append(desire_record)
+                outcome = classify_outcome(result.get('error') or result.get('content', '')[:2000], status_code)
+                self._record_history(False, time.time(), target, status_code, result.get('response_time'),
+                                     outcome, self.dominant_desire)
                 # 削弱释放的欲望之力
                 self._strengthen_desires(desires_unleashed, satisfied=False)
                 self.monitor.desire_conflict(self.dominant_desire, '挫折', f"{self.dominant_desire}受挫: {url}")
@@ -1554,9 +1617,9 @@ class SevenDesiresEngine:
             
             # 唤醒最强大的欲望
             self._awaken_dominant_desire()
-        
-        # 封印欲望记忆
-        self._seal_desire_memories()
+            
+            # 标记欲望记忆已修改，由后台线程延迟封印
+            self._memory_persister.mark_dirty()
     
     def feed_desire_hunger(self, cpu: float, memory: float, network: float):
         """满足欲望的资源饥渴
@@ -1671,6 +1734,7 @@ class SevenDesiresEngine:
             }
         
         profile = self.target_profiles[target]
+        self._dirty_targets.add(target)
         
         # 更新统计信息
         if desire_satisfied:
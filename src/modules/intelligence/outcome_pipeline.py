@@ -0,0 +1,130 @@
+# PhantomCrawler - 结果分析管线模块
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+
+# 事件类型
+EVENT_RESPONSE = 'response'  # 收到HTTP响应（成功或被阻止）
+EVENT_ERROR = 'error'        # 主请求抛出异常
+EVENT_FAILURE = 'failure'    # 所有方法都失败后的最终失败
+EVENT_BROWSER = 'browser'    # Playwright爬取的结果
+
+
+class OutcomeEvent(NamedTuple):
+    """
+    一次请求结果的紧凑事件
+
+    只保留分析需要的标量字段，不引用响应和正文
+    """
+    kind: str
+    url: str
+    success: bool
+    response_time: float
+    timestamp: float
+    status_code: int = 500
+    error: str = 'Unknown error'
+    blocked: bool = False
+    content_length: int = 0
+    playwright_used: bool = False
+    risk_level: float = 0.5
+    success_streak: int = 0  # 提交时爬虫的连续成功次数
+
+    @classmethod
+    def from_result(cls, kind: str, url: str, result: Any, response_time: float,
+                    success: bool, success_streak: int = 0) -> 'OutcomeEvent':
+        """
+        从爬取结果（CrawlResult或字典）提取事件
+
+        Args:
+            kind: 事件类型
+            url: 目标URL
+            result: 爬取结果
+            response_time: 响应时间（秒）
+            success: 是否成功
+            success_streak: 提交时的连续成功次数
+
+        Returns:
+            事件
+        """
+        if not hasattr(result, 'get'):
+            return cls(kind, url, success, response_time, time.time(), error=str(result),
+                       success_streak=success_streak)
+        content_length = getattr(result, 'content_length', None)
+        if content_length is None:
+            content = result.get('content')
+            content_length = len(content) if content else 0
+        return cls(
+            kind, url, success, response_time, time.time(),
+            status_code=result.get('status_code', 500),
+            error=str(result.get('error', 'Unknown error')),
+            blocked=bool(result.get('blocked', False)),
+            content_length=content_length,
+            playwright_used=bool(result.get('playwright_used', False)),
+            risk_level=result.get('risk_level', 0.5),
+            success_streak=success_streak
+        )
+
+    def as_result(self) -> Dict[str, Any]:
+        """转换为分析方法使用的结果字典"""
+        return self._asdict()
+
+
+class StrategySnapshot(NamedTuple):
+    """请求路径做策略决策时读取的七宗欲状态快照（每次分析后整体替换）"""
+    dominant_desire: str = '贪婪'
+    detection_danger: float = 0.0
+    detection_risk: float = 0.0
+
+
+class OutcomePipeline:
+    """
+    结果分析管线
+
+    请求路径把OutcomeEvent交给emit，在调用线程中立即分析，分析后调用snapshot发布策略快照；
+    策略决策读取snapshot属性，不直接读取七宗欲引擎的实时状态。
+
+    每个事件的分析只需几十微秒，后台线程的排队和唤醒开销比分析本身更大，因此分析总是同步执行。
+    """
+
+    def __init__(self, apply: Callable[[List[OutcomeEvent]], None],
+                 snapshot: Optional[Callable[[], Any]] = None):
+        """
+        Args:
+            apply: 处理一批事件的函数
+            snapshot: 生成策略快照的函数，每次处理后调用
+        """
+        self._apply = apply
+        self._snapshot = snapshot
+        self.snapshot = snapshot() if snapshot else None
+        self.stats = {
+            'emitted': 0,
+            'apply_errors': 0,
+            'apply_seconds': 0.0
+        }
+
+    def emit(self, event: OutcomeEvent) -> None:
+        """
+        分析一个事件并发布新的策略快照
+
+        Args:
+            event: 结果事件
+        """
+        start = time.perf_counter()
+        try:
+            self._apply([event])
+        except Exception as e:
+            self.stats['apply_errors'] += 1
+            print(f"[PhantomCrawler] 结果分析失败: {str(e)}")
+        if self._snapshot:
+            try:
+                self.snapshot = self._snapshot()
+            except Exception as e:
+                print(f"[PhantomCrawler] 策略快照生成失败: {str(e)}")
+        self.stats['emitted'] += 1
+        self.stats['apply_seconds'] += time.perf_counter() - start
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取管线统计，包含平均每个事件的分析耗时"""
+        stats = dict(self.stats)
+        stats['avg_apply_ms'] = stats['apply_seconds'] * 1000 / stats['emitted'] if stats['emitted'] else 0.0
+        return stats
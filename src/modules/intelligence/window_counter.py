@@ -0,0 +1,144 @@
+# PhantomCrawler - 滑动窗口计数模块
+import time
+import threading
+from typing import Dict, Iterable, List, Optional
+
+from src.config import global_config
+
+# 计数项
+REQUESTS = 0
+SUCCESSES = 1
+FAILURES = 2
+BLOCKS = 3
+LATENCY_SUM = 4
+LATENCY_COUNT = 5
+METRIC_NAMES = ('requests', 'successes', 'failures', 'blocks', 'latency_sum', 'latency_count')
+
+
+class SlidingWindow:
+    """
+    按时间分桶的环形计数器
+
+    窗口被划分为固定数量的桶，每个桶累计一段时间内的各项计数，同时维护整个窗口的合计。
+    时间前进时只清空过期的桶并从合计中减去，读取合计不需要遍历记录；
+    过期粒度为一个桶的宽度。
+    """
+
+    def __init__(self, span: float, buckets: int = 60):
+        """
+        Args:
+            span: 窗口长度（秒）
+            buckets: 桶数量
+        """
+        self.span = span
+        self.bucket_count = max(1, buckets)
+        self.width = span / self.bucket_count
+        self._buckets: List[List[float]] = [[0.0] * len(METRIC_NAMES) for _ in range(self.bucket_count)]
+        self.totals: List[float] = [0.0] * len(METRIC_NAMES)
+        self._epoch: Optional[int] = None
+
+    def advance(self, now: float) -> None:
+        """把窗口推进到now，过期的桶从合计中减去"""
+        epoch = int(now // self.width)
+        if self._epoch is None:
+            self._epoch = epoch
+            return
+        steps = epoch - self._epoch
+        if steps <= 0:
+            return
+        if steps >= self.bucket_count:
+            for bucket in self._buckets:
+                bucket[:] = [0.0] * len(METRIC_NAMES)
+            self.totals = [0.0] * len(METRIC_NAMES)
+        else:
+            totals = self.totals
+            for step in range(1, steps + 1):
+                bucket = self._buckets[(self._epoch + step) % self.bucket_count]
+                for index, value in enumerate(bucket):
+                    if value:
+                        totals[index] -= value
+                        bucket[index] = 0.0
+        self._epoch = epoch
+
+    def add(self, now: float, values: Iterable[float]) -> None:
+        """在now所在的桶中累加各项计数"""
+        self.advance(now)
+        bucket = self._buckets[self._epoch % self.bucket_count]
+        totals = self.totals
+        for index, value in enumerate(values):
+            if value:
+                bucket[index] += value
+                totals[index] += value
+
+
+class WindowedCounters:
+    """
+    多个时间窗口（默认1分钟/10分钟/1小时）的请求、成功、失败、封锁和响应时间计数
+
+    每次记录结果时更新所有窗口，读取任一窗口的计数、成功率、平均响应时间都是常数时间。
+    """
+
+    def __init__(self, windows: Optional[Iterable[float]] = None, buckets: Optional[int] = None):
+        """
+        Args:
+            windows: 窗口长度列表（秒），None时读取配置desires.rate_windows
+            buckets: 每个窗口的桶数量，None时读取配置desires.window_buckets
+        """
+        windows = windows or global_config.get('desires.rate_windows', [60, 600, 3600])
+        buckets = buckets or global_config.get('desires.window_buckets', 60)
+        self.windows: Dict[float, SlidingWindow] = {span: SlidingWindow(span, buckets) for span in windows}
+        self._lock = threading.Lock()
+
+    def record(self, success: bool, blocked: bool = False, latency: Optional[float] = None,
+               timestamp: Optional[float] = None) -> None:
+        """
+        记录一次请求结果
+
+        Args:
+            success: 是否成功
+            blocked: 是否被封锁（验证码、403、限速等）
+            latency: 响应时间（秒），未知时为None
+            timestamp: 时间戳，默认当前时间
+        """
+        now = time.time() if timestamp is None else timestamp
+        has_latency = latency is not None and latency == latency
+        values = (1, 1 if success else 0, 0 if success else 1, 1 if blocked else 0,
+                  latency if has_latency else 0, 1 if has_latency else 0)
+        with self._lock:
+            for window in self.windows.values():
+                window.add(now, values)
+
+    def _totals(self, span: float, now: Optional[float] = None) -> List[float]:
+        window = self.windows[span]
+        with self._lock:
+            window.advance(time.time() if now is None else now)
+            return list(window.totals)
+
+    def count(self, span: float, metric: int = REQUESTS, now: Optional[float] = None) -> int:
+        """窗口内的计数（metric为REQUESTS/SUCCESSES/FAILURES/BLOCKS）"""
+        return int(self._totals(span, now)[metric])
+
+    def success_rate(self, span: float, now: Optional[float] = None) -> Optional[float]:
+        """窗口内的成功率（0~1），窗口内没有请求时返回None"""
+        totals = self._totals(span, now)
+        return totals[SUCCESSES] / totals[REQUESTS] if totals[REQUESTS] else None
+
+    def average_latency(self, span: float, now: Optional[float] = None) -> Optional[float]:
+        """窗口内的平均响应时间（秒），没有响应时间时返回None"""
+        totals = self._totals(span, now)
+        return totals[LATENCY_SUM] / totals[LATENCY_COUNT] if totals[LATENCY_COUNT] else None
+
+    def snapshot(self, now: Optional[float] = None) -> Dict[str, Dict[str, float]]:
+        """
+        所有窗口的计数
+
+        Returns:
+            {'60s': {'requests': ..., 'successes': ..., ...}, ...}
+        """
+        now = time.time() if now is None else now
+        result = {}
+        for span in self.windows:
+            totals = self._totals(span, now)
+            result[f'{span:g}s'] = {name: int(value) if name != 'latency_sum' else value
+                                    for name, value in zip(METRIC_NAMES, totals)}
+        return result
@@ -0,0 +1,123 @@
+# PhantomCrawler - 延迟写回持久化模块
+import time
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from src.config import global_config
+
+
+class WriteBehindPersister:
+    """
+    延迟写回的状态持久化
+
+    调用方在每次修改状态后调用mark_dirty()（只增加计数，O(1)），后台线程在
+    累计flush_every次修改或距离上次写入超过flush_interval秒时才取快照并写入。
+    快照在调用方提供的锁内生成，只包含上次写入之后的增量（如新增的事件），写入在锁外完成，
+    由write负责持久化（如在一个事务中追加到事件日志），不重写整个状态。
+    close()停止后台线程并写入最后的修改。
+    """
+
+    def __init__(self, snapshot: Callable[[], Any], write: Callable[[Any], None],
+                 flush_interval: Optional[float] = None, flush_every: Optional[int] = None,
+                 lock: Optional[threading.RLock] = None, name: str = 'write-behind'):
+        """
+        Args:
+            snapshot: 返回待写入状态的函数，在lock内调用，返回值不能再被其他线程修改（如序列化后的字节）
+            write: 写入快照的函数，在lock外调用
+            flush_interval: 有未写入修改时，两次写入的最大间隔秒数
+            flush_every: 累计多少次修改后立即唤醒后台线程写入
+            lock: 生成快照时持有的锁
+            name: 后台线程名称
+        """
+        self._snapshot = snapshot
+        self._write = write
+        self.flush_interval = flush_interval or global_config.get('desires.flush_interval', 5.0)
+        self.flush_every = flush_every or global_config.get('desires.flush_every', 100)
+        self._state_lock = lock or threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+        self._name = name
+        self._dirty = 0
+        self.stats = {
+            'marked': 0,
+            'flushes': 0,
+            'flush_errors': 0,
+            'flush_seconds': 0.0,
+            'last_flush': 0.0
+        }
+
+    def mark_dirty(self, count: int = 1) -> None:
+        """记录状态已修改，必要时唤醒后台线程"""
+        with self._state_lock:
+            self._dirty += count
+        self.stats['marked'] += count
+        if self._thread is None and not self._stopped:
+            self._start()
+        if self._dirty >= self.flush_every:
+            self._wakeup.set()
+
+    @property
+    def dirty(self) -> bool:
+        """是否有未写入的修改"""
+        return self._dirty > 0
+
+    def _start(self) -> None:
+        with self._flush_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            if self._stopped:
+                break
+            if self._dirty:
+                self.flush()
+
+    def flush(self) -> bool:
+        """
+        立即写入未保存的修改
+
+        Returns:
+            是否执行了写入
+        """
+        with self._flush_lock:
+            if not self._dirty:
+                return False
+            start = time.perf_counter()
+            with self._state_lock:
+                pending = self._dirty
+                state = self._snapshot()
+            try:
+                self._write(state)
+            except Exception as e:
+                self.stats['flush_errors'] += 1
+                print(f"[PhantomCrawler] 状态写入失败: {str(e)}")
+                return False
+            # 生成快照之后到达的修改留给下一次写入
+            with self._state_lock:
+                self._dirty -= pending
+            self.stats['flushes'] += 1
+            self.stats['flush_seconds'] += time.perf_counter() - start
+            self.stats['last_flush'] = time.time()
+            return True
+
+    def close(self) -> None:
+        """停止后台线程并写入剩余的修改"""
+        self._stopped = True
+        self._wakeup.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=max(self.flush_interval, 1.0) + 5.0)
+        self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取写入统计"""
+        stats = dict(self.stats)
+        stats['pending'] = self._dirty
+        return stats
+
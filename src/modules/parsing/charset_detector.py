@@ -0,0 +1,216 @@
+# PhantomCrawler - 字符集检测模块
+import re
+import time
+import codecs
+import threading
+import importlib.util
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+
+from src.config import global_config
+
+# 统计检测库（可选），requests依赖其中之一
+HAS_CHARSET_NORMALIZER = importlib.util.find_spec('charset_normalizer') is not None
+HAS_CHARDET = importlib.util.find_spec('chardet') is not None
+
+if HAS_CHARSET_NORMALIZER:
+    import charset_normalizer
+elif HAS_CHARDET:
+    import chardet
+
+_BOMS = (
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+_META_CHARSET = re.compile(rb'<meta[^>]+?charset\s*=\s*["\']?\s*([a-zA-Z0-9_:.\-]+)', re.IGNORECASE)
+_XML_ENCODING = re.compile(rb'<\?xml[^>]+?encoding\s*=\s*["\']([a-zA-Z0-9_.\-]+)', re.IGNORECASE)
+
+# 按WHATWG编码标准，浏览器把这些标签当作其超集解码
+_SUPERSETS = {
+    'gb2312': 'gb18030',
+    'gbk': 'gb18030',
+    'iso8859-1': 'cp1252',
+    'ascii': 'cp1252',
+    'shift_jis': 'cp932',
+    'euc_kr': 'cp949',
+    'big5': 'big5hkscs',
+}
+
+
+def normalize_encoding(label: Optional[str]) -> Optional[str]:
+    """
+    规范化编码名称
+
+    Returns:
+        Python编解码器名称，无法识别时返回None
+    """
+    if not label:
+        return None
+    try:
+        name = codecs.lookup(label.strip().strip('"\'')).name
+    except LookupError:
+        return None
+    return _SUPERSETS.get(name, name)
+
+
+class CharsetDetector:
+    """
+    响应正文字符集检测
+
+    依次检查：BOM -> Content-Type头的charset -> 正文前几KB中的<meta charset>或
+    <?xml encoding> -> 同一主机之前检测到的编码 -> UTF-8严格解码 -> 统计检测。
+    只有前面都无法确定时才对正文样本做统计检测，结果按主机记忆，
+    同一站点的后续页面不再重复检测。主机记忆和UTF-8都以严格解码验证，
+    验证得到的文本直接作为解码结果，正文只解码一次。
+    """
+
+    def __init__(self, sniff_bytes: Optional[int] = None, detect_bytes: Optional[int] = None,
+                 max_hosts: Optional[int] = None):
+        """
+        Args:
+            sniff_bytes: 查找<meta charset>时扫描的字节数
+            detect_bytes: 统计检测使用的最大样本字节数
+            max_hosts: 记忆编码的最大主机数
+        """
+        self.sniff_bytes = sniff_bytes or global_config.get('charset.sniff_bytes', 4096)
+        self.detect_bytes = detect_bytes or global_config.get('charset.detect_bytes', 65536)
+        self.max_hosts = max_hosts or global_config.get('charset.max_hosts', 10000)
+        self._host_encodings: 'OrderedDict[str, str]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {
+            'decodes': 0,
+            'decode_seconds': 0.0,
+            'bom': 0,
+            'header': 0,
+            'meta': 0,
+            'host_memo': 0,
+            'utf8': 0,
+            'detected': 0,
+            'fallback': 0
+        }
+
+    def detect(self, content: bytes, header_charset: Optional[str] = None,
+               host: Optional[str] = None) -> Tuple[str, str]:
+        """
+        确定正文编码
+
+        Args:
+            content: 正文字节
+            header_charset: Content-Type头中的charset
+            host: 主机键，用于读取和记忆编码
+
+        Returns:
+            (编码名称, 来源)元组，来源为bom、header、meta、host_memo、utf8、detected或fallback
+        """
+        encoding, source, _ = self._detect(content, header_charset, host)
+        return encoding, source
+
+    def _detect(self, content: bytes, header_charset: Optional[str],
+                host: Optional[str]) -> Tuple[str, str, Optional[str]]:
+        # 第三项为严格解码验证时已得到的文本，没有时为None
+        for bom, encoding in _BOMS:
+            if content.startswith(bom):
+                return encoding, 'bom', None
+
+        encoding = normalize_encoding(header_charset)
+        if encoding:
+            return encoding, 'header', None
+
+        head = content[:self.sniff_bytes]
+        match = _META_CHARSET.search(head) or _XML_ENCODING.search(head)
+        if match:
+            encoding = normalize_encoding(match.group(1).decode('ascii', 'ignore'))
+            if encoding:
+                self._remember(host, encoding)
+                return encoding, 'meta', None
+
+        if host:
+            with self._lock:
+                encoding = self._host_encodings.get(host)
+                if encoding:
+                    self._host_encodings.move_to_end(host)
+            # 主机记忆的编码无法严格解码本页时，继续检查UTF-8和统计检测
+            if encoding:
+                try:
+                    return encoding, 'host_memo', content.decode(encoding)
+                except (UnicodeDecodeError, LookupError):
+                    pass
+
+        # UTF-8严格解码对其他多字节编码几乎总会失败，每页都检查，不写入主机记忆
+        try:
+            return 'utf-8', 'utf8', content.decode('utf-8')
+        except UnicodeDecodeError:
+            pass
+
+        encoding = self._statistical_detect(content[:self.detect_bytes])
+        if encoding:
+            self._remember(host, encoding)
+            return encoding, 'detected', None
+        return 'utf-8', 'fallback', None
+
+    @staticmethod
+    def _statistical_detect(sample: bytes) -> Optional[str]:
+        try:
+            if HAS_CHARSET_NORMALIZER:
+                best = charset_normalizer.from_bytes(sample).best()
+                return normalize_encoding(best.encoding) if best else None
+            if HAS_CHARDET:
+                return normalize_encoding(chardet.detect(sample).get('encoding'))
+        except Exception as e:
+            print(f"[PhantomCrawler] 字符集检测失败: {str(e)}")
+        return None
+
+    def _remember(self, host: Optional[str], encoding: str) -> None:
+        if not host:
+            return
+        with self._lock:
+            self._host_encodings[host] = encoding
+            self._host_encodings.move_to_end(host)
+            while len(self._host_encodings) > self.max_hosts:
+                self._host_encodings.popitem(last=False)
+
+    def decode_response(self, response: httpx.Response, host: Optional[str] = None) -> str:
+        """
+        确定响应的编码并解码正文，解码结果缓存在响应中（response.text），正文只解码一次
+
+        Args:
+            response: 正文已读取的响应
+            host: 主机键，None时取响应URL的主机
+
+        Returns:
+            解码后的文本
+        """
+        start = time.perf_counter()
+        content = response.content
+        if host is None:
+            host = response.request.url.netloc.decode('ascii', 'ignore').lower()
+        encoding, source, text = self._detect(content, response.charset_encoding, host)
+        if text is None:
+            # 与httpx的response.text一致，无法解码的字节替换为U+FFFD
+            try:
+                text = content.decode(encoding, errors='replace')
+            except LookupError:
+                encoding = 'utf-8'
+                text = content.decode(encoding, errors='replace')
+        response.encoding = encoding
+        # 直接放入httpx的文本缓存，response.text不再重新解码
+        response._text = text
+        elapsed = time.perf_counter() - start
+
+        self.stats['decodes'] += 1
+        self.stats['decode_seconds'] += elapsed
+        self.stats[source] += 1
+        return text
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取检测统计，包含平均每页解码耗时"""
+        stats = dict(self.stats)
+        stats['avg_decode_ms'] = stats['decode_seconds'] * 1000 / stats['decodes'] if stats['decodes'] else 0.0
+        stats['hosts_memoized'] = len(self._host_encodings)
+        return stats
@@ -1,96 +1,98 @@
-# PhantomCrawler - HTML解析模块
-import re
-from urllib.parse import urlparse, urljoin
-from typing import List, Dict, Optional
-
-class HTMLParser:
-    """HTML解析器，用于提取页面中的链接"""
-    
-    def __init__(self):
-        # 常用的链接提取正则表达式
-        self.link_pattern = re.compile(r'<a[^>]+href=["\'](.*?)["\'][^>]*>', re.IGNORECASE)
-        
-    def extract_links(self, html_content: str, base_url: str) -> List[str]:
-        """
-        从HTML内容中提取链接
-        
-        Args:
-            html_content: HTML内容字符串
-            base_url: 基础URL，用于解析相对路径
-            
-        Returns:
-            提取的链接列表
-        """
-        if not html_content:
-            return []
-        
-        # 提取所有链接
-        raw_links = self.link_pattern.findall(html_content)
-        
-        # 清理和规范化链接
-        normalized_links = []
-        for link in raw_links:
-            # 跳过JavaScript链接和锚点链接
-            if link.startswith('javascript:') or link.startswith('#'):
-                continue
-            
-            # 处理相对路径
-            if not link.startswith(('http://', 'https://')):
-                link = urljoin(base_url, link)
-            
-            # 规范化URL（移除片段部分）
-            parsed = urlparse(link)
-            normalized_link = f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
-            if parsed.query:
-                normalized_link += f"?{parsed.query}"
-            
-            normalized_links.append(normalized_link)
-        
-        return list(set(normalized_links))  # 去重
-    
-    def filter_links_by_domain(self, links: List[str], target_domain: str) -> List[str]:
-        """
-        根据域名过滤链接
-        
-        Args:
-            links: 链接列表
-            target_domain: 目标域名
-            
-        Returns:
-            过滤后的链接列表
-        """
-        filtered_links = []
-        for link in links:
-            parsed = urlparse(link)
-            # 检查域名是否匹配（支持子域名）
-            if parsed.netloc and (parsed.netloc == target_domain or parsed.netloc.endswith(f'.{target_domain}')):
-                filtered_links.append(link)
-        
-        return filtered_links
-    
-    def filter_links_by_pattern(self, links: List[str], include_patterns: Optional[List[str]] = None, 
-                              exclude_patterns: Optional[List[str]] = None) -> List[str]:
-        """
-        根据模式过滤链接
-        
-        Args:
-            links: 链接列表
-            include_patterns: 包含的模式列表
-            exclude_patterns: 排除的模式列表
-            
-        Returns:
-            过滤后的链接列表
-        """
-        filtered_links = links.copy()
-        
-        # 应用包含模式
-        if include_patterns:
-            filtered_links = [link for link in filtered_links 
-                            if any(pattern in link for pattern in include_patterns)]
-        
-        # 应用排除模式
-        if exclude_patterns:
-            filtered_links = [link for link in filtered_links 
-                            if not any(pattern in link for pattern in exclude_patterns)]
-        
-        return filtered_links
\ No newline at end of file
+# PhantomCrawler - HTML解析模块
+from typing import List, Dict, Optional, Union
+
+from src.modules.parsing.link_extractor import LinkExtractor
+from src.modules.parsing.parsed_link import LinkScope, ParsedLink, parse_links
+from src.modules.parsing.public_suffix import DomainScope
+from src.modules.parsing.scope_matcher import compile_scope
+
+class HTMLParser:
+    """HTML解析器，用于提取页面中的链接"""
+    
+    def __init__(self):
+        # 字节级链接提取引擎，同时处理<base>、<area>和<link rel=next>等
+        self.link_extractor = LinkExtractor()
+        
+    def extract_links(self, html_content: Union[str, bytes], base_url: str,
+                      encoding: Optional[str] = None) -> List[str]:
+        """
+        从HTML内容中提取链接
+        
+        Args:
+            html_content: HTML内容，原始字节（推荐，不需要先解码整个页面）或字符串
+            base_url: 基础URL，用于解析相对路径
+            encoding: 字节内容的编码，用于解码链接中的非ASCII字符
+            
+        Returns:
+            提取的链接列表（已去掉片段、按首次出现顺序去重）
+        """
+        if not html_content:
+            return []
+        
+        return self.link_extractor.extract(html_content, base_url, encoding)
+    
+    def extract_parsed_links(self, html_content: Union[str, bytes], base_url: str,
+                             encoding: Optional[str] = None) -> List[ParsedLink]:
+        """
+        从HTML内容中提取预解析的链接，之后的过滤和入队不再解析URL
+        
+        Args:
+            html_content: HTML内容，原始字节或字符串
+            base_url: 基础URL，用于解析相对路径
+            encoding: 字节内容的编码
+            
+        Returns:
+            ParsedLink列表
+        """
+        return parse_links(self.extract_links(html_content, base_url, encoding))
+    
+    def filter_parsed_links(self, links: List[ParsedLink], target_domain: Optional[str] = None,
+                            include_patterns: Optional[List[str]] = None,
+                            exclude_patterns: Optional[List[str]] = None,
+                            visited=None, robots=None) -> List[ParsedLink]:
+        """
+        一次遍历完成域名、模式、已访问和robots.txt过滤
+        
+        Args:
+            links: 预解析的链接
+            target_domain: 目标域名（含子域名）
+            include_patterns: 包含的模式列表
+            exclude_patterns: 排除的模式列表
+            visited: 已访问URL存储
+            robots: RobotsCache，只使用已缓存的规则
+            
+        Returns:
+            过滤后的链接列表
+        """
+        scope = LinkScope(target_domain, include_patterns or (), exclude_patterns or ())
+        return scope.filter(links, visited, robots)
+    
+    def filter_links_by_domain(self, links: List[str], target_domain: str) -> List[str]:
+        """
+        根据域名过滤链接
+        
+        Args:
+            links: 链接列表
+            target_domain: 目标域名
+            
+        Returns:
+            过滤后的链接列表
+        """
+        # 按主机名比较（忽略端口），支持子域名
+        return DomainScope([target_domain]).filter(links)
+    
+    def filter_links_by_pattern(self, links: List[str], include_patterns: Optional[List[str]] = None, 
+                              exclude_patterns: Optional[List[str]] = None) -> List[str]:
+        """
+        根据模式过滤链接
+        
+        Args:
+            links: 链接列表
+            include_patterns: 包含的模式列表（子串，或're:'开头的正则、'glob:'开头的通配符）
+            exclude_patterns: 排除的模式列表，格式同上
+            
+        Returns:
+            过滤后的链接列表
+        """
+        # 相同的规则只编译一次，匹配耗时与模式数量基本无关
+        return compile_scope(include_patterns or (), exclude_patterns or ()).filter(links)
\ No newline at end of file
@@ -0,0 +1,309 @@
+# PhantomCrawler - 链接提取模块
+import re
+import html
+import itertools
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+# 一次扫描同时跳过注释、脚本/样式块（其中的标签不是链接）并找出携带链接的标签。
+# 先行断言让div、p、span等无关标签在第一个字符处就失败；
+# 每个分支的结束部分都可以匹配到缓冲区末尾（\Z），此时对应的结束分组为空，说明标记被块边界截断
+_TOKEN = re.compile(
+    rb'<(?=[!sSaAlLbB])(?:!--.*?(-->|\Z)'
+    rb'|script\b.*?(</script\s*>|\Z)'
+    rb'|style\b.*?(</style\s*>|\Z)'
+    rb'|(a|area|link|base)\b([^>]*)(>|\Z))',
+    re.IGNORECASE | re.DOTALL
+)
+_HREF = re.compile(rb'''(?:^|[\s"'/])href\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))''', re.IGNORECASE)
+_REL = re.compile(rb'''(?:^|[\s"'/])rel\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))''', re.IGNORECASE)
+
+# 跟随的<link rel>取值，样式表、图标等资源不作为页面链接
+DEFAULT_FOLLOW_RELS = frozenset({'next', 'prev', 'previous', 'alternate', 'canonical'})
+
+_SCHEME_CHARS = frozenset('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789+-.')
+
+
+def _attr_value(pattern: re.Pattern, attrs: bytes) -> Optional[bytes]:
+    match = pattern.search(attrs)
+    if match is None:
+        return None
+    value = match.group(1)
+    if value is None:
+        value = match.group(2)
+        if value is None:
+            value = match.group(3)
+    return value
+
+
+class LinkTokenizer:
+    """
+    增量的字节级链接标签分词器
+
+    SAX风格：每次feed一段字节，产出其中完整的(标签名, 属性字节)事件，
+    不完整的结尾（被截断的标签、未闭合的注释或脚本）留到下一次feed。
+    注释、<script>和<style>中的内容被整体跳过。
+    """
+
+    def __init__(self):
+        self._buffer = b''
+
+    def feed(self, data: bytes) -> List[Tuple[bytes, bytes]]:
+        """
+        输入一段字节
+
+        Returns:
+            其中完整的(小写标签名, 属性字节)事件列表，标签名为a、area、link或base
+        """
+        buffer = self._buffer + data if self._buffer else data
+        self._buffer = b''
+        events = []
+        last = 0
+        for match in _TOKEN.finditer(buffer):
+            comment_end, script_end, style_end, tag, attrs, tag_end = match.groups()
+            if tag is not None:
+                if not tag_end:
+                    self._buffer = buffer[match.start():]
+                    return events
+                events.append((tag.lower(), attrs))
+            elif not (comment_end or script_end or style_end):
+                # 未闭合的注释或脚本，等待后续数据
+                self._buffer = buffer[match.start():]
+                return events
+            last = match.end()
+
+        # 保留可能被截断的开头（如结尾的'<scr'）
+        tail = buffer.rfind(b'<', max(last, len(buffer) - 8))
+        if tail != -1:
+            self._buffer = buffer[tail:]
+        return events
+
+    def close(self) -> List[Tuple[bytes, bytes]]:
+        """输入结束，处理剩余的字节（未闭合的标签按文档结尾闭合）"""
+        buffer, self._buffer = self._buffer, b''
+        match = _TOKEN.match(buffer) if buffer else None
+        if match and match.group(4):
+            return [(match.group(4).lower(), match.group(5))]
+        return []
+
+
+def tokenize_document(data: bytes) -> List[Tuple[bytes, bytes]]:
+    """
+    一次性切分完整文档，结果与LinkTokenizer的feed+close相同
+
+    整个文档已在内存中时不需要处理块边界，用findall在C中完成扫描
+
+    Returns:
+        (小写标签名, 属性字节)事件列表
+    """
+    return [(tag.lower(), attrs) for _, _, _, tag, attrs, _ in _TOKEN.findall(data) if tag]
+
+
+class LinkExtractor:
+    """
+    页面链接提取引擎
+
+    基于LinkTokenizer直接处理字节，支持：
+    - 带引号和不带引号的href，HTML实体（&amp;）
+    - <base href>改变相对链接的基准
+    - <a>、<area>，以及rel为next/prev/alternate/canonical的<link>
+    - 一次性规范化：去掉片段，常见形式（绝对、协议相对、根相对、同目录相对）
+      直接拼接，点段（./、../）按RFC 3986归并，不调用urljoin
+    - 非HTTP链接（javascript:、mailto:、tel:、data:）被丢弃
+
+    结果按首次出现的顺序去重。
+    """
+
+    def __init__(self, follow_rels: Optional[Iterable[str]] = None):
+        """
+        Args:
+            follow_rels: 需要跟随的<link rel>取值
+        """
+        self.follow_rels = frozenset(follow_rels) if follow_rels is not None else DEFAULT_FOLLOW_RELS
+
+    def extract(self, content: Union[bytes, str], base_url: str, encoding: Optional[str] = None) -> List[str]:
+        """
+        提取页面中的链接
+
+        Args:
+            content: 页面正文，字节或字符串
+            base_url: 页面URL
+            encoding: 正文编码，用于解码链接中的非ASCII字符
+
+        Returns:
+            去重后的绝对URL列表
+        """
+        if not content:
+            return []
+        if isinstance(content, str):
+            content = content.encode('utf-8', 'surrogatepass')
+            encoding = 'utf-8'
+        return list(dict.fromkeys(self._resolve_events((tokenize_document(content),), base_url, encoding)))
+
+    def extract_stream(self, chunks: Iterable[bytes], base_url: str, encoding: Optional[str] = None) -> List[str]:
+        """
+        从字节块流中提取链接，内存中只保留当前块和未完成的标签
+
+        Args:
+            chunks: 正文字节块
+            base_url: 页面URL
+            encoding: 正文编码
+
+        Returns:
+            去重后的绝对URL列表
+        """
+        return list(dict.fromkeys(self.iter_links(chunks, base_url, encoding)))
+
+    def iter_links(self, chunks: Iterable[bytes], base_url: str,
+                   encoding: Optional[str] = None) -> Iterator[str]:
+        """
+        逐个产出链接（未去重）
+
+        Yields:
+            绝对URL
+        """
+        tokenizer = LinkTokenizer()
+
+        def batches() -> Iterator[List[Tuple[bytes, bytes]]]:
+            for chunk in chunks:
+                yield tokenizer.feed(chunk)
+            yield tokenizer.close()
+
+        return self._resolve_events(batches(), base_url, encoding)
+
+    def _resolve_events(self, batches: Iterable[List[Tuple[bytes, bytes]]], base_url: str,
+                        encoding: Optional[str]) -> Iterator[str]:
+        encoding = encoding or 'utf-8'
+        resolver = _Resolver(base_url)
+        resolve = resolver.resolve
+        decode = self._decode
+        href_search = _HREF.search
+        follow_rels = self.follow_rels
+        seen_raw = set()
+        base_seen = False
+
+        for events in batches:
+            for tag, attrs in events:
+                match = href_search(attrs)
+                if match is None:
+                    continue
+                href = match.group(1)
+                if href is None:
+                    href = match.group(2)
+                    if href is None:
+                        href = match.group(3)
+                if not href:
+                    continue
+                if tag != b'a':
+                    if tag == b'base':
+                        # 只有第一个<base href>生效
+                        if not base_seen:
+                            base_seen = True
+                            resolver = _Resolver(resolve(decode(href, encoding)) or base_url)
+                            resolve = resolver.resolve
+                        continue
+                    if tag == b'link':
+                        rel = _attr_value(_REL, attrs)
+                        if not rel or not follow_rels.intersection(rel.decode('ascii', 'ignore').lower().split()):
+                            continue
+                # 同一页面中重复的原始链接只解析一次
+                if href in seen_raw:
+                    continue
+                seen_raw.add(href)
+                url = resolve(decode(href, encoding))
+                if url:
+                    yield url
+
+    @staticmethod
+    def _decode(value: bytes, encoding: str) -> str:
+        text = value.decode(encoding, 'replace')
+        if '&' in text:
+            # 绝大多数实体是查询串中的&amp;，只有它时用replace代替完整的实体解析
+            if text.count('&') == text.count('&amp;'):
+                return text.replace('&amp;', '&')
+            text = html.unescape(text)
+        return text
+
+
+def _remove_dot_segments(url: str) -> str:
+    """按RFC 3986归并绝对URL路径中的点段（./、../），查询串不受影响"""
+    start = url.find('/', url.find('//') + 2)
+    if start == -1:
+        return url
+    query = url.find('?', start)
+    end = query if query != -1 else len(url)
+    path = url[start:end]
+    if '/.' not in path:
+        return url
+
+    segments = path.split('/')
+    output = []
+    for segment in segments[1:]:
+        if segment == '..':
+            if output:
+                output.pop()
+        elif segment != '.':
+            output.append(segment)
+    if segments[-1] in ('.', '..'):
+        output.append('')
+    return url[:start] + '/' + '/'.join(output) + url[end:]
+
+
+class _Resolver:
+    """以一个基准URL解析相对链接，常见形式只做字符串拼接"""
+
+    __slots__ = ('scheme', 'origin', 'directory', 'path_query')
+
+    def __init__(self, base_url: str):
+        parts = urlsplit(base_url)
+        self.scheme = parts.scheme.lower()
+        self.origin = f"{self.scheme}://{parts.netloc}"
+        path = parts.path or '/'
+        self.directory = self.origin + path[:path.rfind('/') + 1]
+        self.path_query = self.origin + path
+
+    def resolve(self, href: str) -> Optional[str]:
+        """
+        解析链接为去掉片段的绝对HTTP(S) URL
+
+        Returns:
+            绝对URL，非HTTP链接或空链接返回None
+        """
+        href = href.strip()
+        if '\n' in href or '\t' in href or '\r' in href:
+            href = href.replace('\n', '').replace('\t', '').replace('\r', '')
+        fragment = href.find('#')
+        if fragment != -1:
+            href = href[:fragment]
+        if not href:
+            return None
+
+        first = href[0]
+        if first == '/':
+            if href.startswith('//'):
+                url = f"{self.scheme}:{href}"
+            else:
+                url = self.origin + href
+        elif first == '?':
+            url = self.path_query + href
+        else:
+            colon = href.find(':')
+            if colon > 0 and self._is_scheme(href, colon):
+                scheme = href[:colon].lower()
+                if scheme != 'http' and scheme != 'https':
+                    return None
+                url = href if href[:colon] == scheme else scheme + href[colon:]
+            else:
+                url = self.directory + href
+
+        if '/.' in url:
+            url = _remove_dot_segments(url)
+        return url
+
+    @staticmethod
+    def _is_scheme(href: str, colon: int) -> bool:
+        # 冒号之前出现/、?时是路径的一部分（如'a/b:c'），不是协议
+        for char in href[:colon]:
+            if char not in _SCHEME_CHARS:
+                return False
+        return href[0].isalpha()
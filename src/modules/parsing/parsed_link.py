@@ -0,0 +1,114 @@
+# PhantomCrawler - 预解析链接模块
+import re
+from typing import Iterable, List, NamedTuple, Optional, Union
+
+from src.modules.parsing.public_suffix import DomainScope, registrable_domain
+from src.modules.parsing.scope_matcher import compile_scope
+from src.utils.url_fingerprint import url_fingerprint
+
+
+# 协议、主机、路径、查询串；整个匹配即去掉片段的URL
+_URL = re.compile(r'([a-zA-Z][a-zA-Z0-9+.\-]*)://([^/?#]*)([^?#]*)(?:\?([^#]*))?')
+
+
+class ParsedLink(NamedTuple):
+    """只解析一次的链接记录，过滤、去重和入队都直接使用其中的字段"""
+    url: str
+    scheme: str
+    host: str                   # 小写的netloc（含端口），与爬取边界、主机调度使用的主机键一致
+    registrable_domain: str     # 按公共后缀列表划分的可注册域名（不含端口）
+    path: str
+    query: str
+    fingerprint: int            # url_fingerprint(url)，已访问存储和爬取边界直接按指纹查找
+
+
+def parse_link(url: str) -> Optional[ParsedLink]:
+    """
+    解析绝对HTTP(S) URL，片段被丢弃
+
+    只用一次预编译的正则匹配切分各部分，不调用urlsplit
+
+    Returns:
+        ParsedLink，不是绝对HTTP(S) URL时返回None
+    """
+    match = _URL.match(url)
+    if match is None:
+        return None
+    scheme, host, path, query = match.groups()
+    scheme = scheme.lower()
+    if (scheme != 'http' and scheme != 'https') or not host:
+        return None
+    url = match.group(0)
+    host = host.lower()
+
+    hostname = host.rpartition('@')[2] if '@' in host else host
+    if hostname[:1] == '[':
+        hostname = hostname[:hostname.find(']') + 1]
+    elif ':' in hostname:
+        hostname = hostname.partition(':')[0]
+    return ParsedLink(url, scheme, host, registrable_domain(hostname), path or '/', query or '',
+                      url_fingerprint(url))
+
+
+def parse_links(urls: Iterable[str]) -> List[ParsedLink]:
+    """批量解析链接，跳过无法解析的URL"""
+    links = []
+    for url in urls:
+        link = parse_link(url)
+        if link is not None:
+            links.append(link)
+    return links
+
+
+class LinkScope:
+    """
+    链接的爬取范围
+
+    把域名过滤、包含/排除模式、已访问检查和已缓存的robots.txt规则合并为对一批
+    ParsedLink的一次遍历，每个链接不再被重复解析或重复计算指纹。
+    """
+
+    def __init__(self, domains: Optional[Union[DomainScope, str, Iterable[str]]] = None,
+                 include_patterns: Optional[List[str]] = None,
+                 exclude_patterns: Optional[List[str]] = None):
+        """
+        Args:
+            domains: 限定的域名（含子域名），可以是DomainScope、单个域名或域名列表，None表示不限制
+            include_patterns: 包含模式（见ScopeMatcher），None时读取配置scope.include_patterns
+            exclude_patterns: 排除模式，None时读取配置scope.exclude_patterns
+        """
+        if domains is not None and not isinstance(domains, DomainScope):
+            domains = DomainScope([domains] if isinstance(domains, str) else domains)
+        self.domains = domains
+        self.matcher = compile_scope(include_patterns, exclude_patterns)
+
+    def in_scope(self, link: ParsedLink) -> bool:
+        """链接是否满足域名和模式条件"""
+        if self.domains is not None and not self.domains.allows_host(link.host, link.registrable_domain):
+            return False
+        return not self.matcher or self.matcher.allows(link.url)
+
+    def filter(self, links: Iterable[ParsedLink], visited=None, robots=None) -> List[ParsedLink]:
+        """
+        一次遍历过滤一批链接
+
+        Args:
+            links: 预解析的链接
+            visited: 已访问URL存储（需要contains_fingerprint方法）
+            robots: RobotsCache，只使用已缓存的规则
+
+        Returns:
+            范围内、未访问且未被robots.txt禁止的链接
+        """
+        in_scope = self.in_scope
+        contains = visited.contains_fingerprint if visited is not None else None
+        kept = []
+        for link in links:
+            if not in_scope(link):
+                continue
+            if contains is not None and contains(link.fingerprint):
+                continue
+            if robots is not None and robots.check_cached(link.url) is False:
+                continue
+            kept.append(link)
+        return kept
@@ -0,0 +1,280 @@
+# PhantomCrawler - 公共后缀与域名范围模块
+import os
+import ipaddress
+import threading
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+from src.config import global_config
+
+# 随代码分发的公共后缀列表（publicsuffix.org，去掉了注释），不需要联网
+DEFAULT_SUFFIX_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'public_suffix_list.dat')
+
+# 前缀树节点中标记规则结束的键（标签不会是空字符串）
+_MARK = ''
+_RULE = 1
+_EXCEPTION = 2
+
+
+def _hostname(host: str) -> str:
+    """从netloc或主机名中取出小写、不含端口和结尾点的主机名"""
+    host = host.rpartition('@')[2].lower()
+    if host[:1] == '[':
+        return host[:host.find(']') + 1]
+    return host.partition(':')[0].rstrip('.')
+
+
+def _is_ip(hostname: str) -> bool:
+    if hostname[:1] == '[':
+        return True
+    if not hostname or not hostname[-1].isdigit():
+        return False
+    try:
+        ipaddress.ip_address(hostname)
+        return True
+    except ValueError:
+        return False
+
+
+class PublicSuffixList:
+    """
+    公共后缀列表
+
+    规则按标签倒序存入嵌套字典构成的前缀树（com -> example ...），查找时从顶级域开始
+    每个标签一次字典查找，耗时只与主机名的标签数有关。支持通配符规则（*.ck）和例外规则（!www.ck），
+    没有匹配的规则时按隐含的'*'规则处理（顶级域即公共后缀）。国际化域名的规则同时以Unicode
+    和punycode形式收录。
+    """
+
+    def __init__(self, path: Optional[str] = None, cache_size: Optional[int] = None):
+        """
+        Args:
+            path: 公共后缀列表文件，None时读取配置scope.public_suffix_file，未配置时使用随代码分发的列表
+            cache_size: 可注册域名查询的缓存条目数
+        """
+        self.path = path or global_config.get('scope.public_suffix_file') or DEFAULT_SUFFIX_FILE
+        self._root: Dict[str, Any] = {}
+        self.rule_count = 0
+        self._load()
+        cache_size = cache_size or global_config.get('scope.domain_cache_size', 65536)
+        self.registrable_domain = lru_cache(maxsize=cache_size)(self._registrable_domain)
+
+    def _load(self) -> None:
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                rule = line.strip()
+                if not rule or rule.startswith('//'):
+                    continue
+                rule = rule.split()[0].lower()
+                self._add(rule)
+                try:
+                    ascii_rule = rule.encode('idna').decode('ascii')
+                except UnicodeError:
+                    continue
+                if ascii_rule != rule:
+                    self._add(ascii_rule)
+
+    def _add(self, rule: str) -> None:
+        mark = _RULE
+        if rule.startswith('!'):
+            mark = _EXCEPTION
+            rule = rule[1:]
+        node = self._root
+        for label in reversed(rule.split('.')):
+            node = node.setdefault(label, {})
+        node[_MARK] = mark
+        self.rule_count += 1
+
+    def suffix_length(self, labels: List[str]) -> int:
+        """
+        计算公共后缀包含的标签数
+
+        Args:
+            labels: 主机名按'.'切分后的标签列表
+
+        Returns:
+            公共后缀的标签数（至少为1）
+        """
+        matched = 1
+        node = self._root
+        depth = 0
+        for label in reversed(labels):
+            depth += 1
+            wildcard = node.get('*')
+            if wildcard is not None and wildcard.get(_MARK) == _RULE:
+                matched = depth
+            child = node.get(label)
+            if child is None:
+                break
+            mark = child.get(_MARK)
+            if mark == _EXCEPTION:
+                # 例外规则：公共后缀是规则去掉最左边的标签
+                matched = depth - 1
+                break
+            if mark == _RULE:
+                matched = depth
+            node = child
+        return matched
+
+    def public_suffix(self, hostname: str) -> Optional[str]:
+        """
+        返回主机名的公共后缀
+
+        Returns:
+            公共后缀，IP地址或空主机名返回None
+        """
+        hostname = _hostname(hostname)
+        if not hostname or _is_ip(hostname):
+            return None
+        labels = hostname.split('.')
+        return '.'.join(labels[-self.suffix_length(labels):])
+
+    def _registrable_domain(self, hostname: str) -> Optional[str]:
+        """
+        返回主机名的可注册域名（公共后缀加一个标签）
+
+        Args:
+            hostname: 主机名或netloc
+
+        Returns:
+            可注册域名；主机名本身是公共后缀、IP地址或空主机名时返回None
+        """
+        hostname = _hostname(hostname)
+        if not hostname or _is_ip(hostname):
+            return None
+        labels = hostname.split('.')
+        length = self.suffix_length(labels)
+        if len(labels) <= length:
+            return None
+        return '.'.join(labels[-length - 1:])
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取规则数量和查询缓存统计"""
+        info = self.registrable_domain.cache_info()
+        return {
+            'rules': self.rule_count,
+            'cache_hits': info.hits,
+            'cache_misses': info.misses,
+            'cache_size': info.currsize
+        }
+
+
+_default_list: Optional[PublicSuffixList] = None
+_default_lock = threading.Lock()
+
+
+def get_public_suffix_list() -> PublicSuffixList:
+    """返回共享的公共后缀列表（第一次调用时加载）"""
+    global _default_list
+    if _default_list is None:
+        with _default_lock:
+            if _default_list is None:
+                _default_list = PublicSuffixList()
+    return _default_list
+
+
+def registrable_domain(hostname: str) -> str:
+    """
+    返回主机名的可注册域名，用作按站点划分的键
+
+    Args:
+        hostname: 主机名或netloc
+
+    Returns:
+        可注册域名；IP地址、公共后缀本身等没有可注册域名时返回去掉端口的主机名
+    """
+    return get_public_suffix_list().registrable_domain(hostname) or _hostname(hostname)
+
+
+class DomainScope:
+    """
+    按域名划分的爬取范围索引
+
+    允许列表中的每个域名同时允许它的所有子域名。域名先按可注册域名分组：
+    可注册域名不在索引中的主机一次字典查找即被拒绝；允许项本身就是可注册域名时
+    （最常见的情况）一次查找即被接受；只有允许项是子域名时才沿主机名的父域名逐级查找。
+    查找耗时与主机名长度成正比，与允许列表的大小无关。端口不参与比较。
+    允许项本身是公共后缀（如github.io）时，其下所有站点都允许。
+    """
+
+    def __init__(self, domains: Iterable[str], suffix_list: Optional[PublicSuffixList] = None):
+        """
+        Args:
+            domains: 允许的域名（主机名或netloc均可）
+            suffix_list: 公共后缀列表，None时使用共享列表
+        """
+        self.suffix_list = suffix_list or get_public_suffix_list()
+        # 可注册域名 -> 该域名下允许的子域名集合，None表示整个可注册域名都允许
+        self._index: Dict[str, Optional[set]] = {}
+        # 允许项本身是公共后缀（如github.io）时，其下所有站点都允许
+        self._suffixes: set = set()
+        for domain in domains:
+            self.add(domain)
+
+    @classmethod
+    def for_url(cls, url: str, suffix_list: Optional[PublicSuffixList] = None) -> 'DomainScope':
+        """创建只允许URL所在可注册域名（同一站点）的范围"""
+        scope = cls((), suffix_list)
+        host = urlsplit(url).netloc
+        scope.add(scope.suffix_list.registrable_domain(host) or host)
+        return scope
+
+    def add(self, domain: str) -> None:
+        """加入一个允许的域名"""
+        hostname = _hostname(domain.strip())
+        if not hostname:
+            return
+        site = self.suffix_list.registrable_domain(hostname)
+        if site is None and not _is_ip(hostname) and '.' in hostname:
+            self._suffixes.add(hostname)
+            return
+        site = site or hostname
+        if site == hostname:
+            self._index[site] = None
+        elif self._index.get(site, ()) is not None:
+            self._index.setdefault(site, set()).add(hostname)
+
+    def __len__(self) -> int:
+        return sum(1 if names is None else len(names) for names in self._index.values()) + len(self._suffixes)
+
+    def allows_host(self, host: str, site: Optional[str] = None) -> bool:
+        """
+        主机是否在范围内
+
+        Args:
+            host: 主机名或netloc
+            site: 已知的可注册域名（如ParsedLink.registrable_domain），省略时查询
+
+        Returns:
+            主机是允许的域名或其子域名时返回True
+        """
+        if site is None:
+            site = self.suffix_list.registrable_domain(host) or _hostname(host)
+        names = self._index.get(site, False)
+        if names is None:
+            return True
+        if names is False:
+            return bool(self._suffixes) and self._under_suffix(_hostname(host))
+        name = _hostname(host)
+        while True:
+            if name in names:
+                return True
+            dot = name.find('.')
+            if dot == -1 or name == site:
+                return bool(self._suffixes) and self._under_suffix(name)
+            name = name[dot + 1:]
+
+    def _under_suffix(self, name: str) -> bool:
+        suffixes = self._suffixes
+        while True:
+            if name in suffixes:
+                return True
+            dot = name.find('.')
+            if dot == -1:
+                return False
+            name = name[dot + 1:]
+
+    def filter(self, urls: Iterable[str]) -> List[str]:
+        """保留主机在范围内的URL"""
+        return [url for url in urls if self.allows_host(urlsplit(url).netloc)]
@@ -0,0 +1,219 @@
+# PhantomCrawler - 爬取范围匹配模块
+import re
+import fnmatch
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.config import global_config
+
+# 模式前缀：re:按正则搜索，glob:按通配符匹配完整URL，其余按子串匹配（与以往的行为相同）
+REGEX_PREFIX = 're:'
+GLOB_PREFIX = 'glob:'
+
+
+_REGEX_META = frozenset('.^$*+?{}[]\\|()')
+_GLOB_META = '*?['
+_BACKREFERENCE = re.compile(r'\\[1-9]|\(\?P=')
+
+
+def _regex_prefix(regex: str) -> Tuple[str, str]:
+    """
+    拆出正则开头的字面前缀
+
+    Returns:
+        (字面前缀, 剩余的正则)；含有选择分支或以特殊结构开头时前缀为空
+    """
+    if '|' in regex:
+        return '', regex
+    prefix = []
+    index = 0
+    while index < len(regex):
+        char = regex[index]
+        if char == '\\':
+            # 只有转义的标点是字面字符，\d、\w等是字符类
+            if index + 1 >= len(regex) or regex[index + 1].isalnum():
+                break
+            literal, step = regex[index + 1], 2
+        elif char in _REGEX_META:
+            break
+        else:
+            literal, step = char, 1
+        # 后面跟着量词的字符不是必需的
+        if regex[index + step:index + step + 1] in ('*', '+', '?', '{'):
+            break
+        prefix.append(literal)
+        index += step
+    return ''.join(prefix), regex[index:]
+
+
+def _glob_prefix(glob: str) -> Tuple[str, str]:
+    """
+    拆出通配符开头的字面前缀
+
+    Returns:
+        (字面前缀, 剩余部分的完整匹配正则)
+    """
+    positions = [glob.find(char) for char in _GLOB_META if char in glob]
+    split = min(positions) if positions else len(glob)
+    rest = glob[split:]
+    return glob[:split], fnmatch.translate(rest) if rest else r'\Z'
+
+
+def _trie_regex(entries: Iterable[Tuple[str, str]]) -> str:
+    """
+    把(字面前缀, 剩余正则)编译成前缀树形式的正则
+
+    re模块按顺序尝试选择分支；前缀树中同一层的分支首字符互不相同，每个位置只需沿树向下走，
+    只有走到前缀末端时才尝试剩余正则，因此耗时与模式数量基本无关。剩余正则为空表示纯子串。
+    """
+    trie: Dict[str, dict] = {}
+    for prefix, rest in entries:
+        node = trie
+        for char in prefix:
+            node = node.setdefault(char, {})
+        node.setdefault('', []).append(rest)
+
+    def build(node: Dict[str, Any]) -> str:
+        rests = node.get('', ())
+        if '' in rests:
+            # 较短的子串已经匹配，更长的延续不影响结果
+            return ''
+        branches = []
+        singles = []
+        for char in sorted(key for key in node if key):
+            child = build(node[char])
+            if child:
+                branches.append(re.escape(char) + child)
+            else:
+                singles.append(re.escape(char))
+        if singles:
+            branches.append(singles[0] if len(singles) == 1 else '[' + ''.join(singles) + ']')
+        branches.extend(f'(?:{rest})' for rest in rests)
+        return branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+
+    return build(trie)
+
+
+def _compile_entries(entries: List[Tuple[str, str]], anchored: bool) -> list:
+    """编译为匹配函数列表，通常只有一个函数"""
+    if not entries:
+        return []
+    try:
+        pattern = re.compile(_trie_regex(entries))
+        return [pattern.match if anchored else pattern.search]
+    except (re.error, RecursionError):
+        # 内联全局标志、重复的分组名等无法合并时逐个编译（仍然只编译一次）
+        patterns = [re.compile(re.escape(prefix) + rest) for prefix, rest in entries]
+        return [pattern.match if anchored else pattern.search for pattern in patterns]
+
+
+class PatternSet:
+    """
+    编译后的一组URL模式
+
+    子串和正则合并为一个按字面前缀组织的前缀树正则（搜索），通配符合并为另一个（从头完整匹配）。
+    '*子串*'形式的通配符等价于子串。每个URL最多执行两次匹配，与模式数量基本无关。
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        """
+        Args:
+            patterns: 模式列表，'re:'开头为正则，'glob:'开头为通配符（匹配完整URL），其余为子串
+        """
+        search_entries = []
+        glob_entries = []
+        standalone = []
+        self.size = 0
+        for pattern in dict.fromkeys(patterns):
+            if not pattern:
+                continue
+            self.size += 1
+            if pattern.startswith(REGEX_PREFIX):
+                regex = pattern[len(REGEX_PREFIX):]
+                if _BACKREFERENCE.search(regex):
+                    # 合并后分组编号会改变，含反向引用的正则单独编译
+                    standalone.append(re.compile(regex).search)
+                else:
+                    search_entries.append(_regex_prefix(regex))
+            elif pattern.startswith(GLOB_PREFIX):
+                glob = pattern[len(GLOB_PREFIX):]
+                inner = glob[1:-1]
+                if len(glob) > 2 and glob[0] == '*' and glob[-1] == '*' and not any(c in inner for c in _GLOB_META):
+                    search_entries.append((inner, ''))
+                else:
+                    glob_entries.append(_glob_prefix(glob))
+            else:
+                search_entries.append((pattern, ''))
+
+        self._matchers = _compile_entries(search_entries, False) + _compile_entries(glob_entries, True) + standalone
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __bool__(self) -> bool:
+        return self.size > 0
+
+    def matches(self, url: str) -> bool:
+        """URL是否匹配任一模式"""
+        for matcher in self._matchers:
+            if matcher(url):
+                return True
+        return False
+
+
+class ScopeMatcher:
+    """
+    包含/排除规则的编译结果
+
+    URL需要匹配任一包含模式（没有包含模式时全部包含），且不匹配任何排除模式。
+    """
+
+    def __init__(self, include_patterns: Optional[Iterable[str]] = None,
+                 exclude_patterns: Optional[Iterable[str]] = None):
+        """
+        Args:
+            include_patterns: 包含模式列表
+            exclude_patterns: 排除模式列表
+        """
+        self.include = PatternSet(include_patterns or ())
+        self.exclude = PatternSet(exclude_patterns or ())
+
+    def __bool__(self) -> bool:
+        return bool(self.include) or bool(self.exclude)
+
+    def allows(self, url: str) -> bool:
+        """URL是否在范围内"""
+        if self.include and not self.include.matches(url):
+            return False
+        if self.exclude and self.exclude.matches(url):
+            return False
+        return True
+
+    def filter(self, urls: Iterable[str]) -> List[str]:
+        """保留范围内的URL"""
+        allows = self.allows
+        return [url for url in urls if allows(url)]
+
+
+@lru_cache(maxsize=64)
+def _compile(include: Tuple[str, ...], exclude: Tuple[str, ...]) -> ScopeMatcher:
+    return ScopeMatcher(include, exclude)
+
+
+def compile_scope(include_patterns: Optional[Iterable[str]] = None,
+                  exclude_patterns: Optional[Iterable[str]] = None) -> ScopeMatcher:
+    """
+    编译包含/排除规则，相同的规则只编译一次
+
+    Args:
+        include_patterns: 包含模式列表，None时使用配置scope.include_patterns
+        exclude_patterns: 排除模式列表，None时使用配置scope.exclude_patterns
+
+    Returns:
+        ScopeMatcher
+    """
+    if include_patterns is None:
+        include_patterns = global_config.get('scope.include_patterns', [])
+    if exclude_patterns is None:
+        exclude_patterns = global_config.get('scope.exclude_patterns', [])
+    return _compile(tuple(include_patterns), tuple(exclude_patterns))
@@ -0,0 +1,264 @@
+# PhantomCrawler - 站点地图与订阅源解析模块
+import io
+import gzip
+import importlib.util
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, ContextManager, Iterable, Iterator, NamedTuple, Optional, Set
+from urllib.parse import urljoin
+
+from src.config import global_config
+
+# defusedxml可用时用它防御实体扩展攻击，否则使用标准库
+HAS_DEFUSEDXML = importlib.util.find_spec('defusedxml') is not None
+
+if HAS_DEFUSEDXML:
+    from defusedxml.ElementTree import iterparse
+else:
+    from xml.etree.ElementTree import iterparse
+
+
+class SitemapEntry(NamedTuple):
+    """站点地图或订阅源中的一个条目"""
+    url: str
+    lastmod: Optional[float]  # Unix时间戳，未提供时为None
+    is_sitemap: bool  # 是否为站点地图索引中的子站点地图
+
+
+class _IterReader(io.RawIOBase):
+    """把字节块迭代器包装成可读文件对象，并限制读取的总字节数"""
+
+    def __init__(self, chunks: Iterable[bytes], limit: int):
+        self._chunks = iter(chunks)
+        self._buffer = b''
+        self._remaining = limit
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._buffer:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self._buffer = chunk
+        size = min(len(buffer), len(self._buffer))
+        if size > self._remaining:
+            raise ValueError('站点地图超过大小上限')
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        self._remaining -= size
+        return size
+
+
+class _LimitedReader(io.RawIOBase):
+    """限制解压后读取的总字节数，防御压缩炸弹"""
+
+    def __init__(self, raw, limit: int):
+        self._raw = raw
+        self._remaining = limit
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self._raw.read(len(buffer))
+        if len(data) > self._remaining:
+            raise ValueError('站点地图解压后超过大小上限')
+        self._remaining -= len(data)
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def parse_lastmod(value: Optional[str]) -> Optional[float]:
+    """
+    解析lastmod / updated / pubDate时间
+
+    支持W3C日期时间格式（YYYY、YYYY-MM、YYYY-MM-DD及完整时间）和RFC 822格式
+
+    Returns:
+        Unix时间戳，无法解析时返回None
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        if len(value) == 4:
+            parsed = datetime(int(value), 1, 1)
+        elif len(value) == 7:
+            parsed = datetime(int(value[:4]), int(value[5:7]), 1)
+        else:
+            parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        try:
+            parsed = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def iter_sitemap_entries(stream, base_url: str = '', max_bytes: Optional[int] = None) -> Iterator[SitemapEntry]:
+    """
+    流式解析站点地图、站点地图索引、RSS或Atom订阅源
+
+    使用iterparse逐个元素处理，处理完的元素立即清除，内存占用与文件大小无关。
+    gzip压缩的内容按魔数自动识别。
+
+    Args:
+        stream: 可读的二进制文件对象
+        base_url: 解析相对链接的基准URL
+        max_bytes: 解压后的最大字节数
+
+    Yields:
+        SitemapEntry条目
+    """
+    max_bytes = max_bytes or global_config.get('sitemaps.max_bytes', 52428800)
+    reader = io.BufferedReader(stream) if not hasattr(stream, 'peek') else stream
+    if reader.peek(2)[:2] == b'\x1f\x8b':
+        reader = io.BufferedReader(_LimitedReader(gzip.GzipFile(fileobj=reader), max_bytes))
+
+    entry_tags = ('url', 'sitemap', 'item', 'entry')
+    loc = None
+    lastmod = None
+    root = None
+    for event, element in iterparse(reader, events=('start', 'end')):
+        tag = element.tag.rsplit('}', 1)[-1].lower()
+        if event == 'start':
+            if root is None:
+                root = element
+            elif tag in entry_tags:
+                # 丢弃频道级的<link>、<pubDate>等条目之外的信息
+                loc = None
+                lastmod = None
+            continue
+
+        # 只取条目中的第一个地址，忽略image:loc等扩展中的地址
+        if tag == 'loc':
+            loc = loc or (element.text or '').strip()
+        elif tag in ('lastmod', 'updated', 'pubdate', 'published'):
+            if lastmod is None:
+                lastmod = parse_lastmod(element.text)
+        elif tag == 'link':
+            # RSS的<link>是文本，Atom的<link>是href属性
+            href = element.get('href')
+            if href:
+                if element.get('rel', 'alternate') == 'alternate':
+                    loc = loc or href.strip()
+            elif element.text and element.text.strip():
+                loc = loc or element.text.strip()
+        elif tag in entry_tags:
+            if loc:
+                # 站点地图中的地址几乎都是绝对地址，跳过开销较大的urljoin
+                if not loc.startswith(('http://', 'https://')):
+                    loc = urljoin(base_url, loc)
+                yield SitemapEntry(loc, lastmod, tag == 'sitemap')
+            loc = None
+            lastmod = None
+            # 清除已处理的条目，保持内存恒定
+            element.clear()
+            if root is not None:
+                root.clear()
+
+
+class SitemapSeeder:
+    """
+    站点地图播种器
+
+    从给定的站点地图或订阅源开始，递归展开站点地图索引，逐个产出页面URL及其lastmod。
+    所有文件都以流的方式读取，内存中只保留待展开的站点地图队列；
+    read_next每次完整读取一个文件并交给回调（如写入会溢出到磁盘的爬取边界），
+    读取期间不会跨页面爬取长时间占用连接。
+    """
+
+    def __init__(self, open_stream: Callable[[str], ContextManager[Iterable[bytes]]],
+                 sitemap_urls: Iterable[str] = (), max_sitemaps: Optional[int] = None,
+                 max_urls: Optional[int] = None):
+        """
+        Args:
+            open_stream: 打开URL并返回字节块迭代器的上下文管理器工厂
+            sitemap_urls: 起始站点地图或订阅源URL
+            max_sitemaps: 最多读取的站点地图文件数量
+            max_urls: 最多产出的URL数量
+        """
+        self.open_stream = open_stream
+        self.max_sitemaps = max_sitemaps or global_config.get('sitemaps.max_sitemaps', 1000)
+        self.max_urls = max_urls or global_config.get('sitemaps.max_urls', 1000000)
+        self.max_bytes = global_config.get('sitemaps.max_bytes', 52428800)
+        self._queue: deque = deque()
+        self._seen: Set[str] = set()
+        self.stats = {
+            'sitemaps_read': 0,
+            'sitemap_errors': 0,
+            'urls': 0
+        }
+        self.add(sitemap_urls)
+
+    def add(self, sitemap_urls: Iterable[str]) -> None:
+        """加入待读取的站点地图或订阅源"""
+        for url in sitemap_urls:
+            if url not in self._seen:
+                self._seen.add(url)
+                self._queue.append(url)
+
+    def has_pending(self) -> bool:
+        """是否还有未读取的站点地图"""
+        return (bool(self._queue) and self.stats['sitemaps_read'] < self.max_sitemaps
+                and self.stats['urls'] < self.max_urls)
+
+    def read_next(self, callback: Callable[[SitemapEntry], None]) -> int:
+        """
+        完整读取下一个站点地图文件
+
+        Args:
+            callback: 对每个页面条目调用的函数
+
+        Returns:
+            本次产出的页面条目数量
+        """
+        count = 0
+        if self.has_pending():
+            for entry in self._iter_file(self._queue.popleft()):
+                callback(entry)
+                count += 1
+        return count
+
+    def iter_entries(self) -> Iterator[SitemapEntry]:
+        """
+        依次展开所有站点地图并产出页面条目
+
+        Yields:
+            页面URL条目（不包含子站点地图）
+        """
+        while self.has_pending():
+            yield from self._iter_file(self._queue.popleft())
+
+    def _iter_file(self, sitemap_url: str) -> Iterator[SitemapEntry]:
+        self.stats['sitemaps_read'] += 1
+        try:
+            with self.open_stream(sitemap_url) as chunks:
+                raw = io.BufferedReader(_IterReader(chunks, self.max_bytes))
+                for entry in iter_sitemap_entries(raw, sitemap_url, self.max_bytes):
+                    if entry.is_sitemap:
+                        self.add((entry.url,))
+                        continue
+                    if self.stats['urls'] >= self.max_urls:
+                        return
+                    self.stats['urls'] += 1
+                    yield entry
+        except Exception as e:
+            self.stats['sitemap_errors'] += 1
+            print(f"[PhantomCrawler] 读取站点地图 {sitemap_url} 失败: {str(e)}")
+
+
+def lastmod_priority(lastmod: Optional[float]) -> float:
+    """
+    把lastmod转换为爬取边界的优先级
+
+    越新的页面优先级越高（以天为单位），没有lastmod的页面排在最后
+    """
+    if lastmod is None:
+        return 0.0
+    return max(0.0, lastmod / 86400.0)
@@ -0,0 +1,423 @@
+# PhantomCrawler - 内容寻址存储模块
+import os
+import io
+import zlib
+import hashlib
+import sqlite3
+import threading
+import importlib.util
+from typing import Any, Dict, Iterator, List, Optional, Set, Union
+
+from src.config import global_config
+
+HAS_ZSTD = importlib.util.find_spec('zstandard') is not None
+
+if HAS_ZSTD:
+    import zstandard
+
+
+class ContentStore:
+    """
+    内容寻址的页面正文存储
+
+    正文按SHA-256哈希去重：相同内容只压缩、写入一次，结果中只保留哈希引用。
+    压缩后的正文追加写入定长上限的段文件（segment-00000.pack ...），
+    index.db记录每个哈希所在的段、偏移、长度、编码和引用次数。
+
+    启用主机字典模式（需要zstandard）时，每个主机的前N个正文按普通zstd存储并作为样本，
+    随后为该主机训练一个zstd字典，之后的正文都用该字典压缩。同一站点的页面共享大量
+    模板标记（头部、导航、页脚、脚本），字典压缩能把这部分冗余几乎完全消除。
+    """
+
+    INDEX_NAME = 'index.db'
+
+    def __init__(self, root_dir: str, segment_max_bytes: Optional[int] = None,
+                 codec: Optional[str] = None, commit_interval: int = 1000,
+                 host_dictionaries: Optional[bool] = None,
+                 dict_training_samples: Optional[int] = None,
+                 dict_size: Optional[int] = None):
+        """
+        Args:
+            root_dir: 存储目录
+            segment_max_bytes: 单个段文件的最大字节数
+            codec: 压缩编码，'zstd'、'zlib'或'auto'（有zstandard时用zstd）
+            commit_interval: 每写入多少个新正文提交一次索引
+            host_dictionaries: 是否为每个主机训练zstd压缩字典
+            dict_training_samples: 训练字典所用的每主机样本数（前N个正文）
+            dict_size: 字典大小（字节）
+        """
+        os.makedirs(root_dir, exist_ok=True)
+        self.root_dir = root_dir
+        self.segment_max_bytes = segment_max_bytes or global_config.get(
+            'content_store.segment_max_bytes', 256 * 1024 * 1024)
+        codec = codec or global_config.get('content_store.codec', 'auto')
+        if codec == 'auto':
+            codec = 'zstd' if HAS_ZSTD else 'zlib'
+        if codec == 'zstd' and not HAS_ZSTD:
+            print("[PhantomCrawler] 未安装zstandard库，内容存储改用zlib压缩")
+            codec = 'zlib'
+        self.codec = codec
+        self.commit_interval = commit_interval
+
+        if host_dictionaries is None:
+            host_dictionaries = global_config.get('content_store.host_dictionaries', False)
+        if host_dictionaries and self.codec != 'zstd':
+            print("[PhantomCrawler] 主机字典压缩需要zstandard库，已禁用")
+            host_dictionaries = False
+        self.host_dictionaries = host_dictionaries
+        self.dict_training_samples = dict_training_samples or global_config.get(
+            'content_store.dict_training_samples', 32)
+        self.dict_size = dict_size or global_config.get('content_store.dict_size', 112640)
+
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(os.path.join(root_dir, self.INDEX_NAME), check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode = WAL')
+        self._conn.execute('PRAGMA synchronous = NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS bodies ('
+            'hash TEXT PRIMARY KEY, segment INTEGER NOT NULL, offset INTEGER NOT NULL, '
+            'length INTEGER NOT NULL, raw_length INTEGER NOT NULL, codec TEXT NOT NULL, '
+            'refs INTEGER NOT NULL DEFAULT 1, dict_id INTEGER)'
+        )
+        columns = {row[1] for row in self._conn.execute('PRAGMA table_info(bodies)')}
+        if 'dict_id' not in columns:
+            self._conn.execute('ALTER TABLE bodies ADD COLUMN dict_id INTEGER')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS dictionaries ('
+            'id INTEGER PRIMARY KEY, host TEXT NOT NULL UNIQUE, data BLOB NOT NULL)'
+        )
+        self._conn.commit()
+
+        # 续写最后一个段文件
+        row = self._conn.execute('SELECT MAX(segment) FROM bodies').fetchone()
+        self._segment = row[0] if row and row[0] is not None else 0
+        self._writer = open(self._segment_path(self._segment), 'ab')
+        self._readers: Dict[int, Any] = {}
+        self._uncommitted = 0
+
+        self._compressor = zstandard.ZstdCompressor(level=3) if self.codec == 'zstd' else None
+        self._decompressor = zstandard.ZstdDecompressor() if HAS_ZSTD else None
+
+        # 主机字典：主机 -> 字典ID，字典ID -> 压缩/解压器（按需创建）
+        self._host_dicts: Dict[str, int] = {
+            host: dict_id for dict_id, host in self._conn.execute('SELECT id, host FROM dictionaries')
+        }
+        self._dict_compressors: Dict[int, Any] = {}
+        self._dict_decompressors: Dict[int, Any] = {}
+        # 尚未训练字典的主机的样本哈希（样本正文从存储中读回，内存中只保留哈希）
+        self._host_samples: Dict[str, List[str]] = {}
+        self._untrainable_hosts: Set[str] = set()
+
+        self.stats = {
+            'puts': 0,
+            'stored': 0,
+            'duplicates': 0,
+            'raw_bytes': 0,
+            'stored_bytes': 0,
+            'deduplicated_bytes': 0,
+            'dictionaries_trained': 0,
+            'dict_compressed': 0,
+            'released': 0,
+            'reclaimed_bytes': 0
+        }
+
+    def put(self, content: Union[str, bytes], host: Optional[str] = None) -> str:
+        """
+        存入正文
+
+        Args:
+            content: 页面正文（str按UTF-8编码）
+            host: 正文所属主机，启用主机字典模式时用于选择字典
+
+        Returns:
+            正文的SHA-256十六进制哈希
+        """
+        if isinstance(content, str):
+            content = content.encode('utf-8', 'surrogatepass')
+        digest = hashlib.sha256(content).hexdigest()
+
+        with self._lock:
+            self.stats['puts'] += 1
+            self.stats['raw_bytes'] += len(content)
+
+            cursor = self._conn.execute('UPDATE bodies SET refs = refs + 1 WHERE hash = ?', (digest,))
+            if cursor.rowcount:
+                self.stats['duplicates'] += 1
+                self.stats['deduplicated_bytes'] += len(content)
+                self._maybe_commit()
+                return digest
+
+            dict_id = self._host_dicts.get(host) if self.host_dictionaries and host else None
+            if dict_id is not None:
+                data = self._dict_compressor(dict_id).compress(content)
+                self.stats['dict_compressed'] += 1
+            else:
+                data = self._compress(content)
+
+            if self._writer.tell() and self._writer.tell() + len(data) > self.segment_max_bytes:
+                self._roll_segment()
+            offset = self._writer.tell()
+            self._writer.write(data)
+
+            self._conn.execute(
+                'INSERT INTO bodies (hash, segment, offset, length, raw_length, codec, dict_id) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (digest, self._segment, offset, len(data), len(content), self.codec, dict_id)
+            )
+            self.stats['stored'] += 1
+            self.stats['stored_bytes'] += len(data)
+
+            if self.host_dictionaries and host and dict_id is None and host not in self._untrainable_hosts:
+                samples = self._host_samples.setdefault(host, [])
+                samples.append(digest)
+                if len(samples) >= self.dict_training_samples:
+                    self._train_dictionary(host)
+            self._maybe_commit()
+        return digest
+
+    def release(self, digest: str) -> bool:
+        """
+        释放正文的一个引用，引用归零时从索引中删除
+
+        段文件只追加，删除的正文在collect_garbage重写其所在段之前仍占用磁盘空间。
+
+        Args:
+            digest: put()返回的哈希
+
+        Returns:
+            正文是否已被删除
+        """
+        with self._lock:
+            self._conn.execute('UPDATE bodies SET refs = refs - 1 WHERE hash = ?', (digest,))
+            cursor = self._conn.execute('DELETE FROM bodies WHERE hash = ? AND refs <= 0', (digest,))
+            self._maybe_commit()
+            if cursor.rowcount:
+                self.stats['released'] += 1
+                return True
+            return False
+
+    def collect_garbage(self, min_dead_ratio: float = 0.5) -> int:
+        """
+        回收已释放正文占用的磁盘空间
+
+        当前写入段以外、已释放字节占比不低于min_dead_ratio的段：仍被引用的正文复制到当前段，
+        然后删除旧段文件。
+
+        Args:
+            min_dead_ratio: 触发重写的已释放字节占比
+
+        Returns:
+            回收的字节数
+        """
+        reclaimed = 0
+        with self._lock:
+            self.flush()
+            live = dict(self._conn.execute(
+                'SELECT segment, SUM(length) FROM bodies WHERE segment != ? GROUP BY segment', (self._segment,)
+            ).fetchall())
+            for segment in range(self._segment):
+                path = self._segment_path(segment)
+                if not os.path.exists(path):
+                    continue
+                size = os.path.getsize(path)
+                live_bytes = live.get(segment, 0)
+                if size == 0 or (size - live_bytes) / size < min_dead_ratio:
+                    continue
+                rows = self._conn.execute(
+                    'SELECT hash, offset, length FROM bodies WHERE segment = ?', (segment,)
+                ).fetchall()
+                for digest, offset, length in rows:
+                    data = self._read_compressed(digest)[0]
+                    if self._writer.tell() and self._writer.tell() + length > self.segment_max_bytes:
+                        self._roll_segment()
+                    new_offset = self._writer.tell()
+                    self._writer.write(data)
+                    self._conn.execute('UPDATE bodies SET segment = ?, offset = ? WHERE hash = ?',
+                                       (self._segment, new_offset, digest))
+                # 先让复制的数据和索引落盘，再删除旧段
+                self.flush()
+                reader = self._readers.pop(segment, None)
+                if reader is not None:
+                    reader.close()
+                os.remove(path)
+                reclaimed += size - live_bytes
+            self.stats['reclaimed_bytes'] += reclaimed
+        return reclaimed
+
+    def get(self, digest: str) -> Optional[bytes]:
+        """
+        按哈希读取正文
+
+        Args:
+            digest: put()返回的哈希
+
+        Returns:
+            正文字节，不存在时返回None
+        """
+        with self._lock:
+            located = self._read_compressed(digest)
+            if located is None:
+                return None
+            data, codec, dict_id = located
+            if dict_id is not None:
+                return self._dict_decompressor(dict_id).decompress(data)
+            return self._decompress(data, codec)
+
+    def iter_chunks(self, digest: str, chunk_size: int = 65536) -> Iterator[bytes]:
+        """
+        流式解压正文，适合对大量正文做再处理时控制内存
+
+        Args:
+            digest: put()返回的哈希
+            chunk_size: 每次产出的最大解压字节数
+
+        Yields:
+            解压后的正文分块
+        """
+        located = self._read_compressed(digest)
+        if located is None:
+            return
+        data, codec, dict_id = located
+
+        if codec == 'zstd':
+            decompressor = self._dict_decompressor(dict_id) if dict_id is not None else self._decompressor
+            if decompressor is None:
+                raise ImportError('读取zstd压缩的正文需要安装zstandard库')
+            with decompressor.stream_reader(io.BytesIO(data)) as reader:
+                while True:
+                    chunk = reader.read(chunk_size)
+                    if not chunk:
+                        break
+                    yield chunk
+        else:
+            decompressor = zlib.decompressobj()
+            for start in range(0, len(data), chunk_size):
+                chunk = decompressor.decompress(data[start:start + chunk_size])
+                if chunk:
+                    yield chunk
+            tail = decompressor.flush()
+            if tail:
+                yield tail
+
+    def get_text(self, digest: str, encoding: str = 'utf-8') -> Optional[str]:
+        """按哈希读取正文并解码为字符串"""
+        data = self.get(digest)
+        return data.decode(encoding, 'replace') if data is not None else None
+
+    def __contains__(self, digest: str) -> bool:
+        with self._lock:
+            return self._conn.execute('SELECT 1 FROM bodies WHERE hash = ?', (digest,)).fetchone() is not None
+
+    def flush(self) -> None:
+        """将段文件和索引写入磁盘"""
+        with self._lock:
+            self._writer.flush()
+            self._conn.commit()
+            self._uncommitted = 0
+
+    def close(self) -> None:
+        """刷新并关闭存储"""
+        with self._lock:
+            if self._writer.closed:
+                return
+            self.flush()
+            self._writer.close()
+            for reader in self._readers.values():
+                reader.close()
+            self._readers.clear()
+            self._conn.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取存储统计信息，包括去重率与压缩率"""
+        stats = dict(self.stats)
+        stats['codec'] = self.codec
+        stats['segments'] = self._segment + 1
+        stats['dedup_rate'] = stats['duplicates'] / stats['puts'] if stats['puts'] else 0.0
+        stats['write_ratio'] = stats['stored_bytes'] / stats['raw_bytes'] if stats['raw_bytes'] else 0.0
+        stats['host_dictionaries'] = len(self._host_dicts)
+        return stats
+
+    def _read_compressed(self, digest: str):
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT segment, offset, length, codec, dict_id FROM bodies WHERE hash = ?', (digest,)
+            ).fetchone()
+            if row is None:
+                return None
+            segment, offset, length, codec, dict_id = row
+            if segment == self._segment:
+                self._writer.flush()
+
+            reader = self._readers.get(segment)
+            if reader is None:
+                reader = self._readers[segment] = open(self._segment_path(segment), 'rb')
+            reader.seek(offset)
+            return reader.read(length), codec, dict_id
+
+    def _train_dictionary(self, host: str) -> None:
+        digests = self._host_samples.pop(host)
+        # 已释放的样本不再参与训练
+        samples = [sample for sample in (self.get(digest) for digest in digests) if sample is not None]
+        try:
+            dictionary = zstandard.train_dictionary(self.dict_size, samples)
+        except Exception as e:
+            # 样本过少或过小时无法训练，该主机继续使用普通压缩
+            print(f"[PhantomCrawler] 主机 {host} 的压缩字典训练失败: {str(e)}")
+            self._untrainable_hosts.add(host)
+            return
+
+        cursor = self._conn.execute(
+            'INSERT INTO dictionaries (host, data) VALUES (?, ?)', (host, dictionary.as_bytes())
+        )
+        self._host_dicts[host] = cursor.lastrowid
+        self.stats['dictionaries_trained'] += 1
+
+    def _load_dictionary(self, dict_id: int):
+        row = self._conn.execute('SELECT data FROM dictionaries WHERE id = ?', (dict_id,)).fetchone()
+        if row is None:
+            raise KeyError(f'压缩字典 {dict_id} 不存在')
+        return zstandard.ZstdCompressionDict(row[0])
+
+    def _dict_compressor(self, dict_id: int):
+        compressor = self._dict_compressors.get(dict_id)
+        if compressor is None:
+            compressor = zstandard.ZstdCompressor(level=3, dict_data=self._load_dictionary(dict_id))
+            self._dict_compressors[dict_id] = compressor
+        return compressor
+
+    def _dict_decompressor(self, dict_id: int):
+        if not HAS_ZSTD:
+            raise ImportError('读取字典压缩的正文需要安装zstandard库')
+        with self._lock:
+            decompressor = self._dict_decompressors.get(dict_id)
+            if decompressor is None:
+                decompressor = zstandard.ZstdDecompressor(dict_data=self._load_dictionary(dict_id))
+                self._dict_decompressors[dict_id] = decompressor
+        return decompressor
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.root_dir, f'segment-{segment:05d}.pack')
+
+    def _roll_segment(self) -> None:
+        self.flush()
+        self._writer.close()
+        self._segment += 1
+        self._writer = open(self._segment_path(self._segment), 'ab')
+
+    def _maybe_commit(self) -> None:
+        # 先刷新段文件再提交索引，索引中的记录总是指向已写入的数据
+        self._uncommitted += 1
+        if self._uncommitted >= self.commit_interval:
+            self.flush()
+
+    def _compress(self, content: bytes) -> bytes:
+        if self.codec == 'zstd':
+            return self._compressor.compress(content)
+        return zlib.compress(content, 6)
+
+    def _decompress(self, data: bytes, codec: str) -> bytes:
+        if codec == 'zstd':
+            if self._decompressor is None:
+                raise ImportError('读取zstd压缩的正文需要安装zstandard库')
+            return self._decompressor.decompress(data)
+        return zlib.decompress(data)
@@ -0,0 +1,261 @@
+# PhantomCrawler - HTTP重新验证缓存模块
+import os
+import json
+import time
+import sqlite3
+import threading
+from typing import Any, Dict, Optional
+
+from src.config import global_config
+from src.modules.storage.content_store import ContentStore
+from src.utils.url_fingerprint import canonical_url
+
+
+class HttpCache:
+    """
+    基于ETag / Last-Modified的持久化响应缓存
+
+    以规范化URL为键，在SQLite中保存验证器（ETag、Last-Modified）和响应头，
+    正文存入缓存目录下的ContentStore（内容未变的页面在多次运行之间只保存一份）。
+    重复爬取时发送If-None-Match / If-Modified-Since条件请求，收到304时返回缓存的正文。
+
+    Cache-Control: no-store的响应和没有任何验证器的响应不会被缓存。
+    条目数超过max_entries或超过max_age未验证的条目按最近验证时间淘汰，被替换或淘汰的条目
+    释放其正文引用，正文存储定期回收已释放的空间。写入每commit_interval条提交一次。
+    """
+
+    DB_NAME = 'http_cache.db'
+
+    def __init__(self, cache_dir: Optional[str] = None, max_body_bytes: Optional[int] = None,
+                 max_entries: Optional[int] = None, max_age: Optional[float] = None,
+                 commit_interval: Optional[int] = None):
+        """
+        Args:
+            cache_dir: 缓存目录
+            max_body_bytes: 可缓存的最大正文字节数
+            max_entries: 最多保留的条目数
+            max_age: 条目最长保留时间（秒，自最近一次验证起）
+            commit_interval: 每多少次写入提交一次
+        """
+        self.cache_dir = cache_dir or global_config.get('http_cache.dir', 'data/http_cache')
+        self.max_body_bytes = max_body_bytes or global_config.get('http_cache.max_body_bytes', 10485760)
+        self.max_entries = max_entries or global_config.get('http_cache.max_entries', 100000)
+        self.max_age = max_age or global_config.get('http_cache.max_age', 2592000)
+        self.commit_interval = commit_interval or global_config.get('http_cache.commit_interval', 100)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(os.path.join(self.cache_dir, self.DB_NAME), check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode = WAL')
+        self._conn.execute('PRAGMA synchronous = NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS http_cache ('
+            'key TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, status INTEGER, '
+            'headers TEXT, body_hash TEXT NOT NULL, stored_at REAL, validated_at REAL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS http_cache_validated ON http_cache (validated_at)')
+        self._conn.commit()
+        self.bodies = ContentStore(
+            os.path.join(self.cache_dir, 'bodies'),
+            segment_max_bytes=global_config.get('http_cache.segment_max_bytes', 67108864),
+            host_dictionaries=False
+        )
+        self._entries = self._conn.execute('SELECT COUNT(*) FROM http_cache').fetchone()[0]
+        self._uncommitted = 0
+
+        self.stats = {
+            'hits': 0,  # 304，使用缓存正文
+            'misses': 0,  # 没有缓存条目，普通请求
+            'revalidations': 0,  # 条件请求收到了304或200
+            'changed': 0,  # 条件请求返回了新内容
+            'stored': 0,
+            'evicted': 0,
+            'invalidated': 0,
+            'bytes_saved': 0
+        }
+        with self._lock:
+            self._evict()
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """
+        返回URL缓存条目对应的条件请求头
+
+        Args:
+            url: 原始请求URL（不含爬虫追加的随机参数）
+
+        Returns:
+            If-None-Match / If-Modified-Since请求头，没有缓存条目时返回空字典
+        """
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT etag, last_modified FROM http_cache WHERE key = ?', (canonical_url(url),)
+            ).fetchone()
+        if row is None:
+            self.stats['misses'] += 1
+            return {}
+
+        headers = {}
+        if row[0]:
+            headers['If-None-Match'] = row[0]
+        if row[1]:
+            headers['If-Modified-Since'] = row[1]
+        return headers
+
+    def lookup(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        收到304后读取缓存的响应
+
+        Returns:
+            包含status_code、headers、content（bytes）的字典，条目或正文缺失时返回None
+        """
+        key = canonical_url(url)
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT status, headers, body_hash FROM http_cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            content = self.bodies.get(row[2])
+            if content is None:
+                return None
+            self._conn.execute('UPDATE http_cache SET validated_at = ? WHERE key = ?', (time.time(), key))
+            self._maybe_commit()
+
+        self.stats['hits'] += 1
+        self.stats['revalidations'] += 1
+        self.stats['bytes_saved'] += len(content)
+        return {
+            'status_code': row[0],
+            'headers': json.loads(row[1]),
+            'content': content
+        }
+
+    def store(self, url: str, status_code: int, headers: Dict[str, str], content: bytes,
+              revalidated: bool = False) -> bool:
+        """
+        保存带验证器的响应
+
+        Args:
+            url: 原始请求URL
+            status_code: 响应状态码
+            headers: 响应头
+            content: 响应正文字节
+            revalidated: 是否是条件请求返回的新内容
+
+        Returns:
+            是否写入了缓存
+        """
+        if status_code != 200:
+            return False
+        if revalidated:
+            self.stats['revalidations'] += 1
+            self.stats['changed'] += 1
+        if len(content) > self.max_body_bytes:
+            return False
+
+        lowered = {name.lower(): value for name, value in headers.items()}
+        etag = lowered.get('etag')
+        last_modified = lowered.get('last-modified')
+        if not etag and not last_modified:
+            return False
+        if 'no-store' in lowered.get('cache-control', '').lower():
+            return False
+
+        # 正文已单独存储，不保留会误导解码的传输相关头，也不重放旧的Set-Cookie
+        for name in ('content-length', 'content-encoding', 'transfer-encoding', 'set-cookie'):
+            lowered.pop(name, None)
+
+        key = canonical_url(url)
+        now = time.time()
+        with self._lock:
+            previous = self._conn.execute('SELECT body_hash FROM http_cache WHERE key = ?', (key,)).fetchone()
+            # 先引用新正文再释放旧正文，内容未变时正文不会被删除
+            body_hash = self.bodies.put(content)
+            self._conn.execute(
+                'INSERT OR REPLACE INTO http_cache '
+                '(key, etag, last_modified, status, headers, body_hash, stored_at, validated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (key, etag, last_modified, status_code,
+                 json.dumps(lowered, ensure_ascii=False), body_hash, now, now)
+            )
+            if previous is not None:
+                self.bodies.release(previous[0])
+            else:
+                self._entries += 1
+            self._maybe_commit()
+        self.stats['stored'] += 1
+        return True
+
+    def invalidate(self, url: str) -> bool:
+        """
+        删除URL的缓存条目（如服务器返回304但缓存的正文已丢失）
+
+        Returns:
+            是否删除了条目
+        """
+        key = canonical_url(url)
+        with self._lock:
+            row = self._conn.execute('SELECT body_hash FROM http_cache WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return False
+            self._conn.execute('DELETE FROM http_cache WHERE key = ?', (key,))
+            self.bodies.release(row[0])
+            self._entries -= 1
+            self._maybe_commit()
+        self.stats['invalidated'] += 1
+        return True
+
+    def flush(self) -> None:
+        """提交未写入的缓存条目"""
+        with self._lock:
+            # 先写入正文，缓存条目总是指向已落盘的正文
+            self.bodies.flush()
+            self._conn.commit()
+            self._uncommitted = 0
+
+    def _maybe_commit(self) -> None:
+        self._uncommitted += 1
+        if self._uncommitted >= self.commit_interval:
+            self._evict()
+            self.flush()
+
+    def _evict(self) -> None:
+        """淘汰过期条目和超出max_entries的最久未验证条目，并回收正文空间"""
+        conn = self._conn
+        cutoff = time.time() - self.max_age
+        rows = conn.execute('SELECT key, body_hash FROM http_cache WHERE validated_at < ?', (cutoff,)).fetchall()
+        excess = self._entries - len(rows) - self.max_entries
+        if excess > 0:
+            # 一次多淘汰10%，避免每批写入都触发淘汰
+            rows += conn.execute(
+                'SELECT key, body_hash FROM http_cache WHERE validated_at >= ? ORDER BY validated_at LIMIT ?',
+                (cutoff, excess + self.max_entries // 10)
+            ).fetchall()
+        if not rows:
+            return
+        conn.executemany('DELETE FROM http_cache WHERE key = ?', ((key,) for key, _ in rows))
+        for _, body_hash in rows:
+            self.bodies.release(body_hash)
+        self._entries -= len(rows)
+        self.stats['evicted'] += len(rows)
+        self.flush()
+        self.bodies.collect_garbage()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存命中统计"""
+        stats = dict(self.stats)
+        requests = stats['hits'] + stats['misses'] + stats['changed']
+        stats['hit_rate'] = stats['hits'] / requests if requests else 0.0
+        with self._lock:
+            stats['entries'] = self._conn.execute('SELECT COUNT(*) FROM http_cache').fetchone()[0]
+        return stats
+
+    def close(self) -> None:
+        """提交未写入的条目并关闭缓存"""
+        with self._lock:
+            try:
+                self.flush()
+                self._conn.close()
+            except Exception:
+                pass
+            self.bodies.close()
@@ -0,0 +1,375 @@
+# PhantomCrawler - 响应正文流式读取模块
+import os
+import time
+import asyncio
+import hashlib
+import mimetypes
+import tempfile
+import threading
+from typing import Any, Dict, Optional
+
+import httpx
+
+from src.config import global_config
+
+# 正文已在读取时解码，重新构造的响应不能保留这些传输相关的头
+_TRANSFER_HEADERS = ('content-encoding', 'content-length', 'transfer-encoding')
+
+HTML_TYPES = ('text/html', 'application/xhtml+xml')
+TEXT_TYPES = ('application/json', 'application/xml', 'application/javascript',
+              'application/rss+xml', 'application/atom+xml')
+
+DEFAULT_MAX_BYTES = {
+    'text/html': 10485760,
+    'application/xhtml+xml': 10485760,
+    'text/': 5242880,
+    'application/json': 5242880,
+    'default': 104857600
+}
+
+
+class _BodyBuffer:
+    """单个响应的正文累积状态：HTML和溢出阈值以内的其他正文留在内存，超过阈值的正文边读边写入溢出文件"""
+
+    def __init__(self, reader: 'ResponseBodyReader', media_type: str):
+        self.reader = reader
+        self.media_type = media_type
+        self.limit = reader.limit_for(media_type)
+        self.in_memory_limit = self.limit if reader.is_html(media_type) else reader.spool_threshold
+        # 超过上限时文本保留前缀，二进制整体放弃
+        self.keep_prefix = reader.is_textual(media_type)
+        self.buffer = bytearray()
+        self.size = 0
+        self.truncated = False
+        self.skipped: Optional[str] = None
+        self._file = None
+        self._path: Optional[str] = None
+        self._hash = hashlib.sha256()
+
+    def feed(self, chunk: bytes) -> bool:
+        """
+        写入一个数据块
+
+        Returns:
+            是否继续读取
+        """
+        if self.size + len(chunk) > self.limit:
+            if self._file is None and self.keep_prefix and self.limit <= self.in_memory_limit:
+                # 文本保留上限以内的前缀，链接提取仍然可用
+                self.buffer += chunk[:self.limit - self.size]
+                self.size = self.limit
+                self.truncated = True
+            else:
+                self.skipped = 'too_large'
+                self._discard()
+            return False
+
+        self.size += len(chunk)
+        if self._file is None and self.size <= self.in_memory_limit:
+            self.buffer += chunk
+            return True
+
+        if self._file is None:
+            self._open_spool()
+        self._hash.update(chunk)
+        self._file.write(chunk)
+        return True
+
+    def in_memory(self, chunk_size: int) -> bool:
+        """下一个数据块是否只写入内存缓冲区（不触及磁盘）"""
+        return self._file is None and self.size + chunk_size <= self.in_memory_limit
+
+    @property
+    def spooling(self) -> bool:
+        """正文是否正在写入溢出文件"""
+        return self._file is not None
+
+    def _open_spool(self) -> None:
+        fd, self._path = tempfile.mkstemp(dir=self.reader.prepare_spool_dir(), suffix='.part')
+        self._file = os.fdopen(fd, 'wb')
+        if self.buffer:
+            self._hash.update(self.buffer)
+            self._file.write(self.buffer)
+            self.buffer = bytearray()
+
+    def _discard(self) -> None:
+        self.buffer = bytearray()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            try:
+                os.remove(self._path)
+            except OSError:
+                pass
+            self._path = None
+
+    def finish(self, response: httpx.Response) -> httpx.Response:
+        """构造只包含已读取正文的响应"""
+        extensions = dict(response.extensions)
+        extensions['body_bytes'] = self.size
+        if self.skipped:
+            extensions['body_skipped'] = self.skipped
+        if self.truncated:
+            extensions['body_truncated'] = True
+
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            extension = mimetypes.guess_extension(self.media_type) or '.bin'
+            path = os.path.join(self.reader.spool_dir, self._hash.hexdigest() + extension)
+            # 按内容哈希命名，相同的正文只保留一份
+            is_new = not os.path.exists(path)
+            os.replace(self._path, path)
+            extensions['body_path'] = path
+            self.reader.stats['spooled'] += 1
+            self.reader.stats['bytes_spooled'] += self.size
+            self.reader.spooled(path, self.size if is_new else 0)
+
+        self.reader.stats['bytes_read'] += self.size
+        if self.truncated:
+            self.reader.stats['truncated'] += 1
+        if self.skipped:
+            self.reader.stats['rejected'] += 1
+
+        headers = [(name, value) for name, value in response.headers.multi_items()
+                   if name.lower() not in _TRANSFER_HEADERS]
+        return httpx.Response(
+            response.status_code,
+            headers=headers,
+            content=bytes(self.buffer),
+            request=response.request,
+            extensions=extensions
+        )
+
+
+class ResponseBodyReader:
+    """
+    流式响应正文读取器
+
+    在读取正文之前检查Content-Type和Content-Length：被拒绝的类型和声明超过上限的正文
+    直接关闭连接，不下载。读取时按类型限制解码后的字节数：
+    - HTML保留在内存中并解码，超过上限的部分被截断（前缀仍可提取链接）
+    - 其他类型（JSON、XML、图片等）不超过溢出阈值时保留在内存（二进制不解码，见response.content），
+      超过阈值时边读边写入溢出目录，以内容哈希命名
+
+    无论链接指向多大的文件，内存中最多只保留一个上限以内的正文。溢出目录的总大小不超过
+    spool_max_bytes，超出时删除最早写入的文件；未配置目录时使用状态目录（见use_state_dir）
+    下的spool子目录，没有状态目录时使用系统临时目录下的phantom_spool。
+    """
+
+    def __init__(self, max_bytes: Optional[Dict[str, int]] = None, spool_threshold: Optional[int] = None,
+                 spool_dir: Optional[str] = None, reject_types: Optional[list] = None,
+                 chunk_size: int = 65536, spool_max_bytes: Optional[int] = None):
+        """
+        Args:
+            max_bytes: 按媒体类型的字节上限，键可以是完整类型、'type/'前缀或'default'
+            spool_threshold: 非HTML正文保留在内存中的最大字节数
+            spool_dir: 溢出文件目录，None时读取配置，未配置时见use_state_dir
+            reject_types: 不下载的媒体类型或'type/'前缀
+            chunk_size: 每次读取的字节数
+            spool_max_bytes: 溢出目录的总字节上限
+        """
+        self.max_bytes = dict(DEFAULT_MAX_BYTES)
+        self.max_bytes.update(max_bytes or global_config.get('response_body.max_bytes', {}))
+        self.spool_threshold = spool_threshold or global_config.get('response_body.spool_threshold', 1048576)
+        self._explicit_spool_dir = spool_dir or global_config.get('response_body.spool_dir')
+        self.spool_dir = self._explicit_spool_dir or os.path.join(tempfile.gettempdir(), 'phantom_spool')
+        self.spool_max_bytes = spool_max_bytes or global_config.get('response_body.spool_max_bytes', 1073741824)
+        self._spool_lock = threading.Lock()
+        # 溢出目录当前的总字节数，第一次溢出时扫描目录得到
+        self._spool_bytes: Optional[int] = None
+        self.reject_types = tuple(reject_types if reject_types is not None
+                                  else global_config.get('response_body.reject_types', ['video/', 'audio/']))
+        self.chunk_size = chunk_size
+        self.stats = {
+            'responses': 0,
+            'rejected': 0,
+            'truncated': 0,
+            'spooled': 0,
+            'bytes_read': 0,
+            'bytes_spooled': 0,
+            'spool_pruned': 0
+        }
+
+    def use_state_dir(self, state_dir: str) -> None:
+        """
+        没有显式配置溢出目录时，把溢出文件写入状态目录下的spool子目录
+
+        Args:
+            state_dir: 检查点状态目录
+        """
+        if self._explicit_spool_dir:
+            return
+        spool_dir = os.path.join(state_dir, 'spool')
+        with self._spool_lock:
+            if spool_dir != self.spool_dir:
+                self.spool_dir = spool_dir
+                self._spool_bytes = None
+
+    def prepare_spool_dir(self) -> str:
+        """创建溢出目录，第一次使用时统计已有文件并删除中断留下的.part文件"""
+        with self._spool_lock:
+            if self._spool_bytes is None:
+                os.makedirs(self.spool_dir, exist_ok=True)
+                total = 0
+                stale = time.time() - 3600
+                for entry in os.scandir(self.spool_dir):
+                    if not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                    if entry.name.endswith('.part'):
+                        if stat.st_mtime < stale:
+                            self._remove(entry.path)
+                        continue
+                    total += stat.st_size
+                self._spool_bytes = total
+            return self.spool_dir
+
+    def spooled(self, path: str, size: int) -> None:
+        """
+        记录新写入的溢出文件，总大小超过上限时删除最早的文件（保留刚写入的文件）
+
+        Args:
+            path: 溢出文件路径
+            size: 新增的字节数（文件已存在时为0）
+        """
+        with self._spool_lock:
+            self._spool_bytes = (self._spool_bytes or 0) + size
+            if self._spool_bytes <= self.spool_max_bytes:
+                return
+            files = []
+            for entry in os.scandir(self.spool_dir):
+                if entry.is_file() and not entry.name.endswith('.part') and entry.path != path:
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+            files.sort()
+            # 删除到上限的90%，避免每次溢出都扫描目录
+            target = self.spool_max_bytes * 0.9
+            for _, file_size, file_path in files:
+                if self._spool_bytes <= target:
+                    break
+                if self._remove(file_path):
+                    self._spool_bytes -= file_size
+                    self.stats['spool_pruned'] += 1
+
+    @staticmethod
+    def _remove(path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+    @staticmethod
+    def media_type(headers) -> str:
+        """返回Content-Type中的媒体类型（小写，不含参数）"""
+        return headers.get('content-type', '').split(';', 1)[0].strip().lower()
+
+    @staticmethod
+    def is_html(media_type: Optional[str]) -> bool:
+        """是否为HTML正文，未声明类型时按HTML处理"""
+        return not media_type or media_type in HTML_TYPES
+
+    def is_textual(self, media_type: str) -> bool:
+        """是否为需要解码的文本正文"""
+        return (self.is_html(media_type) or media_type.startswith('text/') or media_type in TEXT_TYPES
+                or media_type.endswith(('+xml', '+json')))
+
+    def limit_for(self, media_type: str) -> int:
+        """返回媒体类型的字节上限"""
+        if media_type in self.max_bytes:
+            return self.max_bytes[media_type]
+        prefix = media_type.split('/', 1)[0] + '/'
+        return self.max_bytes.get(prefix, self.max_bytes['default'])
+
+    def reject_reason(self, response: httpx.Response) -> Optional[str]:
+        """
+        只根据响应头判断是否放弃读取正文
+
+        Returns:
+            'content_type'、'too_large'，可以读取时返回None
+        """
+        media_type = self.media_type(response.headers)
+        if media_type and media_type.startswith(self.reject_types):
+            return 'content_type'
+        # 压缩传输时Content-Length是压缩后的长度，只能在读取时检查
+        length = response.headers.get('content-length')
+        if length and length.isdigit() and 'content-encoding' not in response.headers:
+            if int(length) > self.limit_for(media_type) and not self.is_textual(media_type):
+                return 'too_large'
+        return None
+
+    def read(self, response: httpx.Response) -> httpx.Response:
+        """
+        读取以stream=True发送的请求的正文
+
+        调用方负责在之后关闭原始响应
+
+        Returns:
+            正文已按规则读取的新响应，extensions中包含body_bytes，
+            以及可能的body_path、body_skipped、body_truncated
+        """
+        buffer = self._start(response)
+        if not buffer.skipped:
+            for chunk in response.iter_bytes(self.chunk_size):
+                if not buffer.feed(chunk):
+                    break
+        return buffer.finish(response)
+
+    async def aread(self, response: httpx.Response, executor=None) -> httpx.Response:
+        """
+        read的异步版本
+
+        留在内存中的数据块直接在事件循环中处理，写入溢出文件的数据块和最后的重命名、
+        清理在executor中执行（None时使用事件循环的默认线程池）
+
+        Args:
+            response: 以stream=True发送的请求的响应
+            executor: 执行溢出文件写入的线程池
+        """
+        loop = asyncio.get_running_loop()
+        buffer = self._start(response)
+        if not buffer.skipped:
+            async for chunk in response.aiter_bytes(self.chunk_size):
+                if buffer.in_memory(len(chunk)):
+                    if not buffer.feed(chunk):
+                        break
+                elif not await loop.run_in_executor(executor, buffer.feed, chunk):
+                    break
+        if buffer.spooling:
+            return await loop.run_in_executor(executor, buffer.finish, response)
+        return buffer.finish(response)
+
+    def _start(self, response: httpx.Response) -> _BodyBuffer:
+        self.stats['responses'] += 1
+        buffer = _BodyBuffer(self, self.media_type(response.headers))
+        reason = self.reject_reason(response)
+        if reason:
+            buffer.skipped = reason
+            print(f"[PhantomCrawler] 跳过正文 ({reason}): {response.request.url}")
+        return buffer
+
+    @staticmethod
+    def is_complete(response: httpx.Response) -> bool:
+        """响应的完整正文是否在内存中"""
+        extensions = response.extensions
+        return not (extensions.get('body_path') or extensions.get('body_skipped')
+                    or extensions.get('body_truncated'))
+
+    def describe(self, response: httpx.Response) -> Dict[str, Any]:
+        """
+        返回写入爬取结果的正文信息
+
+        Returns:
+            包含content_type，以及可能的body_path、body_skipped、body_truncated的字典
+        """
+        extensions = response.extensions
+        info: Dict[str, Any] = {'content_type': self.media_type(response.headers)}
+        for key in ('body_path', 'body_skipped', 'body_truncated'):
+            if extensions.get(key):
+                info[key] = extensions[key]
+        return info
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取正文读取统计"""
+        return dict(self.stats)
@@ -0,0 +1,551 @@
+# PhantomCrawler - 结果输出模块
+import os
+import gzip
+import json
+import time
+import queue
+import sqlite3
+import threading
+import importlib.util
+from typing import Any, Dict, List, Optional
+
+from src.config import global_config
+
+# 可选压缩与列式存储依赖
+HAS_ZSTD = importlib.util.find_spec('zstandard') is not None
+HAS_PYARROW = importlib.util.find_spec('pyarrow') is not None
+
+if HAS_ZSTD:
+    import zstandard
+
+# 结构化输出（SQLite/Parquet）的固定列，其余字段合并到extra列
+RESULT_COLUMNS = ['url', 'status_code', 'success', 'blocked', 'depth', 'response_time',
+                  'timestamp', 'content', 'content_hash', 'headers', 'error', 'extra']
+
+
+def flatten_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    将爬取结果展开为固定列的记录，用于SQLite与Parquet输出
+
+    Args:
+        result: crawl/iter_crawl返回的结果字典
+
+    Returns:
+        仅包含RESULT_COLUMNS列的记录
+    """
+    extra = {key: value for key, value in result.items()
+             if key not in RESULT_COLUMNS and key != 'cookies'}
+    if result.get('cookies'):
+        extra['cookies'] = result['cookies']
+
+    status_code = result.get('status_code')
+    depth = result.get('depth')
+    response_time = result.get('response_time')
+    success = result.get('success')
+    return {
+        'url': result.get('url'),
+        'status_code': int(status_code) if status_code is not None else None,
+        'success': bool(success) if success is not None else None,
+        'blocked': bool(result.get('blocked', False)),
+        'depth': int(depth) if depth is not None else None,
+        'response_time': float(response_time) if response_time is not None else None,
+        'timestamp': float(result.get('timestamp') or time.time()),
+        'content': result.get('content'),
+        'content_hash': result.get('content_hash'),
+        'headers': json.dumps(result['headers'], ensure_ascii=False, default=str) if result.get('headers') else None,
+        'error': result.get('error'),
+        'extra': json.dumps(extra, ensure_ascii=False, default=str) if extra else None
+    }
+
+
+class _Control:
+    """在写出线程中执行的控制操作（如标记输出位置），执行完毕后唤醒提交线程"""
+
+    def __init__(self, func, args):
+        self.func = func
+        self.args = args
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.done = threading.Event()
+
+    def run(self) -> None:
+        try:
+            self.result = self.func(*self.args)
+        except Exception as e:
+            self.error = e
+        self.done.set()
+
+
+class ResultSink:
+    """
+    结果输出基类
+
+    write()只把结果放入有界队列，由后台线程按批次（batch_size条或flush_interval秒）
+    写出，爬取线程不会等待磁盘I/O。队列满时write()阻塞，对爬取形成反压。
+    子类实现_write_batch()与_close()。
+
+    支持检查点的子类还实现_mark()与_truncate()：mark()在写出之前提交的全部结果后返回输出位置，
+    随检查点一起保存；恢复时truncate()丢弃该位置之后写出的结果（这些页面会被重新爬取），
+    避免同一页面在输出中出现两次。
+    """
+
+    sink_type = 'base'
+
+    def __init__(self, batch_size: Optional[int] = None, flush_interval: Optional[float] = None,
+                 queue_size: Optional[int] = None):
+        """
+        Args:
+            batch_size: 每批写出的最大记录数
+            flush_interval: 未满一批时最长等待秒数
+            queue_size: 待写出队列的容量
+        """
+        self.batch_size = batch_size or global_config.get('sinks.batch_size', 500)
+        self.flush_interval = flush_interval or global_config.get('sinks.flush_interval', 1.0)
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size or global_config.get('sinks.queue_size', 10000))
+        self._closed = False
+        self._lock = threading.Lock()
+
+        self.stats = {
+            'records': 0,
+            'batches': 0,
+            'errors': 0,
+            'flush_latency_last_ms': 0.0,
+            'flush_latency_max_ms': 0.0,
+            'flush_latency_total_ms': 0.0
+        }
+
+        self._worker = threading.Thread(target=self._run, name=f'{self.sink_type}-sink', daemon=True)
+        self._worker.start()
+
+    def write(self, result: Dict[str, Any]) -> None:
+        """
+        提交一条结果
+
+        Args:
+            result: 爬取结果字典
+        """
+        if self._closed:
+            raise RuntimeError(f'{self.sink_type} sink已关闭')
+        # 浅拷贝，避免调用方在序列化前修改结果
+        self._queue.put(dict(result))
+
+    def flush(self) -> None:
+        """等待已提交的结果全部写出"""
+        self._queue.join()
+
+    def close(self) -> None:
+        """写出剩余结果并关闭输出"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._queue.put(None)
+        self._worker.join()
+        try:
+            self._close()
+        except Exception as e:
+            print(f"[PhantomCrawler] 关闭{self.sink_type}输出失败: {str(e)}")
+
+    def mark(self) -> Optional[Dict[str, Any]]:
+        """
+        写出已提交的全部结果并返回当前输出位置
+
+        Returns:
+            可传给truncate()的位置，不支持检查点的输出返回None
+        """
+        if self._closed:
+            return None
+        return self._call(self._mark)
+
+    def truncate(self, position: Optional[Dict[str, Any]]) -> None:
+        """
+        丢弃position之后写出的结果，从检查点恢复、写入新结果之前调用
+
+        Args:
+            position: mark()返回的位置，None时不做任何操作
+        """
+        if position and not self._closed:
+            self._call(self._truncate, position)
+
+    def _call(self, func, *args):
+        # 控制操作排在已提交的结果之后，由写出线程执行，文件和连接只在该线程中使用
+        control = _Control(func, args)
+        self._queue.put(control)
+        control.done.wait()
+        if control.error is not None:
+            raise control.error
+        return control.result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取写出统计信息，包括批次写出延迟"""
+        stats = dict(self.stats)
+        total = stats.pop('flush_latency_total_ms')
+        stats['flush_latency_avg_ms'] = total / stats['batches'] if stats['batches'] else 0.0
+        stats['pending'] = self._queue.qsize()
+        stats['type'] = self.sink_type
+        return stats
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            batch: List[Dict[str, Any]] = []
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            taken = 1
+            control = None
+            if item is None:
+                stop = True
+            elif isinstance(item, _Control):
+                control = item
+            else:
+                batch.append(item)
+                deadline = time.time() + self.flush_interval
+                while len(batch) < self.batch_size:
+                    remaining = deadline - time.time()
+                    try:
+                        item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    taken += 1
+                    if item is None:
+                        stop = True
+                        break
+                    if isinstance(item, _Control):
+                        control = item
+                        break
+                    batch.append(item)
+
+            if batch:
+                self._flush_batch(batch)
+            if control is not None:
+                control.run()
+            for _ in range(taken):
+                self._queue.task_done()
+
+    def _flush_batch(self, batch: List[Dict[str, Any]]) -> None:
+        start = time.perf_counter()
+        try:
+            self._write_batch(batch)
+        except Exception as e:
+            self.stats['errors'] += 1
+            print(f"[PhantomCrawler] {self.sink_type}输出写入失败: {str(e)}")
+            return
+
+        latency_ms = (time.perf_counter() - start) * 1000
+        self.stats['records'] += len(batch)
+        self.stats['batches'] += 1
+        self.stats['flush_latency_last_ms'] = latency_ms
+        self.stats['flush_latency_total_ms'] += latency_ms
+        self.stats['flush_latency_max_ms'] = max(self.stats['flush_latency_max_ms'], latency_ms)
+
+    def _write_batch(self, batch: List[Dict[str, Any]]) -> None:
+        raise NotImplementedError
+
+    def _mark(self) -> Optional[Dict[str, Any]]:
+        return None
+
+    def _truncate(self, position: Dict[str, Any]) -> None:
+        pass
+
+    def _close(self) -> None:
+        pass
+
+
+class JsonlSink(ResultSink):
+    """
+    JSONL输出：每行一条结果，按大小轮转文件，可选gzip/zstd压缩
+
+    文件名形如 results-00000.jsonl.gz，max_bytes按未压缩字节数计算。
+    """
+
+    sink_type = 'jsonl'
+
+    def __init__(self, path: str, max_bytes: Optional[int] = None, compression: Optional[str] = None,
+                 **kwargs):
+        """
+        Args:
+            path: 输出路径前缀，如 out/results.jsonl（压缩后缀会自动补上）
+            max_bytes: 单个文件的最大未压缩字节数，0表示不轮转
+            compression: None、'gzip'或'zstd'
+        """
+        if compression not in (None, 'gzip', 'zstd'):
+            raise ValueError(f'不支持的压缩格式: {compression}')
+        if compression == 'zstd' and not HAS_ZSTD:
+            raise ImportError('zstd压缩需要安装zstandard库')
+
+        base = path[:-len('.jsonl')] if path.endswith('.jsonl') else path
+        directory = os.path.dirname(base)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._base = base
+        self.compression = compression
+        self.max_bytes = max_bytes if max_bytes is not None else global_config.get('sinks.jsonl_max_bytes', 256 * 1024 * 1024)
+        self._file_index = -1
+        self._file = None
+        self._raw_file = None
+        self._file_bytes = 0
+        self.files: List[str] = []
+        super().__init__(**kwargs)
+
+    def _path(self, index: int) -> str:
+        suffix = {None: '', 'gzip': '.gz', 'zstd': '.zst'}[self.compression]
+        return f'{self._base}-{index:05d}.jsonl{suffix}'
+
+    def _open_next(self) -> None:
+        self._close()
+        self._file_index += 1
+        path = self._path(self._file_index)
+        self._raw_file = open(path, 'wb')
+        self._open_member()
+        self._file_bytes = 0
+        self.files.append(path)
+
+    def _open_member(self) -> None:
+        # 压缩输出由多个独立的gzip成员/zstd帧组成，每个检查点位置都落在成员边界上
+        if self.compression == 'gzip':
+            self._file = gzip.GzipFile(fileobj=self._raw_file, mode='wb', compresslevel=6)
+        elif self.compression == 'zstd':
+            self._file = zstandard.ZstdCompressor(level=3).stream_writer(self._raw_file, closefd=False)
+        else:
+            self._file = self._raw_file
+
+    def _write_batch(self, batch: List[Dict[str, Any]]) -> None:
+        if self._raw_file is None:
+            self._open_next()
+        elif self._file is None:
+            self._open_member()
+
+        lines = []
+        for result in batch:
+            lines.append(json.dumps(result, ensure_ascii=False, default=str).encode('utf-8') + b'\n')
+
+        for line in lines:
+            if self.max_bytes and self._file_bytes and self._file_bytes + len(line) > self.max_bytes:
+                self._open_next()
+            self._file.write(line)
+            self._file_bytes += len(line)
+        self._file.flush()
+
+    def _mark(self) -> Dict[str, Any]:
+        if self._raw_file is None:
+            return {'file': self._file_index, 'offset': 0, 'bytes': 0}
+        if self._file is not self._raw_file and self._file is not None:
+            # 结束当前的压缩成员，下一批写入时开始新成员
+            self._file.close()
+            self._file = None
+        self._raw_file.flush()
+        return {'file': self._file_index, 'offset': self._raw_file.tell(), 'bytes': self._file_bytes}
+
+    def _truncate(self, position: Dict[str, Any]) -> None:
+        self._close()
+        index = position['file']
+        # 删除检查点之后轮转出的文件
+        later = index + 1
+        while os.path.exists(self._path(later)):
+            os.remove(self._path(later))
+            later += 1
+        self.files = [self._path(i) for i in range(index)]
+        self._file_index = index - 1
+        path = self._path(index)
+        if index >= 0 and os.path.exists(path):
+            # 截断到检查点位置后继续追加，压缩成员在下一批写入时才开始
+            with open(path, 'r+b') as f:
+                f.truncate(position['offset'])
+            self._file_index = index
+            self._raw_file = open(path, 'ab')
+            self._file_bytes = position['bytes']
+            self.files.append(path)
+
+    def _close(self) -> None:
+        if self._file is not None and self._file is not self._raw_file:
+            self._file.close()
+        self._file = None
+        if self._raw_file is not None:
+            self._raw_file.close()
+            self._raw_file = None
+
+
+class SQLiteSink(ResultSink):
+    """SQLite输出：每批结果在一个事务中写入crawl_results表"""
+
+    sink_type = 'sqlite'
+
+    def __init__(self, path: str, **kwargs):
+        """
+        Args:
+            path: SQLite数据库路径
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        # 连接只在写出线程中使用
+        self._conn: Optional[sqlite3.Connection] = None
+        super().__init__(**kwargs)
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path)
+            conn.execute('PRAGMA journal_mode = WAL')
+            conn.execute('PRAGMA synchronous = NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS crawl_results ('
+                'id INTEGER PRIMARY KEY, url TEXT, status_code INTEGER, success INTEGER, '
+                'blocked INTEGER, depth INTEGER, response_time REAL, timestamp REAL, '
+                'content TEXT, content_hash TEXT, headers TEXT, error TEXT, extra TEXT)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS crawl_results_url ON crawl_results (url)')
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _write_batch(self, batch: List[Dict[str, Any]]) -> None:
+        conn = self._connect()
+        placeholders = ', '.join('?' * len(RESULT_COLUMNS))
+        rows = []
+        for result in batch:
+            record = flatten_result(result)
+            rows.append(tuple(record[column] for column in RESULT_COLUMNS))
+        with conn:
+            conn.executemany(
+                f'INSERT INTO crawl_results ({", ".join(RESULT_COLUMNS)}) VALUES ({placeholders})',
+                rows
+            )
+
+    def _mark(self) -> Dict[str, Any]:
+        # 每批在一个事务中提交，最大行号即已持久化的位置
+        row = self._connect().execute('SELECT MAX(id) FROM crawl_results').fetchone()
+        return {'rowid': row[0] or 0}
+
+    def _truncate(self, position: Dict[str, Any]) -> None:
+        with self._connect() as conn:
+            conn.execute('DELETE FROM crawl_results WHERE id > ?', (position['rowid'],))
+
+    def _run(self) -> None:
+        try:
+            super()._run()
+        finally:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class ParquetSink(ResultSink):
+    """
+    Parquet输出：每批结果写为一个行组
+
+    Parquet文件在关闭时才写入文件尾，检查点只记录已写出的行数；恢复时从上次关闭的文件中
+    复制检查点之前的行，之后继续写入（文件未正常关闭时无法读取，只能重新开始）。
+    """
+
+    sink_type = 'parquet'
+
+    def __init__(self, path: str, batch_size: Optional[int] = None, **kwargs):
+        """
+        Args:
+            path: Parquet文件路径
+            batch_size: 每个行组的行数
+        """
+        if not HAS_PYARROW:
+            raise ImportError('Parquet输出需要安装pyarrow库')
+        import pyarrow
+        import pyarrow.parquet
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._pa = pyarrow
+        self._schema = pyarrow.schema([
+            ('url', pyarrow.string()),
+            ('status_code', pyarrow.int32()),
+            ('success', pyarrow.bool_()),
+            ('blocked', pyarrow.bool_()),
+            ('depth', pyarrow.int32()),
+            ('response_time', pyarrow.float64()),
+            ('timestamp', pyarrow.float64()),
+            ('content', pyarrow.large_string()),
+            ('content_hash', pyarrow.string()),
+            ('headers', pyarrow.string()),
+            ('error', pyarrow.string()),
+            ('extra', pyarrow.string())
+        ])
+        self._pq = pyarrow.parquet
+        # 第一次写入（或恢复）时才创建文件，恢复前不会覆盖上次的输出
+        self._writer = None
+        self._rows = 0
+        super().__init__(batch_size=batch_size or global_config.get('sinks.parquet_row_group_size', 5000),
+                         **kwargs)
+
+    def _open(self):
+        if self._writer is None:
+            self._writer = self._pq.ParquetWriter(self.path, self._schema, compression='zstd')
+        return self._writer
+
+    def _write_batch(self, batch: List[Dict[str, Any]]) -> None:
+        records = [flatten_result(result) for result in batch]
+        columns = {column: [record[column] for record in records] for column in RESULT_COLUMNS}
+        table = self._pa.Table.from_pydict(columns, schema=self._schema)
+        self._open().write_table(table)
+        self._rows += len(records)
+
+    def _mark(self) -> Dict[str, Any]:
+        return {'rows': self._rows}
+
+    def _truncate(self, position: Dict[str, Any]) -> None:
+        if self._writer is not None or not os.path.exists(self.path):
+            return
+        previous = self.path + '.resume'
+        os.replace(self.path, previous)
+        try:
+            source = self._pq.ParquetFile(previous)
+            remaining = position['rows']
+            for batch in source.iter_batches(batch_size=self.batch_size):
+                if remaining <= 0:
+                    break
+                batch = batch.slice(0, remaining)
+                self._open().write_table(self._pa.Table.from_batches([batch]).cast(self._schema))
+                remaining -= batch.num_rows
+                self._rows += batch.num_rows
+        except Exception as e:
+            print(f"[PhantomCrawler] 无法读取上次的Parquet输出，从头写入（原文件保留为 {previous}）: {str(e)}")
+            return
+        os.remove(previous)
+
+    def _close(self) -> None:
+        self._open().close()
+
+
+def create_sink(spec: str, **kwargs) -> ResultSink:
+    """
+    根据描述字符串创建结果输出
+
+    Args:
+        spec: 形如 jsonl:out/results.jsonl、jsonl+gzip:out/results.jsonl、
+              jsonl+zstd:out/results.jsonl、sqlite:out/results.db、parquet:out/results.parquet
+
+    Returns:
+        结果输出实例
+    """
+    kind, _, path = spec.partition(':')
+    if not path:
+        raise ValueError(f'无效的输出描述: {spec}，格式应为 类型:路径')
+
+    kind, _, compression = kind.partition('+')
+    if kind == 'jsonl':
+        return JsonlSink(path, compression=compression or None, **kwargs)
+    if kind == 'sqlite':
+        return SQLiteSink(path, **kwargs)
+    if kind == 'parquet':
+        return ParquetSink(path, **kwargs)
+    raise ValueError(f'不支持的输出类型: {kind}')
@@ -0,0 +1,42 @@
+# PhantomCrawler - URL指纹工具
+import hashlib
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+
+def url_fingerprint(url: str) -> int:
+    """计算URL的64位指纹
+
+    返回有符号64位整数，可直接存入SQLite的INTEGER列或array('q')
+
+    Args:
+        url: URL字符串
+
+    Returns:
+        64位URL指纹
+    """
+    digest = hashlib.blake2b(url.encode('utf-8', 'surrogatepass'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little', signed=True)
+
+
+_DEFAULT_PORTS = {'http': '80', 'https': '443'}
+
+
+def canonical_url(url: str) -> str:
+    """计算URL的规范形式，用作缓存键
+
+    协议和主机转为小写，去掉默认端口、片段和空路径，查询参数按名称排序
+
+    Args:
+        url: URL字符串
+
+    Returns:
+        规范化后的URL
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    host, _, port = netloc.rpartition(':')
+    if host and port == _DEFAULT_PORTS.get(scheme) and not netloc.endswith(']'):
+        netloc = host
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True))) if parts.query else ''
+    return urlunsplit((scheme, netloc, parts.path or '/', query, ''))
@@ -0,0 +1,56 @@
+# PhantomCrawler - 测试公共夹具
+import io
+import contextlib
+
+import httpx
+import pytest
+
+from src.config import global_config
+
+
+
+@pytest.fixture
+def config(tmp_path):
+    """临时修改全局配置，测试结束后恢复"""
+    missing = object()
+    saved = {}
+
+    def set_value(key, value):
+        if key not in saved:
+            saved[key] = global_config.get(key, missing)
+        global_config.set(key, value)
+
+    # 状态文件写入临时目录，关闭网络相关的默认行为和人类延迟
+    set_value('desires.memory_path', str(tmp_path / 'seven_desires.db'))
+    set_value('desires.legacy_memory_path', '')
+    set_value('robots.enabled', False)
+    set_value('sitemaps.enabled', False)
+    set_value('http_cache.enabled', False)
+    set_value('response_body.spool_dir', str(tmp_path / 'spool'))
+    set_value('behavior_simulator.delay_min', 0.0)
+    set_value('behavior_simulator.delay_max', 0.0)
+    yield set_value
+    for key, value in saved.items():
+        global_config.set(key, None if value is missing else value)
+
+
+@pytest.fixture
+def make_crawler(config):
+    """创建使用httpx.MockTransport的爬虫，handler为请求处理函数"""
+    from src.core.crawler import PhantomCrawler
+
+    crawlers = []
+
+    def factory(handler):
+        with contextlib.redirect_stdout(io.StringIO()):
+            crawler = PhantomCrawler()
+        crawler.playwright_available = False
+        crawler.http_client = httpx.Client(transport=httpx.MockTransport(handler))
+        crawlers.append(crawler)
+        return crawler
+
+    yield factory
+    with contextlib.redirect_stdout(io.StringIO()):
+        for crawler in crawlers:
+            crawler.close()
+
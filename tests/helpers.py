@@ -0,0 +1,30 @@
+# PhantomCrawler - 测试辅助函数
+import io
+import gzip
+import json
+import contextlib
+
+# 足够大的HTML正文，过短的正文会被当作封锁页
+PAGE = b'<html><head><title>ok</title></head><body>' + b'<p>content</p>' * 200 + b'</body></html>'
+
+
+def quiet(function, *args, **kwargs):
+    """屏蔽爬虫的控制台输出执行函数"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return function(*args, **kwargs)
+
+
+def read_jsonl(sink):
+    """按写出顺序读取JSONL输出中的全部URL"""
+    urls = []
+    for path in sink.files:
+        with open(path, 'rb') as f:
+            if sink.compression == 'gzip':
+                data = gzip.decompress(f.read())
+            elif sink.compression == 'zstd':
+                import zstandard
+                data = zstandard.ZstdDecompressor().stream_reader(f, read_across_frames=True).read()
+            else:
+                data = f.read()
+        urls.extend(json.loads(line)['url'] for line in data.splitlines())
+    return urls
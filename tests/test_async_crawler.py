@@ -0,0 +1,80 @@
+# PhantomCrawler - 异步爬取引擎测试
+import asyncio
+import os
+import threading
+
+import httpx
+
+from src.core.async_crawler import AsyncPhantomCrawler
+from tests.helpers import PAGE, quiet
+
+
+class RecordingSink:
+    """记录写入线程的结果输出"""
+
+    def __init__(self):
+        self.threads = []
+        self.urls = []
+
+    def write(self, result):
+        self.threads.append(threading.current_thread().name)
+        self.urls.append(result['url'])
+
+
+def run_crawler(handler, coroutine_factory):
+    """用MockTransport初始化异步爬虫，执行coroutine_factory(crawler)后关闭"""
+    async def main():
+        crawler = quiet(AsyncPhantomCrawler)
+        await quiet(crawler.initialize_async)
+        await crawler.async_client.aclose()
+        crawler.async_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        try:
+            return crawler, await coroutine_factory(crawler)
+        finally:
+            await quiet(crawler.aclose)
+
+    return asyncio.run(main())
+
+
+def html(request):
+    return httpx.Response(200, headers={'Content-Type': 'text/html'}, content=PAGE)
+
+
+def test_host_semaphores_are_evicted_when_idle(config):
+    urls = [f'http://host{i}.test/{j}' for i in range(20) for j in range(2)]
+    crawler, results = run_crawler(html, lambda crawler: crawler.acrawl_batch(urls, sink=RecordingSink()))
+
+    assert [result['url'] for result in results] == urls
+    assert all(result['success'] for result in results)
+    stats = crawler.async_stats
+    assert stats['hosts'] >= 20
+    assert stats['hosts_evicted'] == stats['hosts']
+    assert crawler._host_semaphores == {}
+
+
+def test_result_output_and_decoding_run_off_the_event_loop(config):
+    sink = RecordingSink()
+    loop_threads = []
+
+    async def crawl(crawler):
+        loop_threads.append(threading.current_thread().name)
+        return await crawler.acrawl('http://a.test/', sink=sink)
+
+    _, result = run_crawler(html, crawl)
+    assert result['success']
+    assert sink.urls == ['http://a.test/']
+    assert sink.threads[0].startswith('phantom-io')
+    assert sink.threads[0] != loop_threads[0]
+
+
+def test_large_bodies_are_spooled_through_the_executor(config, tmp_path):
+    config('response_body.spool_threshold', 1024)
+    image = os.urandom(20000)
+
+    def handler(request):
+        return httpx.Response(200, headers={'Content-Type': 'image/png'}, content=image)
+
+    _, result = run_crawler(handler, lambda crawler: crawler.acrawl('http://a.test/image.png',
+                                                                     sink=RecordingSink()))
+    with open(result['body_path'], 'rb') as f:
+        assert f.read() == image
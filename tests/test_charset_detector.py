@@ -0,0 +1,70 @@
+# PhantomCrawler - 字符集检测测试
+import httpx
+
+from src.modules.parsing.charset_detector import CharsetDetector, normalize_encoding
+
+
+def make_response(content, content_type='text/html', url='http://a.com/'):
+    return httpx.Response(200, headers={'Content-Type': content_type}, content=content,
+                          request=httpx.Request('GET', url))
+
+
+def test_normalize_encoding_uses_whatwg_supersets():
+    assert normalize_encoding('GB2312') == 'gb18030'
+    assert normalize_encoding('"iso-8859-1"') == 'cp1252'
+    assert normalize_encoding('utf8') == 'utf-8'
+    assert normalize_encoding('no-such-charset') is None
+    assert normalize_encoding(None) is None
+
+
+def test_detection_order():
+    detector = CharsetDetector()
+    text = '中文内容'
+    assert detector.detect(b'\xef\xbb\xbf' + text.encode('utf-8')) == ('utf-8-sig', 'bom')
+    assert detector.detect(text.encode('gbk'), header_charset='gbk') == ('gb18030', 'header')
+    meta = b'<meta charset="big5">' + '繁體'.encode('big5')
+    assert detector.detect(meta, host='tw.com') == ('big5hkscs', 'meta')
+    assert detector.detect(text.encode('utf-8')) == ('utf-8', 'utf8')
+
+
+def test_host_memo_is_checked_before_utf8_and_reused():
+    detector = CharsetDetector()
+    detector.detect(b'<meta charset="gbk">', host='cn.com')
+
+    # 没有声明编码的页面使用主机记忆，严格解码成功即采用
+    body = '<p>简体中文页面</p>'.encode('gbk')
+    response = make_response(body, url='http://cn.com/page')
+    assert detector.decode_response(response) == '<p>简体中文页面</p>'
+    assert response.encoding == 'gb18030'
+    assert detector.stats['host_memo'] == 1
+
+    # 纯ASCII页面在任何记忆编码下结果都相同
+    assert detector.detect(b'<p>ascii</p>', host='cn.com') == ('gb18030', 'host_memo')
+
+
+def test_memo_that_cannot_decode_falls_back_to_utf8():
+    detector = CharsetDetector()
+    detector.detect(b'<meta charset="utf-16-le">', host='a.com')
+    # 奇数长度的正文不是合法的UTF-16，继续检查UTF-8
+    assert detector.detect('é!'.encode('utf-8'), host='a.com') == ('utf-8', 'utf8')
+
+
+def test_decode_response_decodes_only_once(monkeypatch):
+    detector = CharsetDetector()
+    response = make_response('<p>héllo wörld</p>'.encode('utf-8'))
+    text = detector.decode_response(response)
+
+    # response.text使用已缓存的结果，不再经过httpx的解码器
+    def fail(*args, **kwargs):
+        raise AssertionError('正文被重复解码')
+    monkeypatch.setattr(httpx._models, 'TextDecoder', fail)
+    assert response.text is text
+    assert text == '<p>héllo wörld</p>'
+    assert detector.get_stats()['decodes'] == 1
+
+
+def test_undecodable_bytes_are_replaced():
+    detector = CharsetDetector()
+    response = make_response(b'<p>ok \xff\xfe</p>', content_type='text/html; charset=utf-8')
+    assert detector.decode_response(response) == '<p>ok ��</p>'
+    assert detector.stats['header'] == 1
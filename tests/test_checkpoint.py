@@ -0,0 +1,228 @@
+# PhantomCrawler - 爬取检查点测试
+import httpx
+
+from src.modules.frontier.checkpoint import CrawlCheckpoint
+from src.modules.frontier.frontier import CrawlFrontier
+from src.modules.frontier.visited_store import FingerprintVisitedStore
+from tests.helpers import read_jsonl
+
+
+def open_state(state_dir):
+    """打开检查点和与其共享连接的爬取边界"""
+    checkpoint = CrawlCheckpoint(str(state_dir), interval_pages=10, interval_seconds=60)
+    frontier = CrawlFrontier(max_in_memory=3, refill_batch=2, connection=checkpoint.connection)
+    return checkpoint, frontier
+
+
+def test_fresh_state_dir_has_no_checkpoint(tmp_path):
+    checkpoint = CrawlCheckpoint(str(tmp_path))
+    assert not checkpoint.has_state()
+    assert checkpoint.status() is None
+    assert checkpoint.saved_params() == {}
+    checkpoint.close()
+
+
+def test_resume_restores_frontier_visited_and_in_flight_url(tmp_path):
+    checkpoint, frontier = open_state(tmp_path)
+    checkpoint.params = {'start_url': 'http://a.com/', 'max_depth': 2}
+    for i in range(8):
+        frontier.push(f'http://a.com/{i}', 1)
+
+    url, depth = frontier.pop()
+    checkpoint.begin(url, depth)
+    checkpoint.record_page(url, True)
+    in_flight = frontier.pop()
+    checkpoint.begin(*in_flight)
+    checkpoint.save(frontier, status='interrupted')
+    # 保存之后的修改未提交，不应出现在恢复结果中
+    frontier.push('http://a.com/unsaved', 1)
+    checkpoint.close()
+
+    checkpoint, frontier = open_state(tmp_path)
+    visited = FingerprintVisitedStore()
+    assert checkpoint.has_state()
+    assert checkpoint.status() == 'interrupted'
+    assert checkpoint.saved_params() == {'start_url': 'http://a.com/', 'max_depth': 2}
+
+    assert checkpoint.restore(frontier, visited) == 1
+    assert url in visited
+    assert checkpoint.counters == {'total': 1, 'success': 1, 'failed': 0}
+
+    remaining = []
+    while len(frontier):
+        remaining.append(frontier.pop()[0])
+    assert in_flight[0] in remaining
+    assert sorted(remaining) == sorted(f'http://a.com/{i}' for i in range(1, 8))
+    checkpoint.close()
+
+
+def test_reset_discards_saved_state(tmp_path):
+    checkpoint, frontier = open_state(tmp_path)
+    frontier.push('http://a.com/', 0)
+    checkpoint.record_page('http://a.com/done', False)
+    checkpoint.save(frontier)
+    checkpoint.reset()
+    checkpoint.close()
+
+    checkpoint, frontier = open_state(tmp_path)
+    assert not checkpoint.has_state()
+    assert checkpoint.restore(frontier, FingerprintVisitedStore()) == 0
+    assert len(frontier) == 0
+    checkpoint.close()
+
+
+def _checkpointed_output(tmp_path, make_sink, read):
+    """检查点之后写出的结果在恢复时被截断"""
+    checkpoint, frontier = open_state(tmp_path / 'state')
+    checkpoint.sink = sink = make_sink()
+    for i in range(5):
+        sink.write({'url': f'http://a.com/{i}'})
+        checkpoint.record_page(f'http://a.com/{i}', True)
+    checkpoint.save(frontier, status='running')
+    # 检查点之后写出、尚未记录的结果
+    for i in range(5, 8):
+        sink.write({'url': f'http://a.com/{i}'})
+    sink.close()
+    checkpoint.close()
+
+    checkpoint, frontier = open_state(tmp_path / 'state')
+    checkpoint.sink = sink = make_sink()
+    assert checkpoint.restore(frontier, FingerprintVisitedStore()) == 5
+    sink.write({'url': 'http://a.com/5'})
+    sink.close()
+    checkpoint.close()
+    assert read(sink) == [f'http://a.com/{i}' for i in range(6)]
+
+
+def test_jsonl_output_is_truncated_to_checkpoint(tmp_path):
+    from src.modules.storage.result_sink import JsonlSink
+
+    for compression in (None, 'gzip', 'zstd'):
+        directory = tmp_path / str(compression)
+        _checkpointed_output(directory, lambda: JsonlSink(str(directory / 'out.jsonl'), compression=compression,
+                                                          max_bytes=0, batch_size=2), read_jsonl)
+
+
+def test_rotated_jsonl_files_after_checkpoint_are_removed(tmp_path):
+    from src.modules.storage.result_sink import JsonlSink
+
+    # 每个文件只容纳一行，检查点之后轮转出的文件在恢复时删除
+    _checkpointed_output(tmp_path, lambda: JsonlSink(str(tmp_path / 'out.jsonl'), max_bytes=10),
+                         read_jsonl)
+    assert not (tmp_path / 'out-00006.jsonl').exists()
+
+
+def test_sqlite_output_is_truncated_to_checkpoint(tmp_path):
+    import sqlite3
+    from src.modules.storage.result_sink import SQLiteSink
+
+    def read(sink):
+        with sqlite3.connect(sink.path) as conn:
+            return [url for (url,) in conn.execute('SELECT url FROM crawl_results ORDER BY id')]
+
+    _checkpointed_output(tmp_path, lambda: SQLiteSink(str(tmp_path / 'out.db')), read)
+
+
+def test_parquet_output_is_truncated_to_checkpoint(tmp_path):
+    import pyarrow.parquet
+    from src.modules.storage.result_sink import ParquetSink
+
+    def read(sink):
+        return pyarrow.parquet.read_table(sink.path).column('url').to_pylist()
+
+    _checkpointed_output(tmp_path, lambda: ParquetSink(str(tmp_path / 'out.parquet'), batch_size=2), read)
+    assert not (tmp_path / 'out.parquet.resume').exists()
+
+
+def test_host_stats_are_saved_incrementally(tmp_path):
+    checkpoint, frontier = open_state(tmp_path)
+    checkpoint.record_page('http://a.com/1', True)
+    checkpoint.record_page('http://a.com/2', False)
+    checkpoint.save(frontier)
+    checkpoint.record_page('http://A.com/3', True)
+    checkpoint.record_page('http://b.com/1', True)
+    assert checkpoint.host_stats('a.com')['fetched'] == 3
+    checkpoint.save(frontier)
+
+    rows = dict((host, (fetched, failed)) for host, fetched, failed in
+                checkpoint.connection.execute('SELECT host, fetched, failed FROM crawl_hosts'))
+    assert rows == {'a.com': (3, 1), 'b.com': (1, 0)}
+    # 主机统计不再整体写入元数据
+    assert checkpoint.connection.execute("SELECT 1 FROM crawl_meta WHERE key = 'hosts'").fetchone() is None
+    checkpoint.close()
+
+
+def test_legacy_host_meta_is_migrated(tmp_path):
+    import json
+
+    checkpoint, frontier = open_state(tmp_path)
+    checkpoint.save(frontier)
+    checkpoint.connection.execute(
+        "INSERT INTO crawl_meta (key, value) VALUES ('hosts', ?)",
+        (json.dumps({'old.com': {'fetched': 4, 'failed': 1, 'last_fetch': 1.0}}),)
+    )
+    checkpoint.connection.commit()
+    checkpoint.close()
+
+    checkpoint, frontier = open_state(tmp_path)
+    checkpoint.restore(frontier)
+    checkpoint.save(frontier)
+    assert checkpoint.host_stats('old.com') == {'fetched': 4, 'failed': 1, 'last_fetch': 1.0}
+    assert checkpoint.connection.execute("SELECT 1 FROM crawl_meta WHERE key = 'hosts'").fetchone() is None
+    checkpoint.close()
+
+
+def test_iter_crawl_resume_does_not_duplicate_yielded_pages(tmp_path, make_crawler):
+    from src.modules.storage.result_sink import JsonlSink
+    from tests.helpers import PAGE, quiet
+
+    links = b''.join(b'<a href="/p%d">p</a>' % i for i in range(8))
+    page = PAGE.replace(b'</body>', links + b'</body>')
+
+    def handler(request):
+        return httpx.Response(200, headers={'Content-Type': 'text/html'}, content=page)
+
+    state_dir = str(tmp_path / 'state')
+    sink = JsonlSink(str(tmp_path / 'out.jsonl'), max_bytes=0)
+    crawler = make_crawler(handler)
+    crawl = crawler.iter_crawl('http://site.test/', max_depth=1, state_dir=state_dir, sink=sink)
+    first = [quiet(next, crawl)['url'] for _ in range(4)]
+    quiet(crawl.close)
+    sink.close()
+
+    sink = JsonlSink(str(tmp_path / 'out.jsonl'), max_bytes=0)
+    crawler = make_crawler(handler)
+    rest = [result['url'] for result in quiet(list, crawler.iter_crawl('http://site.test/', max_depth=1,
+                                                                       state_dir=state_dir, resume=True,
+                                                                       sink=sink))]
+    sink.close()
+
+    expected = {'http://site.test/'} | {f'http://site.test/p{i}' for i in range(8)}
+    assert not set(first) & set(rest)
+    assert set(first) | set(rest) == expected
+    assert sorted(read_jsonl(sink)) == sorted(expected)
+
+
+def test_summary_reports_deepest_crawled_page_after_frontier_drains(tmp_path, make_crawler):
+    from tests.helpers import PAGE, quiet
+
+    def handler(request):
+        # 每个页面链接到下一层
+        level = int(request.url.path.strip('/') or 0)
+        link = b'<a href="/%d">next</a>' % (level + 1)
+        return httpx.Response(200, headers={'Content-Type': 'text/html'},
+                              content=PAGE.replace(b'</body>', link + b'</body>'))
+
+    state_dir = str(tmp_path / 'state')
+    summary = {}
+    crawler = make_crawler(handler)
+    quiet(list, crawler.iter_crawl('http://site.test/', max_depth=3, summary=summary, state_dir=state_dir))
+    assert summary['total_urls'] == 4
+    assert summary['frontier']['in_memory'] == 0
+    assert summary['max_depth_reached'] == 3
+
+    # 恢复后的爬取继承已记录的最大深度
+    checkpoint = CrawlCheckpoint(state_dir)
+    checkpoint.restore()
+    assert checkpoint.counters['max_depth'] == 3
+    checkpoint.close()
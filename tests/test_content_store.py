@@ -0,0 +1,97 @@
+# PhantomCrawler - 内容寻址存储测试
+import os
+
+import pytest
+
+from src.modules.storage.content_store import ContentStore, HAS_ZSTD
+
+
+def test_released_bodies_are_reclaimed(tmp_path):
+    store = ContentStore(str(tmp_path), segment_max_bytes=4096, codec='zlib')
+    digests = [store.put(os.urandom(1500)) for _ in range(12)]
+    shared = store.put(b'shared body')
+    store.put(b'shared body')
+
+    for digest in digests[:10]:
+        assert store.release(digest)
+    # 还有一个引用，不删除
+    assert not store.release(shared)
+    assert shared in store
+
+    reclaimed = store.collect_garbage()
+    assert reclaimed > 0
+    assert all(digest not in store for digest in digests[:10])
+    assert all(store.get(digest) is not None for digest in digests[10:])
+    assert store.get(shared) == b'shared body'
+    store.close()
+
+    reopened = ContentStore(str(tmp_path), codec='zlib')
+    assert reopened.get(shared) == b'shared body'
+    assert all(reopened.get(digest) is not None for digest in digests[10:])
+    reopened.close()
+
+
+def test_identical_bodies_are_stored_once_and_survive_reopen(tmp_path):
+    store = ContentStore(str(tmp_path), segment_max_bytes=1024, codec='zlib', commit_interval=2)
+    page = '<html><body>' + '页面正文 ' * 200 + '</body></html>'
+    first = store.put(page)
+    assert store.put(page.encode('utf-8')) == first
+    others = [store.put(os.urandom(800)) for _ in range(4)]
+
+    stats = store.get_stats()
+    assert stats['stored'] == 5
+    assert stats['duplicates'] == 1
+    assert stats['segments'] > 1
+    assert store.get_text(first) == page
+    assert b''.join(store.iter_chunks(first, chunk_size=64)) == page.encode('utf-8')
+    assert store.get('0' * 64) is None
+    store.close()
+
+    reopened = ContentStore(str(tmp_path), codec='zlib')
+    assert reopened.get_text(first) == page
+    assert all(reopened.get(digest) is not None for digest in others)
+    # 重新打开后仍然去重，并续写最后一个段文件
+    reopened.put(page)
+    assert reopened.stats['duplicates'] == 1
+    assert reopened.get_stats()['segments'] == stats['segments']
+    reopened.close()
+
+
+def _templated_page(host, i):
+    """同一站点共享模板、正文不同的页面"""
+    header = f'<html><head><title>{host}</title><link rel="stylesheet" href="/static/site.css"></head>'
+    nav = ''.join(f'<li><a href="/section/{n}">栏目 {n}</a></li>' for n in range(30))
+    body = f'<p>第{i}篇文章 ' + os.urandom(40).hex() + '</p>'
+    return f'{header}<body><ul class="nav">{nav}</ul>{body}<footer>© {host}</footer></body></html>'
+
+
+@pytest.mark.skipif(not HAS_ZSTD, reason='需要zstandard')
+def test_host_dictionaries_are_trained_and_survive_reopen(tmp_path):
+    store = ContentStore(str(tmp_path), codec='zstd', host_dictionaries=True,
+                         dict_training_samples=20, dict_size=4096)
+    texts = [_templated_page('a.com', i) for i in range(30)]
+    pages = {store.put(text, host='a.com'): text for text in texts}
+    # 样本数不足的主机不训练字典
+    other = store.put(_templated_page('b.com', 0), host='b.com')
+
+    stats = store.get_stats()
+    assert stats['dictionaries_trained'] == 1
+    assert stats['host_dictionaries'] == 1
+    assert stats['dict_compressed'] == 10
+    for digest, text in pages.items():
+        assert store.get_text(digest) == text
+    # 最后一个正文使用字典压缩
+    dict_digest = list(pages)[-1]
+    expected = pages[dict_digest].encode('utf-8')
+    assert b''.join(store.iter_chunks(dict_digest, chunk_size=128)) == expected
+    store.close()
+
+    reopened = ContentStore(str(tmp_path), codec='zstd', host_dictionaries=True,
+                           dict_training_samples=20, dict_size=4096)
+    assert reopened.get(dict_digest) == expected
+    assert reopened.get(other) is not None
+    # 重新打开后继续使用已训练的字典
+    reopened.put(_templated_page('a.com', 99), host='a.com')
+    assert reopened.stats['dict_compressed'] == 1
+    assert reopened.stats['dictionaries_trained'] == 0
+    reopened.close()
@@ -0,0 +1,67 @@
+# PhantomCrawler - 爬取结果测试
+import json
+
+import httpx
+import pytest
+
+from src.core.crawl_result import CrawlResult
+
+
+def make_result(textual=True, **fields):
+    request = httpx.Request('GET', 'http://a.com/page')
+    response = httpx.Response(
+        200, request=request, content='<p>正文</p>'.encode('utf-8'),
+        headers={'Content-Type': 'text/html; charset=utf-8', 'Set-Cookie': 'sid=1; Path=/'}
+    )
+    return CrawlResult('http://a.com/page', response, textual=textual, **fields)
+
+
+def test_lazy_fields_are_decoded_on_first_access():
+    result = make_result(response_time=0.5)
+
+    assert result._pending == ['content', 'headers', 'cookies']
+    assert list(result) == ['url', 'status_code', 'response_time', 'content', 'headers', 'cookies']
+    assert len(result) == 6
+    assert 'content' in result
+    assert result.content_length == len('<p>正文</p>'.encode('utf-8'))
+
+    assert result['content'] == '<p>正文</p>'
+    assert result._pending == ['headers', 'cookies']
+    assert result.get('headers')['content-type'] == 'text/html; charset=utf-8'
+    assert result['cookies'] == {'sid': '1'}
+    assert result._pending == []
+
+
+def test_missing_keys_behave_like_a_dict():
+    result = make_result()
+
+    with pytest.raises(KeyError):
+        result['missing']
+    assert result.get('missing', 'default') == 'default'
+    assert 'missing' not in result
+
+
+def test_overwriting_or_deleting_lazy_fields_skips_decoding():
+    result = make_result(textual=False)
+
+    del result['cookies']
+    result['headers'] = {'x': '1'}
+    result.update({'content_hash': 'abc', 'blocked': False})
+
+    assert 'cookies' not in result
+    assert result['headers'] == {'x': '1'}
+    assert result._pending == ['content']
+    # 非文本正文不解码
+    assert result['content'] == ''
+    assert result['content_hash'] == 'abc'
+
+
+def test_dict_conversion_is_json_serializable():
+    result = make_result(blocked=False)
+
+    converted = result.to_dict()
+    assert converted == dict(result)
+    assert converted['url'] == 'http://a.com/page'
+    assert converted['status_code'] == 200
+    assert converted['content'] == '<p>正文</p>'
+    assert json.loads(json.dumps(converted, ensure_ascii=False)) == converted
@@ -0,0 +1,107 @@
+# PhantomCrawler - 欲望记忆存储测试
+from src.modules.intelligence.desire_store import (
+    DEFEAT, PROFILE, STATE, TRIUMPH, DesireMemoryStore, LazyProfileMap, dumps
+)
+
+
+def open_store(tmp_path, **kwargs):
+    kwargs.setdefault('compact_every', 1000)
+    kwargs.setdefault('history_span', 5)
+    return DesireMemoryStore(str(tmp_path / 'desires.db'), **kwargs)
+
+
+def test_new_store_is_empty(tmp_path):
+    store = open_store(tmp_path)
+    assert store.is_empty()
+    assert store.load() == {'state': None, 'triumph_history': [], 'defeat_history': [], 'profiles': {}}
+    store.close()
+
+
+def test_log_is_compacted_and_history_trimmed(tmp_path):
+    store = open_store(tmp_path, compact_every=10)
+    store.append([(TRIUMPH, None, dumps({'n': i})) for i in range(8)])
+    assert store.get_stats()['log_size'] == 8
+
+    store.append([(DEFEAT, None, dumps({'n': 100})), (STATE, None, dumps({'level': 1})),
+                  (PROFILE, 'a.com', dumps({'visits': 1}))])
+
+    stats = store.get_stats()
+    assert stats['compactions'] == 1
+    assert stats['log_size'] == 0
+    memories = store.load()
+    assert [record['n'] for record in memories['triumph_history']] == [3, 4, 5, 6, 7]
+    assert memories['defeat_history'] == [{'n': 100}]
+    assert memories['state'] == {'level': 1}
+    assert store.get_profile('a.com') == {'visits': 1}
+    store.close()
+
+
+def test_latest_profile_and_state_win_across_log_and_snapshot(tmp_path):
+    store = open_store(tmp_path)
+    store.append([(PROFILE, 'a.com', dumps({'visits': 1})), (STATE, None, dumps({'level': 1}))])
+    store.compact()
+    store.append([(PROFILE, 'a.com', dumps({'visits': 2})), (PROFILE, 'b.com', dumps({'visits': 1})),
+                  (STATE, None, dumps({'level': 2}))])
+
+    # 日志中的版本优先于快照
+    assert store.get_profile('a.com') == {'visits': 2}
+    assert dict(store.iter_profiles()) == {'a.com': {'visits': 2}, 'b.com': {'visits': 1}}
+    assert store.profile_count() == 2
+    store.close()
+
+    # 重新打开时合并日志尾部
+    store = open_store(tmp_path)
+    assert store.get_stats()['log_size'] == 3
+    assert store.load()['state'] == {'level': 2}
+    assert store.get_stats()['log_size'] == 0
+    assert store.get_profile('a.com') == {'visits': 2}
+    assert store.profile_count() == 2
+    store.close()
+
+
+def test_legacy_memories_import(tmp_path):
+    legacy = {
+        'dominant_desire': '贪婪',
+        'desire_levels': {'贪婪': 0.8},
+        'ignored': 'not a state key',
+        'triumph_history': [{'n': i} for i in range(7)],
+        'defeat_history': [{'n': -1}],
+        'target_profiles': {'a.com': {'visits': 3}, 'b.com': {'visits': 4}}
+    }
+    store = open_store(tmp_path)
+    store.import_memories(legacy, ['dominant_desire', 'desire_levels'])
+
+    assert not store.is_empty()
+    assert store.get_stats()['log_size'] == 0
+    memories = store.load()
+    assert memories['state'] == {'dominant_desire': '贪婪', 'desire_levels': {'贪婪': 0.8}}
+    assert [record['n'] for record in memories['triumph_history']] == [2, 3, 4, 5, 6]
+    assert memories['defeat_history'] == [{'n': -1}]
+    assert dict(store.iter_profiles()) == legacy['target_profiles']
+    store.close()
+
+
+def test_lazy_profile_map_loads_on_demand_and_caches_misses():
+    stored = {'a.com': {'visits': 1}, 'b.com': {'visits': 2}}
+    lookups = []
+
+    def loader(host):
+        lookups.append(host)
+        return stored.get(host)
+
+    profiles = LazyProfileMap(loader, lambda: stored.items())
+    assert profiles['a.com'] == {'visits': 1}
+    assert 'a.com' in profiles
+    assert lookups == ['a.com']
+
+    # 未命中只查询一次
+    assert profiles.get('new.com') is None
+    assert 'new.com' not in profiles
+    assert lookups == ['a.com', 'new.com']
+
+    # 写入后不再视为未命中
+    profiles.setdefault('new.com', {'visits': 0})['visits'] += 1
+    assert profiles['new.com'] == {'visits': 1}
+
+    assert len(profiles) == 3
+    assert set(profiles) == {'a.com', 'b.com', 'new.com'}
@@ -0,0 +1,112 @@
+# PhantomCrawler - 爬取边界测试
+from src.modules.frontier.frontier import CrawlFrontier
+
+
+def drain(frontier, wait_time=None):
+    """依次取出边界中的全部URL"""
+    popped = []
+    while True:
+        item = frontier.pop(wait_time)
+        if item is None:
+            return popped
+        popped.append(item)
+
+
+def test_pops_shallowest_depth_first_and_rotates_hosts():
+    frontier = CrawlFrontier(max_in_memory=100)
+    frontier.push('http://a.com/2', 1)
+    frontier.push('http://a.com/0', 0)
+    frontier.push('http://a.com/1', 0)
+    frontier.push('http://b.com/0', 0)
+
+    popped = drain(frontier)
+
+    assert [depth for _, depth in popped] == [0, 0, 0, 1]
+    # 同一深度内按主机轮询
+    assert [url for url, _ in popped[:3]] == ['http://a.com/0', 'http://b.com/0', 'http://a.com/1']
+    assert len(frontier) == 0
+
+
+def test_priority_orders_urls_within_a_host():
+    frontier = CrawlFrontier(max_in_memory=100)
+    frontier.push('http://a.com/low', 0, priority=1)
+    frontier.push('http://a.com/high', 0, priority=5)
+
+    assert drain(frontier) == [('http://a.com/high', 0), ('http://a.com/low', 0)]
+
+
+def test_duplicates_are_rejected_in_memory_and_on_disk():
+    frontier = CrawlFrontier(max_in_memory=1)
+    assert frontier.push('http://a.com/1', 0)
+    assert frontier.push('http://a.com/2', 0)  # 溢出到磁盘
+    assert not frontier.push('http://a.com/1', 0)
+    assert not frontier.push('http://a.com/2', 0)
+    assert frontier.stats['duplicates'] == 2
+    frontier.close()
+
+
+def test_spill_and_refill_keep_every_url_and_depth_order():
+    frontier = CrawlFrontier(max_in_memory=5, refill_batch=3)
+    urls = {f'http://h{i % 7}.com/{i}': i % 3 for i in range(60)}
+    for url, depth in urls.items():
+        frontier.push(url, depth)
+    assert frontier.get_stats()['on_disk'] == 55
+
+    popped = drain(frontier)
+
+    assert dict(popped) == urls
+    depths = [depth for _, depth in popped]
+    assert depths == sorted(depths)
+    assert frontier.stats['refilled'] == 55
+    frontier.close()
+
+
+def test_explicit_zero_window_spills_everything():
+    frontier = CrawlFrontier(max_in_memory=0, refill_batch=0)
+    for i in range(10):
+        frontier.push(f'http://a.com/{i}', 0)
+    assert frontier.get_stats()['in_memory'] == 0
+    assert frontier.get_stats()['on_disk'] == 10
+
+    assert len(drain(frontier)) == 10
+    frontier.close()
+
+
+def test_wait_time_prefers_ready_hosts_and_keeps_all_urls():
+    frontier = CrawlFrontier(max_in_memory=100)
+    for i in range(4):
+        frontier.push(f'http://cold.com/{i}', 0)
+        frontier.push(f'http://warm.com/{i}', 0)
+    cooling = {'cold.com': 5.0, 'warm.com': 0.0}
+
+    first = frontier.pop(lambda host: cooling[host])
+    assert first == ('http://warm.com/0', 0)
+
+    # 所有主机都在冷却时取最早就绪的主机，被跳过的主机仍留在轮询环中
+    cooling['warm.com'] = 10.0
+    assert frontier.pop(lambda host: cooling[host]) == ('http://cold.com/0', 0)
+    assert frontier.get_stats()['hosts_in_memory'] == 2
+
+    rest = drain(frontier, lambda host: cooling[host])
+    assert len(rest) == 6
+    assert sorted(url for url, _ in rest) == sorted(
+        [f'http://cold.com/{i}' for i in range(1, 4)] + [f'http://warm.com/{i}' for i in range(1, 4)]
+    )
+
+
+def test_refill_never_exceeds_the_memory_window():
+    frontier = CrawlFrontier(max_in_memory=3, refill_batch=2)
+    for i in range(3):
+        frontier.push(f'http://deep.com/{i}', 2)
+    # 窗口已满，更浅的URL溢出到磁盘
+    for i in range(5):
+        frontier.push(f'http://shallow.com/{i}', 0)
+
+    popped = []
+    while len(frontier):
+        popped.append(frontier.pop())
+        assert frontier.get_stats()['in_memory'] <= 3
+    assert len(popped) == 8
+    # 腾出空间后磁盘上更浅的URL先于窗口中剩余的深层URL出队
+    assert [depth for _, depth in popped[1:6]] == [0] * 5
+    frontier.close()
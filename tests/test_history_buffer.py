@@ -0,0 +1,78 @@
+# PhantomCrawler - 紧凑历史记录测试
+import math
+
+import pytest
+
+from src.modules.intelligence.history_buffer import (
+    OUTCOME_BLOCKED, OUTCOME_CAPTCHA, OUTCOME_OK, OUTCOME_TIMEOUT, HistoryBuffer, classify_outcome
+)
+
+
+def fill(buffer, count, hosts=1):
+    for i in range(count):
+        buffer.append(float(i), f'host{i % hosts}.com', 200, 0.1, OUTCOME_OK, '贪婪')
+
+
+def test_wraparound_keeps_the_newest_records_in_order():
+    buffer = HistoryBuffer(capacity=5)
+    fill(buffer, 12)
+
+    assert len(buffer) == 5
+    assert buffer.total == 12
+    assert [record.timestamp for record in buffer.records()] == [7.0, 8.0, 9.0, 10.0, 11.0]
+    assert [record.timestamp for record in buffer.records(2)] == [10.0, 11.0]
+    assert buffer[0].timestamp == 7.0
+    assert buffer[-1].timestamp == 11.0
+    assert [record.timestamp for record in buffer[1:3]] == [8.0, 9.0]
+    assert buffer.timestamp_at(0) == 7.0
+    assert buffer.timestamp_at(-1) == 11.0
+    with pytest.raises(IndexError):
+        buffer.timestamp_at(5)
+
+
+def test_records_decode_fields():
+    buffer = HistoryBuffer(capacity=4)
+    buffer.append(1.0, 'a.com', 403, None, OUTCOME_BLOCKED, '色欲')
+    buffer.append(2.0, 'b.com', 200, 0.5, OUTCOME_OK, '不存在的欲望')
+
+    blocked, ok = buffer.records()
+    assert (blocked.host, blocked.status, blocked.outcome, blocked.desire) == ('a.com', 403, OUTCOME_BLOCKED, '色欲')
+    assert math.isnan(blocked.latency)
+    assert ok.desire is None
+    assert ok.latency == pytest.approx(0.5)
+
+
+def test_since_and_count_since():
+    buffer = HistoryBuffer(capacity=4)
+    fill(buffer, 3)
+    seen = buffer.total
+    fill(buffer, 2)
+
+    assert [record.timestamp for record in buffer.since(seen)] == [0.0, 1.0]
+    assert buffer.since(buffer.total) == []
+    assert buffer.count_since(1.0) == 3
+
+
+def test_host_table_is_bounded_by_capacity():
+    buffer = HistoryBuffer(capacity=100)
+    fill(buffer, 1000, hosts=1000)
+
+    live_hosts = [host for host in buffer._hosts if host is not None]
+    assert len(buffer._hosts) <= 100
+    assert len(buffer._host_ids) == len(live_hosts) == 100
+    assert {record.host for record in buffer.records()} == set(live_hosts)
+
+
+def test_legacy_dict_records_are_classified():
+    buffer = HistoryBuffer(capacity=4)
+    buffer.add({'timestamp': 1.0, 'url': 'http://a.com/x', 'reason': 'Request timed out'}, failed=True)
+    buffer.add({'time': 2.0, 'target': 'b.com', 'result': {'status_code': 200, 'response_time': 0.2}})
+
+    failed, ok = buffer.records()
+    assert (failed.host, failed.outcome) == ('a.com', OUTCOME_TIMEOUT)
+    assert (ok.host, ok.status, ok.outcome) == ('b.com', 200, OUTCOME_OK)
+
+
+def test_classify_outcome():
+    assert classify_outcome('CAPTCHA detected') == OUTCOME_CAPTCHA
+    assert classify_outcome(None, 403) == OUTCOME_BLOCKED
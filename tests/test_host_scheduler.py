@@ -0,0 +1,67 @@
+# PhantomCrawler - 主机礼貌调度测试
+from src.modules.frontier.host_scheduler import HostScheduler
+
+
+class FakeClock:
+    """可手动推进的时钟，sleep直接推进时间"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+def make_scheduler(clock, **kwargs):
+    return HostScheduler(delay_min=1.0, delay_max=1.0, burst=1, clock=clock, sleep=clock.sleep, **kwargs)
+
+
+def test_release_delays_the_same_host_only():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock)
+    scheduler.acquire('a.com')
+    scheduler.release('a.com')
+
+    assert scheduler.wait_time('a.com') == 1.0
+    assert scheduler.wait_time('b.com') == 0.0
+
+
+def test_iter_ready_interleaves_hosts_instead_of_waiting():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock)
+    urls = ['http://a.com/1', 'http://a.com/2', 'http://b.com/1', 'http://b.com/2']
+
+    order = []
+    for url in scheduler.iter_ready(urls):
+        host = scheduler.host_of(url)
+        scheduler.acquire(host)
+        order.append(url)
+        scheduler.release(host)
+
+    assert order == ['http://a.com/1', 'http://b.com/1', 'http://a.com/2', 'http://b.com/2']
+    # 两个主机交替爬取，只在第二轮前等待一次
+    assert scheduler.stats['idle_waits'] == 1
+    assert clock.now == 1.0
+
+
+def test_idle_hosts_are_evicted_but_crawl_delay_survives():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock)
+    scheduler.set_crawl_delay('slow.com', 30.0)
+    for i in range(2048):
+        host = f'host{i}.com'
+        scheduler.acquire(host)
+        scheduler.release(host)
+        clock.now += 0.01
+
+    stats = scheduler.get_stats()
+    assert stats['evicted'] > 0
+    assert stats['hosts'] < 2048
+    assert 'slow.com' not in scheduler._hosts
+
+    scheduler.acquire('slow.com')
+    scheduler.release('slow.com', delay=0.0)
+    assert scheduler.wait_time('slow.com') == 30.0
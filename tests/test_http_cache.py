@@ -0,0 +1,109 @@
+# PhantomCrawler - HTTP重新验证缓存测试
+import time
+
+import httpx
+
+from src.modules.storage.http_cache import HttpCache
+from tests.helpers import PAGE, quiet
+
+HEADERS = {'Content-Type': 'text/html', 'ETag': '"v1"'}
+
+
+def test_conditional_headers_and_lookup(tmp_path):
+    cache = HttpCache(str(tmp_path))
+    assert cache.conditional_headers('http://a.com/x') == {}
+
+    assert cache.store('http://a.com/x', 200, {'ETag': '"v1"', 'Last-Modified': 'Mon, 01 Jan 2024 00:00:00 GMT',
+                                               'Set-Cookie': 'a=b'}, b'body')
+    assert cache.conditional_headers('http://a.com/x') == {
+        'If-None-Match': '"v1"', 'If-Modified-Since': 'Mon, 01 Jan 2024 00:00:00 GMT'
+    }
+    # 只有真正收到304时才计为重新验证
+    assert cache.get_stats()['revalidations'] == 0
+
+    cached = cache.lookup('http://a.com/x')
+    assert cached['content'] == b'body'
+    assert 'set-cookie' not in cached['headers']
+    assert cache.get_stats()['revalidations'] == 1
+    cache.close()
+
+
+def test_uncacheable_responses_are_skipped(tmp_path):
+    cache = HttpCache(str(tmp_path))
+    assert not cache.store('http://a.com/1', 200, {}, b'no validator')
+    assert not cache.store('http://a.com/2', 200, {'ETag': '"x"', 'Cache-Control': 'no-store'}, b'x')
+    assert not cache.store('http://a.com/3', 404, {'ETag': '"x"'}, b'x')
+    assert cache.get_stats()['entries'] == 0
+    cache.close()
+
+
+def test_replaced_bodies_are_released(tmp_path):
+    cache = HttpCache(str(tmp_path))
+    cache.store('http://a.com/x', 200, {'ETag': '"v1"'}, b'first version')
+    first = cache._conn.execute('SELECT body_hash FROM http_cache').fetchone()[0]
+    cache.store('http://a.com/x', 200, {'ETag': '"v2"'}, b'second version', revalidated=True)
+
+    assert first not in cache.bodies
+    assert cache.lookup('http://a.com/x')['content'] == b'second version'
+    # 内容未变时重新写入不会删除正文
+    cache.store('http://a.com/x', 200, {'ETag': '"v2"'}, b'second version')
+    assert cache.lookup('http://a.com/x')['content'] == b'second version'
+    cache.close()
+
+
+def test_entries_are_bounded_and_committed_in_batches(tmp_path):
+    cache = HttpCache(str(tmp_path), max_entries=10, commit_interval=5)
+    for i in range(40):
+        cache.store(f'http://a.com/{i}', 200, {'ETag': f'"{i}"'}, f'body {i}'.encode())
+    stats = cache.get_stats()
+    assert stats['entries'] <= 10 + cache.commit_interval
+    assert stats['evicted'] >= 25
+    # 最近写入的条目保留，最早的被淘汰
+    assert cache.lookup('http://a.com/39') is not None
+    assert cache.lookup('http://a.com/0') is None
+    cache.close()
+
+    reopened = HttpCache(str(tmp_path), max_entries=10)
+    assert reopened.lookup('http://a.com/39')['content'] == b'body 39'
+    reopened.close()
+
+
+def test_expired_entries_are_evicted_on_open(tmp_path):
+    cache = HttpCache(str(tmp_path))
+    cache.store('http://a.com/x', 200, {'ETag': '"v1"'}, b'old')
+    cache._conn.execute('UPDATE http_cache SET validated_at = ?', (time.time() - 100,))
+    cache.close()
+
+    reopened = HttpCache(str(tmp_path), max_age=10)
+    assert reopened.get_stats()['entries'] == 0
+    reopened.close()
+
+
+def test_304_without_cached_body_refetches_unconditionally(make_crawler, tmp_path):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        if 'if-none-match' in request.headers:
+            return httpx.Response(304)
+        return httpx.Response(200, content=PAGE, headers=HEADERS)
+
+    crawler = make_crawler(handler)
+    crawler.set_http_cache(HttpCache(str(tmp_path / 'cache')))
+
+    assert quiet(crawler.crawl, 'http://a.com/x')['status_code'] == 200
+    assert quiet(crawler.crawl, 'http://a.com/x').get('not_modified')
+
+    # 正文丢失后，304被当作未命中：删除条目并不带验证器重新请求
+    body_hash = crawler.http_cache._conn.execute('SELECT body_hash FROM http_cache').fetchone()[0]
+    crawler.http_cache.bodies.release(body_hash)
+    result = quiet(crawler.crawl, 'http://a.com/x')
+
+    assert result['status_code'] == 200
+    assert result['content']
+    assert not result.get('not_modified')
+    assert 'if-none-match' in requests[2].headers
+    assert 'if-none-match' not in requests[3].headers
+    stats = crawler.http_cache.get_stats()
+    assert stats['invalidated'] == 1
+    assert stats['revalidations'] == 1
@@ -0,0 +1,33 @@
+# PhantomCrawler - 增量洞察视图测试
+from src.modules.intelligence.insight_view import InsightView
+
+
+def test_sections_recompute_only_when_their_key_changes():
+    view = InsightView()
+    calls = []
+
+    def compute(value):
+        def build():
+            calls.append(value)
+            return {'value': value}
+        return build
+
+    first = view.get('a', (1,), compute(1))
+    assert view.get('a', (1,), compute(2)) is first
+    assert view.get('b', (1,), compute(3)) == {'value': 3}
+    assert view.get('a', (2,), compute(4)) == {'value': 4}
+    assert calls == [1, 3, 4]
+    assert view.stats == {'hits': 1, 'misses': 3}
+
+
+def test_invalidate_marks_sections_dirty():
+    view = InsightView()
+    view.get('a', (), lambda: 1)
+    view.get('b', (), lambda: 2)
+
+    view.invalidate('a')
+    assert view.get('a', (), lambda: 10) == 10
+    assert view.get('b', (), lambda: 20) == 2
+
+    view.invalidate()
+    assert view.get('b', (), lambda: 20) == 20
@@ -0,0 +1,72 @@
+# PhantomCrawler - 链接提取测试
+from src.modules.parsing.link_extractor import LinkExtractor, LinkTokenizer, tokenize_document
+
+DOCUMENT = (
+    b'<html><head><link rel="stylesheet" href="/site.css"><link rel="next" href="/page/2">'
+    b'<style>a[href="/style-link"] { color: red }</style></head><body>'
+    b'<!-- <a href="/commented">hidden</a> -->'
+    b'<script>document.write(\'<a href="/scripted">x</a>\');</script>'
+    b'<div><a class=x href=/unquoted>u</a><A HREF=\'/single?a=1&amp;b=2\'>s</A>'
+    b'<area shape="rect" href="../up/./file.html"><a href="mailto:me@a.com">m</a>'
+    b'<a href="javascript:void(0)">j</a><a href="//cdn.a.com/x#frag">c</a>'
+    b'<a href="/unquoted">again</a><a name="anchor">no href</a></div></body></html>'
+)
+
+EXPECTED = [
+    'http://a.com/page/2',
+    'http://a.com/unquoted',
+    'http://a.com/single?a=1&b=2',
+    'http://a.com/up/file.html',
+    'http://cdn.a.com/x',
+]
+
+
+def tokenize_in_chunks(data, size):
+    tokenizer = LinkTokenizer()
+    events = []
+    for start in range(0, len(data), size):
+        events.extend(tokenizer.feed(data[start:start + size]))
+    events.extend(tokenizer.close())
+    return events
+
+
+def test_comments_scripts_and_styles_are_skipped():
+    tags = [tag for tag, _ in tokenize_document(DOCUMENT)]
+    assert tags == [b'link', b'link', b'a', b'a', b'area', b'a', b'a', b'a', b'a', b'a']
+    assert not any(b'commented' in attrs or b'scripted' in attrs or b'style-link' in attrs
+                   for _, attrs in tokenize_document(DOCUMENT))
+
+
+def test_every_chunk_boundary_yields_the_same_events():
+    expected = tokenize_document(DOCUMENT)
+    for size in range(1, 40):
+        assert tokenize_in_chunks(DOCUMENT, size) == expected, size
+
+
+def test_unclosed_tag_at_end_of_document_is_emitted_on_close():
+    tokenizer = LinkTokenizer()
+    assert tokenizer.feed(b'<p>text</p><a href="/tail"') == []
+    assert tokenizer.close() == [(b'a', b' href="/tail"')]
+
+
+def test_extract_resolves_filters_and_deduplicates():
+    extractor = LinkExtractor()
+    base = 'http://a.com/dir/page.html'
+
+    assert extractor.extract(DOCUMENT, base) == EXPECTED
+    assert extractor.extract(DOCUMENT.decode('utf-8'), base) == EXPECTED
+    chunks = (DOCUMENT[i:i + 7] for i in range(0, len(DOCUMENT), 7))
+    assert extractor.extract_stream(chunks, base) == EXPECTED
+
+
+def test_first_base_href_changes_the_resolution_base():
+    document = (b'<base href="http://b.com/root/"><base href="http://c.com/">'
+                b'<a href="child">c</a><a href="/abs">a</a>')
+
+    assert LinkExtractor().extract(document, 'http://a.com/') == ['http://b.com/root/child', 'http://b.com/abs']
+
+
+def test_non_ascii_links_use_the_page_encoding():
+    document = '<a href="/新闻?q=中文">n</a>'.encode('gb18030')
+
+    assert LinkExtractor().extract(document, 'http://a.com/', encoding='gb18030') == ['http://a.com/新闻?q=中文']
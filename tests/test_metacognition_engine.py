@@ -0,0 +1,43 @@
+# PhantomCrawler - 七宗欲引擎测试
+import time
+
+from src.modules.intelligence.metacognition_engine import SevenDesiresEngine
+from tests.helpers import quiet
+
+
+def test_desire_balance_uses_the_recent_window(config):
+    engine = quiet(SevenDesiresEngine)
+    now = time.time()
+    # 两小时前的大量成功不应掩盖最近的连续失败
+    for _ in range(50):
+        engine._record_history(True, now - 7200)
+    for _ in range(10):
+        engine._record_history(False, now - 10)
+    anger = engine.desire_forces['愤怒']
+
+    quiet(engine._balance_desire_forces)
+    assert engine.desire_perception['efficiency_score']['success_rate'] == 0.0
+    assert engine.desire_forces['愤怒'] > anger
+    quiet(engine.shutdown)
+
+
+def test_insights_reuse_unchanged_sections(config):
+    engine = quiet(SevenDesiresEngine)
+    first = engine.get_metacognitive_insights()
+    assert set(first) == set(engine.INSIGHT_SECTIONS) | {'timestamp'}
+
+    second = engine.get_metacognitive_insights()
+    assert second['desire_state'] is first['desire_state']
+    assert second['risk_assessment'] is first['risk_assessment']
+
+    # 欲望强度变化只使依赖它的部分重新计算
+    engine.desire_forces['贪婪'] += 0.1
+    third = engine.get_metacognitive_insights(['desire_state', 'risk_assessment'])
+    assert set(third) == {'timestamp', 'desire_state', 'risk_assessment'}
+    assert third['desire_state'] is not first['desire_state']
+    assert third['desire_state']['active_forces']['贪婪'] == engine.desire_forces['贪婪']
+    assert third['risk_assessment'] is first['risk_assessment']
+
+    engine.desire_perception['block_attempts'] += 5
+    assert engine.get_metacognitive_insights(['risk_assessment'])['risk_assessment'] is not first['risk_assessment']
+    quiet(engine.shutdown)
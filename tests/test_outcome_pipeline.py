@@ -0,0 +1,57 @@
+# PhantomCrawler - 结果分析管线测试
+import httpx
+
+from src.modules.intelligence.outcome_pipeline import (
+    EVENT_ERROR, EVENT_RESPONSE, OutcomeEvent, OutcomePipeline, StrategySnapshot
+)
+from tests.helpers import PAGE, quiet
+
+
+def test_event_keeps_only_scalar_fields():
+    result = {'status_code': 403, 'blocked': True, 'content': 'x' * 100, 'risk_level': 0.9,
+              'headers': {'a': 'b'}}
+    event = OutcomeEvent.from_result(EVENT_RESPONSE, 'http://a.com/', result, 0.5, False, success_streak=3)
+    assert event.status_code == 403 and event.blocked
+    assert event.content_length == 100
+    assert event.success_streak == 3
+    assert 'content' not in event.as_result() and 'headers' not in event.as_result()
+
+    error = OutcomeEvent.from_result(EVENT_ERROR, 'http://a.com/', ValueError('boom'), 0.1, False)
+    assert error.error == 'boom' and error.status_code == 500
+
+
+def test_emit_applies_synchronously_and_refreshes_snapshot():
+    applied = []
+    state = {'desire': '贪婪'}
+
+    def apply(events):
+        applied.extend(events)
+        state['desire'] = '愤怒'
+
+    pipeline = OutcomePipeline(apply, lambda: StrategySnapshot(state['desire']))
+    assert pipeline.snapshot.dominant_desire == '贪婪'
+    event = OutcomeEvent.from_result(EVENT_RESPONSE, 'http://a.com/', {'status_code': 200}, 0.1, True)
+    pipeline.emit(event)
+
+    assert applied == [event]
+    assert pipeline.snapshot.dominant_desire == '愤怒'
+    assert pipeline.get_stats()['emitted'] == 1
+
+
+def test_apply_errors_are_counted_not_raised():
+    def apply(events):
+        raise RuntimeError('broken')
+
+    pipeline = OutcomePipeline(apply)
+    quiet(pipeline.emit, OutcomeEvent.from_result(EVENT_RESPONSE, 'http://a.com/', {}, 0.1, True))
+    assert pipeline.get_stats()['apply_errors'] == 1
+
+
+def test_crawl_feeds_the_pipeline(make_crawler):
+    crawler = make_crawler(lambda request: httpx.Response(200, headers={'Content-Type': 'text/html'},
+                                                          content=PAGE))
+    result = quiet(crawler.crawl, 'http://a.test/')
+    assert result['status_code'] == 200
+    stats = crawler.outcome_pipeline.get_stats()
+    assert stats['emitted'] >= 1
+    assert stats['apply_errors'] == 0
@@ -0,0 +1,46 @@
+# PhantomCrawler - 预解析链接测试
+from src.modules.frontier.visited_store import FingerprintVisitedStore
+from src.modules.parsing.parsed_link import LinkScope, parse_link, parse_links
+from src.utils.url_fingerprint import url_fingerprint
+
+
+def test_parse_link_splits_once_and_drops_fragment():
+    link = parse_link('HTTPS://User@Shop.Example.co.uk:8443/a/b?x=1&y=2#top')
+
+    assert link.url == 'HTTPS://User@Shop.Example.co.uk:8443/a/b?x=1&y=2'
+    assert link.scheme == 'https'
+    assert link.host == 'user@shop.example.co.uk:8443'
+    assert link.registrable_domain == 'example.co.uk'
+    assert link.path == '/a/b'
+    assert link.query == 'x=1&y=2'
+    assert link.fingerprint == url_fingerprint(link.url)
+
+
+def test_parse_link_defaults_and_rejects_non_http():
+    link = parse_link('http://127.0.0.1:8080')
+    assert (link.host, link.registrable_domain, link.path, link.query) == ('127.0.0.1:8080', '127.0.0.1', '/', '')
+
+    assert parse_link('ftp://a.com/file') is None
+    assert parse_link('/relative/path') is None
+    assert parse_link('http:///no-host') is None
+    assert [link.url for link in parse_links(['mailto:me@a.com', 'http://a.com/', 'b.com'])] == ['http://a.com/']
+
+
+def test_link_scope_filters_domain_patterns_and_visited_in_one_pass():
+    links = parse_links([
+        'http://a.com/keep',
+        'http://blog.a.com/keep',
+        'http://a.com/admin/login',
+        'http://a.com/seen',
+        'http://other.com/keep',
+    ])
+    visited = FingerprintVisitedStore()
+    visited.add('http://a.com/seen')
+    scope = LinkScope('a.com', include_patterns=[], exclude_patterns=['/admin/'])
+
+    kept = scope.filter(links, visited=visited)
+
+    assert [link.url for link in kept] == ['http://a.com/keep', 'http://blog.a.com/keep']
+    assert not scope.in_scope(links[-1])
+    # 不限制域名时只按模式过滤
+    assert len(LinkScope(include_patterns=[], exclude_patterns=[]).filter(links)) == 5
@@ -0,0 +1,75 @@
+# PhantomCrawler - 公共后缀测试
+import pytest
+
+from src.modules.parsing.public_suffix import DomainScope, PublicSuffixList, registrable_domain
+
+
+@pytest.fixture(scope='module')
+def suffixes():
+    return PublicSuffixList()
+
+
+@pytest.mark.parametrize('hostname, suffix, site', [
+    ('www.example.com', 'com', 'example.com'),
+    ('a.b.example.co.uk', 'co.uk', 'example.co.uk'),
+    ('user.github.io', 'github.io', 'user.github.io'),
+    # 通配符规则和例外规则
+    ('shop.foo.ck', 'foo.ck', 'shop.foo.ck'),
+    ('www.ck', 'ck', 'www.ck'),
+    ('a.city.kawasaki.jp', 'kawasaki.jp', 'city.kawasaki.jp'),
+    ('a.b.kawasaki.jp', 'b.kawasaki.jp', 'a.b.kawasaki.jp'),
+    # 国际化域名的Unicode和punycode形式
+    ('www.例子.公司.cn', '公司.cn', '例子.公司.cn'),
+    ('www.xn--fsqu00a.xn--55qx5d.cn', 'xn--55qx5d.cn', 'xn--fsqu00a.xn--55qx5d.cn'),
+    # 没有匹配的规则时顶级域即公共后缀
+    ('host.example.unknowntld', 'unknowntld', 'example.unknowntld'),
+    ('WWW.Example.COM.:8080', 'com', 'example.com'),
+])
+def test_suffix_and_registrable_domain(suffixes, hostname, suffix, site):
+    assert suffixes.public_suffix(hostname) == suffix
+    assert suffixes.registrable_domain(hostname) == site
+
+
+def test_hosts_without_registrable_domain(suffixes):
+    assert suffixes.registrable_domain('co.uk') is None
+    assert suffixes.registrable_domain('192.168.0.1') is None
+    assert suffixes.registrable_domain('[::1]:8080') is None
+    assert suffixes.public_suffix('10.0.0.1') is None
+    # 模块函数回退为去掉端口的主机名
+    assert registrable_domain('192.168.0.1:8080') == '192.168.0.1'
+    assert registrable_domain('localhost') == 'localhost'
+
+
+def test_lookups_are_cached(suffixes):
+    before = suffixes.get_stats()
+    suffixes.registrable_domain('cached.example.org')
+    suffixes.registrable_domain('cached.example.org')
+    stats = suffixes.get_stats()
+
+    assert stats['rules'] > 5000
+    assert stats['cache_hits'] == before['cache_hits'] + 1
+    assert stats['cache_misses'] == before['cache_misses'] + 1
+
+
+def test_domain_scope_allows_subdomains_only(suffixes):
+    scope = DomainScope(['example.com', 'docs.python.org', 'github.io', '10.0.0.1'], suffixes)
+
+    assert scope.allows_host('example.com')
+    assert scope.allows_host('a.b.example.com:443')
+    assert not scope.allows_host('badexample.com')
+    assert scope.allows_host('docs.python.org')
+    assert scope.allows_host('en.docs.python.org')
+    assert not scope.allows_host('www.python.org')
+    # 允许项是公共后缀时其下所有站点都允许
+    assert scope.allows_host('someone.github.io')
+    assert scope.allows_host('10.0.0.1:8000')
+    assert not scope.allows_host('10.0.0.2')
+    assert scope.filter(['http://x.example.com/', 'http://example.net/']) == ['http://x.example.com/']
+
+
+def test_domain_scope_for_url_covers_the_whole_site(suffixes):
+    scope = DomainScope.for_url('https://www.example.co.uk/start', suffixes)
+
+    assert scope.allows_host('shop.example.co.uk')
+    assert not scope.allows_host('other.co.uk')
+    assert len(scope) == 1
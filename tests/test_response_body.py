@@ -0,0 +1,109 @@
+# PhantomCrawler - 响应正文流式读取测试
+import os
+import time
+
+import httpx
+
+from src.modules.storage.response_body import ResponseBodyReader
+
+
+def fetch(reader, content_type, body):
+    """用MockTransport发送流式请求并交给reader读取"""
+    def handler(request):
+        return httpx.Response(200, content=body, headers={'Content-Type': content_type})
+
+    with httpx.Client(transport=httpx.MockTransport(handler)) as client:
+        with client.stream('GET', 'http://a.com/file') as response:
+            return reader.read(response)
+
+
+def make_reader(tmp_path, **kwargs):
+    kwargs.setdefault('spool_threshold', 1024)
+    kwargs.setdefault('max_bytes', {'text/html': 4096, 'default': 65536})
+    return ResponseBodyReader(spool_dir=str(tmp_path / 'spool'), chunk_size=256, **kwargs)
+
+
+def test_small_image_stays_in_memory(tmp_path):
+    reader = make_reader(tmp_path)
+    response = fetch(reader, 'image/png', b'\x89PNG' + b'\x00' * 100)
+
+    assert 'body_path' not in response.extensions
+    assert response.content == b'\x89PNG' + b'\x00' * 100
+    assert reader.is_complete(response)
+    assert reader.stats['spooled'] == 0
+
+
+def test_large_binary_and_text_are_spooled(tmp_path):
+    reader = make_reader(tmp_path)
+    image = os.urandom(5000)
+    response = fetch(reader, 'image/png', image)
+    path = response.extensions['body_path']
+    assert path.startswith(str(tmp_path / 'spool'))
+    assert path.endswith('.png')
+    with open(path, 'rb') as f:
+        assert f.read() == image
+    assert response.content == b''
+
+    response = fetch(reader, 'application/json', b'[' + b'1,' * 2000 + b'1]')
+    assert 'body_path' in response.extensions
+    assert not reader.is_complete(response)
+    assert reader.stats['spooled'] == 2
+
+
+def test_html_over_limit_keeps_prefix(tmp_path):
+    reader = make_reader(tmp_path)
+    response = fetch(reader, 'text/html', b'<a href="/x">' + b'x' * 10000)
+
+    assert response.extensions['body_truncated']
+    assert len(response.content) == 4096
+    assert response.content.startswith(b'<a href="/x">')
+
+
+def test_binary_over_limit_and_rejected_types_are_skipped(tmp_path):
+    reader = make_reader(tmp_path)
+    # 声明的长度超限时不读取正文
+    response = fetch(reader, 'application/zip', os.urandom(70000))
+    assert response.extensions['body_skipped'] == 'too_large'
+    assert response.content == b''
+
+    # 分块传输没有Content-Length，读取过程中超限时删除已写入的溢出文件
+    response = fetch(reader, 'application/zip', iter([os.urandom(10000) for _ in range(7)]))
+    assert response.extensions['body_skipped'] == 'too_large'
+    assert os.listdir(tmp_path / 'spool') == []
+
+    response = fetch(reader, 'video/mp4', b'x' * 10)
+    assert response.extensions['body_skipped'] == 'content_type'
+
+
+def test_spool_directory_is_capped(tmp_path):
+    reader = make_reader(tmp_path, spool_max_bytes=20000)
+    paths = []
+    for i in range(10):
+        paths.append(fetch(reader, 'application/octet-stream', os.urandom(4000)).extensions['body_path'])
+        # 保证修改时间递增
+        os.utime(paths[-1], (time.time() - 100 + i, time.time() - 100 + i))
+
+    remaining = [path for path in paths if os.path.exists(path)]
+    assert sum(os.path.getsize(path) for path in remaining) <= 20000
+    assert paths[-1] in remaining
+    assert paths[0] not in remaining
+    assert reader.stats['spool_pruned'] > 0
+
+
+def test_default_spool_dir_follows_state_dir(tmp_path):
+    reader = ResponseBodyReader(spool_threshold=16)
+    stale = tmp_path / 'state' / 'spool' / 'old.part'
+    stale.parent.mkdir(parents=True)
+    stale.write_bytes(b'x')
+    os.utime(stale, (time.time() - 7200, time.time() - 7200))
+
+    reader.use_state_dir(str(tmp_path / 'state'))
+    response = fetch(reader, 'application/pdf', b'%PDF' + b'0' * 100)
+
+    assert os.path.dirname(response.extensions['body_path']) == str(tmp_path / 'state' / 'spool')
+    # 中断留下的临时文件在第一次溢出时清理
+    assert not stale.exists()
+
+    explicit = ResponseBodyReader(spool_dir=str(tmp_path / 'explicit'))
+    explicit.use_state_dir(str(tmp_path / 'state'))
+    assert explicit.spool_dir == str(tmp_path / 'explicit')
@@ -0,0 +1,92 @@
+# PhantomCrawler - 结果输出测试
+import json
+import sqlite3
+
+import pytest
+
+from src.modules.storage.result_sink import (
+    HAS_PYARROW, JsonlSink, SQLiteSink, ParquetSink, create_sink, flatten_result
+)
+from tests.helpers import read_jsonl
+
+RESULT = {'url': 'http://a.com/', 'status_code': 200, 'success': True, 'depth': 1,
+          'headers': {'content-type': 'text/html'}, 'cookies': {'sid': 'x'}, 'title': '首页'}
+
+
+def test_flatten_result_moves_unknown_fields_to_extra():
+    record = flatten_result(RESULT)
+    assert record['status_code'] == 200 and record['success'] is True
+    assert json.loads(record['headers']) == {'content-type': 'text/html'}
+    assert json.loads(record['extra']) == {'title': '首页', 'cookies': {'sid': 'x'}}
+    assert record['content'] is None and record['timestamp'] > 0
+
+
+def test_create_sink_parses_specs(tmp_path):
+    sink = create_sink(f'jsonl+gzip:{tmp_path}/out.jsonl')
+    assert isinstance(sink, JsonlSink) and sink.compression == 'gzip'
+    sink.close()
+    sink = create_sink(f'sqlite:{tmp_path}/out.db')
+    assert isinstance(sink, SQLiteSink)
+    sink.close()
+    with pytest.raises(ValueError):
+        create_sink('jsonl')
+    with pytest.raises(ValueError):
+        create_sink(f'csv:{tmp_path}/out.csv')
+    with pytest.raises(ValueError):
+        JsonlSink(str(tmp_path / 'out.jsonl'), compression='bz2')
+
+
+def test_results_are_written_in_batches(tmp_path):
+    sink = JsonlSink(str(tmp_path / 'out.jsonl'), batch_size=10, flush_interval=5)
+    for i in range(25):
+        sink.write(dict(RESULT, url=f'http://a.com/{i}'))
+    sink.close()
+    assert read_jsonl(sink) == [f'http://a.com/{i}' for i in range(25)]
+    stats = sink.get_stats()
+    assert stats['records'] == 25
+    assert stats['batches'] == 3
+    with pytest.raises(RuntimeError):
+        sink.write(RESULT)
+
+
+def test_write_copies_the_result(tmp_path):
+    sink = JsonlSink(str(tmp_path / 'out.jsonl'))
+    result = dict(RESULT)
+    sink.write(result)
+    result['url'] = 'http://changed/'
+    sink.close()
+    assert read_jsonl(sink) == ['http://a.com/']
+
+
+def test_jsonl_rotates_by_uncompressed_size(tmp_path):
+    sink = JsonlSink(str(tmp_path / 'out.jsonl'), max_bytes=300, compression='zstd')
+    for i in range(10):
+        sink.write(dict(RESULT, url=f'http://a.com/{i}'))
+    sink.close()
+    assert len(sink.files) > 1
+    assert all(path.endswith('.jsonl.zst') for path in sink.files)
+    assert read_jsonl(sink) == [f'http://a.com/{i}' for i in range(10)]
+
+
+def test_sqlite_sink_writes_fixed_columns(tmp_path):
+    sink = SQLiteSink(str(tmp_path / 'out.db'))
+    sink.write(RESULT)
+    sink.flush()
+    sink.close()
+    with sqlite3.connect(str(tmp_path / 'out.db')) as conn:
+        row = conn.execute('SELECT url, status_code, success, depth, extra FROM crawl_results').fetchone()
+    assert row[:4] == ('http://a.com/', 200, 1, 1)
+    assert json.loads(row[4])['title'] == '首页'
+
+
+@pytest.mark.skipif(not HAS_PYARROW, reason='需要pyarrow')
+def test_parquet_sink_writes_row_groups(tmp_path):
+    import pyarrow.parquet
+
+    sink = ParquetSink(str(tmp_path / 'out.parquet'), batch_size=4)
+    for i in range(10):
+        sink.write(dict(RESULT, url=f'http://a.com/{i}'))
+    sink.close()
+    table = pyarrow.parquet.read_table(str(tmp_path / 'out.parquet'))
+    assert table.num_rows == 10
+    assert table.column('status_code').to_pylist() == [200] * 10
@@ -0,0 +1,126 @@
+# PhantomCrawler - robots.txt缓存测试
+import asyncio
+
+from src.modules.frontier.host_scheduler import HostScheduler
+from src.modules.frontier.robots_cache import RobotsCache, RobotsRules
+from tests.helpers import quiet
+
+ROBOTS = """
+User-agent: *
+Disallow: /private/
+Allow: /private/public
+Disallow: /*.pdf$
+Crawl-delay: 5
+Sitemap: http://a.com/sitemap.xml
+
+User-agent: SpecialBot
+Disallow: /only-us/
+"""
+
+
+def static_fetch(status, body='', calls=None):
+    def fetch(url):
+        if calls is not None:
+            calls.append(url)
+        return status, body
+    return fetch
+
+
+def test_longest_match_and_wildcards():
+    rules = RobotsRules.parse(ROBOTS, 'OtherBot')
+    assert not rules.is_allowed('/private/secret')
+    assert rules.is_allowed('/private/public/page')
+    assert not rules.is_allowed('/docs/file.pdf')
+    assert rules.is_allowed('/docs/file.pdf?download=1')
+    assert rules.crawl_delay == 5
+    assert rules.sitemaps == ['http://a.com/sitemap.xml']
+
+
+def test_specific_user_agent_group_wins():
+    rules = RobotsRules.parse(ROBOTS, 'specialbot')
+    assert not rules.is_allowed('/only-us/x')
+    # 选中专属组后不再使用*组的规则
+    assert rules.is_allowed('/private/secret')
+
+
+def test_status_codes(tmp_path):
+    cache = RobotsCache(cache_path='')
+    assert cache.is_allowed('http://gone.com/x', static_fetch(404))
+    assert not cache.is_allowed('http://down.com/x', static_fetch(503))
+    cache.close()
+
+
+def test_network_errors_allow_and_retry_soon(tmp_path):
+    calls = []
+
+    def failing(url):
+        calls.append(url)
+        raise ConnectionError('refused')
+
+    cache = RobotsCache(cache_path=str(tmp_path / 'robots.db'), unreachable_ttl=60)
+    assert quiet(cache.is_allowed, 'http://a.com/x', failing)
+    assert cache.is_allowed('http://a.com/y', failing)
+    assert len(calls) == 1
+    assert cache.get_stats()['unreachable'] == 1
+    cache.close()
+
+    # 网络错误不写入持久化缓存，下次运行重新获取
+    cache = RobotsCache(cache_path=str(tmp_path / 'robots.db'))
+    assert not cache.is_allowed('http://a.com/private/x', static_fetch(200, ROBOTS, calls))
+    assert len(calls) == 2
+    cache.close()
+
+
+def test_rules_are_reused_from_disk(tmp_path):
+    calls = []
+    cache = RobotsCache(cache_path=str(tmp_path / 'robots.db'))
+    cache.is_allowed('http://a.com/', static_fetch(200, ROBOTS, calls))
+    cache.close()
+
+    cache = RobotsCache(cache_path=str(tmp_path / 'robots.db'))
+    assert not cache.is_allowed('http://a.com/private/x', static_fetch(200, ROBOTS, calls))
+    assert len(calls) == 1
+    assert cache.get_stats()['disk_hits'] == 1
+    cache.close()
+
+
+def test_memory_cache_is_lru_bounded():
+    calls = []
+    cache = RobotsCache(cache_path='', max_hosts=3)
+    for i in range(5):
+        cache.is_allowed(f'http://host{i}.com/', static_fetch(200, '', calls))
+    # 最近使用的主机保留下来
+    cache.is_allowed('http://host2.com/', static_fetch(200, '', calls))
+    cache.is_allowed('http://host5.com/', static_fetch(200, '', calls))
+    stats = cache.get_stats()
+    assert stats['hosts'] == 3
+    assert stats['evicted'] == 3
+    assert cache.check_cached('http://host2.com/') is True
+    assert cache.check_cached('http://host3.com/') is None
+    assert len(calls) == 6
+
+
+def test_crawl_delay_is_applied_to_scheduler():
+    scheduler = HostScheduler(delay_min=0.0, delay_max=0.0)
+    cache = RobotsCache(cache_path='', scheduler=scheduler, max_crawl_delay=2)
+    cache.is_allowed('http://a.com/', static_fetch(200, ROBOTS))
+    scheduler.acquire('a.com')
+    scheduler.release('a.com')
+    # Crawl-delay 5被上限收紧为2秒
+    assert 1.5 < scheduler.wait_time('a.com') <= 2
+
+
+def test_concurrent_async_checks_fetch_once():
+    calls = []
+
+    async def fetch(url):
+        calls.append(url)
+        await asyncio.sleep(0.01)
+        return 200, ROBOTS
+
+    async def main():
+        cache = RobotsCache(cache_path='')
+        return await asyncio.gather(*(cache.ais_allowed(f'http://a.com/private/{i}', fetch) for i in range(5)))
+
+    assert asyncio.run(main()) == [False] * 5
+    assert calls == ['http://a.com/robots.txt']
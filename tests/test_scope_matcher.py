@@ -0,0 +1,71 @@
+# PhantomCrawler - 爬取范围匹配测试
+import re
+import fnmatch
+
+from src.modules.parsing.scope_matcher import PatternSet, ScopeMatcher, compile_scope
+
+URLS = [
+    'http://a.com/',
+    'http://a.com/blog/2023/post-1',
+    'http://a.com/blog/tag/python',
+    'http://a.com/shop/item?id=42',
+    'http://a.com/static/app.js',
+    'http://a.com/static/logo.PNG',
+    'http://a.com/admin/login',
+    'http://a.com/aa/aa',
+    'http://b.org/blog/2023/other',
+]
+
+PATTERNS = [
+    '/shop/',
+    'logout',
+    r're:/blog/\d{4}/',
+    r're:\.(?:js|css)$',
+    r're:/(\w+)/\1$',
+    're:(?i)\\.png$',
+    'glob:http://a.com/admin/*',
+    'glob:*tag*',
+    'glob:http://?.org/*',
+]
+
+
+def reference_matches(pattern, url):
+    """逐个模式匹配的参考实现"""
+    if pattern.startswith('re:'):
+        return re.search(pattern[3:], url) is not None
+    if pattern.startswith('glob:'):
+        return fnmatch.fnmatchcase(url, pattern[5:])
+    return pattern in url
+
+
+def test_combined_patterns_match_like_individual_patterns():
+    for size in range(1, len(PATTERNS) + 1):
+        patterns = PATTERNS[:size]
+        compiled = PatternSet(patterns)
+        assert len(compiled) == size
+        for url in URLS:
+            expected = any(reference_matches(pattern, url) for pattern in patterns)
+            assert compiled.matches(url) == expected, (patterns, url)
+
+
+def test_include_and_exclude_rules():
+    matcher = ScopeMatcher(['/blog/', 'glob:*/shop/*'], ['re:/tag/', 'b.org'])
+
+    assert matcher.filter(URLS) == [
+        'http://a.com/blog/2023/post-1',
+        'http://a.com/shop/item?id=42',
+    ]
+    assert ScopeMatcher(None, ['/static/']).allows('http://a.com/')
+    assert not ScopeMatcher()
+    assert ScopeMatcher().allows('http://anything/')
+
+
+def test_compile_scope_reads_config_and_reuses_compiled_rules(config):
+    config('scope.include_patterns', ['/blog/'])
+    config('scope.exclude_patterns', ['re:/tag/'])
+
+    matcher = compile_scope()
+
+    assert matcher is compile_scope(['/blog/'], ['re:/tag/'])
+    assert matcher.allows('http://a.com/blog/2023/post-1')
+    assert not matcher.allows('http://a.com/blog/tag/python')
@@ -0,0 +1,102 @@
+# PhantomCrawler - 站点地图解析与播种测试
+import io
+import gzip
+import contextlib
+
+import httpx
+
+from src.modules.parsing.sitemap_parser import (
+    SitemapSeeder, iter_sitemap_entries, lastmod_priority, parse_lastmod
+)
+from tests.helpers import PAGE, quiet
+
+URLSET = b'''<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"
+        xmlns:image="http://www.google.com/schemas/sitemap-image/1.1">
+  <url><loc>http://a.com/new</loc><lastmod>2024-05-01</lastmod>
+       <image:image><image:loc>http://a.com/img.png</image:loc></image:image></url>
+  <url><loc>/relative</loc></url>
+</urlset>'''
+
+INDEX = b'''<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <sitemap><loc>http://a.com/sitemap-1.xml</loc></sitemap>
+</sitemapindex>'''
+
+ATOM = b'''<feed xmlns="http://www.w3.org/2005/Atom">
+  <link href="http://a.com/" rel="self"/>
+  <entry><link rel="alternate" href="http://a.com/post"/><updated>2024-01-02T03:04:05Z</updated></entry>
+</feed>'''
+
+
+def test_urlset_entries_skip_extension_locations():
+    entries = list(iter_sitemap_entries(io.BytesIO(URLSET), 'http://a.com/sitemap.xml'))
+    assert [entry.url for entry in entries] == ['http://a.com/new', 'http://a.com/relative']
+    assert entries[0].lastmod == parse_lastmod('2024-05-01')
+    assert entries[1].lastmod is None
+
+
+def test_gzip_index_and_atom_feed():
+    index = list(iter_sitemap_entries(io.BytesIO(gzip.compress(INDEX))))
+    assert index[0].url == 'http://a.com/sitemap-1.xml' and index[0].is_sitemap
+
+    feed = list(iter_sitemap_entries(io.BytesIO(ATOM)))
+    assert [entry.url for entry in feed] == ['http://a.com/post']
+    assert feed[0].lastmod == parse_lastmod('2024-01-02T03:04:05+00:00')
+
+
+def test_lastmod_formats_and_priority():
+    assert parse_lastmod('2024') == parse_lastmod('2024-01-01')
+    assert parse_lastmod('Tue, 02 Jan 2024 00:00:00 GMT') == parse_lastmod('2024-01-02')
+    assert parse_lastmod('not a date') is None
+    assert lastmod_priority(parse_lastmod('2024-05-01')) > lastmod_priority(parse_lastmod('2023-05-01'))
+    assert lastmod_priority(None) == 0.0
+
+
+def fake_site(files):
+    @contextlib.contextmanager
+    def open_stream(url):
+        if url not in files:
+            raise Exception('HTTP 404')
+        yield iter([files[url]])
+    return open_stream
+
+
+def test_seeder_expands_indexes_and_stops_at_max_urls():
+    files = {'http://a.com/index.xml': INDEX, 'http://a.com/sitemap-1.xml': URLSET}
+    seeder = SitemapSeeder(fake_site(files), ['http://a.com/index.xml', 'http://a.com/missing.xml'], max_urls=1)
+    urls = [entry.url for entry in quiet(list, seeder.iter_entries())]
+    assert urls == ['http://a.com/new']
+    assert not seeder.has_pending()
+    assert seeder.stats['urls'] == 1
+
+
+def crawl_site(make_crawler, **kwargs):
+    """爬取只有首页的站点，站点地图列出10个页面，返回请求过的路径"""
+    sitemap = b'<urlset>' + b''.join(b'<url><loc>http://site.test/p%d</loc></url>' % i
+                                     for i in range(10)) + b'</urlset>'
+    requested = []
+
+    def handler(request):
+        requested.append(request.url.path)
+        if request.url.path == '/sitemap.xml':
+            return httpx.Response(200, headers={'Content-Type': 'application/xml'}, content=sitemap)
+        return httpx.Response(200, headers={'Content-Type': 'text/html'}, content=PAGE)
+
+    crawler = make_crawler(handler)
+    quiet(list, crawler.iter_crawl('http://site.test/', max_depth=1, **kwargs))
+    return requested
+
+
+def test_sitemaps_are_off_by_default(make_crawler):
+    assert crawl_site(make_crawler) == ['/']
+
+
+def test_explicit_sitemap_seeds_and_is_capped_by_max_urls(make_crawler):
+    summary = {}
+    requested = crawl_site(make_crawler, sitemap_urls=['http://site.test/sitemap.xml'], max_urls=4,
+                           summary=summary)
+    pages = [path for path in requested if path != '/sitemap.xml']
+    assert len(pages) == 4
+    assert '/sitemap.xml' in requested
+    # 站点地图只产出本次爬取上限以内的URL
+    assert summary['sitemaps']['urls'] == 4
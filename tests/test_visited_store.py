@@ -0,0 +1,49 @@
+# PhantomCrawler - 已访问URL存储测试
+import pytest
+
+from src.modules.frontier.visited_store import (
+    BloomVisitedStore, FingerprintVisitedStore, create_visited_store
+)
+
+
+def test_exact_store_grows_without_losing_urls():
+    store = FingerprintVisitedStore(initial_capacity=8)
+    urls = [f'http://a.com/page/{i}' for i in range(5000)]
+    assert all(store.add(url) for url in urls)
+    assert not store.add(urls[0])
+
+    assert len(store) == 5000
+    assert all(url in store for url in urls)
+    assert not any(f'http://b.com/page/{i}' in store for i in range(5000))
+    assert store.get_stats()['false_positive_rate'] == 0.0
+
+
+def test_bloom_false_positive_rate_stays_near_target():
+    store = BloomVisitedStore(capacity=20000, false_positive_rate=0.01)
+    for i in range(20000):
+        store.add(f'http://a.com/page/{i}')
+    assert all(f'http://a.com/page/{i}' in store for i in range(20000))
+
+    false_positives = sum(f'http://b.com/page/{i}' in store for i in range(20000))
+    assert false_positives / 20000 < 0.02
+
+
+def test_bloom_adds_layers_when_full_and_keeps_members():
+    store = BloomVisitedStore(capacity=100, false_positive_rate=0.01)
+    for i in range(1000):
+        store.add(f'http://a.com/{i}')
+
+    assert store.get_stats()['layers'] > 1
+    assert all(f'http://a.com/{i}' in store for i in range(1000))
+    false_positives = sum(f'http://b.com/{i}' in store for i in range(10000))
+    assert false_positives / 10000 < 0.02
+
+
+def test_bloom_rejects_invalid_rate():
+    with pytest.raises(ValueError):
+        BloomVisitedStore(false_positive_rate=0)
+
+
+def test_factory_selects_mode():
+    assert create_visited_store('exact', 100).mode == 'exact'
+    assert create_visited_store('bloom', 100, 0.01).mode == 'bloom'
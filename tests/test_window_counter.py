@@ -0,0 +1,48 @@
+# PhantomCrawler - 滑动窗口计数测试
+import pytest
+
+from src.modules.intelligence.window_counter import (
+    BLOCKS, FAILURES, REQUESTS, SUCCESSES, WindowedCounters
+)
+
+
+def test_counts_rates_and_latency_within_window():
+    counters = WindowedCounters(windows=[60], buckets=6)
+    counters.record(True, latency=0.2, timestamp=100.0)
+    counters.record(True, latency=0.4, timestamp=101.0)
+    counters.record(False, blocked=True, timestamp=102.0)
+    counters.record(False, latency=float('nan'), timestamp=103.0)
+
+    assert counters.count(60, REQUESTS, now=103.0) == 4
+    assert counters.count(60, SUCCESSES, now=103.0) == 2
+    assert counters.count(60, FAILURES, now=103.0) == 2
+    assert counters.count(60, BLOCKS, now=103.0) == 1
+    assert counters.success_rate(60, now=103.0) == pytest.approx(0.5)
+    # 未知（None/NaN）响应时间不计入平均值
+    assert counters.average_latency(60, now=103.0) == pytest.approx(0.3)
+
+
+def test_buckets_expire_as_time_advances():
+    counters = WindowedCounters(windows=[60], buckets=6)
+    counters.record(True, timestamp=0.0)
+    counters.record(False, timestamp=35.0)
+
+    assert counters.count(60, now=59.0) == 2
+    # 第一个桶[0, 10)在窗口推进到[60, 70)时过期
+    assert counters.count(60, now=65.0) == 1
+    assert counters.success_rate(60, now=65.0) == 0.0
+    # 超过整个窗口长度后全部清空
+    assert counters.count(60, now=200.0) == 0
+    assert counters.success_rate(60, now=200.0) is None
+    assert counters.average_latency(60, now=200.0) is None
+
+
+def test_windows_expire_independently():
+    counters = WindowedCounters(windows=[60, 600], buckets=60)
+    for second in range(0, 300, 10):
+        counters.record(True, timestamp=float(second))
+
+    snapshot = counters.snapshot(now=300.0)
+    assert snapshot['60s']['requests'] == 5
+    assert snapshot['600s']['requests'] == 30
+    assert snapshot['600s']['successes'] == 30
@@ -0,0 +1,61 @@
+# PhantomCrawler - 延迟写回持久化测试
+import threading
+
+from src.modules.intelligence.write_behind import WriteBehindPersister
+from tests.helpers import quiet
+
+
+class Recorder:
+    """记录每次写入的增量"""
+
+    def __init__(self):
+        self.pending = []
+        self.written = []
+        self.event = threading.Event()
+
+    def snapshot(self):
+        batch, self.pending = self.pending, []
+        return batch
+
+    def write(self, batch):
+        self.written.append(batch)
+        self.event.set()
+
+
+def test_flush_every_wakes_the_background_writer():
+    recorder = Recorder()
+    persister = WriteBehindPersister(recorder.snapshot, recorder.write, flush_interval=60, flush_every=3)
+    for i in range(3):
+        recorder.pending.append(i)
+        persister.mark_dirty()
+    assert recorder.event.wait(5)
+    assert recorder.written == [[0, 1, 2]]
+    assert not persister.dirty
+    persister.close()
+    # 没有新的修改时close不再写入
+    assert persister.get_stats()['flushes'] == 1
+
+
+def test_close_writes_remaining_changes():
+    recorder = Recorder()
+    persister = WriteBehindPersister(recorder.snapshot, recorder.write, flush_interval=60, flush_every=100)
+    recorder.pending.append('last')
+    persister.mark_dirty()
+    assert recorder.written == []
+    persister.close()
+    assert recorder.written == [['last']]
+    assert persister.get_stats()['pending'] == 0
+
+
+def test_failed_write_keeps_changes_dirty():
+    def fail(batch):
+        raise OSError('disk full')
+
+    persister = WriteBehindPersister(lambda: None, fail, flush_interval=60, flush_every=100)
+    persister.mark_dirty(2)
+    assert not quiet(persister.flush)
+    assert persister.dirty
+    assert persister.get_stats()['flush_errors'] == 1
+    persister._write = lambda batch: None
+    persister.close()
+    assert not persister.dirty